@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+顧客CSV一括取り込み用に customers.phone_normalized とユニークインデックスを追加するスクリプト
+
+ユニークインデックスは手動の顧客登録・更新にも効く。同じ店舗で既に使われている電話番号は
+登録・更新できなくなり、画面には「この電話番号はすでに登録されています。」と表示される
+（customer_db.DuplicatePhoneError）。
+"""
+
+from database.connection import get_connection
+from database.customer_import_db import PHONE_NORMALIZED_SQL
+
+def add_customer_phone_normalized():
+    """customersに正規化済み電話番号の生成列と (store_id, phone_normalized) のユニークインデックスを追加"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # 正規化の規則は PHONE_NORMALIZED_SQL（全角数字→半角、数字以外を除去、+81→0）
+        cursor.execute(f"""
+            ALTER TABLE customers
+            ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR(20)
+            GENERATED ALWAYS AS ({PHONE_NORMALIZED_SQL}) STORED
+        """)
+
+        # 既存データに重複があるとユニークインデックスを作れないため先に確認
+        cursor.execute("""
+            SELECT store_id, phone_normalized, array_agg(customer_id ORDER BY customer_id)
+            FROM customers
+            WHERE phone_normalized IS NOT NULL
+            GROUP BY store_id, phone_normalized
+            HAVING COUNT(*) > 1
+            ORDER BY store_id, phone_normalized
+        """)
+        duplicates = cursor.fetchall()
+        if duplicates:
+            print(f"❌ 電話番号が重複している顧客が {len(duplicates)} 組あります。統合してから再実行してください")
+            for store_id, phone, customer_ids in duplicates:
+                print(f"  店舗ID={store_id} 電話番号={phone} 顧客ID={customer_ids}")
+            conn.rollback()
+            return
+
+        # import_customers_csv の ON CONFLICT (store_id, phone_normalized) で使用
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_customers_store_phone_normalized
+            ON customers(store_id, phone_normalized)
+        """)
+
+        conn.commit()
+        print("✅ customers.phone_normalized とユニークインデックスの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    add_customer_phone_normalized()
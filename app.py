@@ -7,11 +7,21 @@ if sys.platform == 'win32':
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
 from flask import Flask, request
+from utils.app_logging import setup_logging, init_request_logging
+from utils.metrics import init_request_metrics
+from utils.json_provider import init_json_provider
+
+# ログ出力（JSON・非同期）を最初に設定
+setup_logging()
+
 from routes.main import main_routes
 from datetime import datetime, timedelta
 import json
 
 app = Flask(__name__)
+init_json_provider(app)
+init_request_logging(app)
+init_request_metrics(app)
 app.secret_key = "your_secret_key_here"
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 app.config['JSON_AS_ASCII'] = False
@@ -42,6 +52,15 @@ def parse_json_filter(value):
     except (json.JSONDecodeError, TypeError):
         return []
 
+# アップロード画像の縮小版（variant）のURL（配信ルートは routes/main.py）・画像かどうかの判定
+from utils.image_pipeline import image_variant_url, is_image_path
+app.jinja_env.globals['image_variant_url'] = image_variant_url
+app.jinja_env.globals['is_image_path'] = is_image_path
+
+# 静的ファイルのハッシュ付き配信・APIレスポンスの圧縮
+from utils.static_assets import init_static_assets
+init_static_assets(app)
+
 @app.route('/<store>/test', methods=['GET'])
 def test_route(store):
     return f"Test route working for store: {store}"
@@ -87,6 +106,10 @@ app.register_blueprint(reservation_bp)
 from routes.staff_shift import staff_shift_bp
 app.register_blueprint(staff_shift_bp)
 
+# LINE Webhook Blueprint
+from routes.line_webhook import line_webhook_bp
+app.register_blueprint(line_webhook_bp)
+
 
 # ===== Twilio音声通話エンドポイント =====
 @app.route('/twilio/voice', methods=['GET', 'POST'])
@@ -114,6 +137,40 @@ def twilio_voice():
     return str(response), 200, {'Content-Type': 'text/xml'}
 
 
+@app.route('/twilio/status', methods=['POST'])
+def twilio_status():
+    """
+    Twilioのステータスコールバック用エンドポイント
+    通話結果（completed / no-answer / busy / failed）をキューに入れてすぐに応答する
+    （call_attempts への書き込みは utils/call_outcomes の書き込み用スレッドでまとめて行う）
+    キューが満杯で受け付けられなかった場合は 503 を返す
+    """
+    from utils.call_outcomes import enqueue_call_status, is_valid_twilio_request
+    from utils.twilio_call import get_twilio_settings
+    
+    store_id = request.args.get('store_id', type=int)
+    auth_token = get_twilio_settings(store_id).get('twilio_auth_token')
+    if not is_valid_twilio_request(
+        request.query_string.decode('utf-8'),
+        request.form.to_dict(),
+        request.headers.get('X-Twilio-Signature'),
+        auth_token
+    ):
+        return '', 403
+    
+    accepted = enqueue_call_status(
+        call_sid=request.form.get('CallSid'),
+        call_status=request.form.get('CallStatus'),
+        duration_seconds=request.form.get('CallDuration', type=int),
+        record_id=request.args.get('record_id', type=int),
+        store_id=store_id,
+        attempt_no=request.args.get('attempt_no', type=int)
+    )
+    if not accepted:
+        return 'Service Unavailable', 503
+    return '', 204
+
+
 # ===== スケジューラー管理エンドポイント（店舗コード対応） =====
 @app.route('/<store>/admin/scheduler/status', methods=['GET'])
 def scheduler_status(store):
@@ -143,6 +200,22 @@ def scheduler_restart(store):
         return {'success': False, 'error': str(e), 'store': store}, 500
 
 
+@app.route('/<store>/admin/maintenance/status', methods=['GET'])
+def maintenance_status(store):
+    """メンテナンスジョブの実行統計と直近の実行履歴（管理者用）"""
+    from utils.maintenance import get_maintenance_metrics, get_maintenance_history
+
+    try:
+        return {
+            'store': store,
+            'metrics': get_maintenance_metrics(),
+            'history': get_maintenance_history(limit=int(request.args.get('limit', 50))),
+            'timestamp': datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'store': store}, 500
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("ピックアップシステム起動中...")
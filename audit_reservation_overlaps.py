@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+既存予約の重複（同じキャストで時間が重なっている予約）を一括で検出するスクリプト
+
+使い方:
+    python audit_reservation_overlaps.py 2025-10-01 2025-10-31
+    python audit_reservation_overlaps.py 2025-10-01 2025-10-31 --store nagano
+"""
+import argparse
+
+from database.connection import get_store_id
+from database.reservation_db import audit_reservation_overlaps
+
+def main():
+    parser = argparse.ArgumentParser(description='予約の重複を検出します')
+    parser.add_argument('date_from', help='開始営業日（YYYY-MM-DD）')
+    parser.add_argument('date_to', help='終了営業日（YYYY-MM-DD）')
+    parser.add_argument('--store', help='店舗コード（省略時は全店舗）')
+    args = parser.parse_args()
+
+    store_id = get_store_id(args.store) if args.store else None
+    overlaps = audit_reservation_overlaps(store_id, args.date_from, args.date_to)
+
+    if not overlaps:
+        print("✅ 重複している予約はありません")
+        return
+
+    print(f"⚠️ 重複している予約: {len(overlaps)}件")
+    for overlap in overlaps:
+        print(
+            f"  店舗{overlap['store_id']} {overlap['business_date']} "
+            f"{overlap['cast_name']}(ID:{overlap['cast_id']}) "
+            f"予約ID {overlap['reservation_id']} ⇔ {overlap['conflicting_reservation_id']}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+store_id のないホテル・エリアに店舗を割り当てるスクリプト
+
+ホテル管理画面・ホテル/エリアのAPI・予約画面のホテル選択は店舗（store_id）で絞り込むため、
+以前の register_hotel / register_area で登録した store_id のない行は表示されなくなる。
+各行を次の順で決めた店舗に割り当てる。
+    ホテル: そのホテルの予約が最も多い店舗 → エリアの店舗 → DEFAULT_STORE_ID
+    エリア: そのエリアのホテルが最も多い店舗 → そのエリアの予約が最も多い店舗 → DEFAULT_STORE_ID
+割り当てた店舗以外の予約でも使われているホテルは最後に一覧を出力するので、必要なら店舗ごとに登録し直すこと。
+"""
+
+from database.connection import get_connection
+
+# 予約などから店舗を決められない行の割り当て先（長野店）
+DEFAULT_STORE_ID = 1
+
+
+def backfill_hotel_area_store_id():
+    """hotels / areas の store_id を埋める"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # ホテル: 予約の多い店舗
+        cursor.execute("""
+            UPDATE hotels h
+            SET store_id = top_store.store_id
+            FROM (
+                SELECT DISTINCT ON (hotel_id) hotel_id, store_id
+                FROM reservations
+                WHERE hotel_id IS NOT NULL AND store_id IS NOT NULL
+                GROUP BY hotel_id, store_id
+                ORDER BY hotel_id, COUNT(*) DESC, store_id
+            ) top_store
+            WHERE h.hotel_id = top_store.hotel_id AND h.store_id IS NULL
+        """)
+        print(f"  hotels: 予約から {cursor.rowcount} 件")
+
+        # エリア: ホテルの多い店舗 → 予約の多い店舗
+        cursor.execute("""
+            UPDATE areas a
+            SET store_id = top_store.store_id
+            FROM (
+                SELECT DISTINCT ON (area_id) area_id, store_id
+                FROM hotels
+                WHERE area_id IS NOT NULL AND store_id IS NOT NULL
+                GROUP BY area_id, store_id
+                ORDER BY area_id, COUNT(*) DESC, store_id
+            ) top_store
+            WHERE a.area_id = top_store.area_id AND a.store_id IS NULL
+        """)
+        print(f"  areas: ホテルから {cursor.rowcount} 件")
+
+        cursor.execute("""
+            UPDATE areas a
+            SET store_id = top_store.store_id
+            FROM (
+                SELECT DISTINCT ON (area_id) area_id, store_id
+                FROM reservations
+                WHERE area_id IS NOT NULL AND store_id IS NOT NULL
+                GROUP BY area_id, store_id
+                ORDER BY area_id, COUNT(*) DESC, store_id
+            ) top_store
+            WHERE a.area_id = top_store.area_id AND a.store_id IS NULL
+        """)
+        print(f"  areas: 予約から {cursor.rowcount} 件")
+
+        # ホテル: エリアの店舗
+        cursor.execute("""
+            UPDATE hotels h
+            SET store_id = a.store_id
+            FROM areas a
+            WHERE h.area_id = a.area_id AND h.store_id IS NULL AND a.store_id IS NOT NULL
+        """)
+        print(f"  hotels: エリアから {cursor.rowcount} 件")
+
+        # 残りは DEFAULT_STORE_ID
+        for table in ('areas', 'hotels'):
+            cursor.execute(f"UPDATE {table} SET store_id = %s WHERE store_id IS NULL", (DEFAULT_STORE_ID,))
+            print(f"  {table}: store_id={DEFAULT_STORE_ID} に {cursor.rowcount} 件")
+
+        # 確認: 割り当て漏れと、割り当てた店舗以外の予約でも使われている行
+        for table in ('areas', 'hotels'):
+            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE store_id IS NULL")
+            remaining = cursor.fetchone()[0]
+            if remaining:
+                print(f"❌ {table} に store_id のない行が {remaining} 件残っています")
+                conn.rollback()
+                return
+
+        cursor.execute("""
+            SELECT h.hotel_id, h.name, h.store_id, array_agg(DISTINCT r.store_id ORDER BY r.store_id)
+            FROM hotels h
+            JOIN reservations r ON r.hotel_id = h.hotel_id
+            WHERE r.store_id IS NOT NULL AND r.store_id <> h.store_id
+            GROUP BY h.hotel_id, h.name, h.store_id
+            ORDER BY h.hotel_id
+        """)
+        shared = cursor.fetchall()
+        if shared:
+            print(f"⚠️ 他の店舗の予約でも使われているホテルが {len(shared)} 件あります（割り当てた店舗以外の画面には表示されません）")
+            for hotel_id, name, store_id, other_store_ids in shared:
+                print(f"  ホテルID={hotel_id} {name}: store_id={store_id} 他店舗={other_store_ids}")
+
+        conn.commit()
+        print("✅ ホテル・エリアの store_id の割り当てが完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    backfill_hotel_area_store_id()
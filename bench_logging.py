@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+ログ出力のオーバーヘッド計測スクリプト
+
+送迎登録1件のリクエストで、リクエスト処理スレッドがログ出力に使う時間を比較する。
+
+    before      : 以前の print() 25行（同期書き込み）
+    after(sync) : logging + JsonFormatter で2行（登録ログ + アクセスログ、同期書き込み）
+    after(async): utils/app_logging.setup_logging で2行（QueueHandler → QueueListener）
+
+出力先は2種類で計測する。
+    file: 一時ファイル（書き込みが速い場合）
+    slow: 1回の書き込みに SLOW_WRITE_SECONDS かかる出力先（端末・詰まったパイプの代わり）
+
+使い方: python bench_logging.py [リクエスト数]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from utils.app_logging import JsonFormatter, setup_logging, stop_logging
+
+BEFORE_LINES_PER_REQUEST = 25
+AFTER_LINES_PER_REQUEST = 2
+
+# slow 出力先の1回の書き込み時間（秒）
+SLOW_WRITE_SECONDS = 0.0002
+
+
+class SlowStream:
+    """書き込みのたびに待つ出力先"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        time.sleep(SLOW_WRITE_SECONDS)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _emit_print(request_no):
+    for line_no in range(BEFORE_LINES_PER_REQUEST):
+        print(f"DEBUG: register_pickup_record request={request_no} line={line_no} cast_id=12 hotel_id=34")
+
+
+def _emit_logging(logger, request_no):
+    logger.info("送迎記録登録", extra={'type': 'pickup', 'record_ids': [request_no]})
+    logger.info("POST /nagano/pickup_register 302", extra={'status': 302, 'duration_ms': 12.3})
+
+
+def _measure(requests, emit):
+    durations = []
+    for request_no in range(requests):
+        started = time.perf_counter()
+        emit(request_no)
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return {
+        'mean_us': sum(durations) / len(durations) * 1_000_000,
+        'p99_us': durations[max(int(len(durations) * 0.99) - 1, 0)] * 1_000_000
+    }
+
+
+def _run_sink(requests, open_stream):
+    results = {}
+
+    stream = open_stream('before')
+    original_stdout = sys.stdout
+    sys.stdout = stream
+    try:
+        results['before'] = _measure(requests, _emit_print)
+    finally:
+        sys.stdout = original_stdout
+
+    stream = open_stream('sync')
+    logger = logging.getLogger('bench.sync')
+    logger.propagate = False
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    results['after(sync)'] = _measure(requests, lambda n: _emit_logging(logger, n))
+    logger.removeHandler(handler)
+
+    stream = open_stream('async')
+    setup_logging(level='INFO', stream=stream)
+    logger = logging.getLogger('bench.async')
+    results['after(async)'] = _measure(requests, lambda n: _emit_logging(logger, n))
+    stop_logging()
+
+    return results
+
+
+def run_benchmark(requests=2000):
+    """出力先ごとの計測結果 {出力先: {方式: {'mean_us', 'p99_us'}}}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+
+        def open_file(name):
+            f = open(os.path.join(tmp, f'{name}.log'), 'w', encoding='utf-8', buffering=1)
+            files.append(f)
+            return f
+
+        try:
+            results['file'] = _run_sink(requests, open_file)
+            results['slow'] = _run_sink(requests, lambda name: SlowStream(open_file(f'slow_{name}')))
+        finally:
+            for f in files:
+                f.close()
+    return results
+
+
+if __name__ == '__main__':
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    results = run_benchmark(request_count)
+    print(f"リクエスト数: {request_count}")
+    for sink, sink_results in results.items():
+        print(f"[{sink}]")
+        for name, result in sink_results.items():
+            print(f"  {name:13s}: 平均 {result['mean_us']:8.1f}µs / p99 {result['p99_us']:8.1f}µs")
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+外部API送信のスループット計測スクリプト（ローカルの模擬 LINE / Twilio サーバーを使用）
+
+    before: 送信ごとに接続を作る（以前の requests.post / 送信ごとの twilio Client）
+    after : utils/http_clients の共通クライアント（keep-alive・タイムアウト・サーキットブレーカー）
+
+模擬サーバーは HTTP（TLSなし）のため、本番で省ける TLS ハンドシェイクの時間は含まれない。
+Twilio の計測は twilio パッケージがインストールされている場合のみ行う。
+
+使い方: python bench_outbound_http.py [送信数]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """LINE push と Twilio の発信APIに成功を返す模擬サーバー"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if self.path.endswith('/Calls.json'):
+            status, body = 201, {'sid': 'CA' + '0' * 32, 'status': 'queued'}
+        else:
+            status, body = 200, {}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _measure(count, send):
+    started = time.perf_counter()
+    for i in range(count):
+        send(i)
+    elapsed = time.perf_counter() - started
+    return {'per_second': count / elapsed, 'mean_ms': elapsed / count * 1000}
+
+
+def run_benchmark(count=500):
+    """方式ごとの計測結果 {名前: {'per_second', 'mean_ms'}}"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    # utils.http_clients は読み込み時に環境変数を読むため、先に設定する
+    os.environ['LINE_API_BASE_URL'] = base_url
+    os.environ['TWILIO_API_BASE_URL'] = base_url
+    from utils.http_clients import call_twilio, get_twilio_client, line_post
+
+    payload = {'to': 'U' + '0' * 32, 'messages': [{'type': 'text', 'text': 'ベンチマーク'}]}
+    results = {}
+    try:
+        results['line before'] = _measure(count, lambda i: requests.post(
+            base_url + '/v2/bot/message/push',
+            headers={'Authorization': 'Bearer token'},
+            json=payload
+        ))
+        results['line after'] = _measure(count, lambda i: line_post(1, 'token', '/v2/bot/message/push', payload))
+
+        try:
+            from twilio.rest import Client
+        except ImportError:
+            print("twilio がインストールされていないため Twilio の計測をスキップします")
+        else:
+            def twilio_before(i):
+                client = Client('AC' + '0' * 32, 'token')
+                client.api.base_url = base_url
+                client.calls.create(to='+819000000000', from_='+815000000000', url=base_url + '/twiml')
+
+            def twilio_after(i):
+                client = get_twilio_client(1, 'AC' + '0' * 32, 'token')
+                call_twilio(lambda: client.calls.create(
+                    to='+819000000000', from_='+815000000000', url=base_url + '/twiml'
+                ))
+
+            results['twilio before'] = _measure(count, twilio_before)
+            results['twilio after'] = _measure(count, twilio_after)
+    finally:
+        server.shutdown()
+    return results
+
+
+if __name__ == '__main__':
+    send_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    results = run_benchmark(send_count)
+    print(f"送信数: {send_count}")
+    for name, result in results.items():
+        print(f"  {name:14s}: {result['per_second']:8.1f} 件/秒 / 平均 {result['mean_ms']:6.2f}ms")
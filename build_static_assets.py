@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+静的ファイル（JS / CSS）のビルドスクリプト
+
+デプロイ時（アプリ起動前）に実行する。static/ 以下の JS / CSS を縮小し、
+内容のハッシュ付きの名前で static/dist/ に出力する（.gz / .br も作成）。
+起動時に static/dist/manifest.json を読み込み、url_for('static', ...) がハッシュ付きの名前を返す。
+
+縮小には rjsmin / rcssmin、brotli 圧縮には brotli パッケージを使う（未インストールの場合は省略）。
+"""
+
+from utils.static_assets import build_static_assets, DIST_DIR
+
+if __name__ == '__main__':
+    try:
+        manifest = build_static_assets('static')
+        print(f"✅ {len(manifest)}件の静的ファイルを static/{DIST_DIR}/ に出力しました")
+    except Exception as e:
+        print(f"❌ エラー: {e}")
@@ -14,4 +14,12 @@ DATABASE_CONFIG = {
 }
 
 # 通知設定
-DEFAULT_NOTIFICATION_MINUTES = 10
\ No newline at end of file
+DEFAULT_NOTIFICATION_MINUTES = 10
+
+# キャストマイページのセッション検証方式
+# 'db': cast_sessions を参照（プロセス内キャッシュあり）
+# 'token': 署名付きトークンで検証（複数プロセス構成向け、リクエストごとのDB参照なし）
+CAST_SESSION_MODE = os.getenv('CAST_SESSION_MODE', 'db')
+
+# 署名付きトークンの有効期限（秒）。セッション有効期限（24時間）に合わせる
+CAST_SESSION_TOKEN_MAX_AGE = 24 * 60 * 60
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+空き枠インデックスのバージョン管理テーブル（availability_versions）を作成するスクリプト
+
+予約・出勤の書き込み時に営業日ごとのバージョンを上げ、各ワーカーはキャッシュした
+空き枠インデックスのバージョンと比べて他ワーカーの書き込みを検出する（database/availability_db.py）。
+作成後はアプリを再起動すること（テーブルの有無はプロセスごとに初回のみ確認する）。
+"""
+
+from database.connection import get_connection
+
+def create_availability_versions_table():
+    """availability_versions テーブルを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS availability_versions (
+                store_id INTEGER NOT NULL,
+                business_date DATE NOT NULL,
+                version BIGINT NOT NULL DEFAULT 1,
+                PRIMARY KEY (store_id, business_date)
+            )
+        """)
+        print("  availability_versions: 作成")
+
+        conn.commit()
+        print("✅ 空き枠インデックスのバージョン管理テーブルの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_availability_versions_table()
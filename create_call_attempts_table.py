@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""オートコールの発信結果テーブル（call_attempts）を作成するスクリプト"""
+
+from database.connection import get_connection
+
+def create_call_attempts_table():
+    """call_attempts テーブルを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS call_attempts (
+                attempt_id BIGSERIAL PRIMARY KEY,
+                call_sid VARCHAR(64) NOT NULL UNIQUE,
+                record_id INTEGER,
+                store_id INTEGER,
+                attempt_no SMALLINT NOT NULL DEFAULT 1,
+                status VARCHAR(20) NOT NULL,
+                duration_seconds INTEGER,
+                completed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                redialed BOOLEAN NOT NULL DEFAULT FALSE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_call_attempts_record
+            ON call_attempts (record_id, attempt_no DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_call_attempts_redial
+            ON call_attempts (completed_at)
+            WHERE redialed = FALSE AND status IN ('no-answer', 'busy', 'failed')
+        """)
+        print("  call_attempts: 作成")
+
+        conn.commit()
+        print("✅ オートコール発信結果テーブルの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_call_attempts_table()
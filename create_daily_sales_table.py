@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""日次売上集計テーブル（daily_sales）と営業日締め記録テーブル（business_day_closes）を作成するスクリプト"""
+
+from database.connection import get_connection
+
+def create_daily_sales_table():
+    """daily_sales / business_day_closes テーブルを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # 店舗・営業日・キャスト・支払方法ごとの集計（金銭記録と予約）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_sales (
+                store_id INTEGER NOT NULL,
+                business_date DATE NOT NULL,
+                cast_id INTEGER NOT NULL,
+                payment_method VARCHAR(50) NOT NULL DEFAULT '',
+                money_record_count INTEGER NOT NULL DEFAULT 0,
+                received_total BIGINT NOT NULL DEFAULT 0,
+                change_total BIGINT NOT NULL DEFAULT 0,
+                reservation_count INTEGER NOT NULL DEFAULT 0,
+                cancelled_count INTEGER NOT NULL DEFAULT 0,
+                reservation_sales BIGINT NOT NULL DEFAULT 0,
+                cast_payout BIGINT NOT NULL DEFAULT 0,
+                closed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (store_id, business_date, cast_id, payment_method)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_daily_sales_business_date
+            ON daily_sales (business_date, store_id)
+        """)
+        print("  daily_sales: 作成")
+
+        # 締め済みの営業日（金銭記録の削除はここにある営業日だけを対象にする）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS business_day_closes (
+                business_date DATE PRIMARY KEY,
+                money_record_count INTEGER NOT NULL DEFAULT 0,
+                reservation_count INTEGER NOT NULL DEFAULT 0,
+                closed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        print("  business_day_closes: 作成")
+
+        conn.commit()
+        print("✅ 日次売上集計テーブルの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_daily_sales_table()
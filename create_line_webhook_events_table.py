@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""LINE Webhook イベントの処理済み記録テーブル（line_webhook_events）を作成するスクリプト"""
+
+from database.connection import get_connection
+
+def create_line_webhook_events_table():
+    """line_webhook_events テーブルを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS line_webhook_events (
+                webhook_event_id VARCHAR(64) PRIMARY KEY,
+                event_type VARCHAR(50),
+                received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                processed_at TIMESTAMP,
+                status VARCHAR(20) NOT NULL,
+                error TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_line_webhook_events_received_at
+            ON line_webhook_events (received_at)
+        """)
+        print("  line_webhook_events: 作成")
+
+        conn.commit()
+        print("✅ LINE Webhook イベントテーブルの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_line_webhook_events_table()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""メンテナンスジョブの実行履歴テーブル（maintenance_runs）を作成するスクリプト"""
+
+from database.connection import get_connection
+
+def create_maintenance_tables():
+    """maintenance_runs テーブルを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                run_id BIGSERIAL PRIMARY KEY,
+                job_id VARCHAR(100) NOT NULL,
+                started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP,
+                duration_ms INTEGER,
+                status VARCHAR(20) NOT NULL,
+                result TEXT,
+                error TEXT,
+                host VARCHAR(255),
+                pid INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_maintenance_runs_job
+            ON maintenance_runs (job_id, run_id DESC)
+        """)
+        print("  maintenance_runs: 作成")
+
+        conn.commit()
+        print("✅ メンテナンス実行履歴テーブルの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_maintenance_tables()
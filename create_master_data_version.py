@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""予約登録画面マスタデータのバージョン管理テーブルとトリガーを作成するスクリプト"""
+
+from database.connection import get_connection
+from database.reservation_bootstrap_db import MASTER_DATA_TABLES
+
+def create_master_data_version():
+    """master_data_version テーブルと、マスタテーブル変更時にバージョンを上げるトリガーを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS master_data_version (
+                id INTEGER PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 1,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO master_data_version (id, version) VALUES (1, 1)
+            ON CONFLICT (id) DO NOTHING
+        """)
+
+        cursor.execute("""
+            CREATE OR REPLACE FUNCTION bump_master_data_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE master_data_version
+                SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+
+        for table in MASTER_DATA_TABLES:
+            cursor.execute("SELECT to_regclass(%s)", (table,))
+            if cursor.fetchone()[0] is None:
+                print(f"⚠️ テーブル {table} が存在しないためスキップします")
+                continue
+
+            trigger_name = f"trg_{table}_master_data_version"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name} ON {table}")
+            # 行単位ではなく文単位にして、一括更新でもバージョン更新は1回にする
+            cursor.execute(f"""
+                CREATE TRIGGER {trigger_name}
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_master_data_version()
+            """)
+            print(f"  {table}: トリガー作成")
+
+        conn.commit()
+        print("✅ マスタデータバージョン管理の作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_master_data_version()
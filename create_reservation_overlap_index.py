@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""予約重複チェック用のインデックスを作成するスクリプト"""
+
+from database.connection import get_connection
+
+def create_reservation_overlap_index():
+    """reservationsにキャスト×時間帯のGiSTインデックスを作成"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # cast_id（整数）と tsrange を同じGiSTインデックスに載せるため
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+        # find_conflicting_reservations の && 検索で使用
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reservations_cast_period
+            ON reservations USING gist (cast_id, tsrange(reservation_datetime, end_datetime, '[)'))
+            WHERE cast_id IS NOT NULL AND end_datetime IS NOT NULL
+        """)
+
+        # 重複監査（営業日範囲のスキャン）で使用
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reservations_business_date_cast
+            ON reservations(business_date, cast_id)
+        """)
+
+        conn.commit()
+        print("✅ 予約重複チェック用インデックスの作成が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    create_reservation_overlap_index()
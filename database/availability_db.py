@@ -0,0 +1,613 @@
+# -*- coding: utf-8 -*-
+"""
+空き枠検索（キャスト空き状況）用のデータベース操作関数
+
+営業日ごとに「出勤枠・予約区間（往復の移動時間込み）・NG設定」を
+ソート済み区間インデックスとしてメモリ上に保持する。
+インデックスは初回検索時に構築し、予約・出勤の書き込み時にその場で更新する。
+
+他プロセス（他のワーカー）の書き込みは availability_versions テーブルの
+営業日ごとのバージョン番号で検出する（create_availability_versions_table.py で作成）。
+書き込み側が同じトランザクション内で bump_day_version() でバージョンを上げ、
+検索側はキャッシュしたインデックスのバージョンが DB と違えば再構築する。
+"""
+import threading
+import time as _time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, date, time, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+from database.connection import get_connection
+
+# 空き枠計算の対象外とする予約ステータス
+EXCLUDED_RESERVATION_STATUSES = ('キャンセル', 'cancelled', 'deleted')
+
+# バージョンを上げない書き込み（SQLの直接実行など）を取りこぼした場合の保険（秒）
+DAY_INDEX_TTL_SECONDS = 300
+
+# 保持するインデックスの上限（店舗×営業日の数。使われていないものから破棄）
+DAY_INDEX_MAX_ENTRIES = 12
+
+_day_index_cache: 'OrderedDict[Tuple[int, str], DayIntervalIndex]' = OrderedDict()
+_day_index_lock = threading.Lock()
+
+# availability_versions テーブルがあるか（初回のみ確認。作成後はアプリの再起動が必要）
+_versions_table_exists: Optional[bool] = None
+
+
+def occupied_interval(start: datetime, end: datetime, travel_minutes: int) -> Tuple[datetime, datetime]:
+    """
+    予約が実際にキャストを拘束する区間（往路・復路の移動時間を含む）を返す
+
+    ガントチャートの往路／復路バーと同じ考え方で、
+    開始前と終了後にそれぞれ移動時間を確保する。
+    """
+    buffer = timedelta(minutes=travel_minutes or 0)
+    return start - buffer, end + buffer
+
+
+class DayIntervalIndex:
+    """
+    1店舗・1営業日分の空き枠インデックス
+
+    キャストごとに予約区間を開始時刻でソートし、
+    「その位置までの終了時刻の最大値」を併せて持つことで、
+    区間の重なり判定を二分探索 O(log n) で行う。
+    """
+
+    def __init__(self, store_id: int, business_date: str,
+                 shifts: Dict[int, Dict[str, Any]],
+                 busy: Dict[int, List[Tuple[datetime, datetime, int]]],
+                 ng_items: Dict[int, Dict[str, set]],
+                 version: Optional[int] = None):
+        self.store_id = store_id
+        self.business_date = business_date
+        self.shifts = shifts
+        self.ng_items = ng_items
+        self.version = version
+        self.built_at = _time.monotonic()
+
+        # キャストID → (開始時刻のリスト, その位置までの終了時刻の最大値のリスト, 区間のリスト)
+        # 書き込み時の更新中も検索側が矛盾した組を読まないよう、タプルごと差し替える
+        self._casts: Dict[int, Tuple[List[datetime], List[datetime], List[Tuple[datetime, datetime, int]]]] = {}
+
+        for cast_id, intervals in busy.items():
+            self._set_intervals(cast_id, sorted(intervals, key=lambda x: x[0]))
+
+    def _set_intervals(self, cast_id: int, intervals: List[Tuple[datetime, datetime, int]]) -> None:
+        """開始時刻順の区間からキャストの検索用リストを作り直す"""
+        if not intervals:
+            self._casts.pop(cast_id, None)
+            return
+
+        starts = []
+        max_ends = []
+        current_max = None
+        for start, end, _reservation_id in intervals:
+            current_max = end if current_max is None or end > current_max else current_max
+            starts.append(start)
+            max_ends.append(current_max)
+        self._casts[cast_id] = (starts, max_ends, intervals)
+
+    def is_expired(self) -> bool:
+        return _time.monotonic() - self.built_at > DAY_INDEX_TTL_SECONDS
+
+    def remove_reservation(self, reservation_id: int) -> None:
+        """予約区間を取り除く（キャンセル・削除・日付やキャストの変更時）"""
+        for cast_id, (_, _, intervals) in list(self._casts.items()):
+            if any(interval[2] == reservation_id for interval in intervals):
+                self._set_intervals(cast_id, [interval for interval in intervals if interval[2] != reservation_id])
+
+    def put_reservation(self, reservation_id: int, cast_id: int,
+                        occupied_start: datetime, occupied_end: datetime) -> None:
+        """予約区間（移動時間込み）を追加する（既にあれば置き換える）"""
+        self.remove_reservation(reservation_id)
+        intervals = list(self._casts.get(cast_id, ((), (), []))[2])
+        insort(intervals, (occupied_start, occupied_end, reservation_id))
+        self._set_intervals(cast_id, intervals)
+
+    def set_shift(self, cast_id: int, shift: Optional[Dict[str, Any]]) -> None:
+        """出勤枠を差し替える（None の場合は出勤なし）"""
+        # 検索側が shifts を走査中でも壊れないよう、辞書ごと差し替える
+        shifts = dict(self.shifts)
+        if shift is None:
+            shifts.pop(cast_id, None)
+        else:
+            shifts[cast_id] = shift
+        self.shifts = shifts
+
+    def _blocking_end(self, cast_id: int, start: datetime, end: datetime) -> Optional[datetime]:
+        """
+        [start, end) と重なる予約区間があれば、それらの終了時刻の最大値を返す
+        重ならなければNone
+        """
+        entry = self._casts.get(cast_id)
+        if not entry:
+            return None
+        starts, max_ends, _ = entry
+
+        # 開始時刻が end より前の区間だけが重なり得る
+        idx = bisect_left(starts, end)
+        if idx == 0:
+            return None
+
+        max_end = max_ends[idx - 1]
+        return max_end if max_end > start else None
+
+    def is_ng(self, cast_id: int, hotel_id: Optional[int] = None,
+              course_id: Optional[int] = None, area_id: Optional[int] = None) -> bool:
+        """キャストが指定のホテル・コース・エリアをNGにしているか"""
+        ng = self.ng_items.get(cast_id)
+        if not ng:
+            return False
+        return (
+            (hotel_id is not None and hotel_id in ng['hotels'])
+            or (course_id is not None and course_id in ng['courses'])
+            or (area_id is not None and area_id in ng['areas'])
+        )
+
+    def earliest_start(self, cast_id: int, desired_start: datetime, duration_minutes: int,
+                       travel_minutes: int = 0,
+                       latest_start: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        desired_start 以降で、出勤枠に収まり他の予約と重ならない最も早い開始時刻を返す
+
+        Args:
+            cast_id: キャストID
+            desired_start: 希望開始日時
+            duration_minutes: コース時間（分）
+            travel_minutes: 今回の予約先への移動時間（分）
+            latest_start: これより後の開始は探索しない（Noneの場合は出勤終了まで）
+
+        Returns:
+            datetime: 開始可能な日時、見つからない場合はNone
+        """
+        shift = self.shifts.get(cast_id)
+        if not shift:
+            return None
+
+        duration = timedelta(minutes=duration_minutes)
+        candidate = max(desired_start, shift['start'])
+
+        while True:
+            if candidate + duration > shift['end']:
+                return None
+            if latest_start is not None and candidate > latest_start:
+                return None
+
+            occupied_start, occupied_end = occupied_interval(candidate, candidate + duration, travel_minutes)
+            blocking_end = self._blocking_end(cast_id, occupied_start, occupied_end)
+            if blocking_end is None:
+                return candidate
+
+            # 重なった予約群がすべて終わって移動できる時刻まで一気に進める
+            candidate = blocking_end + timedelta(minutes=travel_minutes or 0)
+
+    def conflicting_reservations(self, cast_id: int, start: datetime, end: datetime) -> List[int]:
+        """[start, end) と重なる予約IDの一覧を返す"""
+        entry = self._casts.get(cast_id)
+        if not entry:
+            return []
+        starts, _, intervals = entry
+
+        idx = bisect_left(starts, end)
+        return [
+            reservation_id
+            for interval_start, interval_end, reservation_id in intervals[:idx]
+            if interval_end > start
+        ]
+
+
+def _to_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_desired_start(target_date: str, start_value: str) -> datetime:
+    """
+    希望開始時刻を日時に変換
+
+    'HH:MM' 形式（タイムスケジュールと同じく24時以降は '25:00' のように指定）
+    または 'YYYY-MM-DD HH:MM' 形式を受け付ける。
+    """
+    start_value = start_value.strip()
+    if ' ' in start_value:
+        return datetime.strptime(start_value, '%Y-%m-%d %H:%M')
+
+    hour_str, minute_str = start_value.split(':')
+    base = datetime.combine(_to_date(target_date), datetime.min.time())
+    return base + timedelta(hours=int(hour_str), minutes=int(minute_str))
+
+
+def shift_interval(work_date, start_time, end_time) -> Tuple[datetime, datetime]:
+    """出勤枠の開始・終了日時（日跨ぎの出勤は終了を翌日扱い）"""
+    if isinstance(start_time, str):
+        start_time = time.fromisoformat(start_time)
+    if isinstance(end_time, str):
+        end_time = time.fromisoformat(end_time)
+    work_date = _to_date(work_date)
+    shift_start = datetime.combine(work_date, start_time)
+    shift_end = datetime.combine(work_date, end_time)
+    if shift_end <= shift_start:
+        shift_end += timedelta(days=1)
+    return shift_start, shift_end
+
+
+def _fetch_value(cursor):
+    """1行1列の結果を返す（タプル行・dict_row のどちらのカーソルでも使えるように）"""
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+def _has_versions_table(cursor) -> bool:
+    global _versions_table_exists
+    if _versions_table_exists is None:
+        cursor.execute("SELECT to_regclass('availability_versions')")
+        _versions_table_exists = _fetch_value(cursor) is not None
+    return _versions_table_exists
+
+
+def bump_day_version(cursor, store_id: int, business_date) -> Optional[int]:
+    """
+    営業日のバージョンを上げる（予約・出勤の書き込みと同じトランザクション内で呼び出す）
+
+    コミットまで行ロックを持つため、同じ営業日への他の書き込みとは直列になる。
+
+    Returns:
+        int: 上げた後のバージョン（テーブル未作成の場合は None）
+    """
+    if not _has_versions_table(cursor):
+        return None
+    cursor.execute("""
+        INSERT INTO availability_versions (store_id, business_date, version)
+        VALUES (%s, %s, 1)
+        ON CONFLICT (store_id, business_date)
+        DO UPDATE SET version = availability_versions.version + 1
+        RETURNING version
+    """, (store_id, str(business_date)))
+    return _fetch_value(cursor)
+
+
+def get_day_version(cursor, store_id: int, business_date) -> Optional[int]:
+    """営業日のバージョン（書き込みがまだ無い営業日は 0、テーブル未作成の場合は None）"""
+    if not _has_versions_table(cursor):
+        return None
+    cursor.execute(
+        "SELECT version FROM availability_versions WHERE store_id = %s AND business_date = %s",
+        (store_id, str(business_date))
+    )
+    version = _fetch_value(cursor)
+    return version if version is not None else 0
+
+
+def get_day_version_totals(cursor, date_from, date_to) -> Optional[Dict[date, int]]:
+    """
+    営業日ごとのバージョン（全店舗の合計）。予約の書き込みがあると値が増える
+
+    Returns:
+        dict: 営業日 → バージョン合計（書き込みの無い営業日は含まない、テーブル未作成の場合は None）
+    """
+    if not _has_versions_table(cursor):
+        return None
+    cursor.execute("""
+        SELECT business_date, SUM(version) AS version_total
+        FROM availability_versions
+        WHERE business_date BETWEEN %s AND %s
+        GROUP BY business_date
+    """, (str(date_from), str(date_to)))
+    totals = {}
+    for row in cursor.fetchall():
+        business_date, version_total = (row['business_date'], row['version_total']) if isinstance(row, dict) else row
+        totals[business_date] = int(version_total)
+    return totals
+
+
+def build_day_index(store_id: int, business_date: str, version: Optional[int] = None) -> DayIntervalIndex:
+    """
+    1営業日分の空き枠インデックスをDBから構築（クエリ3本）
+
+    version には構築前に読んだバージョンを渡す（構築中の書き込みは次回の検索で再構築される）
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # 1. 出勤キャスト（日跨ぎの出勤は終了を翌日扱い）
+        cursor.execute(
+            """
+            SELECT
+                c.cast_id,
+                c.name,
+                cs.work_date,
+                cs.start_time,
+                cs.end_time
+            FROM cast_schedules cs
+            JOIN casts c ON c.cast_id = cs.cast_id
+            WHERE c.store_id = %s
+                AND c.is_active = TRUE
+                AND cs.work_date = %s
+                AND cs.status = 'confirmed'
+                AND cs.start_time IS NOT NULL
+                AND cs.end_time IS NOT NULL
+            """,
+            (store_id, business_date)
+        )
+
+        shifts = {}
+        for cast_id, cast_name, work_date, start_time, end_time in cursor.fetchall():
+            shift_start, shift_end = shift_interval(work_date, start_time, end_time)
+            shifts[cast_id] = {
+                'cast_name': cast_name,
+                'start': shift_start,
+                'end': shift_end
+            }
+
+        # 2. 予約区間（ホテルのエリア、なければ予約のエリアの移動時間）
+        cursor.execute(
+            """
+            SELECT
+                r.reservation_id,
+                r.cast_id,
+                r.reservation_datetime,
+                r.end_datetime,
+                r.course_time_minutes,
+                r.extension_minutes,
+                COALESCE(ha.travel_time_minutes, ra.travel_time_minutes, 0)
+            FROM reservations r
+            LEFT JOIN hotels h ON r.hotel_id = h.hotel_id
+            LEFT JOIN areas ha ON h.area_id = ha.area_id
+            LEFT JOIN areas ra ON r.area_id = ra.area_id
+            WHERE r.store_id = %s
+                AND r.business_date = %s
+                AND r.cast_id IS NOT NULL
+                AND r.status <> ALL(%s)
+            """,
+            (store_id, business_date, list(EXCLUDED_RESERVATION_STATUSES))
+        )
+
+        busy = {}
+        for reservation_id, cast_id, start, end, course_minutes, extension_minutes, travel in cursor.fetchall():
+            if start is None:
+                continue
+            if end is None:
+                end = start + timedelta(minutes=(course_minutes or 0) + (extension_minutes or 0))
+            occupied_start, occupied_end = occupied_interval(start, end, travel)
+            busy.setdefault(cast_id, []).append((occupied_start, occupied_end, reservation_id))
+
+        # 3. NG設定（ホテル・コース・エリア）
+        cursor.execute(
+            """
+            SELECT cast_id, 'hotels', hotel_id FROM cast_ng_hotels WHERE store_id = %s
+            UNION ALL
+            SELECT cast_id, 'courses', course_id FROM cast_ng_courses WHERE store_id = %s
+            UNION ALL
+            SELECT cast_id, 'areas', area_id FROM cast_ng_areas WHERE store_id = %s
+            """,
+            (store_id, store_id, store_id)
+        )
+
+        ng_items = {}
+        for cast_id, ng_type, item_id in cursor.fetchall():
+            ng = ng_items.setdefault(cast_id, {'hotels': set(), 'courses': set(), 'areas': set()})
+            ng[ng_type].add(item_id)
+
+        return DayIntervalIndex(store_id, business_date, shifts, busy, ng_items, version)
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_day_index(store_id: int, business_date, db=None) -> DayIntervalIndex:
+    """
+    キャッシュ済みのインデックスを返す（なければ・古ければ構築）
+
+    Args:
+        db: get_connection() の接続。渡した場合は営業日のバージョンを確認し、
+            他プロセスの書き込みがあれば再構築する（None の場合は DAY_INDEX_TTL_SECONDS まで使う）
+    """
+    key = (store_id, str(business_date))
+
+    version = None
+    if db is not None:
+        cursor = db.cursor()
+        try:
+            version = get_day_version(cursor, store_id, key[1])
+        finally:
+            cursor.close()
+
+    with _day_index_lock:
+        index = _day_index_cache.get(key)
+        if index is not None:
+            _day_index_cache.move_to_end(key)
+    if index is not None and not index.is_expired() and (db is None or index.version == version):
+        return index
+
+    index = build_day_index(store_id, key[1], version)
+    with _day_index_lock:
+        _day_index_cache[key] = index
+        _day_index_cache.move_to_end(key)
+        while len(_day_index_cache) > DAY_INDEX_MAX_ENTRIES:
+            _day_index_cache.popitem(last=False)
+    return index
+
+
+def _update_cached_index(store_id: int, business_date, version: Optional[int], apply) -> None:
+    """
+    書き込み後（コミット後）にキャッシュ済みのインデックスをその場で更新する
+
+    version は書き込みと同じトランザクションで bump_day_version() が返した値。
+    インデックスのバージョンの次でなければ、間に他プロセスの書き込みがあったため破棄する。
+    """
+    key = (store_id, str(business_date))
+    with _day_index_lock:
+        index = _day_index_cache.get(key)
+        if index is None:
+            return
+        if version is not None and (index.version is None or version != index.version + 1):
+            del _day_index_cache[key]
+            return
+        apply(index)
+        index.version = version
+
+
+def put_reservation_in_day_index(store_id: int, business_date, version: Optional[int],
+                                 reservation_id: int, cast_id: Optional[int], status: Optional[str],
+                                 start: Optional[datetime], end: Optional[datetime],
+                                 travel_minutes: int = 0) -> None:
+    """予約の登録・更新をインデックスに反映（空き枠の対象外の予約は取り除く）"""
+    if not cast_id or start is None or status in EXCLUDED_RESERVATION_STATUSES:
+        remove_reservation_from_day_index(store_id, business_date, version, reservation_id)
+        return
+
+    occupied_start, occupied_end = occupied_interval(start, end or start, travel_minutes)
+    _update_cached_index(
+        store_id, business_date, version,
+        lambda index: index.put_reservation(reservation_id, cast_id, occupied_start, occupied_end)
+    )
+
+
+def remove_reservation_from_day_index(store_id: int, business_date, version: Optional[int],
+                                      reservation_id: int) -> None:
+    """予約のキャンセル・削除・営業日の変更をインデックスに反映"""
+    _update_cached_index(
+        store_id, business_date, version,
+        lambda index: index.remove_reservation(reservation_id)
+    )
+
+
+def set_shift_in_day_index(store_id: int, work_date, version: Optional[int],
+                           cast_id: int, shift: Optional[Dict[str, Any]]) -> None:
+    """
+    出勤の登録・変更・削除をインデックスに反映
+
+    Args:
+        shift: {'cast_name', 'start', 'end'}（出勤しない場合は None）
+    """
+    _update_cached_index(
+        store_id, work_date, version,
+        lambda index: index.set_shift(cast_id, shift)
+    )
+
+
+def invalidate_day_index(store_id: Optional[int], business_date=None) -> None:
+    """
+    インデックスを破棄する（その場で更新できない一括の書き込み後などに呼び出す）
+
+    Args:
+        store_id: 店舗ID（Noneの場合は全店舗）
+        business_date: 営業日（Noneの場合は全日付）
+    """
+    with _day_index_lock:
+        if store_id is not None and business_date is not None:
+            _day_index_cache.pop((store_id, str(business_date)), None)
+            return
+        for key in list(_day_index_cache.keys()):
+            if store_id is not None and key[0] != store_id:
+                continue
+            if business_date is not None and key[1] != str(business_date):
+                continue
+            del _day_index_cache[key]
+
+
+def get_travel_minutes(db, hotel_id: Optional[int] = None, area_id: Optional[int] = None) -> Tuple[int, Optional[int]]:
+    """
+    予約先の移動時間（分）とエリアIDを取得
+
+    Returns:
+        tuple: (移動時間, エリアID)
+    """
+    cursor = db.cursor()
+    try:
+        if hotel_id:
+            cursor.execute(
+                """
+                SELECT a.travel_time_minutes, h.area_id
+                FROM hotels h
+                LEFT JOIN areas a ON h.area_id = a.area_id
+                WHERE h.hotel_id = %s
+                """,
+                (hotel_id,)
+            )
+            row = cursor.fetchone()
+            if row:
+                return row[0] or 0, row[1]
+
+        if area_id:
+            cursor.execute("SELECT travel_time_minutes FROM areas WHERE area_id = %s", (area_id,))
+            row = cursor.fetchone()
+            if row:
+                return row[0] or 0, area_id
+
+        return 0, area_id
+    finally:
+        cursor.close()
+
+
+def find_available_casts(
+    store_id: int,
+    business_date: str,
+    desired_start: datetime,
+    duration_minutes: int,
+    travel_minutes: int = 0,
+    hotel_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+    area_id: Optional[int] = None,
+    max_delay_minutes: Optional[int] = None,
+    db=None
+) -> List[Dict[str, Any]]:
+    """
+    希望時刻に案内可能なキャストを、開始可能時刻の早い順に返す
+
+    Args:
+        store_id: 店舗ID
+        business_date: 営業日（YYYY-MM-DD形式）
+        desired_start: 希望開始日時
+        duration_minutes: コース時間（延長込み、分）
+        travel_minutes: 予約先への移動時間（分）
+        hotel_id / course_id / area_id: NG判定に使用
+        max_delay_minutes: 希望時刻から何分後までの開始を許容するか（Noneは出勤終了まで）
+        db: get_connection() の接続（インデックスのバージョン確認に使う）
+
+    Returns:
+        list: [{'cast_id', 'cast_name', 'start_datetime', 'end_datetime', 'delay_minutes', ...}, ...]
+    """
+    index = get_day_index(store_id, business_date, db)
+
+    latest_start = None
+    if max_delay_minutes is not None:
+        latest_start = desired_start + timedelta(minutes=max_delay_minutes)
+
+    results = []
+    for cast_id, shift in index.shifts.items():
+        if index.is_ng(cast_id, hotel_id=hotel_id, course_id=course_id, area_id=area_id):
+            continue
+
+        start = index.earliest_start(
+            cast_id, desired_start, duration_minutes,
+            travel_minutes=travel_minutes, latest_start=latest_start
+        )
+        if start is None:
+            continue
+
+        end = start + timedelta(minutes=duration_minutes)
+        results.append({
+            'cast_id': cast_id,
+            'cast_name': shift['cast_name'],
+            'start_datetime': start.strftime('%Y-%m-%d %H:%M'),
+            'end_datetime': end.strftime('%Y-%m-%d %H:%M'),
+            'delay_minutes': max(0, int((start - desired_start).total_seconds() // 60)),
+            'shift_start': shift['start'].strftime('%H:%M'),
+            'shift_end': shift['end'].strftime('%H:%M'),
+            '_sort_key': (start, shift['start'], shift['cast_name'] or '')
+        })
+
+    results.sort(key=lambda x: x['_sort_key'])
+    for item in results:
+        del item['_sort_key']
+
+    return results
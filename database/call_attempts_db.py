@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+オートコールの発信結果（call_attempts）
+
+Twilio のステータスコールバックで届いた通話結果（completed / no-answer / busy / failed など）を
+発信1回につき1行記録する。テーブルは create_call_attempts_table.py で作成。
+"""
+
+# 再発信の対象にする通話結果
+REDIAL_STATUSES = ('no-answer', 'busy', 'failed')
+
+# 通話結果 → ダッシュボードの表示状態
+CALL_STATUS_DISPLAY = {
+    'completed': 'answered',
+    'no-answer': 'no_answer',
+    'busy': 'no_answer',
+    'failed': 'failed',
+    'canceled': 'failed'
+}
+
+
+def insert_call_attempts(cursor, attempts):
+    """
+    通話結果をまとめて記録（同じ call_sid の結果は上書き）
+
+    Args:
+        cursor: カーソル（トランザクションは呼び出し側で管理）
+        attempts: [{'call_sid', 'record_id', 'store_id', 'attempt_no', 'status', 'duration_seconds'}, ...]
+    """
+    cursor.executemany("""
+        INSERT INTO call_attempts (
+            call_sid, record_id, store_id, attempt_no, status, duration_seconds, completed_at
+        )
+        VALUES (
+            %(call_sid)s, %(record_id)s, %(store_id)s, %(attempt_no)s,
+            %(status)s, %(duration_seconds)s, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT (call_sid) DO UPDATE SET
+            status = EXCLUDED.status,
+            duration_seconds = EXCLUDED.duration_seconds,
+            completed_at = EXCLUDED.completed_at
+    """, attempts)
+
+
+def claim_due_redials(conn, now, max_attempts, delay_minutes):
+    """
+    再発信する通話を確保（再発信済みフラグを先に立ててコミット）
+
+    応答がなかった発信のうち、最大回数に達しておらず、最後の発信から delay_minutes 分以上経ち、
+    退室時刻を過ぎていない送迎記録のものを FOR UPDATE SKIP LOCKED で確保する。
+
+    Returns:
+        list: 再発信する発信（次の attempt_no を含む）
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE call_attempts ca
+        SET redialed = TRUE
+        FROM (
+            SELECT
+                ca2.attempt_id,
+                pr.record_id,
+                pr.exit_time,
+                c.store_id,
+                c.name AS cast_name,
+                c.phone_number AS cast_phone
+            FROM call_attempts ca2
+            JOIN pickup_records pr ON pr.record_id = ca2.record_id
+            JOIN casts c ON pr.cast_id = c.cast_id
+            WHERE
+                ca2.status = ANY(%(statuses)s)
+                AND ca2.redialed = FALSE
+                AND ca2.attempt_no < %(max_attempts)s
+                AND ca2.completed_at <= %(now)s - %(delay)s * INTERVAL '1 minute'
+                AND pr.exit_time > %(now)s
+                AND COALESCE(pr.cast_auto_call_disabled, FALSE) = FALSE
+                AND c.auto_call_enabled = TRUE
+                AND c.phone_number IS NOT NULL
+                AND NOT EXISTS (
+                    SELECT 1 FROM call_attempts newer
+                    WHERE newer.record_id = ca2.record_id AND newer.attempt_no > ca2.attempt_no
+                )
+            FOR UPDATE OF ca2 SKIP LOCKED
+        ) due
+        WHERE ca.attempt_id = due.attempt_id
+        RETURNING due.record_id, due.exit_time, due.store_id, due.cast_name, due.cast_phone,
+                  ca.attempt_no + 1 AS attempt_no
+    """, {
+        'statuses': list(REDIAL_STATUSES),
+        'max_attempts': max_attempts,
+        'delay': delay_minutes,
+        'now': now
+    })
+    attempts = cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    return attempts
+
+
+def get_latest_call_outcomes(db, record_ids):
+    """
+    送迎記録ごとの最新の通話結果
+
+    Returns:
+        dict: record_id → {'status', 'attempt_no', 'duration_seconds'}
+    """
+    if not record_ids:
+        return {}
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT DISTINCT ON (record_id) record_id, status, attempt_no, duration_seconds
+        FROM call_attempts
+        WHERE record_id = ANY(%s)
+        ORDER BY record_id, attempt_no DESC, attempt_id DESC
+    """, (list(record_ids),))
+    return {row['record_id']: row for row in cursor.fetchall()}
+
+
+def cleanup_old_call_attempts(db, days=30):
+    """
+    古い通話結果を削除
+
+    Returns:
+        int: 削除件数
+    """
+    cursor = db.cursor()
+    cursor.execute("""
+        DELETE FROM call_attempts
+        WHERE completed_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'
+    """, (days,))
+    return cursor.rowcount
@@ -9,6 +9,7 @@ if sys.platform == 'win32':
 from database.connection import get_db
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 import json
 from datetime import datetime
 import hashlib
@@ -26,7 +27,7 @@ def get_db_connection(store_code):
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
     )
-    return conn
+    return instrument_connection(conn, 'cast_db')
 
 # ==== 基本キャスト関数 ====
 def get_all_casts(db, store_id):
@@ -45,14 +46,11 @@ def register_cast(db, name, phone_number):
     """新しいキャストをデータベースに登録する関数（修正版：cast_idを返す）"""
     try:
         cursor = db.cursor()
-        cursor.execute("SELECT COALESCE(MAX(cast_id), 0) + 1 as next_id FROM casts")
-        result = cursor.fetchone()
-        new_cast_id = result['next_id']
-        
         cursor.execute(
-            "INSERT INTO casts (cast_id, name, phone_number) VALUES (%s, %s, %s)",
-            (new_cast_id, name, phone_number)
+            "INSERT INTO casts (name, phone_number) VALUES (%s, %s) RETURNING cast_id",
+            (name, phone_number)
         )
+        new_cast_id = cursor.fetchone()['cast_id']
         db.commit()
         print(f"✅ キャスト登録成功: {name} (ID: {new_cast_id})")
         return new_cast_id  # 🆕 cast_idを返す
@@ -169,10 +167,6 @@ def register_cast_extended(db, cast_data):
     try:
         cursor = db.cursor()
         
-        cursor.execute("SELECT COALESCE(MAX(cast_id), 0) + 1 as next_id FROM casts")
-        result = cursor.fetchone()
-        new_cast_id = result['next_id']
-        
         # 平文パスワードとハッシュの両方を保存
         password_plain = cast_data.get('password', '')
         password_hash = None
@@ -185,18 +179,18 @@ def register_cast_extended(db, cast_data):
         
         cursor.execute("""
             INSERT INTO casts (
-                cast_id, name, phone_number, email, birth_date, address,
+                name, phone_number, email, birth_date, address,
                 join_date, status, recruitment_source, transportation_fee,
                 available_course_categories, work_type, comments, login_id, 
                 password_hash, password_plain,
                 profile_image_path, id_document_paths, contract_document_paths,
                 store_id, is_active, created_at, updated_at
             ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
                 CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
             )
+            RETURNING cast_id
         """, (
-            new_cast_id,
             cast_data['name'],
             cast_data.get('phone_number'),
             cast_data.get('email'),
@@ -218,6 +212,7 @@ def register_cast_extended(db, cast_data):
             cast_data.get('store_id', 1),
             True
         ))
+        new_cast_id = cursor.fetchone()['cast_id']
         
         db.commit()
         print(f"拡張キャスト登録成功: {cast_data['name']} (ID: {new_cast_id})")
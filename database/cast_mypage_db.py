@@ -5,6 +5,8 @@
 from datetime import datetime
 import uuid
 
+from database.cast_session_token import revoke_cast_sessions
+
 
 def get_cast_notices(db, store_id=1, limit=20):
     """
@@ -460,6 +462,7 @@ def delete_cast_session(db, session_id, store_id):
             WHERE session_id = %s AND store_id = %s
         """, (session_id, store_id))
         db.commit()
+        revoke_cast_sessions([session_id])
         print(f"セッション無効化成功: session_id {session_id}")
         return True
     except Exception as e:
@@ -486,12 +489,13 @@ def cleanup_expired_sessions(db, store_id, hours=24):
             UPDATE cast_sessions
             SET is_active = FALSE
             WHERE store_id = %s
-            AND last_activity < (CURRENT_TIMESTAMP - INTERVAL '%s hours')
+            AND last_activity < (CURRENT_TIMESTAMP - %s * INTERVAL '1 hour')
             AND is_active = TRUE
             RETURNING session_id
         """, (store_id, hours))
         deleted = cursor.fetchall()
         db.commit()
+        revoke_cast_sessions([row['session_id'] for row in deleted])
         print(f"期限切れセッション削除: {len(deleted)}件 (store_id: {store_id})")
         return len(deleted)
     except Exception as e:
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+キャストマイページのセッション検証キャッシュ
+
+login_required はページ・APIのたびに cast_sessions を読み、last_activity を書き込んでいた。
+セッション情報はプロセス内に短時間（SESSION_CACHE_TTL_SECONDS）キャッシュし、
+last_activity は溜めておいてバックグラウンドスレッドがまとめて書き込む。
+
+ログアウトしたセッションは invalidate_cast_session で即時にキャッシュから外す。
+別プロセスでログアウトした場合も、TTL経過後には無効として扱われる。
+"""
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from database.connection import get_db
+from database.cast_mypage_db import get_cast_session
+
+# セッション情報をキャッシュする秒数
+SESSION_CACHE_TTL_SECONDS = 30
+
+# last_activity をまとめて書き込む間隔（秒）
+ACTIVITY_FLUSH_INTERVAL_SECONDS = 60
+
+# キャッシュするセッション数の上限（超えたら古いものから破棄）
+SESSION_CACHE_MAX_ENTRIES = 10000
+
+# (session_id, store_id) → (キャッシュした時刻, セッション情報 or None)
+# キャッシュした時刻の古い順に並ぶ（追加時に末尾へ移動）
+_session_cache = OrderedDict()
+_session_cache_lock = threading.Lock()
+
+# (session_id, store_id) → 最終アクティビティ時刻（未書き込み分）
+_pending_activity = {}
+_pending_activity_lock = threading.Lock()
+
+_flusher_thread = None
+_flusher_lock = threading.Lock()
+
+
+def get_cached_cast_session(session_id, store_id):
+    """
+    セッション情報を取得（TTL内はDBに問い合わせない）
+
+    Returns:
+        dict: セッション情報（cast_id, is_active など）。無効・存在しない場合は None
+    """
+    key = (session_id, store_id)
+    now = time.monotonic()
+
+    with _session_cache_lock:
+        cached = _session_cache.get(key)
+    if cached and now - cached[0] < SESSION_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    db = get_db()
+    try:
+        cast_session = get_cast_session(db, session_id, store_id)
+    finally:
+        db.close()
+
+    cast_session = dict(cast_session) if cast_session else None
+    with _session_cache_lock:
+        _session_cache[key] = (now, cast_session)
+        _session_cache.move_to_end(key)
+        _prune_session_cache(now)
+    return cast_session
+
+
+def _prune_session_cache(now):
+    """期限切れのキャッシュと上限を超えた分を古い順に破棄（_session_cache_lock 内で呼ぶ）"""
+    while _session_cache:
+        key, (cached_at, _) = next(iter(_session_cache.items()))
+        if now - cached_at < SESSION_CACHE_TTL_SECONDS and len(_session_cache) <= SESSION_CACHE_MAX_ENTRIES:
+            break
+        del _session_cache[key]
+
+
+def invalidate_cast_session(session_id, store_id):
+    """セッションのキャッシュを破棄（ログアウト時）"""
+    with _session_cache_lock:
+        _session_cache.pop((session_id, store_id), None)
+    with _pending_activity_lock:
+        _pending_activity.pop((session_id, store_id), None)
+
+
+def touch_cast_session(session_id, store_id):
+    """最終アクティビティを記録（DBへの書き込みはバックグラウンドでまとめて行う）"""
+    with _pending_activity_lock:
+        _pending_activity[(session_id, store_id)] = datetime.now()
+    _ensure_flusher()
+
+
+def flush_cast_session_activity():
+    """
+    溜まっている last_activity を1回のUPDATEで書き込む
+
+    Returns:
+        int: 書き込んだセッション数
+    """
+    with _pending_activity_lock:
+        if not _pending_activity:
+            return 0
+        pending = dict(_pending_activity)
+        _pending_activity.clear()
+
+    session_ids = [key[0] for key in pending]
+    store_ids = [key[1] for key in pending]
+    activities = list(pending.values())
+
+    db = get_db()
+    if db is None:
+        return 0
+    try:
+        cursor = db.cursor()
+        cursor.execute("""
+            UPDATE cast_sessions s
+            SET last_activity = v.last_activity
+            FROM unnest(%s::text[], %s::int[], %s::timestamp[]) AS v(session_id, store_id, last_activity)
+            WHERE s.session_id::text = v.session_id
+            AND s.store_id = v.store_id
+            AND (s.last_activity IS NULL OR s.last_activity < v.last_activity)
+        """, (session_ids, store_ids, activities))
+        db.commit()
+        return len(pending)
+    except Exception as e:
+        print(f"セッション最終アクティビティ書き込みエラー: {e}")
+        db.rollback()
+        # 次回の書き込みで再試行（新しい記録があればそちらを優先）
+        with _pending_activity_lock:
+            for key, activity in pending.items():
+                _pending_activity.setdefault(key, activity)
+        return 0
+    finally:
+        db.close()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(ACTIVITY_FLUSH_INTERVAL_SECONDS)
+        flush_cast_session_activity()
+
+
+def _ensure_flusher():
+    """書き込みスレッドを起動（プロセスごとに1回）"""
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(
+                target=_flush_loop, name='cast-session-activity', daemon=True
+            )
+            _flusher_thread.start()
+            # 終了時に未書き込み分を書き込む
+            atexit.register(flush_cast_session_activity)
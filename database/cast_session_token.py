@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+キャストマイページの署名付きセッショントークン（CAST_SESSION_MODE = 'token' の場合に使用）
+
+ログイン時に cast_sessions の session_id・cast_id・store_id を署名付き・有効期限付きの
+トークンにして Flask セッションに入れる。リクエストごとの検証は署名と有効期限の確認だけで、
+DBは参照しない。
+
+ログアウト・期限切れで無効化されたセッションはプロセス内の失効リストで弾く。
+失効リストは delete_cast_session / cleanup_expired_sessions の実行時に追加され、
+他プロセスでの無効化はバックグラウンドスレッドが REVOCATION_REFRESH_SECONDS ごとに
+cast_sessions から読み直して反映する（読み込みに失敗した場合は間隔を延ばして再試行）。
+"""
+import threading
+import time
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from config import CAST_SESSION_TOKEN_MAX_AGE
+from database.connection import get_db
+
+TOKEN_SALT = 'cast-mypage-session'
+
+# 失効リストを cast_sessions から読み直す間隔（秒）
+REVOCATION_REFRESH_SECONDS = 30
+
+# 読み込みに失敗した場合の再試行間隔の上限（秒）
+REVOCATION_RETRY_MAX_SECONDS = 300
+
+_revoked_session_ids = set()
+_revoked_lock = threading.Lock()
+
+_initial_load_done = False
+_initial_load_lock = threading.Lock()
+
+_refresher_thread = None
+_refresher_lock = threading.Lock()
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt=TOKEN_SALT)
+
+
+def issue_cast_session_token(session_id, cast_id, store_id):
+    """セッショントークンを発行"""
+    return _serializer().dumps({'sid': session_id, 'cid': cast_id, 'st': store_id})
+
+
+def verify_cast_session_token(token, store_id):
+    """
+    セッショントークンを検証
+
+    Returns:
+        dict: セッション情報（session_id, cast_id, is_active）。無効な場合は None
+    """
+    try:
+        payload = _serializer().loads(token, max_age=CAST_SESSION_TOKEN_MAX_AGE)
+    except (SignatureExpired, BadSignature):
+        return None
+
+    if payload.get('st') != store_id:
+        return None
+    if is_cast_session_revoked(payload.get('sid')):
+        return None
+
+    return {
+        'session_id': payload['sid'],
+        'cast_id': payload['cid'],
+        'is_active': True
+    }
+
+
+def revoke_cast_sessions(session_ids):
+    """セッションを失効リストに追加（このプロセスには即時反映）"""
+    with _revoked_lock:
+        _revoked_session_ids.update(str(session_id) for session_id in session_ids)
+
+
+def is_cast_session_revoked(session_id):
+    """失効済みセッションかどうか（失効リストの読み直しはバックグラウンドで行う）"""
+    if not _initial_load_done:
+        _load_revoked_sessions_once()
+    _ensure_refresher()
+    with _revoked_lock:
+        return str(session_id) in _revoked_session_ids
+
+
+def _load_revoked_sessions_once():
+    """
+    プロセス起動後の最初の読み込み（同時に来たリクエストは1回の読み込みを待つ）
+
+    失敗した場合もリクエストごとには再試行せず、バックグラウンドスレッドに任せる。
+    """
+    global _initial_load_done
+    with _initial_load_lock:
+        if _initial_load_done:
+            return
+        refresh_revoked_sessions()
+        _initial_load_done = True
+
+
+def refresh_revoked_sessions():
+    """
+    失効リストを cast_sessions から読み直す
+
+    トークンの有効期限内にログインしたセッションのうち無効化されたものだけを読むため、
+    リストの大きさはトークン有効期間内のログアウト数程度に収まる。
+
+    Returns:
+        bool: 読み込めた場合 True
+    """
+    db = get_db()
+    if db is None:
+        return False
+    try:
+        cursor = db.cursor()
+        cursor.execute("""
+            SELECT session_id
+            FROM cast_sessions
+            WHERE is_active = FALSE
+            AND login_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+        """, (CAST_SESSION_TOKEN_MAX_AGE,))
+        revoked = {str(row['session_id']) for row in cursor.fetchall()}
+
+        with _revoked_lock:
+            _revoked_session_ids.clear()
+            _revoked_session_ids.update(revoked)
+        return True
+    except Exception as e:
+        print(f"セッション失効リスト読み込みエラー: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def _refresh_loop():
+    delay = REVOCATION_REFRESH_SECONDS
+    while True:
+        time.sleep(delay)
+        if refresh_revoked_sessions():
+            delay = REVOCATION_REFRESH_SECONDS
+        else:
+            delay = min(delay * 2, REVOCATION_RETRY_MAX_SECONDS)
+
+
+def _ensure_refresher():
+    """失効リストの読み直しスレッドを起動（プロセスごとに1回）"""
+    global _refresher_thread
+    if _refresher_thread is not None:
+        return
+    with _refresher_lock:
+        if _refresher_thread is None:
+            _refresher_thread = threading.Thread(
+                target=_refresh_loop, name='cast-session-revocation', daemon=True
+            )
+            _refresher_thread.start()
@@ -1,9 +1,12 @@
+import logging
+
 import psycopg
 from psycopg.rows import dict_row
 from flask import g
 
 # PostgreSQL接続設定を読み込み
 from config import DATABASE_CONFIG
+from utils.metrics import instrument_connection
 
 DB_PATHS = {
     "nagano": {"display_name": "Diary長野"},
@@ -11,6 +14,8 @@ DB_PATHS = {
     "globalwork": {"display_name": "グローバルワーク"},
 }
 
+logger = logging.getLogger(__name__)
+
 class PostgreSQLConnectionWrapper:
     """
     PostgreSQL接続をSQLiteライクに使用するためのラッパークラス
@@ -25,15 +30,14 @@ class PostgreSQLConnectionWrapper:
         try:
             if 'rowid' in query.lower():
                 query = query.replace('rowid', 'id').replace('ROWID', 'id')
-                print(f"SQLite互換性: rowidをidに置き換えました")
+                logger.debug("SQLite互換性: rowidをidに置き換えました")
             
             cursor = self.conn.cursor(row_factory=dict_row)
             cursor.execute(query, params)
             return cursor
         except Exception as e:
-            print(f"SQL実行エラー: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
+            logger.error("SQL実行エラー: %s", e, extra={'query': query})
+            logger.debug("SQL実行エラー時のパラメータ: %r", params)
             try:
                 self.conn.rollback()
             except:
@@ -71,9 +75,9 @@ def get_db(store=None):
             password=DATABASE_CONFIG['password']
         )
         
-        return PostgreSQLConnectionWrapper(conn)
+        return PostgreSQLConnectionWrapper(instrument_connection(conn, 'get_db'))
     except psycopg.Error as e:
-        print(f"PostgreSQL接続エラー: {e}")
+        logger.error("PostgreSQL接続エラー: %s", e)
         return None
 
 def get_connection():
@@ -89,9 +93,9 @@ def get_connection():
             user=DATABASE_CONFIG['user'],
             password=DATABASE_CONFIG['password']
         )
-        return conn
+        return instrument_connection(conn, 'get_connection')
     except psycopg.Error as e:
-        print(f"PostgreSQL接続エラー: {e}")
+        logger.error("PostgreSQL接続エラー: %s", e)
         raise
 
 def close_connection(exception):
@@ -7,8 +7,10 @@ if sys.platform == 'win32':
     os.environ['PYTHONUTF8'] = '1'
 
 from database.connection import get_db
+from database.ordering_db import move_item
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from dotenv import load_dotenv
 
 # 環境変数を読み込む
@@ -23,7 +25,7 @@ def get_db_connection(store_code):
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
     )
-    return conn
+    return instrument_connection(conn, 'course_db')
 
 # ==========================
 # コース管理関数
@@ -164,37 +166,7 @@ def delete_course(course_id):
 def move_course_up(course_id):
     """コースの並び順を上に移動"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order, store_id FROM courses WHERE course_id = %s", (course_id,))
-        current_course = cursor.fetchone()
-        if not current_course:
-            return False
-        
-        current_order = current_course['sort_order']
-        store_id = current_course['store_id']
-        
-        cursor.execute("""
-            SELECT course_id, sort_order FROM courses 
-            WHERE sort_order < %s AND store_id = %s 
-            ORDER BY sort_order DESC LIMIT 1
-        """, (current_order, store_id))
-        upper_course = cursor.fetchone()
-        
-        if upper_course:
-            upper_course_id = upper_course['course_id']
-            upper_order = upper_course['sort_order']
-            
-            cursor.execute("UPDATE courses SET sort_order = %s WHERE course_id = %s", (upper_order, course_id))
-            cursor.execute("UPDATE courses SET sort_order = %s WHERE course_id = %s", (current_order, upper_course_id))
-            db.commit()
-            print(f"コース並び順上移動成功: course_id {course_id}")
-            return True
-        return False
+        return move_item('courses', None, course_id, 'up')
     except Exception as e:
         print(f"コース並び順上移動エラー: {e}")
         import traceback
@@ -204,43 +176,14 @@ def move_course_up(course_id):
 def move_course_down(course_id):
     """コースの並び順を下に移動"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order, store_id FROM courses WHERE course_id = %s", (course_id,))
-        current_course = cursor.fetchone()
-        if not current_course:
-            return False
-        
-        current_order = current_course['sort_order']
-        store_id = current_course['store_id']
-        
-        cursor.execute("""
-            SELECT course_id, sort_order FROM courses 
-            WHERE sort_order > %s AND store_id = %s 
-            ORDER BY sort_order ASC LIMIT 1
-        """, (current_order, store_id))
-        lower_course = cursor.fetchone()
-        
-        if lower_course:
-            lower_course_id = lower_course['course_id']
-            lower_order = lower_course['sort_order']
-            
-            cursor.execute("UPDATE courses SET sort_order = %s WHERE course_id = %s", (lower_order, course_id))
-            cursor.execute("UPDATE courses SET sort_order = %s WHERE course_id = %s", (current_order, lower_course_id))
-            db.commit()
-            print(f"コース並び順下移動成功: course_id {course_id}")
-            return True
-        return False
+        return move_item('courses', None, course_id, 'down')
     except Exception as e:
         print(f"コース並び順下移動エラー: {e}")
         import traceback
         traceback.print_exc()
         return False
 
+
 # ==========================
 # コースカテゴリ管理関数
 # ==========================
@@ -341,37 +284,7 @@ def delete_course_category(category_id):
 def move_course_category_up(category_id):
     """コースカテゴリの並び順を上に移動"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order, store_id FROM course_categories WHERE category_id = %s", (category_id,))
-        current_category = cursor.fetchone()
-        if not current_category:
-            return False
-        
-        current_order = current_category['sort_order']
-        store_id = current_category['store_id']
-        
-        cursor.execute("""
-            SELECT category_id, sort_order FROM course_categories 
-            WHERE sort_order < %s AND store_id = %s 
-            ORDER BY sort_order DESC LIMIT 1
-        """, (current_order, store_id))
-        upper_category = cursor.fetchone()
-        
-        if upper_category:
-            upper_category_id = upper_category['category_id']
-            upper_order = upper_category['sort_order']
-            
-            cursor.execute("UPDATE course_categories SET sort_order = %s WHERE category_id = %s", (upper_order, category_id))
-            cursor.execute("UPDATE course_categories SET sort_order = %s WHERE category_id = %s", (current_order, upper_category_id))
-            db.commit()
-            print(f"コースカテゴリ並び順上移動成功: category_id {category_id}")
-            return True
-        return False
+        return move_item('course_categories', None, category_id, 'up')
     except Exception as e:
         print(f"コースカテゴリ並び順上移動エラー: {e}")
         return False
@@ -379,37 +292,7 @@ def move_course_category_up(category_id):
 def move_course_category_down(category_id):
     """コースカテゴリの並び順を下に移動"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order, store_id FROM course_categories WHERE category_id = %s", (category_id,))
-        current_category = cursor.fetchone()
-        if not current_category:
-            return False
-        
-        current_order = current_category['sort_order']
-        store_id = current_category['store_id']
-        
-        cursor.execute("""
-            SELECT category_id, sort_order FROM course_categories 
-            WHERE sort_order > %s AND store_id = %s 
-            ORDER BY sort_order ASC LIMIT 1
-        """, (current_order, store_id))
-        lower_category = cursor.fetchone()
-        
-        if lower_category:
-            lower_category_id = lower_category['category_id']
-            lower_order = lower_category['sort_order']
-            
-            cursor.execute("UPDATE course_categories SET sort_order = %s WHERE category_id = %s", (lower_order, category_id))
-            cursor.execute("UPDATE course_categories SET sort_order = %s WHERE category_id = %s", (current_order, lower_category_id))
-            db.commit()
-            print(f"コースカテゴリ並び順下移動成功: category_id {category_id}")
-            return True
-        return False
+        return move_item('course_categories', None, category_id, 'down')
     except Exception as e:
         print(f"コースカテゴリ並び順下移動エラー: {e}")
         return False
@@ -6,8 +6,10 @@ import sys
 if sys.platform == 'win32':
     os.environ['PYTHONUTF8'] = '1'
 
+import unicodedata
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from datetime import datetime, date
 from werkzeug.security import generate_password_hash
 from dotenv import load_dotenv
@@ -24,7 +26,7 @@ def get_db_connection(store_code):
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
     )
-    return conn
+    return instrument_connection(conn, 'customer_db')
 
 def create_customers_table(store_code):
     """顧客テーブル作成"""
@@ -66,6 +68,36 @@ def create_customers_table(store_code):
     cur.close()
     conn.close()
 
+def to_katakana(text):
+    """ひらがなをカタカナに変換（フリガナ検索・取り込み用）"""
+    if not text:
+        return text
+    return ''.join(
+        chr(ord(c) + 0x60) if '\u3041' <= c <= '\u3096' else c
+        for c in text
+    )
+
+def normalize_furigana(furigana):
+    """フリガナを正規化（半角カナ→全角、ひらがな→カタカナ、前後の空白除去）"""
+    if not furigana:
+        return None
+    furigana = unicodedata.normalize('NFKC', str(furigana)).strip()
+    return to_katakana(furigana) or None
+
+# 同じ店舗で正規化後の電話番号が重複した場合のユニークインデックス（add_customer_phone_normalized.py）
+PHONE_UNIQUE_INDEX = 'uq_customers_store_phone_normalized'
+
+
+class DuplicatePhoneError(Exception):
+    """同じ店舗に同じ電話番号（phone_normalized が一致）の顧客がいる場合に送出"""
+
+    def __init__(self):
+        super().__init__('この電話番号はすでに登録されています。')
+
+
+def _is_duplicate_phone(error):
+    return isinstance(error, psycopg.errors.UniqueViolation) and error.diag.constraint_name == PHONE_UNIQUE_INDEX
+
 def calculate_age(birthday):
     """年齢計算"""
     if not birthday:
@@ -77,7 +109,12 @@ def calculate_age(birthday):
     return age
 
 def add_customer(store_code, customer_data):
-    """顧客を追加する関数"""
+    """
+    顧客を追加する関数
+
+    Raises:
+        DuplicatePhoneError: 同じ店舗に同じ電話番号の顧客がいる場合
+    """
     try:
         # store_idを取得
         from database.connection import get_store_id
@@ -146,6 +183,10 @@ def add_customer(store_code, customer_data):
         return customer_id
 
     except Exception as e:
+        if _is_duplicate_phone(e):
+            conn.rollback()
+            conn.close()
+            raise DuplicatePhoneError() from e
         print(f"Error in add_customer: {e}")
         import traceback
         traceback.print_exc()
@@ -206,89 +247,100 @@ def get_customer_by_id(store_code, customer_id):
     return customer
 
 def update_customer(store_code, customer_id, customer_data):
-    """顧客情報更新"""
+    """
+    顧客情報更新
+
+    Raises:
+        DuplicatePhoneError: 同じ店舗に同じ電話番号の顧客がいる場合
+    """
     conn = get_db_connection(store_code)
     cur = conn.cursor()
-    
+
     # 年齢自動計算
     age = None
     if customer_data.get('birthday'):
         age = calculate_age(customer_data['birthday'])
-    
-    # マイページパスワード更新（入力があった場合のみ）
-    if customer_data.get('mypage_password'):
-        cur.execute('''
-            UPDATE customers SET
-                name = %s, furigana = %s, phone = %s,
-                birthday = %s, age = %s, postal_code = %s,
-                prefecture = %s, city = %s, address_detail = %s,
-                car_info = %s,
-                recruitment_source = %s, mypage_id = %s,
-                mypage_password_hash = %s,
-                current_points = %s, member_type = %s, status = %s,
-                web_member = %s, comment = %s, nickname = %s,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE customer_id = %s
-        ''', (
-            customer_data['name'],
-            customer_data.get('furigana'),
-            customer_data.get('phone'),
-            customer_data.get('birthday'),
-            age,
-            customer_data.get('postal_code'),
-            customer_data.get('prefecture'),
-            customer_data.get('city'),
-            customer_data.get('address_detail'),
-            customer_data.get('car_info'),
-            customer_data.get('recruitment_source'),
-            customer_data.get('mypage_id'),
-            customer_data.get('mypage_password'),
-            customer_data.get('current_points', 0),
-            customer_data.get('member_type', '通常会員'),
-            customer_data.get('status', '普通'),
-            customer_data.get('web_member', 'web会員'),
-            customer_data.get('comment'),
-            customer_data.get('nickname'),
-            customer_id
-        ))
-    else:
-        # パスワード更新なし
-        cur.execute('''
-            UPDATE customers SET
-                name = %s, furigana = %s, phone = %s,
-                birthday = %s, age = %s, postal_code = %s,
-                prefecture = %s, city = %s, address_detail = %s,
-                car_info = %s,
-                recruitment_source = %s, mypage_id = %s,
-                current_points = %s, member_type = %s, status = %s,
-                web_member = %s, comment = %s, nickname = %s,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE customer_id = %s
-        ''', (
-            customer_data['name'],
-            customer_data.get('furigana'),
-            customer_data.get('phone'),
-            customer_data.get('birthday'),
-            age,
-            customer_data.get('postal_code'),
-            customer_data.get('prefecture'),
-            customer_data.get('city'),
-            customer_data.get('address_detail'),
-            customer_data.get('car_info'),
-            customer_data.get('recruitment_source'),
-            customer_data.get('mypage_id'),
-            customer_data.get('current_points', 0),
-            customer_data.get('member_type', '通常会員'),
-            customer_data.get('status', '普通'),
-            customer_data.get('web_member', 'web会員'),
-            customer_data.get('comment'),
-            customer_data.get('nickname'),
-            customer_id
-        ))
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+
+    try:
+        # マイページパスワード更新（入力があった場合のみ）
+        if customer_data.get('mypage_password'):
+            cur.execute('''
+                UPDATE customers SET
+                    name = %s, furigana = %s, phone = %s,
+                    birthday = %s, age = %s, postal_code = %s,
+                    prefecture = %s, city = %s, address_detail = %s,
+                    car_info = %s,
+                    recruitment_source = %s, mypage_id = %s,
+                    mypage_password_hash = %s,
+                    current_points = %s, member_type = %s, status = %s,
+                    web_member = %s, comment = %s, nickname = %s,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE customer_id = %s
+            ''', (
+                customer_data['name'],
+                customer_data.get('furigana'),
+                customer_data.get('phone'),
+                customer_data.get('birthday'),
+                age,
+                customer_data.get('postal_code'),
+                customer_data.get('prefecture'),
+                customer_data.get('city'),
+                customer_data.get('address_detail'),
+                customer_data.get('car_info'),
+                customer_data.get('recruitment_source'),
+                customer_data.get('mypage_id'),
+                customer_data.get('mypage_password'),
+                customer_data.get('current_points', 0),
+                customer_data.get('member_type', '通常会員'),
+                customer_data.get('status', '普通'),
+                customer_data.get('web_member', 'web会員'),
+                customer_data.get('comment'),
+                customer_data.get('nickname'),
+                customer_id
+            ))
+        else:
+            # パスワード更新なし
+            cur.execute('''
+                UPDATE customers SET
+                    name = %s, furigana = %s, phone = %s,
+                    birthday = %s, age = %s, postal_code = %s,
+                    prefecture = %s, city = %s, address_detail = %s,
+                    car_info = %s,
+                    recruitment_source = %s, mypage_id = %s,
+                    current_points = %s, member_type = %s, status = %s,
+                    web_member = %s, comment = %s, nickname = %s,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE customer_id = %s
+            ''', (
+                customer_data['name'],
+                customer_data.get('furigana'),
+                customer_data.get('phone'),
+                customer_data.get('birthday'),
+                age,
+                customer_data.get('postal_code'),
+                customer_data.get('prefecture'),
+                customer_data.get('city'),
+                customer_data.get('address_detail'),
+                customer_data.get('car_info'),
+                customer_data.get('recruitment_source'),
+                customer_data.get('mypage_id'),
+                customer_data.get('current_points', 0),
+                customer_data.get('member_type', '通常会員'),
+                customer_data.get('status', '普通'),
+                customer_data.get('web_member', 'web会員'),
+                customer_data.get('comment'),
+                customer_data.get('nickname'),
+                customer_id
+            ))
+        conn.commit()
+    except psycopg.errors.UniqueViolation as e:
+        conn.rollback()
+        if _is_duplicate_phone(e):
+            raise DuplicatePhoneError() from e
+        raise
+    finally:
+        cur.close()
+        conn.close()
 
 def delete_customer(store_code, customer_id):
     """顧客削除"""
@@ -335,13 +387,7 @@ def search_customers(store_code, keyword, search_type=None):
             elif search_type == 'furigana':
                 # フリガナ検索（部分一致）
                 # ひらがなが含まれている場合はカタカナに変換
-                search_keyword = keyword
-                if any('\u3041' <= c <= '\u3096' for c in keyword):
-                    # ひらがなをカタカナに変換
-                    search_keyword = ''.join(
-                        chr(ord(c) + 0x60) if '\u3041' <= c <= '\u3096' else c 
-                        for c in keyword
-                    )
+                search_keyword = to_katakana(keyword)
                 
                 sql = """
                     SELECT 
@@ -360,12 +406,7 @@ def search_customers(store_code, keyword, search_type=None):
                 clean_keyword = keyword.replace('-', '')
 
                 # ひらがなが含まれている場合はカタカナに変換
-                search_keyword = keyword
-                if any('\u3041' <= c <= '\u3096' for c in keyword):
-                    search_keyword = ''.join(
-                        chr(ord(c) + 0x60) if '\u3041' <= c <= '\u3096' else c
-                        for c in keyword
-                    )
+                search_keyword = to_katakana(keyword)
 
                 sql = """
                     SELECT
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+顧客CSV一括取り込みのデータベース操作関数
+
+1行ずつ add_customer() を呼ぶと接続・INSERTが行数分発生するため、
+CSVを一時テーブルに COPY で流し込み、INSERT ... SELECT ... ON CONFLICT で
+customers にまとめて登録する。重複判定は (store_id, phone_normalized) の
+ユニークインデックスで行う（add_customer_phone_normalized.py で作成）。
+customers.phone には画面から登録した場合と同じくCSVの表記のまま保存し、
+正規化した電話番号は重複判定（生成列 phone_normalized）にだけ使う。
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from database.connection import get_store_id
+from database.customer_db import (
+    get_db_connection, normalize_furigana, calculate_age
+)
+
+# customers.phone_normalized（生成列）の式。電話番号の正規化はこの式だけで行う
+# （全角数字→半角、数字以外を除去、+81→0）。一時テーブルにも同じ式の生成列を作り、
+# CSV内の重複判定と ON CONFLICT の判定を一致させる
+PHONE_NORMALIZED_SQL = """
+    NULLIF(
+        CASE
+            WHEN phone LIKE '+81%' THEN
+                '0' || substr(regexp_replace(translate(phone, '０１２３４５６７８９', '0123456789'), '[^0-9]', '', 'g'), 3)
+            ELSE
+                regexp_replace(translate(phone, '０１２３４５６７８９', '0123456789'), '[^0-9]', '', 'g')
+        END,
+        ''
+    )
+"""
+
+# CSVヘッダー（日本語・英語どちらでも可）→ customers のカラム名
+CUSTOMER_IMPORT_HEADERS = {
+    'name': 'name', '名前': 'name', '氏名': 'name', '顧客名': 'name',
+    'furigana': 'furigana', 'フリガナ': 'furigana', 'ふりがな': 'furigana',
+    'phone': 'phone', 'phone_number': 'phone', '電話番号': 'phone', '電話': 'phone',
+    'birthday': 'birthday', 'birth_date': 'birthday', '生年月日': 'birthday', '誕生日': 'birthday',
+    'prefecture': 'prefecture', '都道府県': 'prefecture',
+    'city': 'city', '市区町村': 'city',
+    'address_detail': 'address_detail', '住所': 'address_detail', '番地': 'address_detail',
+    'recruitment_source': 'recruitment_source', '流入元': 'recruitment_source',
+    'comment': 'comment', '備考': 'comment', 'コメント': 'comment',
+    'nickname': 'nickname', 'ニックネーム': 'nickname',
+    'current_points': 'current_points', 'ポイント': 'current_points',
+    'member_type': 'member_type', '会員種別': 'member_type',
+}
+
+# 一時テーブルに流し込むカラム（row_no / customer_id 以外）
+STAGING_COLUMNS = (
+    'name', 'furigana', 'phone', 'birthday', 'age', 'prefecture', 'city',
+    'address_detail', 'recruitment_source', 'comment', 'nickname',
+    'current_points', 'member_type'
+)
+
+# 文字数の上限（customers・一時テーブルのカラム定義と同じ）
+# 1行でも超えると COPY 全体が失敗するため、解析時に行単位のエラーにする
+STAGING_MAX_LENGTHS = {
+    'name': 100, 'furigana': 100, 'phone': 20, 'prefecture': 50, 'city': 50,
+    'recruitment_source': 50, 'nickname': 100, 'member_type': 20
+}
+
+# INTEGER カラムの範囲
+MAX_POINTS = 2147483647
+
+# 既存顧客を更新する場合に上書きするカラム（CSV側が空なら既存値を残す）
+UPDATE_COLUMNS = (
+    'name', 'furigana', 'birthday', 'age', 'prefecture', 'city',
+    'address_detail', 'recruitment_source', 'comment', 'nickname', 'member_type'
+)
+
+
+def _decode_csv(data: bytes) -> str:
+    """CSVのバイト列を文字列に変換（UTF-8(BOM付き) → Shift_JIS(cp932) の順に試す）"""
+    for encoding in ('utf-8-sig', 'cp932'):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError('CSVの文字コードを判別できません（UTF-8またはShift_JISで保存してください）')
+
+
+def _parse_birthday(value: str) -> Optional[date]:
+    """生年月日を解析（YYYY-MM-DD / YYYY/MM/DD / YYYYMMDD）"""
+    for fmt in ('%Y-%m-%d', '%Y/%m/%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'生年月日の形式が不正です: {value}')
+
+
+def parse_customer_rows(data: bytes):
+    """
+    CSVを解析し、取り込み対象の行とエラー行に分ける
+
+    Returns:
+        tuple: (rows, errors)
+            rows: [{'row_no': int, 'name': ..., 'phone': ...}, ...]
+            errors: [{'row_no': int, 'status': 'error', 'message': str}, ...]
+        row_no はヘッダーを1行目とした時のCSV上の行番号
+    """
+    reader = csv.reader(io.StringIO(_decode_csv(data)))
+
+    header = next(reader, None)
+    if not header:
+        raise ValueError('CSVが空です')
+
+    columns = [CUSTOMER_IMPORT_HEADERS.get(h.strip()) for h in header]
+    if 'name' not in columns:
+        raise ValueError('名前（name）列がありません')
+
+    rows = []
+    errors = []
+    for row_no, values in enumerate(reader, start=2):
+        if not any(v.strip() for v in values):
+            continue
+
+        record = {}
+        for column, value in zip(columns, values):
+            if column:
+                record[column] = value.strip() or None
+
+        try:
+            if not record.get('name'):
+                raise ValueError('名前が空です')
+
+            birthday = _parse_birthday(record['birthday']) if record.get('birthday') else None
+            points = int(record['current_points'].replace(',', '')) if record.get('current_points') else 0
+            if abs(points) > MAX_POINTS:
+                raise ValueError(f'ポイントが大きすぎます: {points}')
+
+            row = {
+                'row_no': row_no,
+                'name': record['name'],
+                'furigana': normalize_furigana(record.get('furigana')),
+                'phone': record.get('phone'),
+                'birthday': birthday,
+                'age': calculate_age(birthday) if birthday else None,
+                'prefecture': record.get('prefecture'),
+                'city': record.get('city'),
+                'address_detail': record.get('address_detail'),
+                'recruitment_source': record.get('recruitment_source'),
+                'comment': record.get('comment'),
+                'nickname': record.get('nickname'),
+                'current_points': points,
+                'member_type': record.get('member_type') or '通常会員'
+            }
+            too_long = [
+                f'{column}（{limit}文字まで）'
+                for column, limit in STAGING_MAX_LENGTHS.items()
+                if row[column] and len(row[column]) > limit
+            ]
+            if too_long:
+                raise ValueError(f"文字数が上限を超えています: {', '.join(too_long)}")
+            rows.append(row)
+        except ValueError as e:
+            errors.append({'row_no': row_no, 'status': 'error', 'message': str(e)})
+
+    return rows, errors
+
+
+def import_customers_csv(store_code: str, data: bytes, update_existing: bool = False) -> Dict:
+    """
+    顧客CSVを一括取り込みする
+
+    電話番号（数字のみに正規化したもの）が店舗内の既存顧客またはCSV内の前の行と
+    一致する行は重複として扱う。電話番号が空の行は重複判定せずに登録する。
+
+    Args:
+        store_code: 店舗コード
+        data: アップロードされたCSVのバイト列
+        update_existing: True の場合、既存顧客をCSVの値で更新する（False はスキップ）
+
+    Returns:
+        dict: {'inserted': int, 'updated': int, 'skipped': int, 'errors': int,
+               'results': [{'row_no', 'status', 'customer_id', 'message'}, ...]}
+        status は 'inserted' / 'updated' / 'skipped_existing' / 'duplicate_in_file' / 'error'
+    """
+    store_id = get_store_id(store_code)
+    rows, errors = parse_customer_rows(data)
+    results: List[Dict] = list(errors)
+
+    if rows:
+        conn = get_db_connection(store_code)
+        try:
+            cur = conn.cursor()
+
+            cur.execute(f'''
+                CREATE TEMP TABLE customer_import_staging (
+                    row_no INTEGER PRIMARY KEY,
+                    customer_id INTEGER,
+                    name VARCHAR(100),
+                    furigana VARCHAR(100),
+                    phone VARCHAR(20),
+                    phone_normalized VARCHAR(20) GENERATED ALWAYS AS ({PHONE_NORMALIZED_SQL}) STORED,
+                    birthday DATE,
+                    age INTEGER,
+                    prefecture VARCHAR(50),
+                    city VARCHAR(50),
+                    address_detail TEXT,
+                    recruitment_source VARCHAR(50),
+                    comment TEXT,
+                    nickname VARCHAR(100),
+                    current_points INTEGER,
+                    member_type VARCHAR(20)
+                ) ON COMMIT DROP
+            ''')
+
+            column_list = ', '.join(('row_no',) + STAGING_COLUMNS)
+            with cur.copy(f'COPY customer_import_staging ({column_list}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row([row['row_no']] + [row[c] for c in STAGING_COLUMNS])
+
+            # CSV内の重複（正規化した電話番号が同じ2行目以降）を除外
+            cur.execute('''
+                DELETE FROM customer_import_staging s
+                USING (
+                    SELECT row_no,
+                           ROW_NUMBER() OVER (PARTITION BY phone_normalized ORDER BY row_no) AS rn
+                    FROM customer_import_staging
+                    WHERE phone_normalized IS NOT NULL
+                ) d
+                WHERE s.row_no = d.row_no AND d.rn > 1
+                RETURNING s.row_no, s.phone
+            ''')
+            for row_no, phone in cur.fetchall():
+                results.append({
+                    'row_no': row_no,
+                    'status': 'duplicate_in_file',
+                    'message': f'CSV内で電話番号 {phone} が重複しています'
+                })
+
+            # 新規登録時の customer_id を先に採番し、RETURNING の結果を行番号に対応付ける
+            cur.execute('''
+                UPDATE customer_import_staging
+                SET customer_id = nextval(pg_get_serial_sequence('customers', 'customer_id'))
+            ''')
+            cur.execute('SELECT customer_id, row_no, phone_normalized FROM customer_import_staging')
+            staged = cur.fetchall()
+            row_by_id = {customer_id: row_no for customer_id, row_no, _ in staged}
+            row_by_phone = {phone: row_no for _, row_no, phone in staged if phone}
+
+            if update_existing:
+                set_clause = ', '.join(
+                    f'{c} = COALESCE(EXCLUDED.{c}, customers.{c})' for c in UPDATE_COLUMNS
+                )
+                conflict_action = f'DO UPDATE SET {set_clause}, updated_at = CURRENT_TIMESTAMP'
+            else:
+                conflict_action = 'DO NOTHING'
+
+            cur.execute(f'''
+                INSERT INTO customers (customer_id, store_id, {', '.join(STAGING_COLUMNS)})
+                SELECT customer_id, %s, {', '.join(STAGING_COLUMNS)}
+                FROM customer_import_staging
+                ORDER BY row_no
+                ON CONFLICT (store_id, phone_normalized) {conflict_action}
+                RETURNING customer_id, phone_normalized, (xmax = 0) AS inserted
+            ''', (store_id,))
+
+            handled = set()
+            for customer_id, phone, inserted in cur.fetchall():
+                if inserted:
+                    row_no = row_by_id[customer_id]
+                    status = 'inserted'
+                else:
+                    row_no = row_by_phone[phone]
+                    status = 'updated'
+                handled.add(row_no)
+                results.append({'row_no': row_no, 'status': status, 'customer_id': customer_id})
+
+            # 登録も更新もされなかった行 = 既存顧客と重複してスキップした行
+            skipped = [row_no for row_no in row_by_id.values() if row_no not in handled]
+            if skipped:
+                cur.execute('''
+                    SELECT s.row_no, c.customer_id
+                    FROM customer_import_staging s
+                    JOIN customers c
+                        ON c.store_id = %s AND c.phone_normalized = s.phone_normalized
+                    WHERE s.row_no = ANY(%s)
+                ''', (store_id, skipped))
+                for row_no, customer_id in cur.fetchall():
+                    results.append({
+                        'row_no': row_no,
+                        'status': 'skipped_existing',
+                        'customer_id': customer_id,
+                        'message': '同じ電話番号の顧客が既に登録されています'
+                    })
+
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    results.sort(key=lambda r: r['row_no'])
+    summary = {
+        'inserted': sum(1 for r in results if r['status'] == 'inserted'),
+        'updated': sum(1 for r in results if r['status'] == 'updated'),
+        'skipped': sum(1 for r in results if r['status'] in ('skipped_existing', 'duplicate_in_file')),
+        'errors': sum(1 for r in results if r['status'] == 'error'),
+        'results': results
+    }
+    print(f"顧客CSV取り込み: 登録{summary['inserted']}件 / 更新{summary['updated']}件 / "
+          f"スキップ{summary['skipped']}件 / エラー{summary['errors']}件")
+    return summary
@@ -2,6 +2,7 @@
 import os
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,7 +20,7 @@ try:
             user=DATABASE_CONFIG['user'],
             password=DATABASE_CONFIG['password']
         )
-        return conn
+        return instrument_connection(conn, 'customer_options_db')
 except ImportError:
     # config.pyがない場合は環境変数を使用
     def get_db_connection():
@@ -31,7 +32,7 @@ except ImportError:
             user=os.getenv('DB_USER', 'postgres'),
             password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
         )
-        return conn
+        return instrument_connection(conn, 'customer_options_db')
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+営業日締めと日次売上集計（daily_sales）
+
+営業日が終わったら、その日の金銭記録（money_records）と予約（reservations）を
+店舗・キャスト・支払方法ごとに daily_sales に集計し、business_day_closes に締め済みとして記録する。
+金銭記録の created_date は登録した暦日のため、営業日は予約と同じく BUSINESS_DAY_CUTOFF_HOUR 時で
+切り替えた日付（money_business_date_sql）で数える。
+金銭記録は7日で削除されるが、締め済みの営業日は daily_sales に集計が残る。
+
+締め処理は scheduler.py の夜間ジョブから実行し、同じ営業日を再実行しても結果は同じになる。
+締めた後に予約・金銭記録を書き込んだ場合は、その書き込みと一緒に営業日を集計し直す（reclose_if_closed）。
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from database.connection import get_connection
+from database.availability_db import EXCLUDED_RESERVATION_STATUSES
+
+# 営業日の切り替え時刻（この時刻までは前日の営業日として扱う）
+BUSINESS_DAY_CUTOFF_HOUR = 6
+
+# 締め処理でさかのぼる最大日数（締め漏れの補完用）
+CLOSE_LOOKBACK_DAYS = 31
+
+
+def money_business_date_sql(alias: str = 'm') -> str:
+    """
+    金銭記録の営業日を表すSQL式（登録時刻から BUSINESS_DAY_CUTOFF_HOUR 時間引いた日付）
+
+    登録時刻（created_at）のない行は created_date をそのまま使う。
+    """
+    return (
+        f"COALESCE(({alias}.created_at - INTERVAL '{BUSINESS_DAY_CUTOFF_HOUR} hours')::date, "
+        f"{alias}.created_date)"
+    )
+
+
+def get_current_business_date(now: Optional[datetime] = None) -> date:
+    """現在の営業日（BUSINESS_DAY_CUTOFF_HOUR 時までは前日）"""
+    now = now or datetime.now()
+    return (now - timedelta(hours=BUSINESS_DAY_CUTOFF_HOUR)).date()
+
+
+def close_business_day(cursor, business_date: date) -> Dict:
+    """
+    1営業日分を daily_sales に集計して締め済みにする（同じ日の集計は入れ替え）
+
+    Args:
+        cursor: カーソル（トランザクションは呼び出し側で管理）
+        business_date: 締める営業日
+
+    Returns:
+        dict: {'business_date', 'rows', 'money_record_count', 'reservation_count'}
+    """
+    excluded = list(EXCLUDED_RESERVATION_STATUSES)
+
+    cursor.execute("DELETE FROM daily_sales WHERE business_date = %s", (business_date,))
+    cursor.execute(f"""
+        WITH money AS (
+            SELECT
+                COALESCE(c.store_id, 0) AS store_id,
+                COALESCE(m.cast_id, 0) AS cast_id,
+                COALESCE(m.payment_method, '') AS payment_method,
+                COUNT(*) AS money_record_count,
+                COALESCE(SUM(m.received_amount), 0) AS received_total,
+                COALESCE(SUM(m.change_amount), 0) AS change_total
+            FROM money_records m
+            LEFT JOIN casts c ON m.cast_id = c.cast_id
+            WHERE m.created_date BETWEEN %(business_date)s AND %(business_date)s::date + 1
+            AND {money_business_date_sql()} = %(business_date)s
+            GROUP BY 1, 2, 3
+        ),
+        resv AS (
+            SELECT
+                r.store_id,
+                COALESCE(r.cast_id, 0) AS cast_id,
+                COALESCE(r.payment_method, '') AS payment_method,
+                COUNT(*) AS reservation_count,
+                COUNT(*) FILTER (WHERE r.status = ANY(%(excluded)s)) AS cancelled_count,
+                COALESCE(SUM(r.total_amount) FILTER (WHERE r.status <> ALL(%(excluded)s)), 0) AS reservation_sales,
+                COALESCE(SUM(
+                    COALESCE(co.cast_back_amount, 0)
+                    + COALESCE(nt.back_amount, 0)
+                    + COALESCE(ob.option_back, 0)
+                ) FILTER (WHERE r.status <> ALL(%(excluded)s)), 0) AS cast_payout
+            FROM reservations r
+            LEFT JOIN courses co ON r.course_id = co.course_id
+            LEFT JOIN nomination_types nt
+                ON r.nomination_type_id = nt.nomination_type_id AND r.store_id = nt.store_id
+            LEFT JOIN (
+                SELECT ro.reservation_id, SUM(ro.cast_back_amount) AS option_back
+                FROM reservation_options ro
+                JOIN reservations rr ON rr.reservation_id = ro.reservation_id
+                WHERE rr.business_date = %(business_date)s
+                GROUP BY ro.reservation_id
+            ) ob ON ob.reservation_id = r.reservation_id
+            WHERE r.business_date = %(business_date)s
+            GROUP BY 1, 2, 3
+        )
+        INSERT INTO daily_sales (
+            store_id, business_date, cast_id, payment_method,
+            money_record_count, received_total, change_total,
+            reservation_count, cancelled_count, reservation_sales, cast_payout
+        )
+        SELECT
+            COALESCE(money.store_id, resv.store_id),
+            %(business_date)s,
+            COALESCE(money.cast_id, resv.cast_id),
+            COALESCE(money.payment_method, resv.payment_method),
+            COALESCE(money.money_record_count, 0),
+            COALESCE(money.received_total, 0),
+            COALESCE(money.change_total, 0),
+            COALESCE(resv.reservation_count, 0),
+            COALESCE(resv.cancelled_count, 0),
+            COALESCE(resv.reservation_sales, 0),
+            COALESCE(resv.cast_payout, 0)
+        FROM money
+        FULL OUTER JOIN resv
+            ON money.store_id = resv.store_id
+            AND money.cast_id = resv.cast_id
+            AND money.payment_method = resv.payment_method
+        RETURNING money_record_count, reservation_count
+    """, {'business_date': business_date, 'excluded': excluded})
+    rows = cursor.fetchall()
+
+    money_record_count = sum(row[0] for row in rows)
+    reservation_count = sum(row[1] for row in rows)
+
+    cursor.execute("""
+        INSERT INTO business_day_closes (business_date, money_record_count, reservation_count, closed_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (business_date) DO UPDATE SET
+            money_record_count = EXCLUDED.money_record_count,
+            reservation_count = EXCLUDED.reservation_count,
+            closed_at = EXCLUDED.closed_at
+    """, (business_date, money_record_count, reservation_count))
+
+    return {
+        'business_date': business_date.strftime('%Y-%m-%d'),
+        'rows': len(rows),
+        'money_record_count': money_record_count,
+        'reservation_count': reservation_count
+    }
+
+
+def close_pending_business_days(now: Optional[datetime] = None) -> List[Dict]:
+    """
+    まだ締めていない営業日（現在の営業日より前）をすべて締める
+
+    営業日ごとに1トランザクションで実行し、途中で失敗した日は次回の実行で再度締める。
+
+    Returns:
+        list: 締めた営業日ごとの結果
+    """
+    current_business_date = get_current_business_date(now)
+    lookback_from = current_business_date - timedelta(days=CLOSE_LOOKBACK_DAYS)
+
+    conn = get_connection()
+    results = []
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT d FROM (
+                    SELECT {money_business_date_sql()} AS d FROM money_records m
+                    WHERE m.created_date BETWEEN %(from)s AND %(to)s
+                    UNION
+                    SELECT business_date AS d FROM reservations
+                    WHERE business_date >= %(from)s AND business_date < %(to)s
+                ) dates
+                WHERE d >= %(from)s AND d < %(to)s
+                AND d NOT IN (SELECT business_date FROM business_day_closes)
+                ORDER BY d
+            """, {'from': lookback_from, 'to': current_business_date})
+            pending_dates = [row[0] for row in cursor.fetchall()]
+
+        for business_date in pending_dates:
+            try:
+                with conn.cursor() as cursor:
+                    results.append(close_business_day(cursor, business_date))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"営業日締めエラー（{business_date}）: {e}")
+    finally:
+        conn.close()
+
+    return results
+
+
+def is_business_day_closed(cursor, business_date) -> bool:
+    """営業日が締め済みかどうか"""
+    cursor.execute("SELECT 1 FROM business_day_closes WHERE business_date = %s", (business_date,))
+    return cursor.fetchone() is not None
+
+
+def reclose_if_closed(cursor, business_date) -> bool:
+    """
+    締め済みの営業日なら同じトランザクション内で集計し直す（締めた後の予約の書き込みなど）
+
+    Returns:
+        bool: 集計し直した場合 True（未締めの営業日は False）
+    """
+    if not business_date or not is_business_day_closed(cursor, business_date):
+        return False
+    close_business_day(cursor, business_date)
+    return True
+
+
+def reclose_business_day(business_date) -> bool:
+    """
+    締め済みの営業日を集計し直す（締めた後に金銭記録を削除した場合など）
+
+    Returns:
+        bool: 集計し直した場合 True（未締めの営業日・エラーの場合は False）
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            reclosed = reclose_if_closed(cursor, business_date)
+        conn.commit()
+        return reclosed
+    except Exception as e:
+        conn.rollback()
+        print(f"営業日再集計エラー（{business_date}）: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def get_money_cast_totals(db, store_id: int, business_date) -> Dict[str, Dict]:
+    """
+    金銭管理画面のキャスト別合計
+
+    金銭記録（money_records）が残っている営業日は画面の一覧と同じく money_records から集計し、
+    削除済み（保存期間を過ぎた締め済みの営業日）の場合だけ daily_sales から集計する。
+    daily_sales は営業日（money_business_date_sql）単位のため、0時〜BUSINESS_DAY_CUTOFF_HOUR 時の記録は前日分になる。
+
+    Returns:
+        dict: キャスト名 → {'received_total', 'change_total', 'sales_total'}
+    """
+    cursor = db.cursor()
+    cursor.execute(f"""
+        SELECT EXISTS (
+            SELECT 1 FROM money_records m
+            WHERE m.created_date BETWEEN %s AND %s::date + 1
+            AND {money_business_date_sql()} = %s
+        ) AS has_records
+    """, (business_date, business_date, business_date))
+    has_records = cursor.fetchone()['has_records']
+    if not has_records and is_business_day_closed(cursor, business_date):
+        cursor.execute("""
+            SELECT
+                c.name AS cast_name,
+                SUM(ds.received_total) AS received_total,
+                SUM(ds.change_total) AS change_total
+            FROM daily_sales ds
+            LEFT JOIN casts c ON ds.cast_id = c.cast_id
+            WHERE ds.business_date = %s AND ds.store_id = %s AND ds.money_record_count > 0
+            GROUP BY c.name
+        """, (business_date, store_id))
+    else:
+        cursor.execute("""
+            SELECT
+                c.name AS cast_name,
+                SUM(m.received_amount) AS received_total,
+                SUM(m.change_amount) AS change_total
+            FROM money_records m
+            LEFT JOIN casts c ON m.cast_id = c.cast_id
+            WHERE m.created_date = %s AND c.store_id = %s
+            GROUP BY c.name
+        """, (business_date, store_id))
+
+    cast_totals = {}
+    for row in cursor.fetchall():
+        received_total = int(row['received_total'] or 0)
+        change_total = int(row['change_total'] or 0)
+        cast_totals[row['cast_name']] = {
+            'received_total': received_total,
+            'change_total': change_total,
+            'sales_total': received_total - change_total
+        }
+    return cast_totals
+
+
+def query_rollup_metrics(cursor, period: str, date_from: date, date_to: date) -> Dict:
+    """
+    daily_sales から期間別・店舗別の集計を取得（締め済みの営業日のみ）
+
+    Returns:
+        dict: (期間の開始日, store_id) → {'sales', 'reservation_count', 'cancelled_count', 'cast_payout'}
+    """
+    cursor.execute("""
+        SELECT
+            date_trunc(%s, ds.business_date::timestamp)::date AS period_start,
+            ds.store_id,
+            SUM(ds.reservation_sales) AS sales,
+            SUM(ds.reservation_count) AS reservation_count,
+            SUM(ds.cancelled_count) AS cancelled_count,
+            SUM(ds.cast_payout) AS cast_payout
+        FROM daily_sales ds
+        WHERE ds.business_date BETWEEN %s AND %s
+        GROUP BY 1, 2
+    """, (period, date_from, date_to))
+
+    return {
+        (row[0], row[1]): {
+            'sales': int(row[2]),
+            'reservation_count': int(row[3]),
+            'cancelled_count': int(row[4]),
+            'cast_payout': int(row[5])
+        }
+        for row in cursor.fetchall()
+    }
@@ -4,6 +4,7 @@ from database.cast_db import *
 from database.user_db import *
 from database.pickup_db import *
 from database.course_db import *
+from database.ordering_db import move_item
 import psycopg
 from psycopg.rows import dict_row
 import os
@@ -129,7 +130,7 @@ def cleanup_old_announcement_records(db, store_id, days=30):
     try:
         cursor = db.cursor()
         cursor.execute(
-            "DELETE FROM announcements WHERE store_id = %s AND announcement_date < CURRENT_DATE - INTERVAL '%s days'",
+            "DELETE FROM announcements WHERE store_id = %s AND announcement_date < CURRENT_DATE - %s * INTERVAL '1 day'",
             (store_id, days)
         )
         db.commit()
@@ -138,93 +139,6 @@ def cleanup_old_announcement_records(db, store_id, days=30):
         print(f"Error in cleanup_old_announcement_records: {e}")
         return False
 
-def cleanup_all_old_records(db):
-    """すべての古いレコードを一括削除"""
-    try:
-        cleanup_old_pickup_records(db, 7)
-        cleanup_old_money_records(db, 7)
-        cleanup_old_announcement_records(db, 30)
-        return True
-    except Exception as e:
-        print(f"Error in cleanup_all_old_records: {e}")
-        return False
-
-def should_run_cleanup(db, store_id):
-    """クリーンアップが必要かどうかを判定（store_idでフィルタ）"""
-    try:
-        cursor = db.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cleanup_log (
-                id SERIAL PRIMARY KEY,
-                store_id INTEGER NOT NULL,
-                last_cleanup TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        db.commit()
-
-        cursor.execute("SELECT COUNT(*) as count FROM cleanup_log WHERE store_id = %s", (store_id,))
-        count_result = cursor.fetchone()
-        count = count_result.count
-
-        if count == 0:
-            cursor.execute("""
-                INSERT INTO cleanup_log (store_id, last_cleanup)
-                VALUES (%s, CURRENT_TIMESTAMP - INTERVAL '2 days')
-            """, (store_id,))
-            db.commit()
-
-        cursor.execute("""
-            SELECT COUNT(*) as should_cleanup
-            FROM cleanup_log
-            WHERE store_id = %s
-            AND (last_cleanup < CURRENT_TIMESTAMP - INTERVAL '1 day'
-            OR last_cleanup IS NULL)
-        """, (store_id,))
-
-        result = cursor.fetchone()
-        return result.should_cleanup > 0
-
-    except Exception as e:
-        print(f"Error in should_run_cleanup: {e}")
-        return False
-
-def update_cleanup_timestamp(db, store_id):
-    """クリーンアップ実行時刻を更新（store_idでフィルタ）"""
-    try:
-        cursor = db.cursor()
-        cursor.execute("""
-            UPDATE cleanup_log
-            SET last_cleanup = CURRENT_TIMESTAMP
-            WHERE store_id = %s
-        """, (store_id,))
-        db.commit()
-        return True
-    except Exception as e:
-        print(f"Error in update_cleanup_timestamp: {e}")
-        return False
-
-def auto_cleanup_if_needed(db, store_id):
-    """必要に応じて自動クリーンアップを実行（store_idでフィルタ）"""
-    try:
-        if should_run_cleanup(db, store_id):
-            print(f"24時間以上経過しているため、データクリーンアップを実行します（store_id: {store_id}）...")
-
-            cleanup_old_pickup_records(db, 7)
-            cleanup_old_money_records(db, 7)
-            cleanup_old_announcement_records(db, store_id, 30)
-
-            update_cleanup_timestamp(db, store_id)
-
-            print(f"データクリーンアップが完了しました（store_id: {store_id}）")
-            return True
-
-        return False
-
-    except Exception as e:
-        print(f"Error in auto_cleanup_if_needed: {e}")
-        return False
-
 # ==========================
 # オプション管理関数
 # ==========================
@@ -327,38 +241,7 @@ def delete_option(option_id):
 def move_option_up(option_id):
     """オプションの並び順を上に移動"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        current_option = get_option_by_id(option_id)
-        if not current_option:
-            return False
-        
-        current_sort = current_option['sort_order']
-        
-        cursor = db.cursor()
-        
-        cursor.execute("""
-            SELECT option_id, sort_order 
-            FROM options 
-            WHERE sort_order < %s 
-            ORDER BY sort_order DESC 
-            LIMIT 1
-        """, (current_sort,))
-        result = cursor.fetchone()
-        
-        if not result:
-            return False
-        
-        prev_option_id = result['option_id']
-        prev_sort = result['sort_order']
-        
-        cursor.execute("UPDATE options SET sort_order = %s, updated_at = CURRENT_TIMESTAMP WHERE option_id = %s", (prev_sort, option_id))
-        cursor.execute("UPDATE options SET sort_order = %s, updated_at = CURRENT_TIMESTAMP WHERE option_id = %s", (current_sort, prev_option_id))
-        
-        db.commit()
-        return True
+        return move_item('options', None, option_id, 'up')
     except Exception as e:
         print(f"オプション並び順変更エラー (上移動, option_id: {option_id}): {e}")
         return False
@@ -366,38 +249,7 @@ def move_option_up(option_id):
 def move_option_down(option_id):
     """オプションの並び順を下に移動"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        current_option = get_option_by_id(option_id)
-        if not current_option:
-            return False
-        
-        current_sort = current_option['sort_order']
-        
-        cursor = db.cursor()
-        
-        cursor.execute("""
-            SELECT option_id, sort_order 
-            FROM options 
-            WHERE sort_order > %s 
-            ORDER BY sort_order ASC 
-            LIMIT 1
-        """, (current_sort,))
-        result = cursor.fetchone()
-        
-        if not result:
-            return False
-        
-        next_option_id = result['option_id']
-        next_sort = result['sort_order']
-        
-        cursor.execute("UPDATE options SET sort_order = %s, updated_at = CURRENT_TIMESTAMP WHERE option_id = %s", (next_sort, option_id))
-        cursor.execute("UPDATE options SET sort_order = %s, updated_at = CURRENT_TIMESTAMP WHERE option_id = %s", (current_sort, next_option_id))
-        
-        db.commit()
-        return True
+        return move_item('options', None, option_id, 'down')
     except Exception as e:
         print(f"オプション並び順変更エラー (下移動, option_id: {option_id}): {e}")
         return False
\ No newline at end of file
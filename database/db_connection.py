@@ -2,6 +2,8 @@ import psycopg
 import os
 from dotenv import load_dotenv
 
+from utils.metrics import instrument_connection
+
 load_dotenv()
 
 def get_db_connection():
@@ -27,4 +29,4 @@ def get_db_connection():
         password=db_password
     )
     
-    return conn
\ No newline at end of file
+    return instrument_connection(conn, 'db_connection')
\ No newline at end of file
@@ -1,4 +1,5 @@
 from database.connection import get_db
+from database.ordering_db import move_item
 
 # ==== 割引マスタ管理関数 ====
 
@@ -130,60 +131,9 @@ def move_discount_order(db, discount_id, direction):
         bool: 成功したらTrue
     """
     try:
-        cursor = db.cursor()
-        
-        # 現在の割引を取得
-        cursor.execute("""
-            SELECT discount_id, sort_order 
-            FROM discounts 
-            WHERE discount_id = %s
-        """, (discount_id,))
-        current = cursor.fetchone()
-        
-        if not current:
-            return False
-        
-        # 交換先の割引を取得
-        if direction == 'up':
-            # より小さいsort_orderの中で最大のものを取得
-            cursor.execute("""
-                SELECT discount_id, sort_order 
-                FROM discounts 
-                WHERE sort_order < %s 
-                ORDER BY sort_order DESC 
-                LIMIT 1
-            """, (current['sort_order'],))
-        else:  # down
-            # より大きいsort_orderの中で最小のものを取得
-            cursor.execute("""
-                SELECT discount_id, sort_order 
-                FROM discounts 
-                WHERE sort_order > %s 
-                ORDER BY sort_order ASC 
-                LIMIT 1
-            """, (current['sort_order'],))
-        
-        target = cursor.fetchone()
-        
-        if not target:
-            # 交換先がない（既に最上位または最下位）
-            return False
-        
-        # sort_orderを交換
-        cursor.execute("""
-            UPDATE discounts 
-            SET sort_order = %s 
-            WHERE discount_id = %s
-        """, (target['sort_order'], current['discount_id']))
-        
-        cursor.execute("""
-            UPDATE discounts 
-            SET sort_order = %s 
-            WHERE discount_id = %s
-        """, (current['sort_order'], target['discount_id']))
-        
+        moved = move_item('discounts', None, discount_id, direction, db=db)
         db.commit()
-        return True
+        return moved
         
     except Exception as e:
         print(f"並び順変更エラー: {e}")
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+月末締め用エクスポート（予約・金銭記録・キャスト報酬）のデータベース操作関数
+
+全件をメモリに載せないよう、CSVは COPY ... TO STDOUT の出力をそのまま、
+Excelはサーバーサイドカーソル（名前付きカーソル）で少しずつ読み出して書き出す。
+"""
+from typing import Iterator, Optional, Tuple, Any
+
+from psycopg import sql
+
+from database.connection import get_connection
+from database.availability_db import EXCLUDED_RESERVATION_STATUSES
+
+# 名前付きカーソルで1回に取得する行数
+EXPORT_FETCH_SIZE = 2000
+
+# エクスポート種別ごとのSELECT句・FROM句・各フィルタ対象カラム
+EXPORT_DEFINITIONS = {
+    'reservations': {
+        'label': '予約',
+        'select': """
+            SELECT
+                r.reservation_id AS "予約ID",
+                r.store_id AS "店舗ID",
+                r.business_date AS "営業日",
+                r.reservation_datetime AS "開始日時",
+                r.end_datetime AS "終了日時",
+                r.status AS "ステータス",
+                r.customer_id AS "顧客ID",
+                r.customer_name AS "顧客名",
+                r.cast_id AS "キャストID",
+                r.cast_name AS "キャスト名",
+                r.course_name AS "コース",
+                r.course_time_minutes AS "コース時間",
+                r.nomination_type_name AS "指名",
+                r.extension_name AS "延長",
+                r.extension_minutes AS "延長時間",
+                r.hotel_name AS "ホテル",
+                r.room_number AS "部屋番号",
+                r.payment_method AS "支払方法",
+                r.course_price AS "コース料金",
+                r.nomination_fee AS "指名料",
+                r.extension_fee AS "延長料金",
+                r.options_total AS "オプション料金",
+                r.transportation_fee AS "交通費",
+                r.discount_amount AS "割引額",
+                r.adjustment_amount AS "調整金",
+                r.card_fee AS "カード手数料",
+                r.total_amount AS "合計金額",
+                r.staff_name AS "受付スタッフ"
+            FROM reservations r
+        """,
+        'order_by': 'r.business_date, r.reservation_datetime, r.reservation_id',
+        'date_column': 'r.business_date',
+        'store_column': 'r.store_id',
+        'cast_column': 'r.cast_id',
+        'status_column': 'r.status',
+        'exclude_cancelled': False
+    },
+    'money_records': {
+        'label': '金銭記録',
+        'select': """
+            SELECT
+                m.record_id AS "記録ID",
+                c.store_id AS "店舗ID",
+                m.created_date AS "日付",
+                m.exit_time AS "退室時刻",
+                m.cast_id AS "キャストID",
+                c.name AS "キャスト名",
+                m.payment_method AS "支払方法",
+                m.received_amount AS "受取額",
+                m.change_amount AS "お釣り",
+                m.received_amount - m.change_amount AS "売上",
+                u.name AS "スタッフ"
+            FROM money_records m
+            LEFT JOIN casts c ON m.cast_id = c.cast_id
+            LEFT JOIN users u ON m.staff_id = u.login_id
+        """,
+        'order_by': 'm.created_date, m.exit_time, m.record_id',
+        'date_column': 'm.created_date',
+        'store_column': 'c.store_id',
+        'cast_column': 'm.cast_id',
+        'status_column': 'm.payment_method',
+        'exclude_cancelled': False
+    },
+    'rewards': {
+        'label': 'キャスト報酬',
+        'select': """
+            SELECT
+                r.reservation_id AS "予約ID",
+                r.store_id AS "店舗ID",
+                r.business_date AS "営業日",
+                r.cast_id AS "キャストID",
+                r.cast_name AS "キャスト名",
+                r.customer_name AS "顧客名",
+                r.course_name AS "コース",
+                COALESCE(nt.type_name, r.nomination_type_name) AS "指名",
+                COALESCE(co.cast_back_amount, 0) AS "コースバック",
+                COALESCE(nt.back_amount, 0) AS "指名バック",
+                COALESCE(ob.option_back, 0) AS "オプションバック",
+                COALESCE(co.cast_back_amount, 0)
+                    + COALESCE(nt.back_amount, 0)
+                    + COALESCE(ob.option_back, 0) AS "報酬合計"
+            FROM reservations r
+            LEFT JOIN courses co ON r.course_id = co.course_id
+            LEFT JOIN nomination_types nt
+                ON r.nomination_type_id = nt.nomination_type_id AND r.store_id = nt.store_id
+            LEFT JOIN (
+                SELECT reservation_id, SUM(cast_back_amount) AS option_back
+                FROM reservation_options
+                GROUP BY reservation_id
+            ) ob ON ob.reservation_id = r.reservation_id
+        """,
+        'order_by': 'r.business_date, r.cast_id, r.reservation_datetime',
+        'date_column': 'r.business_date',
+        'store_column': 'r.store_id',
+        'cast_column': 'r.cast_id',
+        'status_column': 'r.status',
+        'exclude_cancelled': True
+    }
+}
+
+
+def build_export_query(
+    kind: str,
+    date_from: str,
+    date_to: str,
+    store_id: Optional[int] = None,
+    cast_id: Optional[int] = None,
+    status: Optional[str] = None
+) -> sql.Composed:
+    """
+    エクスポート用のSELECT文を組み立てる
+
+    COPY文ではバインドパラメータが使えないため、値は sql.Literal で埋め込む。
+
+    Args:
+        kind: 'reservations' / 'money_records' / 'rewards'
+        date_from: 開始日（YYYY-MM-DD）
+        date_to: 終了日（YYYY-MM-DD、この日を含む）
+        store_id: 店舗ID（Noneの場合は全店舗）
+        cast_id: キャストID（任意）
+        status: ステータス（任意。金銭記録の場合は支払方法）
+    """
+    definition = EXPORT_DEFINITIONS[kind]
+
+    conditions = [
+        sql.SQL(definition['date_column'] + " BETWEEN {} AND {}").format(
+            sql.Literal(date_from), sql.Literal(date_to)
+        )
+    ]
+    if store_id is not None:
+        conditions.append(
+            sql.SQL(definition['store_column'] + " = {}").format(sql.Literal(store_id))
+        )
+    if cast_id is not None:
+        conditions.append(
+            sql.SQL(definition['cast_column'] + " = {}").format(sql.Literal(cast_id))
+        )
+    if status:
+        conditions.append(
+            sql.SQL(definition['status_column'] + " = {}").format(sql.Literal(status))
+        )
+    elif definition['exclude_cancelled']:
+        conditions.append(
+            sql.SQL(definition['status_column'] + " <> ALL({})").format(
+                sql.Literal(list(EXCLUDED_RESERVATION_STATUSES))
+            )
+        )
+
+    return sql.SQL("{select} WHERE {where} ORDER BY {order_by}").format(
+        select=sql.SQL(definition['select']),
+        where=sql.SQL(' AND ').join(conditions),
+        order_by=sql.SQL(definition['order_by'])
+    )
+
+
+def iter_export_csv(kind: str, date_from: str, date_to: str, **filters) -> Iterator[bytes]:
+    """
+    CSV（UTF-8 BOM付き、Excelでそのまま開ける形式）をチャンク単位で返すジェネレーター
+
+    COPY ... TO STDOUT の出力をそのまま流すため、件数に関わらずメモリ使用量は一定。
+    """
+    query = build_export_query(kind, date_from, date_to, **filters)
+    copy_statement = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(query)
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        yield '\ufeff'.encode('utf-8')
+        with cursor.copy(copy_statement) as copy:
+            for chunk in copy:
+                yield bytes(chunk)
+    finally:
+        conn.close()
+
+
+def iter_export_rows(kind: str, date_from: str, date_to: str, **filters) -> Iterator[Tuple[Any, ...]]:
+    """
+    ヘッダー行に続けてデータ行を1行ずつ返すジェネレーター（Excel出力用）
+
+    名前付きカーソル（サーバーサイドカーソル）で EXPORT_FETCH_SIZE 件ずつ取得する。
+    """
+    query = build_export_query(kind, date_from, date_to, **filters)
+
+    conn = get_connection()
+    try:
+        with conn.transaction():
+            cursor = conn.cursor(name=f'export_{kind}')
+            cursor.itersize = EXPORT_FETCH_SIZE
+            cursor.execute(query)
+
+            yield tuple(desc[0] for desc in cursor.description)
+            for row in cursor:
+                yield row
+
+            cursor.close()
+    finally:
+        conn.close()
+
+
+def write_export_xlsx(fileobj, kind: str, date_from: str, date_to: str, **filters) -> None:
+    """
+    Excel（xlsx）を fileobj に書き出す
+
+    openpyxl の write_only モードを使い、行はワークシートに逐次書き出す。
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=EXPORT_DEFINITIONS[kind]['label'])
+
+    for row in iter_export_rows(kind, date_from, date_to, **filters):
+        worksheet.append(list(row))
+
+    workbook.save(fileobj)
+
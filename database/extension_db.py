@@ -1,4 +1,5 @@
 from database.connection import get_db
+from database.ordering_db import move_item
 
 # ==== 延長マスタ管理関数 ====
 
@@ -125,7 +126,7 @@ def update_extension(db, extension_id, extension_data):
         db.rollback()
         return False
 
-def move_extension_order(db, extension_id, direction):
+def move_extension_order(db, extension_id, direction, store_id=None):
     """
     延長の並び順を変更
 
@@ -133,65 +134,15 @@ def move_extension_order(db, extension_id, direction):
         db: データベース接続
         extension_id: 移動する延長のID
         direction: 'up'（上へ）または 'down'（下へ）
+        store_id: 店舗ID（指定時は同じ店舗内で入れ替え）
 
     Returns:
         bool: 成功したらTrue
     """
     try:
-        cursor = db.cursor()
-
-        # 現在の延長を取得
-        cursor.execute("""
-            SELECT extension_id, sort_order, store_id
-            FROM extensions
-            WHERE extension_id = %s
-        """, (extension_id,))
-        current = cursor.fetchone()
-
-        if not current:
-            return False
-
-        # 交換先の延長を取得（同じstore_id内で）
-        if direction == 'up':
-            # より小さいsort_orderの中で最大のものを取得
-            cursor.execute("""
-                SELECT extension_id, sort_order
-                FROM extensions
-                WHERE sort_order < %s AND store_id = %s
-                ORDER BY sort_order DESC
-                LIMIT 1
-            """, (current['sort_order'], current['store_id']))
-        else:  # down
-            # より大きいsort_orderの中で最小のものを取得
-            cursor.execute("""
-                SELECT extension_id, sort_order
-                FROM extensions
-                WHERE sort_order > %s AND store_id = %s
-                ORDER BY sort_order ASC
-                LIMIT 1
-            """, (current['sort_order'], current['store_id']))
-
-        target = cursor.fetchone()
-
-        if not target:
-            # 交換先がない（既に最上位または最下位）
-            return False
-
-        # sort_orderを交換
-        cursor.execute("""
-            UPDATE extensions
-            SET sort_order = %s
-            WHERE extension_id = %s
-        """, (target['sort_order'], current['extension_id']))
-
-        cursor.execute("""
-            UPDATE extensions
-            SET sort_order = %s
-            WHERE extension_id = %s
-        """, (current['sort_order'], target['extension_id']))
-
+        moved = move_item('extensions', store_id, extension_id, direction, db=db)
         db.commit()
-        return True
+        return moved
 
     except Exception as e:
         print(f"並び順変更エラー: {e}")
@@ -7,8 +7,10 @@ if sys.platform == 'win32':
     os.environ['PYTHONUTF8'] = '1'
 
 from database.connection import get_db
+from database.ordering_db import move_item
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from dotenv import load_dotenv
 
 # 環境変数を読み込む
@@ -23,7 +25,7 @@ def get_db_connection(store_code):
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
     )
-    return conn
+    return instrument_connection(conn, 'hotel_db')
 
 # ==== カテゴリ関連の関数 ====
 def get_all_categories(db):
@@ -37,11 +39,7 @@ def register_category(db, name):
     """新しいカテゴリをデータベースに登録"""
     try:
         cursor = db.cursor()
-        cursor.execute("SELECT COALESCE(MAX(category_id), 0) + 1 as next_id FROM categories")
-        result = cursor.fetchone()
-        new_category_id = result['next_id']
-        
-        cursor.execute("INSERT INTO categories (category_id, name) VALUES (%s, %s)", (new_category_id, name))
+        cursor.execute("INSERT INTO categories (name) VALUES (%s)", (name,))
         db.commit()
         return True  # ✅ 追加
     except psycopg.IntegrityError:
@@ -89,29 +87,39 @@ def delete_category_by_id(db, category_id):
         return False
 
 # ==== エリア関連の関数 ====
-def get_all_areas(db):
-    """データベースから全てのエリア情報を取得（交通費・所要時間含む）"""
+def get_all_areas(db, store_id=None):
+    """
+    データベースから全てのエリア情報を取得（交通費・所要時間含む、store_id指定時はその店舗のみ）
+
+    store_id のない既存のエリアは backfill_hotel_area_store_id.py で店舗を割り当てる
+    """
     cursor = db.cursor()
-    cursor.execute("SELECT area_id, name, transportation_fee, travel_time_minutes, sort_order FROM areas ORDER BY sort_order ASC, name")
+    if store_id is not None:
+        cursor.execute("""
+            SELECT area_id, name, transportation_fee, travel_time_minutes, sort_order
+            FROM areas
+            WHERE store_id = %s
+            ORDER BY sort_order ASC, name
+        """, (store_id,))
+    else:
+        cursor.execute("SELECT area_id, name, transportation_fee, travel_time_minutes, sort_order FROM areas ORDER BY sort_order ASC, name")
     areas = cursor.fetchall()
     return areas
 
-def register_area(db, name, transportation_fee=0, travel_time_minutes=0):
-    """新しいエリアをデータベースに登録（所要時間対応）"""
+def register_area(db, name, transportation_fee=0, travel_time_minutes=0, store_id=None):
+    """新しいエリアをデータベースに登録（所要時間対応、store_id指定時はその店舗の末尾に追加）"""
     try:
         cursor = db.cursor()
-        cursor.execute("SELECT COALESCE(MAX(area_id), 0) + 1 as next_id FROM areas")
-        result = cursor.fetchone()
-        new_area_id = result['next_id']
-        
-        cursor.execute("SELECT COALESCE(MAX(sort_order), 0) + 1 as next_sort FROM areas")
-        sort_result = cursor.fetchone()
-        next_sort_order = sort_result['next_sort'] if sort_result else 1
-        
-        cursor.execute("""
-            INSERT INTO areas (area_id, name, transportation_fee, travel_time_minutes, sort_order) 
-            VALUES (%s, %s, %s, %s, %s)
-        """, (new_area_id, name, transportation_fee, travel_time_minutes, next_sort_order))
+        if store_id is not None:
+            cursor.execute("""
+                INSERT INTO areas (name, transportation_fee, travel_time_minutes, store_id, sort_order)
+                VALUES (%s, %s, %s, %s, (SELECT COALESCE(MAX(sort_order), 0) + 1 FROM areas WHERE store_id = %s))
+            """, (name, transportation_fee, travel_time_minutes, store_id, store_id))
+        else:
+            cursor.execute("""
+                INSERT INTO areas (name, transportation_fee, travel_time_minutes, sort_order) 
+                VALUES (%s, %s, %s, (SELECT COALESCE(MAX(sort_order), 0) + 1 FROM areas))
+            """, (name, transportation_fee, travel_time_minutes))
         db.commit()
         return True
     except psycopg.IntegrityError:
@@ -164,85 +172,34 @@ def delete_area_by_id(db, area_id):
         print(f"エリア削除エラー: {e}")
         return False
 
-def move_area_up(db, area_id):
-    """エリアの並び順を上に移動"""
+def move_area_up(db, area_id, store_id=None):
+    """エリアの並び順を上に移動（store_id指定時は同じ店舗内で入れ替え）"""
     try:
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order FROM areas WHERE area_id = %s", (area_id,))
-        current = cursor.fetchone()
-        
-        if not current:
-            return False
-        
-        current_order = current['sort_order']
-        
-        cursor.execute("""
-            SELECT area_id, sort_order FROM areas 
-            WHERE sort_order < %s 
-            ORDER BY sort_order DESC LIMIT 1
-        """, (current_order,))
-        upper = cursor.fetchone()
-        
-        if upper:
-            upper_id = upper['area_id']
-            upper_order = upper['sort_order']
-            
-            cursor.execute("UPDATE areas SET sort_order = %s WHERE area_id = %s", (upper_order, area_id))
-            cursor.execute("UPDATE areas SET sort_order = %s WHERE area_id = %s", (current_order, upper_id))
-            
-            db.commit()
-            return True
-        else:
-            return False
-            
+        return move_item('areas', store_id, area_id, 'up', db=db)
     except Exception as e:
         print(f"エリア並び順上移動エラー: {e}")
         return False
 
-def move_area_down(db, area_id):
-    """エリアの並び順を下に移動"""
+def move_area_down(db, area_id, store_id=None):
+    """エリアの並び順を下に移動（store_id指定時は同じ店舗内で入れ替え）"""
     try:
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order FROM areas WHERE area_id = %s", (area_id,))
-        current = cursor.fetchone()
-        
-        if not current:
-            return False
-        
-        current_order = current['sort_order']
-        
-        cursor.execute("""
-            SELECT area_id, sort_order FROM areas 
-            WHERE sort_order > %s 
-            ORDER BY sort_order ASC LIMIT 1
-        """, (current_order,))
-        lower = cursor.fetchone()
-        
-        if lower:
-            lower_id = lower['area_id']
-            lower_order = lower['sort_order']
-            
-            cursor.execute("UPDATE areas SET sort_order = %s WHERE area_id = %s", (lower_order, area_id))
-            cursor.execute("UPDATE areas SET sort_order = %s WHERE area_id = %s", (current_order, lower_id))
-            
-            db.commit()
-            return True
-        else:
-            return False
-            
+        return move_item('areas', store_id, area_id, 'down', db=db)
     except Exception as e:
         print(f"エリア並び順下移動エラー: {e}")
         return False
 
 # ==== ホテル関連の関数 ====
-def get_all_hotels_with_details(db, sort_by='sort_order'):
-    """ホテル一覧を詳細情報付きで取得する"""
+def get_all_hotels_with_details(db, sort_by='sort_order', store_id=None):
+    """
+    ホテル一覧を詳細情報付きで取得する（store_id指定時はその店舗のホテルのみ）
+
+    store_id のない既存のホテルは backfill_hotel_area_store_id.py で店舗を割り当てる
+    """
     cursor = db.cursor()
+    store_condition = "WHERE h.store_id = %s" if store_id is not None else ""
     
     if sort_by == 'sort_order':
-        query = """
+        query = f"""
         SELECT 
             h.hotel_id,
             h.name as hotel_name,
@@ -259,10 +216,11 @@ def get_all_hotels_with_details(db, sort_by='sort_order'):
         FROM hotels h
         LEFT JOIN categories c ON h.category_id = c.category_id
         LEFT JOIN areas a ON h.area_id = a.area_id
+        {store_condition}
         ORDER BY h.sort_order ASC, h.hotel_id ASC
         """
     elif sort_by == 'category_name_hotel_name':
-        query = """
+        query = f"""
         SELECT 
             h.hotel_id,
             h.name as hotel_name,
@@ -279,10 +237,11 @@ def get_all_hotels_with_details(db, sort_by='sort_order'):
         FROM hotels h
         LEFT JOIN categories c ON h.category_id = c.category_id
         LEFT JOIN areas a ON h.area_id = a.area_id
+        {store_condition}
         ORDER BY c.category_id, a.area_id, h.name
         """
     else:
-        query = """
+        query = f"""
         SELECT 
             h.hotel_id,
             h.name as hotel_name,
@@ -299,10 +258,11 @@ def get_all_hotels_with_details(db, sort_by='sort_order'):
         FROM hotels h
         LEFT JOIN categories c ON h.category_id = c.category_id
         LEFT JOIN areas a ON h.area_id = a.area_id
+        {store_condition}
         ORDER BY h.hotel_id
         """
     
-    cursor.execute(query)
+    cursor.execute(query, (store_id,) if store_id is not None else None)
     return cursor.fetchall()
 
 def find_hotel_by_id(db, hotel_id):
@@ -329,22 +289,20 @@ def find_hotel_by_id(db, hotel_id):
     """, (hotel_id,))
     return cursor.fetchone()
 
-def register_hotel(db, name, category_id, area_id, base_price=0, additional_time=0):
-    """新しいホテルをデータベースに登録"""
+def register_hotel(db, name, category_id, area_id, base_price=0, additional_time=0, store_id=None):
+    """新しいホテルをデータベースに登録（store_id指定時はその店舗の末尾に追加）"""
     try:
         cursor = db.cursor()
-        cursor.execute("SELECT COALESCE(MAX(hotel_id), 0) + 1 as next_id FROM hotels")
-        result = cursor.fetchone()
-        new_hotel_id = result['next_id']
-        
-        cursor.execute("SELECT COALESCE(MAX(sort_order), 0) + 1 as next_sort FROM hotels")
-        sort_result = cursor.fetchone()
-        next_sort_order = sort_result['next_sort'] if sort_result else 1
-        
-        cursor.execute("""
-            INSERT INTO hotels (hotel_id, name, category_id, area_id, base_price, additional_time, sort_order, is_active, created_at, updated_at) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-        """, (new_hotel_id, name, category_id, area_id, base_price, additional_time, next_sort_order, True))
+        if store_id is not None:
+            cursor.execute("""
+                INSERT INTO hotels (name, category_id, area_id, base_price, additional_time, store_id, sort_order, is_active, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, (SELECT COALESCE(MAX(sort_order), 0) + 1 FROM hotels WHERE store_id = %s), %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            """, (name, category_id, area_id, base_price, additional_time, store_id, store_id, True))
+        else:
+            cursor.execute("""
+                INSERT INTO hotels (name, category_id, area_id, base_price, additional_time, sort_order, is_active, created_at, updated_at) 
+                VALUES (%s, %s, %s, %s, %s, (SELECT COALESCE(MAX(sort_order), 0) + 1 FROM hotels), %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            """, (name, category_id, area_id, base_price, additional_time, True))
         db.commit()
         return True
     except Exception as e:
@@ -398,82 +356,18 @@ def delete_hotel_by_id(db, hotel_id):
         print(f"ホテル削除エラー: {e}")
         return False
 
-def move_hotel_up(hotel_id):
-    """ホテルの並び順を上に移動"""
+def move_hotel_up(hotel_id, store_id=None):
+    """ホテルの並び順を上に移動（store_id指定時は同じ店舗内で入れ替え）"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order FROM hotels WHERE hotel_id = %s", (hotel_id,))
-        current_hotel = cursor.fetchone()
-        
-        if not current_hotel:
-            return False
-        
-        current_order = current_hotel['sort_order']
-        
-        cursor.execute("""
-            SELECT hotel_id, sort_order FROM hotels 
-            WHERE sort_order < %s 
-            ORDER BY sort_order DESC LIMIT 1
-        """, (current_order,))
-        upper_hotel = cursor.fetchone()
-        
-        if upper_hotel:
-            upper_hotel_id = upper_hotel['hotel_id']
-            upper_order = upper_hotel['sort_order']
-            
-            cursor.execute("UPDATE hotels SET sort_order = %s WHERE hotel_id = %s", (upper_order, hotel_id))
-            cursor.execute("UPDATE hotels SET sort_order = %s WHERE hotel_id = %s", (current_order, upper_hotel_id))
-            
-            db.commit()
-            return True
-        else:
-            return False
-            
+        return move_item('hotels', store_id, hotel_id, 'up')
     except Exception as e:
         print(f"ホテル並び順上移動エラー: {e}")
         return False
 
-def move_hotel_down(hotel_id):
-    """ホテルの並び順を下に移動"""
+def move_hotel_down(hotel_id, store_id=None):
+    """ホテルの並び順を下に移動（store_id指定時は同じ店舗内で入れ替え）"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-        
-        cursor = db.cursor()
-        
-        cursor.execute("SELECT sort_order FROM hotels WHERE hotel_id = %s", (hotel_id,))
-        current_hotel = cursor.fetchone()
-        
-        if not current_hotel:
-            return False
-        
-        current_order = current_hotel['sort_order']
-        
-        cursor.execute("""
-            SELECT hotel_id, sort_order FROM hotels 
-            WHERE sort_order > %s 
-            ORDER BY sort_order ASC LIMIT 1
-        """, (current_order,))
-        lower_hotel = cursor.fetchone()
-        
-        if lower_hotel:
-            lower_hotel_id = lower_hotel['hotel_id']
-            lower_order = lower_hotel['sort_order']
-            
-            cursor.execute("UPDATE hotels SET sort_order = %s WHERE hotel_id = %s", (lower_order, hotel_id))
-            cursor.execute("UPDATE hotels SET sort_order = %s WHERE hotel_id = %s", (current_order, lower_hotel_id))
-            
-            db.commit()
-            return True
-        else:
-            return False
-            
+        return move_item('hotels', store_id, hotel_id, 'down')
     except Exception as e:
         print(f"ホテル並び順下移動エラー: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+LINE Webhook イベントの処理済み記録（line_webhook_events）
+
+LINE はイベントを再送することがあるため（isRedelivery）、webhookEventId を主キーにして
+最初に記録できたワーカーだけがイベントを処理する。テーブルは create_line_webhook_events_table.py で作成。
+
+処理に失敗したイベント（'failed'）と、処理中のまま STALE_PROCESSING_SECONDS を過ぎたイベント
+（ワーカーの停止など）は、再送されたときに改めて処理する。
+"""
+
+# 処理中（'processing'）のまま放置されたとみなす秒数
+STALE_PROCESSING_SECONDS = 300
+
+
+def claim_webhook_event(db, webhook_event_id, event_type):
+    """
+    イベントを処理中として記録（処理済み・他のワーカーが処理中なら False）
+
+    Args:
+        db: データベース接続
+        webhook_event_id: LINE の webhookEventId
+        event_type: イベント種別（'message' など）
+
+    Returns:
+        bool: このワーカーが処理するイベントなら True
+    """
+    cursor = db.cursor()
+    cursor.execute("""
+        INSERT INTO line_webhook_events (webhook_event_id, event_type, received_at, status)
+        VALUES (%s, %s, CURRENT_TIMESTAMP, 'processing')
+        ON CONFLICT (webhook_event_id) DO UPDATE
+        SET status = 'processing', received_at = CURRENT_TIMESTAMP, error = NULL, processed_at = NULL
+        WHERE line_webhook_events.status = 'failed'
+        OR (
+            line_webhook_events.status = 'processing'
+            AND line_webhook_events.received_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+        )
+        RETURNING webhook_event_id
+    """, (webhook_event_id, event_type, STALE_PROCESSING_SECONDS))
+    return cursor.fetchone() is not None
+
+
+def finish_webhook_event(db, webhook_event_id, status, error=None):
+    """イベントの処理結果（'processed' / 'failed'）を記録"""
+    cursor = db.cursor()
+    cursor.execute("""
+        UPDATE line_webhook_events
+        SET status = %s, error = %s, processed_at = CURRENT_TIMESTAMP
+        WHERE webhook_event_id = %s
+    """, (status, error, webhook_event_id))
+
+
+def cleanup_old_webhook_events(db, days=7):
+    """
+    古いイベント記録を削除（LINE の再送は数日以内のため）
+
+    Returns:
+        int: 削除件数
+    """
+    cursor = db.cursor()
+    cursor.execute("""
+        DELETE FROM line_webhook_events
+        WHERE received_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'
+    """, (days,))
+    return cursor.rowcount
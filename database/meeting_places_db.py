@@ -2,6 +2,7 @@
 from datetime import datetime
 from typing import List, Dict
 from database.connection import get_connection
+from database.ordering_db import reorder
 
 # =========================
 # 待ち合わせ場所の管理
@@ -109,22 +110,9 @@ def delete_meeting_place(place_id: int) -> bool:
 
 def reorder_meeting_places(store_id: int, place_ids: List[int]) -> bool:
     """待ち合わせ場所の表示順序を更新"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
     try:
-        for order, place_id in enumerate(place_ids, start=1):
-            cursor.execute("""
-                UPDATE meeting_places
-                SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE place_id = %s AND store_id = %s
-            """, (order, place_id, store_id))
-
-        conn.commit()
+        reorder('meeting_places', store_id, place_ids)
         return True
     except Exception as e:
-        conn.rollback()
         print(f"Error reordering meeting places: {e}")
         return False
-    finally:
-        conn.close()
@@ -1,4 +1,5 @@
 from database.connection import get_db
+from database.ordering_db import move_item
 
 # ==== 指名種類マスタ管理関数 ====
 
@@ -125,106 +126,20 @@ def delete_nomination_type(nomination_type_id):
         print(f"指名種類削除エラー (nomination_type_id: {nomination_type_id}): {e}")
         return False
 
-def move_nomination_type_up(nomination_type_id):
-    """指名種類の並び順を上に移動"""
+def move_nomination_type_up(nomination_type_id, store_id=None):
+    """指名種類の並び順を上に移動（store_id指定時は同じ店舗内で入れ替え）"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-
-        current_nomination = get_nomination_type_by_id(nomination_type_id)
-        if not current_nomination:
-            return False
-
-        current_display_order = current_nomination['display_order']
-        current_store_id = current_nomination['store_id']
-
-        cursor = db.cursor()
-
-        # 同じ店舗内で一つ上の並び順を取得
-        cursor.execute("""
-            SELECT nomination_type_id, display_order
-            FROM nomination_types
-            WHERE display_order < %s AND store_id = %s
-            ORDER BY display_order DESC
-            LIMIT 1
-        """, (current_display_order, current_store_id))
-        result = cursor.fetchone()
-
-        if not result:
-            return False
-
-        prev_nomination_id = result['nomination_type_id']
-        prev_display_order = result['display_order']
-
-        # 並び順を入れ替え
-        cursor.execute("""
-            UPDATE nomination_types
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE nomination_type_id = %s
-        """, (prev_display_order, nomination_type_id))
-
-        cursor.execute("""
-            UPDATE nomination_types
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE nomination_type_id = %s
-        """, (current_display_order, prev_nomination_id))
-
-        db.commit()
-        return True
+        return move_item('nomination_types', store_id, nomination_type_id, 'up')
     except Exception as e:
         print(f"指名種類並び順変更エラー (上移動, nomination_type_id: {nomination_type_id}): {e}")
         import traceback
         traceback.print_exc()
         return False
 
-def move_nomination_type_down(nomination_type_id):
-    """指名種類の並び順を下に移動"""
+def move_nomination_type_down(nomination_type_id, store_id=None):
+    """指名種類の並び順を下に移動（store_id指定時は同じ店舗内で入れ替え）"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-
-        current_nomination = get_nomination_type_by_id(nomination_type_id)
-        if not current_nomination:
-            return False
-
-        current_display_order = current_nomination['display_order']
-        current_store_id = current_nomination['store_id']
-
-        cursor = db.cursor()
-
-        # 同じ店舗内で一つ下の並び順を取得
-        cursor.execute("""
-            SELECT nomination_type_id, display_order
-            FROM nomination_types
-            WHERE display_order > %s AND store_id = %s
-            ORDER BY display_order ASC
-            LIMIT 1
-        """, (current_display_order, current_store_id))
-        result = cursor.fetchone()
-
-        if not result:
-            return False
-
-        next_nomination_id = result['nomination_type_id']
-        next_display_order = result['display_order']
-
-        # 並び順を入れ替え
-        cursor.execute("""
-            UPDATE nomination_types
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE nomination_type_id = %s
-        """, (next_display_order, nomination_type_id))
-
-        cursor.execute("""
-            UPDATE nomination_types
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE nomination_type_id = %s
-        """, (current_display_order, next_nomination_id))
-
-        db.commit()
-        return True
+        return move_item('nomination_types', store_id, nomination_type_id, 'down')
     except Exception as e:
         print(f"指名種類並び順変更エラー (下移動, nomination_type_id: {nomination_type_id}): {e}")
         import traceback
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+マスタテーブル共通の並び順（sort_order / display_order）操作
+
+並び替えはドラッグ&ドロップ後の並び全体を受け取り、UPDATE ... FROM (VALUES ...) の
+1文で更新する。並び順は ORDER_GAP 間隔で振り直すため、後から1件を間に挿入する場合も
+前後の値を書き換えずに済む。
+"""
+from typing import List, Optional
+
+from psycopg import sql
+
+from database.connection import get_db
+
+# 並び順の間隔
+ORDER_GAP = 10
+
+# 並び替え可能なテーブル: キー → (テーブル名, ID列, 並び順列, 店舗別か)
+# 店舗別か は一覧画面の取得範囲に合わせる（コース・割引は全店舗共通の一覧で、store_id=1 で登録される）
+SORTABLE_TABLES = {
+    'courses': ('courses', 'course_id', 'sort_order', False),
+    'course_categories': ('course_categories', 'category_id', 'sort_order', False),
+    'nomination_types': ('nomination_types', 'nomination_type_id', 'display_order', True),
+    'extensions': ('extensions', 'extension_id', 'sort_order', True),
+    'options': ('options', 'option_id', 'sort_order', False),
+    'discounts': ('discounts', 'discount_id', 'sort_order', False),
+    'hotels': ('hotels', 'hotel_id', 'sort_order', True),
+    'areas': ('areas', 'area_id', 'sort_order', True),
+    'point_reasons': ('point_operation_reasons', 'reason_id', 'display_order', True),
+    'shift_types': ('shift_types', 'shift_type_id', 'sort_order', True),
+    'reservation_methods': ('reservation_methods', 'method_id', 'display_order', True),
+    'cancellation_reasons': ('cancellation_reasons', 'reason_id', 'display_order', True),
+    'meeting_places': ('meeting_places', 'place_id', 'display_order', True),
+    'customer_field_options': ('customer_field_options', 'id', 'display_order', True),
+}
+
+# 並び替え時に updated_at も更新するテーブル
+TABLES_WITH_UPDATED_AT = {
+    'reservation_methods', 'cancellation_reasons', 'meeting_places', 'point_reasons', 'nomination_types', 'options'
+}
+
+# 論理削除（is_active = FALSE）した行を一覧に出さないテーブル（1件移動の入れ替え先にしない）
+TABLES_WITH_SOFT_DELETE = {'shift_types'}
+
+
+def _store_condition(alias: str, store_scoped: bool, store_id: Optional[int]):
+    """店舗別テーブルの場合の store_id 条件"""
+    if store_scoped and store_id is not None:
+        return sql.SQL(" AND {}.store_id = {}").format(sql.Identifier(alias), sql.Literal(store_id))
+    return sql.SQL("")
+
+
+def _active_condition(alias: str, table: str):
+    """論理削除するテーブルの場合の is_active 条件"""
+    if table in TABLES_WITH_SOFT_DELETE:
+        return sql.SQL(" AND {}.is_active = TRUE").format(sql.Identifier(alias))
+    return sql.SQL("")
+
+
+def reorder(table: str, store_id: Optional[int], ordered_ids: List[int], db=None) -> int:
+    """
+    並び順を一括更新
+
+    Args:
+        table: SORTABLE_TABLES のキー
+        store_id: 店舗ID（店舗別テーブルの場合、他店舗の行は更新しない）
+        ordered_ids: 表示順に並べたID
+        db: データベース接続（省略時は新規に接続してコミット・クローズする）
+
+    Returns:
+        int: 更新した行数
+    """
+    if table not in SORTABLE_TABLES:
+        raise ValueError(f'並び替えできないテーブルです: {table}')
+    if not ordered_ids:
+        return 0
+
+    table_name, id_column, order_column, store_scoped = SORTABLE_TABLES[table]
+
+    values = sql.SQL(', ').join(
+        sql.SQL("({}, {})").format(sql.Literal(int(item_id)), sql.Literal((index + 1) * ORDER_GAP))
+        for index, item_id in enumerate(ordered_ids)
+    )
+    query = sql.SQL("""
+        UPDATE {table} AS t
+        SET {order_column} = v.new_order{touch_updated_at}
+        FROM (VALUES {values}) AS v(item_id, new_order)
+        WHERE t.{id_column} = v.item_id{store_condition}
+    """).format(
+        table=sql.Identifier(table_name),
+        order_column=sql.Identifier(order_column),
+        touch_updated_at=sql.SQL(", updated_at = CURRENT_TIMESTAMP" if table in TABLES_WITH_UPDATED_AT else ""),
+        values=values,
+        id_column=sql.Identifier(id_column),
+        store_condition=_store_condition('t', store_scoped, store_id)
+    )
+
+    own_connection = db is None
+    if own_connection:
+        db = get_db()
+    try:
+        cursor = db.cursor()
+        cursor.execute(query)
+        updated = cursor.rowcount
+        if own_connection:
+            db.commit()
+        return updated
+    except Exception:
+        if own_connection:
+            db.rollback()
+        raise
+    finally:
+        if own_connection:
+            db.close()
+
+
+def move_item(table: str, store_id: Optional[int], item_id: int, direction: str, db=None) -> bool:
+    """
+    1件を1つ上または下に移動（隣の行と並び順を入れ替える、1文で実行）
+
+    Args:
+        table: SORTABLE_TABLES のキー
+        store_id: 店舗ID（店舗別テーブルの場合、同じ店舗内の行とだけ入れ替える）
+        item_id: 移動する行のID
+        direction: 'up' または 'down'
+
+    Returns:
+        bool: 入れ替えた場合 True（先頭・末尾などで移動先がない場合 False）
+    """
+    if table not in SORTABLE_TABLES:
+        raise ValueError(f'並び替えできないテーブルです: {table}')
+    if direction not in ('up', 'down'):
+        raise ValueError(f'direction は up または down です: {direction}')
+
+    table_name, id_column, order_column, store_scoped = SORTABLE_TABLES[table]
+
+    query = sql.SQL("""
+        WITH current_item AS (
+            SELECT c.{id_column} AS item_id, c.{order_column} AS item_order
+            FROM {table} AS c
+            WHERE c.{id_column} = {item_id}{current_store_condition}
+        ),
+        neighbor AS (
+            SELECT n.{id_column} AS item_id, n.{order_column} AS item_order
+            FROM {table} AS n, current_item
+            WHERE n.{order_column} {comparison} current_item.item_order{neighbor_store_condition}{neighbor_active_condition}
+            ORDER BY n.{order_column} {sort_direction}
+            LIMIT 1
+        )
+        UPDATE {table} AS t
+        SET {order_column} = CASE
+            WHEN t.{id_column} = current_item.item_id THEN neighbor.item_order
+            ELSE current_item.item_order
+        END
+        FROM current_item, neighbor
+        WHERE t.{id_column} IN (current_item.item_id, neighbor.item_id)
+    """).format(
+        table=sql.Identifier(table_name),
+        id_column=sql.Identifier(id_column),
+        order_column=sql.Identifier(order_column),
+        item_id=sql.Literal(int(item_id)),
+        comparison=sql.SQL('<' if direction == 'up' else '>'),
+        sort_direction=sql.SQL('DESC' if direction == 'up' else 'ASC'),
+        current_store_condition=_store_condition('c', store_scoped, store_id),
+        neighbor_store_condition=_store_condition('n', store_scoped, store_id),
+        neighbor_active_condition=_active_condition('n', table)
+    )
+
+    own_connection = db is None
+    if own_connection:
+        db = get_db()
+    try:
+        cursor = db.cursor()
+        cursor.execute(query)
+        moved = cursor.rowcount == 2
+        if own_connection:
+            db.commit()
+        return moved
+    except Exception:
+        if own_connection:
+            db.rollback()
+        raise
+    finally:
+        if own_connection:
+            db.close()
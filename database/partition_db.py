@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+履歴テーブルの月単位パーティション（reservations / pickup_records / money_records / point_history）
+
+partition_history_tables.py で各テーブルをパーティションキーの月ごとの範囲パーティション
+（{テーブル}_pYYYYMM）に移行したあと、メンテナンスジョブ（scheduler.py）で
+    - PARTITION_MONTHS_AHEAD か月先までのパーティションを作成
+    - 保持期間を過ぎた月のパーティションを切り離して ARCHIVE_SCHEMA に移動（行の DELETE はしない）
+を行う。パーティションのない月の行は {テーブル}_default に入り、その月のパーティションを作るときに移す。
+
+営業日・日付での絞り込み（business_date = %s など）は、その月のパーティションだけを読む。
+"""
+import logging
+import re
+from datetime import date
+
+from database.daily_sales_db import money_business_date_sql
+
+logger = logging.getLogger(__name__)
+
+# テーブル → パーティションの設定
+#   key: パーティションキー（月の範囲で分ける列）
+#   id: 主キーの列（主キーは (id, key) になる）
+#   retention_days: この日数より前の月を切り離す（None は切り離さない）
+#   closed_key: 行の営業日のSQL式（別名 t）。指定時は営業日締め（business_day_closes）が済んだ行だけのパーティションを切り離す
+PARTITIONED_TABLES = {
+    'reservations': {'key': 'business_date', 'id': 'reservation_id', 'retention_days': None, 'closed_key': None},
+    'pickup_records': {'key': 'created_date', 'id': 'record_id', 'retention_days': 7, 'closed_key': None},
+    'money_records': {'key': 'created_date', 'id': 'id', 'retention_days': 7, 'closed_key': money_business_date_sql('t')},
+    'point_history': {'key': 'created_at', 'id': 'id', 'retention_days': None, 'closed_key': None},
+}
+
+# 何か月先までパーティションを作っておくか
+PARTITION_MONTHS_AHEAD = 3
+
+# 切り離したパーティションの移動先スキーマ（保管・削除は運用で判断する）
+ARCHIVE_SCHEMA = 'archive'
+
+_PARTITION_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(value):
+    """月初日"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """月初日 value の months か月後の月初日"""
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def get_partitioned_tables(cursor):
+    """PARTITIONED_TABLES のうち、パーティションテーブルに移行済みのテーブル"""
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = ANY(%s)
+            AND c.relnamespace = 'public'::regnamespace
+    """, (list(PARTITIONED_TABLES),))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def list_month_partitions(cursor, table):
+    """
+    月のパーティション一覧（デフォルトパーティションを除く、古い順）
+
+    Returns:
+        list: [(パーティション名, 月初日, 翌月初日), ...]
+    """
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+    """, (table,))
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _PARTITION_BOUND.search(bound or '')
+        if not match:
+            continue
+        lower, upper = (date.fromisoformat(value[:10]) for value in match.groups())
+        partitions.append((name, lower, upper))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_month_partition(cursor, table, month):
+    """
+    1か月分のパーティションを作成（既にあれば何もしない）
+
+    デフォルトパーティションにその月の行があれば、新しいパーティションに移してから付け替える。
+
+    Returns:
+        bool: 作成した場合 True
+    """
+    key = PARTITIONED_TABLES[table]['key']
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s)", (name,))
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    lower = month.isoformat()
+    upper = add_months(month, 1).isoformat()
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM {table}_default
+            WHERE {key} >= %s AND {key} < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """, (lower, upper))
+    if cursor.rowcount:
+        logger.info("デフォルトパーティションの行を移しました", extra={'partition': name, 'rows': cursor.rowcount})
+    # 範囲は日付の定数（DDL にはパラメータを使えない）
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+    return True
+
+
+def ensure_partitions(conn, tables, months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+    """
+    今月から months_ahead か月先までのパーティションを作成（テーブルごとにコミット）
+
+    Args:
+        conn: get_connection() の接続
+        tables: 対象のテーブル（get_partitioned_tables の結果）
+
+    Returns:
+        dict: テーブル → 作成したパーティション名のリスト
+    """
+    current = month_start(today or date.today())
+    created = {}
+    for table in sorted(tables):
+        cursor = conn.cursor()
+        try:
+            names = []
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if create_month_partition(cursor, table, month):
+                    names.append(partition_name(table, month))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        if names:
+            logger.info("パーティションを作成しました", extra={'table': table, 'partitions': names})
+            created[table] = names
+    return created
+
+
+def _has_unclosed_rows(cursor, partition, closed_key):
+    cursor.execute(f"""
+        SELECT EXISTS (
+            SELECT 1 FROM {partition} t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM business_day_closes b WHERE b.business_date = {closed_key}
+            )
+        )
+    """)
+    return cursor.fetchone()[0]
+
+
+def detach_expired_partitions(conn, tables, today=None):
+    """
+    保持期間を過ぎた月（翌月初日 <= 今日 - retention_days）のパーティションを切り離して ARCHIVE_SCHEMA に移動
+
+    切り離したパーティションは {ARCHIVE_SCHEMA}.{パーティション名} として残る（削除はしない）。
+
+    Returns:
+        dict: テーブル → 切り離したパーティション名のリスト
+    """
+    today = today or date.today()
+    archived = {}
+    for table in sorted(tables):
+        config = PARTITIONED_TABLES[table]
+        if config['retention_days'] is None:
+            continue
+        cutoff = date.fromordinal(today.toordinal() - config['retention_days'])
+
+        cursor = conn.cursor()
+        try:
+            names = []
+            for name, _, upper in list_month_partitions(cursor, table):
+                if upper > cutoff:
+                    break
+                if config['closed_key'] and _has_unclosed_rows(cursor, name, config['closed_key']):
+                    logger.warning("未締めの営業日があるためパーティションを切り離しません", extra={'partition': name})
+                    continue
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+                conn.commit()
+                names.append(name)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        if names:
+            logger.info("保持期間を過ぎたパーティションを切り離しました", extra={'table': table, 'partitions': names})
+            archived[table] = names
+    return archived
@@ -7,14 +7,19 @@ if sys.platform == 'win32':
     os.environ['PYTHONUTF8'] = '1'
 
 from database.connection import get_db
+from database.daily_sales_db import money_business_date_sql, reclose_business_day
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+import logging
 
 # 環境変数を読み込む
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def get_db_connection(store_code):
     """データベース接続を取得"""
     conn = psycopg.connect(
@@ -24,157 +29,78 @@ def get_db_connection(store_code):
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
     )
-    return conn
+    return instrument_connection(conn, 'pickup_db')
 
 # ==== 送迎記録関連の関数 ====
 
 def register_pickup_record(db, type, cast_id=None, hotel_id=None, course_id=None, entry_time=None, content=None, nomination_type=None, record_date=None):
-    """送迎記録を登録する関数"""
+    """
+    送迎記録を登録する関数
+
+    record_id は pickup_records のシーケンスで採番する（reseed_id_sequences.py）。
+    pickup の場合は入室・退室の2行を1つのINSERT文で登録する。
+    """
     try:
-        print(f"register_pickup_record started with parameters:")
-        print(f"   type: {type}")
-        print(f"   cast_id: {cast_id}")
-        print(f"   hotel_id: {hotel_id}")
-        print(f"   course_id: {course_id}")
-        print(f"   entry_time: {entry_time}")
-        print(f"   content: {content}")
-        print(f"   nomination_type: {nomination_type}")
-        print(f"   record_date: {record_date}")
-        
         cursor = db.cursor()
-        print("Database cursor created")
-        
-        print("Getting max record_id...")
-        cursor.execute("SELECT COALESCE(MAX(record_id), 0) + 1 as next_id FROM pickup_records")
-        result = cursor.fetchone()
-        print(f"   Query result type: {result.__class__.__name__}")
-        print(f"   Query result: {result}")
-        
-        new_record_id = result['next_id']
-        print(f"New record_id: {new_record_id}")
-        
-        # record_dateの判定を変更
+
+        # record_date未指定時はDB側のCURRENT_DATEを使う
         use_current_date_sql = (record_date is None or record_date == 'CURRENT_DATE')
-        
-        if use_current_date_sql:
-            actual_date = datetime.now().strftime('%Y-%m-%d')
-            print(f"Using CURRENT_DATE (actual: {actual_date})")
-        else:
-            actual_date = str(record_date)
-            print(f"Using specified date: {actual_date}")
-        
+        actual_date = datetime.now().strftime('%Y-%m-%d') if use_current_date_sql else str(record_date)
+        created_date = None if use_current_date_sql else str(record_date)
+
+        # entry_timeをTIMESTAMP形式に変換
+        entry_time_full = actual_date + ' ' + entry_time
+
         if type == 'pickup':
-            print("Processing pickup registration...")
-            
-            # entry_timeをTIMESTAMP形式に変換
-            entry_time_full = actual_date + ' ' + entry_time
-            print(f"   Entry time (TIMESTAMP): {entry_time_full}")
-            
-            print("Creating entry record...")
-            if use_current_date_sql:
-                cursor.execute(
-                    """INSERT INTO pickup_records 
-                       (record_id, type, cast_id, hotel_id, course_id, entry_time, is_entry, created_date, nomination_type) 
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_DATE, %s)""",
-                    (new_record_id, type, cast_id, hotel_id, course_id, entry_time_full, True, nomination_type)
-                )
-            else:
-                cursor.execute(
-                    """INSERT INTO pickup_records 
-                       (record_id, type, cast_id, hotel_id, course_id, entry_time, is_entry, created_date, nomination_type) 
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                    (new_record_id, type, cast_id, hotel_id, course_id, entry_time_full, True, record_date, nomination_type)
-                )
-            print("Entry record created")
-            
-            print("Getting course duration...")
+            rows = [(type, cast_id, hotel_id, course_id, entry_time_full, None, True, created_date, nomination_type)]
+
+            # 退室レコード（コース時間から退室時刻を計算）
             cursor.execute("SELECT time_minutes FROM courses WHERE course_id = %s", (course_id,))
             course_result = cursor.fetchone()
-            print(f"   Course query result: {course_result}")
-            
+
             if course_result:
-                course_minutes = course_result['time_minutes']
-                print(f"Course duration: {course_minutes} minutes")
-                
-                print("Calculating exit time...")
                 entry_dt = datetime.strptime(entry_time, '%H:%M')
-                exit_dt = entry_dt + timedelta(minutes=course_minutes)
-                
-                # exit_timeもTIMESTAMP形式で作成
+                exit_dt = entry_dt + timedelta(minutes=course_result['time_minutes'])
                 exit_time = actual_date + ' ' + exit_dt.strftime('%H:%M')
-                
-                print(f"   Entry time: {entry_time}")
-                print(f"   Exit time (TIMESTAMP): {exit_time}")
-                
-                print("Creating exit record...")
-                exit_record_id = new_record_id + 1
-                print(f"   Exit record_id: {exit_record_id}")
-                
-                if use_current_date_sql:
-                    cursor.execute(
-                        """INSERT INTO pickup_records 
-                           (record_id, type, cast_id, hotel_id, course_id, entry_time, exit_time, is_entry, created_date, nomination_type) 
-                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_DATE, %s)""",
-                        (exit_record_id, type, cast_id, hotel_id, course_id, entry_time_full, exit_time, False, nomination_type)
-                    )
-                else:
-                    cursor.execute(
-                        """INSERT INTO pickup_records 
-                           (record_id, type, cast_id, hotel_id, course_id, entry_time, exit_time, is_entry, created_date, nomination_type) 
-                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                        (exit_record_id, type, cast_id, hotel_id, course_id, entry_time_full, exit_time, False, record_date, nomination_type)
-                    )
-                print("Exit record created")
-                print(f"   Entry time stored: {entry_time_full}")
-                print(f"   Exit time stored: {exit_time}")
+                rows.append((type, cast_id, hotel_id, course_id, entry_time_full, exit_time, False, created_date, nomination_type))
             else:
-                print("Course not found - skipping exit record creation")
-            
+                logger.warning("Course not found - skipping exit record creation", extra={'course_id': course_id})
+
+            values = ', '.join(
+                ['(%s, %s, %s, %s, %s, %s, %s, COALESCE(%s::date, CURRENT_DATE), %s)'] * len(rows)
+            )
+            cursor.execute(
+                f"""INSERT INTO pickup_records 
+                    (type, cast_id, hotel_id, course_id, entry_time, exit_time, is_entry, created_date, nomination_type) 
+                    VALUES {values}
+                    RETURNING record_id""",
+                [value for row in rows for value in row]
+            )
+            record_ids = [row['record_id'] for row in cursor.fetchall()]
+
         elif type == 'other':
-            print("Processing other type registration...")
-            
-            # entry_timeをTIMESTAMP形式に変換
-            entry_time_full = actual_date + ' ' + entry_time
-            print(f"   Entry time (TIMESTAMP): {entry_time_full}")
-            
-            if use_current_date_sql:
-                print("   Using CURRENT_DATE")
-                cursor.execute(
-                    """INSERT INTO pickup_records 
-                       (record_id, type, content, entry_time, is_entry, created_date) 
-                       VALUES (%s, %s, %s, %s, %s, CURRENT_DATE)""",
-                    (new_record_id, type, content, entry_time_full, True)
-                )
-            else:
-                print(f"   Using specific date: {record_date}")
-                cursor.execute(
-                    """INSERT INTO pickup_records 
-                       (record_id, type, content, entry_time, is_entry, created_date) 
-                       VALUES (%s, %s, %s, %s, %s, %s)""",
-                    (new_record_id, type, content, entry_time_full, True, record_date)
-                )
-            print("Other type record created")
-        
-        print("Committing transaction...")
+            cursor.execute(
+                """INSERT INTO pickup_records 
+                   (type, content, entry_time, is_entry, created_date) 
+                   VALUES (%s, %s, %s, %s, COALESCE(%s::date, CURRENT_DATE))
+                   RETURNING record_id""",
+                (type, content, entry_time_full, True, created_date)
+            )
+            record_ids = [cursor.fetchone()['record_id']]
+
+        else:
+            record_ids = []
+
         db.commit()
-        print("register_pickup_record completed successfully")
+        logger.info("送迎記録登録", extra={'type': type, 'record_ids': record_ids})
         return True
         
     except Exception as e:
-        print(f"Error in register_pickup_record:")
-        print(f"   Exception: {str(e)}")
-        
-        import traceback
-        print("Full traceback:")
-        traceback.print_exc()
-        
-        print("Rolling back transaction...")
+        logger.exception("Error in register_pickup_record: %s", e)
         try:
             db.rollback()
-            print("Rollback completed")
         except Exception as rollback_error:
-            print(f"Rollback failed: {rollback_error}")
-        
+            logger.error("Rollback failed: %s", rollback_error)
         return False
 
 def get_pickup_records_by_date(db, date=None):
@@ -282,7 +208,7 @@ def update_pickup_record(db, record_id, field, value):
         return True
         
     except Exception as e:
-        print(f"Error in update_pickup_record: {e}")
+        logger.error("Error in update_pickup_record: %s", e)
         return False
 
 def delete_pickup_record(db, record_id):
@@ -293,7 +219,7 @@ def delete_pickup_record(db, record_id):
         db.commit()
         return cursor.rowcount > 0
     except Exception as e:
-        print(f"Error deleting pickup record: {e}")
+        logger.error("Error deleting pickup record: %s", e)
         db.rollback()
         return False
 
@@ -348,15 +274,15 @@ def cleanup_old_pickup_records(db, days=7):
     try:
         cursor = db.cursor()
         cursor.execute(
-            "DELETE FROM pickup_records WHERE created_date < CURRENT_DATE - INTERVAL '%s days'", 
+            "DELETE FROM pickup_records WHERE created_date < CURRENT_DATE - %s * INTERVAL '1 day'",
             (days,)
         )
         db.commit()
         deleted_count = cursor.rowcount
-        print(f"古い送迎記録を{deleted_count}件削除しました")
+        logger.info("古い送迎記録を%d件削除しました", deleted_count)
         return True
     except Exception as e:
-        print(f"Error in cleanup_old_pickup_records: {e}")
+        logger.error("Error in cleanup_old_pickup_records: %s", e)
         return False
 
 # ==== 金銭管理関連の関数 ====
@@ -364,20 +290,18 @@ def register_money_record(db, cast_id, exit_time, received_amount, change_amount
     """金銭記録を登録"""
     try:
         cursor = db.cursor()
-        cursor.execute("SELECT COALESCE(MAX(record_id), 0) + 1 as next_id FROM money_records")
-        result = cursor.fetchone()
-        new_record_id = result['next_id']
-        
+        # record_id は送迎記録から作る金銭記録（routes/money.register_change）と同じ列のため、
+        # 値が重ならないよう pickup_records と同じシーケンスで採番する
         cursor.execute(
             """INSERT INTO money_records 
                (record_id, cast_id, exit_time, received_amount, change_amount, payment_method, staff_id, created_date) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_DATE)""",
-            (new_record_id, cast_id, exit_time, received_amount, change_amount, payment_method, staff_id)
+               VALUES (nextval(pg_get_serial_sequence('pickup_records', 'record_id')), %s, %s, %s, %s, %s, %s, CURRENT_DATE)""",
+            (cast_id, exit_time, received_amount, change_amount, payment_method, staff_id)
         )
         db.commit()
         return True
     except Exception as e:
-        print(f"Error in register_money_record: {e}")
+        logger.error("Error in register_money_record: %s", e)
         return False
 
 def get_money_records_by_date(db, date=None):
@@ -412,30 +336,34 @@ def get_money_records_by_date(db, date=None):
     return cursor.fetchall()
 
 def delete_money_record_by_id(db, record_id):
-    """金銭記録を削除"""
+    """金銭記録を削除（締め済みの営業日の記録なら daily_sales も集計し直す）"""
     try:
         cursor = db.cursor()
-        cursor.execute("DELETE FROM money_records WHERE record_id = %s", (record_id,))
+        cursor.execute(f"DELETE FROM money_records m WHERE m.record_id = %s RETURNING {money_business_date_sql()} AS business_date", (record_id,))
+        deleted_dates = {row['business_date'] for row in cursor.fetchall()}
         db.commit()
+        for business_date in deleted_dates:
+            reclose_business_day(business_date)
         return True
     except Exception as e:
-        print(f"Error in delete_money_record: {e}")
+        logger.error("Error in delete_money_record: %s", e)
         return False
 
 def cleanup_old_money_records(db, days=7):
-    """古い金銭記録を自動削除（7日以上前）"""
+    """古い金銭記録を自動削除（7日以上前、締め済みで daily_sales に集計済みの営業日のみ）"""
     try:
         cursor = db.cursor()
-        cursor.execute(
-            "DELETE FROM money_records WHERE created_date < CURRENT_DATE - INTERVAL '%s days'", 
-            (days,)
-        )
+        cursor.execute(f"""
+            DELETE FROM money_records m
+            WHERE m.created_date < CURRENT_DATE - %s * INTERVAL '1 day'
+            AND {money_business_date_sql()} IN (SELECT business_date FROM business_day_closes)
+        """, (days,))
         db.commit()
         deleted_count = cursor.rowcount
-        print(f"古い金銭記録を{deleted_count}件削除しました")
+        logger.info("古い金銭記録を%d件削除しました", deleted_count)
         return True
     except Exception as e:
-        print(f"Error in cleanup_old_money_records: {e}")
+        logger.error("Error in cleanup_old_money_records: %s", e)
         return False
 
 def get_money_summary_by_cast(db, date=None):
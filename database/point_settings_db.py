@@ -3,6 +3,7 @@
 ポイント設定関連のデータベース操作
 """
 from database.connection import get_db
+from database.ordering_db import move_item
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -401,111 +402,21 @@ def delete_point_reason(store_id, reason_id):
 
 def move_point_reason_up(store_id, reason_id):
     """ポイント操作理由の並び順を上げる"""
-    db = get_db()
     try:
-        # 現在の項目を取得
-        current = db.execute("""
-            SELECT display_order
-            FROM point_operation_reasons
-            WHERE store_id = %s AND reason_id = %s
-        """, (store_id, reason_id)).fetchone()
-
-        if not current or current['display_order'] == 0:
-            return False  # 既に一番上
-
-        current_order = current['display_order']
-
-        # 1つ上の項目を取得
-        prev = db.execute("""
-            SELECT reason_id
-            FROM point_operation_reasons
-            WHERE store_id = %s AND display_order = %s
-        """, (store_id, current_order - 1)).fetchone()
-
-        if not prev:
-            return False
-
-        # 順序を入れ替え
-        db.execute("""
-            UPDATE point_operation_reasons
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE store_id = %s AND reason_id = %s
-        """, (current_order, store_id, prev['reason_id']))
-
-        db.execute("""
-            UPDATE point_operation_reasons
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE store_id = %s AND reason_id = %s
-        """, (current_order - 1, store_id, reason_id))
-
-        db.commit()
-        return True
+        return move_item('point_reasons', store_id, reason_id, 'up')
     except Exception as e:
-        db.rollback()
         print(f"Error moving point reason up: {e}")
         import traceback
         traceback.print_exc()
         return False
-    finally:
-        db.close()
 
 
 def move_point_reason_down(store_id, reason_id):
     """ポイント操作理由の並び順を下げる"""
-    db = get_db()
     try:
-        # 現在の項目を取得
-        current = db.execute("""
-            SELECT display_order
-            FROM point_operation_reasons
-            WHERE store_id = %s AND reason_id = %s
-        """, (store_id, reason_id)).fetchone()
-
-        if not current:
-            return False
-
-        current_order = current['display_order']
-
-        # 最大の display_order を取得
-        max_order_result = db.execute("""
-            SELECT MAX(display_order) as max_order
-            FROM point_operation_reasons
-            WHERE store_id = %s
-        """, (store_id,)).fetchone()
-
-        if current_order >= max_order_result['max_order']:
-            return False  # 既に一番下
-
-        # 1つ下の項目を取得
-        next_item = db.execute("""
-            SELECT reason_id
-            FROM point_operation_reasons
-            WHERE store_id = %s AND display_order = %s
-        """, (store_id, current_order + 1)).fetchone()
-
-        if not next_item:
-            return False
-
-        # 順序を入れ替え
-        db.execute("""
-            UPDATE point_operation_reasons
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE store_id = %s AND reason_id = %s
-        """, (current_order, store_id, next_item['reason_id']))
-
-        db.execute("""
-            UPDATE point_operation_reasons
-            SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE store_id = %s AND reason_id = %s
-        """, (current_order + 1, store_id, reason_id))
-
-        db.commit()
-        return True
+        return move_item('point_reasons', store_id, reason_id, 'down')
     except Exception as e:
-        db.rollback()
         print(f"Error moving point reason down: {e}")
         import traceback
         traceback.print_exc()
         return False
-    finally:
-        db.close()
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+全店舗横断の売上レポート（オーナー用）
+
+日次・週次・月次の売上・予約件数・キャンセル率・キャスト報酬を、指標ごとに
+全店舗まとめて1本の GROUP BY クエリで集計する。
+
+締め済みの営業日は日次集計（daily_sales）から、未締めの営業日だけ予約テーブルから集計する。
+営業日が終わった期間（締め済みの期間）の集計結果はプロセス内にキャッシュし、当日を含む期間だけを
+毎回集計する。締め済みの営業日の予約が後から修正された場合は、その書き込みと同じトランザクションで
+daily_sales を集計し直し（daily_sales_db.reclose_if_closed）、営業日のバージョン（availability_versions）を上げる。
+キャッシュはこのバージョンが変わったら破棄し、REPORT_CACHE_TTL_SECONDS を過ぎたものも集計し直す。
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from database.connection import DB_PATHS, get_connection, get_display_name, get_store_id
+from database.availability_db import EXCLUDED_RESERVATION_STATUSES, get_day_version_totals
+from database.daily_sales_db import get_current_business_date, query_rollup_metrics
+
+REPORT_PERIODS = ('day', 'week', 'month')
+
+# 期間を指定しなかった場合に表示する件数
+DEFAULT_PERIOD_COUNTS = {
+    'day': 14,
+    'week': 8,
+    'month': 6
+}
+
+# 締め済みの期間の集計結果をキャッシュする秒数・件数の上限（超えたら古いものから破棄）
+REPORT_CACHE_TTL_SECONDS = 600
+REPORT_CACHE_MAX_ENTRIES = 256
+
+# (期間種別, 期間の開始日) → (キャッシュした時刻, 期間のバージョン, {store_id: 集計値})（締め済みの期間のみ）
+_closed_period_cache: 'OrderedDict[Tuple[str, date], Tuple[float, Optional[int], Dict[int, Dict]]]' = OrderedDict()
+_closed_period_cache_lock = threading.Lock()
+
+
+def get_report_stores() -> List[Dict]:
+    """レポート対象の店舗一覧"""
+    return [
+        {'store_id': get_store_id(store_code), 'store_code': store_code, 'store_name': get_display_name(store_code)}
+        for store_code in DB_PATHS
+    ]
+
+
+def period_start(period: str, target: date) -> date:
+    """target を含む期間の開始日（週は月曜始まり）"""
+    if period == 'day':
+        return target
+    if period == 'week':
+        return target - timedelta(days=target.weekday())
+    return target.replace(day=1)
+
+
+def period_end(period: str, start: date) -> date:
+    """期間の最終日"""
+    if period == 'day':
+        return start
+    if period == 'week':
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def iter_period_starts(period: str, date_from: date, date_to: date) -> List[date]:
+    """date_from 〜 date_to に含まれる期間の開始日一覧"""
+    starts = []
+    current = period_start(period, date_from)
+    while current <= date_to:
+        starts.append(current)
+        current = period_end(period, current) + timedelta(days=1)
+    return starts
+
+
+def _empty_metrics() -> Dict:
+    return {
+        'sales': 0,
+        'reservation_count': 0,
+        'cancelled_count': 0,
+        'cancellation_rate': 0.0,
+        'cast_payout': 0
+    }
+
+
+def _query_period_metrics(cursor, period: str, date_from: date, date_to: date) -> Dict[Tuple[date, int], Dict]:
+    """
+    date_from 〜 date_to の期間別・店舗別の集計（指標ごとに1クエリ）
+
+    締め済みの営業日は daily_sales から、それ以外は reservations から集計して合算する。
+
+    Returns:
+        dict: (期間の開始日, store_id) → 集計値
+    """
+    metrics: Dict[Tuple[date, int], Dict] = {}
+
+    def bucket(period_date, store_id):
+        key = (period_date, store_id)
+        if key not in metrics:
+            metrics[key] = _empty_metrics()
+        return metrics[key]
+
+    # 締め済みの営業日（日次集計）
+    for key, rollup in query_rollup_metrics(cursor, period, date_from, date_to).items():
+        values = bucket(*key)
+        for name, value in rollup.items():
+            values[name] += value
+
+    # 未締めの営業日: 売上・予約件数・キャンセル件数
+    cursor.execute("""
+        SELECT
+            date_trunc(%s, r.business_date::timestamp)::date AS period_start,
+            r.store_id,
+            COALESCE(SUM(r.total_amount) FILTER (WHERE r.status <> ALL(%s)), 0) AS sales,
+            COUNT(*) AS reservation_count,
+            COUNT(*) FILTER (WHERE r.status = ANY(%s)) AS cancelled_count
+        FROM reservations r
+        WHERE r.business_date BETWEEN %s AND %s
+        AND NOT EXISTS (SELECT 1 FROM business_day_closes bdc WHERE bdc.business_date = r.business_date)
+        GROUP BY 1, 2
+    """, (period, list(EXCLUDED_RESERVATION_STATUSES), list(EXCLUDED_RESERVATION_STATUSES), date_from, date_to))
+    for row_period, store_id, sales, reservation_count, cancelled_count in cursor.fetchall():
+        values = bucket(row_period, store_id)
+        values['sales'] += int(sales)
+        values['reservation_count'] += reservation_count
+        values['cancelled_count'] += cancelled_count
+
+    # 未締めの営業日: キャスト報酬（コースバック + 指名バック + オプションバック）
+    cursor.execute("""
+        SELECT
+            date_trunc(%s, r.business_date::timestamp)::date AS period_start,
+            r.store_id,
+            COALESCE(SUM(
+                COALESCE(co.cast_back_amount, 0)
+                + COALESCE(nt.back_amount, 0)
+                + COALESCE(ob.option_back, 0)
+            ), 0) AS cast_payout
+        FROM reservations r
+        LEFT JOIN courses co ON r.course_id = co.course_id
+        LEFT JOIN nomination_types nt
+            ON r.nomination_type_id = nt.nomination_type_id AND r.store_id = nt.store_id
+        LEFT JOIN (
+            SELECT ro.reservation_id, SUM(ro.cast_back_amount) AS option_back
+            FROM reservation_options ro
+            JOIN reservations rr ON rr.reservation_id = ro.reservation_id
+            WHERE rr.business_date BETWEEN %s AND %s
+            GROUP BY ro.reservation_id
+        ) ob ON ob.reservation_id = r.reservation_id
+        WHERE r.business_date BETWEEN %s AND %s
+        AND r.status <> ALL(%s)
+        AND NOT EXISTS (SELECT 1 FROM business_day_closes bdc WHERE bdc.business_date = r.business_date)
+        GROUP BY 1, 2
+    """, (period, date_from, date_to, date_from, date_to, list(EXCLUDED_RESERVATION_STATUSES)))
+    for row_period, store_id, cast_payout in cursor.fetchall():
+        bucket(row_period, store_id)['cast_payout'] += int(cast_payout)
+
+    for values in metrics.values():
+        if values['reservation_count']:
+            values['cancellation_rate'] = round(values['cancelled_count'] / values['reservation_count'] * 100, 1)
+
+    return metrics
+
+
+def _period_versions(cursor, period: str, starts: List[date]) -> Dict[date, Optional[int]]:
+    """期間ごとのバージョン（期間内の営業日のバージョン合計、テーブル未作成の場合は None）"""
+    totals = get_day_version_totals(cursor, starts[0], period_end(period, starts[-1]))
+    if totals is None:
+        return {start: None for start in starts}
+    versions = {start: 0 for start in starts}
+    for business_date, version_total in totals.items():
+        versions[period_start(period, business_date)] += version_total
+    return versions
+
+
+def get_owner_report(period: str, date_from: date, date_to: date) -> Dict:
+    """
+    全店舗の期間別レポートを取得
+
+    Args:
+        period: 'day' / 'week' / 'month'
+        date_from: 開始営業日
+        date_to: 終了営業日（この日を含む）
+
+    Returns:
+        dict: {'period', 'date_from', 'date_to', 'stores', 'periods': [...]}
+    """
+    if period not in REPORT_PERIODS:
+        raise ValueError(f'period は {", ".join(REPORT_PERIODS)} のいずれかです: {period}')
+    if date_from > date_to:
+        raise ValueError('開始日が終了日より後になっています')
+
+    stores = get_report_stores()
+    current_business_date = get_current_business_date()
+    starts = iter_period_starts(period, date_from, date_to)
+
+    results: Dict[date, Dict[int, Dict]] = {}
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            versions = _period_versions(cursor, period, starts)
+
+            now = time.monotonic()
+            with _closed_period_cache_lock:
+                for start in starts:
+                    cached = _closed_period_cache.get((period, start))
+                    if cached is None:
+                        continue
+                    cached_at, version, per_store = cached
+                    if now - cached_at < REPORT_CACHE_TTL_SECONDS and version == versions[start]:
+                        _closed_period_cache.move_to_end((period, start))
+                        results[start] = per_store
+                    else:
+                        del _closed_period_cache[(period, start)]
+
+            missing = [start for start in starts if start not in results]
+            metrics = {}
+            if missing:
+                metrics = _query_period_metrics(cursor, period, missing[0], period_end(period, missing[-1]))
+    finally:
+        conn.close()
+
+    for start in missing:
+        per_store = {
+            store['store_id']: metrics.get((start, store['store_id']), _empty_metrics())
+            for store in stores
+        }
+        results[start] = per_store
+        # 営業日が終わった期間はキャッシュする（バージョンが変わるか期限を過ぎるまで）
+        if period_end(period, start) < current_business_date:
+            with _closed_period_cache_lock:
+                _closed_period_cache[(period, start)] = (now, versions[start], per_store)
+                _closed_period_cache.move_to_end((period, start))
+                while len(_closed_period_cache) > REPORT_CACHE_MAX_ENTRIES:
+                    _closed_period_cache.popitem(last=False)
+
+    periods = []
+    for start in starts:
+        per_store = results[start]
+        total = _empty_metrics()
+        for values in per_store.values():
+            for key in ('sales', 'reservation_count', 'cancelled_count', 'cast_payout'):
+                total[key] += values[key]
+        if total['reservation_count']:
+            total['cancellation_rate'] = round(total['cancelled_count'] / total['reservation_count'] * 100, 1)
+
+        periods.append({
+            'period_start': start.strftime('%Y-%m-%d'),
+            'period_end': period_end(period, start).strftime('%Y-%m-%d'),
+            'closed': period_end(period, start) < current_business_date,
+            'stores': {str(store_id): values for store_id, values in per_store.items()},
+            'total': total
+        })
+
+    return {
+        'period': period,
+        'date_from': date_from.strftime('%Y-%m-%d'),
+        'date_to': date_to.strftime('%Y-%m-%d'),
+        'stores': stores,
+        'periods': periods
+    }
+
+
+def get_default_report_range(period: str) -> Tuple[date, date]:
+    """期間を指定しなかった場合の表示範囲（当日を含む直近 DEFAULT_PERIOD_COUNTS 期間）"""
+    date_to = get_current_business_date()
+    start = period_start(period, date_to)
+    for _ in range(DEFAULT_PERIOD_COUNTS[period] - 1):
+        start = period_start(period, start - timedelta(days=1))
+    return start, date_to
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+予約登録画面のマスタデータ一括取得
+
+予約登録画面は読み込み時にキャスト・コース・ホテルなど13種類のマスタを使う。
+それぞれ別APIで取得すると13リクエストになるため、1リクエストでまとめて返す。
+
+キャッシュ判定には master_data_version テーブルのバージョン番号を使う。
+対象テーブルが変更されるとトリガーでバージョンが上がる
+（create_master_data_version.py で作成）。
+"""
+import json
+import threading
+from typing import Dict, Optional, Tuple
+
+from database.connection import get_db
+from database.cast_db import get_all_casts
+from database.course_db import get_all_courses
+from database.hotel_db import get_all_areas, get_all_hotels_with_details
+from database.extension_db import get_all_extensions
+from database.discount_db import get_all_discounts
+from database.nominate_db import get_all_nomination_types
+from database.db_access import get_all_options
+from database.reservation_db import get_all_cancellation_reasons, get_all_reservation_methods
+from database.meeting_places_db import get_all_meeting_places
+from database.settings_db import get_card_fee_rate
+from database.user_db import get_reservation_staff
+
+# 変更時に master_data_version を上げるテーブル（予約登録画面で使うマスタ）
+MASTER_DATA_TABLES = (
+    'casts', 'courses', 'course_categories', 'nomination_types', 'extensions',
+    'options', 'discounts', 'cancellation_reasons', 'reservation_methods',
+    'meeting_places', 'hotels', 'categories', 'areas', 'users', 'store_settings'
+)
+
+# 店舗IDごとの (バージョン, 生成済みペイロード)
+_bootstrap_cache: Dict[int, Tuple[int, Dict]] = {}
+_bootstrap_cache_lock = threading.Lock()
+
+
+def get_master_data_version(db) -> Optional[int]:
+    """
+    マスタデータのバージョン番号を取得
+
+    Returns:
+        int: バージョン番号（テーブル未作成などで取得できない場合は None）
+    """
+    try:
+        cursor = db.cursor()
+        cursor.execute("SELECT version FROM master_data_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row['version'] if row else None
+    except Exception as e:
+        print(f"マスタデータバージョン取得エラー: {e}")
+        return None
+
+
+def build_reservation_bootstrap(db, store_id: int) -> Dict:
+    """
+    予約登録画面のマスタデータを1つの辞書にまとめる
+
+    各キーの取得には個別API（/casts/api など）と同じDB関数を使い、形式も同じにしている。
+    """
+    casts = [{
+        'cast_id': cast['cast_id'],
+        'name': cast['name'],
+        'course_category_id': json.loads(cast.get('available_course_categories', '[]'))[0] if cast.get('available_course_categories') else None
+    } for cast in get_all_casts(db, store_id)]
+
+    courses = [{
+        'course_id': course['course_id'],
+        'course_name': course['name'],
+        'price': course['price'] if course.get('price') else 0,
+        'duration_minutes': course.get('time_minutes', 0),
+        'category_id': course.get('category_id')
+    } for course in get_all_courses(db)]
+
+    nomination_types = [{
+        'nomination_type_id': nom['nomination_type_id'],
+        'type_name': nom['type_name'],
+        'fee': nom['additional_fee'] if nom.get('additional_fee') else 0
+    } for nom in get_all_nomination_types(store_id=store_id)]
+
+    extensions = [{
+        'extension_id': ext['extension_id'],
+        'extension_name': ext['extension_name'],
+        'fee': ext['extension_fee'] if ext.get('extension_fee') else 0,
+        'extension_minutes': ext.get('extension_minutes', 0)
+    } for ext in get_all_extensions(db, store_id=store_id)]
+
+    options = [{
+        'option_id': opt['option_id'],
+        'option_name': opt['name'],
+        'price': opt['price'] if opt.get('price') else 0
+    } for opt in get_all_options()]
+
+    discounts = [dict(d) for d in get_all_discounts(db)]
+
+    hotels = [{
+        'hotel_id': hotel['hotel_id'],
+        'hotel_name': hotel['hotel_name'],
+        'hotel_type_id': hotel.get('category_id'),
+        'type_name': hotel.get('category_name', '-'),
+        'area_id': hotel.get('area_id'),
+        'area_name': hotel.get('area_name', '-'),
+        'transportation_fee': hotel.get('transportation_fee', 0),
+        'is_active': hotel.get('is_active', True)
+    } for hotel in get_all_hotels_with_details(db, sort_by='sort_order', store_id=store_id)]
+
+    areas = [{
+        'area_id': area['area_id'],
+        'area_name': area['name'],
+        'transportation_fee': area.get('transportation_fee', 0),
+        'travel_time': area.get('travel_time_minutes', 0)
+    } for area in get_all_areas(db, store_id)]
+
+    staff = [{'id': user['id'], 'name': user['name']} for user in get_reservation_staff(db, store_id)]
+
+    return {
+        'casts': casts,
+        'courses': courses,
+        'nomination_types': nomination_types,
+        'extensions': extensions,
+        'options': options,
+        'discounts': {'success': True, 'discounts': discounts},
+        'cancellation_reasons': {'success': True, 'data': get_all_cancellation_reasons(store_id)},
+        'reservation_methods': get_all_reservation_methods(store_id),
+        'meeting_places': {'success': True, 'data': get_all_meeting_places(store_id)},
+        'hotels': {'success': True, 'data': hotels},
+        'areas': {'success': True, 'data': areas},
+        'staff': staff,
+        'card_fee_rate': {'success': True, 'rate': get_card_fee_rate(store_id)}
+    }
+
+
+def get_reservation_bootstrap(store_id: int, known_version: Optional[int] = None):
+    """
+    予約登録画面のマスタデータをバージョン付きで取得
+
+    Args:
+        store_id: 店舗ID
+        known_version: クライアントが持っているバージョン（If-None-Match から取得）
+
+    Returns:
+        tuple: (version, payload)
+            version が known_version と同じ場合 payload は None（304を返せばよい）
+            バージョン管理テーブルが無い場合 version は None
+    """
+    db = get_db()
+    try:
+        version = get_master_data_version(db)
+        if version is not None and version == known_version:
+            return version, None
+
+        if version is not None:
+            with _bootstrap_cache_lock:
+                cached = _bootstrap_cache.get(store_id)
+            if cached and cached[0] == version:
+                return version, cached[1]
+
+        payload = build_reservation_bootstrap(db, store_id)
+
+        if version is not None:
+            with _bootstrap_cache_lock:
+                _bootstrap_cache[store_id] = (version, payload)
+
+        return version, payload
+    finally:
+        db.close()
@@ -2,6 +2,16 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from database.connection import get_connection
+from database.ordering_db import reorder
+from database.availability_db import (
+    bump_day_version,
+    put_reservation_in_day_index,
+    remove_reservation_from_day_index,
+    get_travel_minutes,
+    occupied_interval,
+    EXCLUDED_RESERVATION_STATUSES
+)
+from database.daily_sales_db import reclose_if_closed
 
 # =========================
 # 予約方法の管理
@@ -83,25 +93,12 @@ def delete_reservation_method(method_id: int) -> bool:
 
 def reorder_reservation_methods(store_id: int, method_ids: List[int]) -> bool:
     """予約方法の表示順序を更新"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     try:
-        for order, method_id in enumerate(method_ids, start=1):
-            cursor.execute("""
-                UPDATE reservation_methods
-                SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE method_id = %s AND store_id = %s
-            """, (order, method_id, store_id))
-        
-        conn.commit()
+        reorder('reservation_methods', store_id, method_ids)
         return True
     except Exception as e:
-        conn.rollback()
         print(f"Error reordering methods: {e}")
         return False
-    finally:
-        conn.close()
 
 # =========================
 # キャンセル理由の管理
@@ -203,26 +200,204 @@ def delete_cancellation_reason(reason_id: int) -> bool:
 
 def reorder_cancellation_reasons(store_id: int, reason_ids: List[int]) -> bool:
     """キャンセル理由の表示順序を更新"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
     try:
-        for order, reason_id in enumerate(reason_ids, start=1):
-            cursor.execute("""
-                UPDATE cancellation_reasons
-                SET display_order = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE reason_id = %s AND store_id = %s
-            """, (order, reason_id, store_id))
-
-        conn.commit()
+        reorder('cancellation_reasons', store_id, reason_ids)
         return True
     except Exception as e:
-        conn.rollback()
         print(f"Error reordering reasons: {e}")
         return False
+
+# =========================
+# 予約の重複チェック
+# =========================
+
+# pg_advisory_xact_lock の名前空間（キャスト単位で予約書き込みを直列化）
+RESERVATION_CAST_LOCK_NAMESPACE = 27001
+
+
+class ReservationConflictError(Exception):
+    """同じキャストの予約と時間（移動時間込み）が重なる場合に送出"""
+
+    def __init__(self, conflicts: List[Dict]):
+        self.conflicts = conflicts
+        super().__init__(f"reservation overlaps with {[c['reservation_id'] for c in conflicts]}")
+
+
+def find_conflicting_reservations(
+    cursor,
+    cast_id: int,
+    start_datetime: datetime,
+    end_datetime: datetime,
+    travel_minutes: int = 0,
+    exclude_reservation_id: Optional[int] = None
+) -> List[Dict]:
+    """
+    キャストの既存予約のうち、指定区間と重なるものを返す
+
+    双方の拘束区間（開始前・終了後に各予約先エリアの移動時間を確保）で判定する。
+    候補の絞り込みは idx_reservations_cast_period（GiST）を使う
+    tsrange の && で行い、移動時間込みの厳密判定はその後に行う。
+    business_date（パーティションキー）も前後1日で絞り、対象月以外のパーティションを読まない。
+    """
+    occupied_start, occupied_end = occupied_interval(start_datetime, end_datetime, travel_minutes)
+
+    cursor.execute("""
+        WITH max_travel AS (
+            SELECT make_interval(mins => COALESCE(MAX(travel_time_minutes), 0)) AS buffer
+            FROM areas
+        )
+        SELECT
+            r.reservation_id,
+            r.customer_name,
+            r.reservation_datetime,
+            r.end_datetime,
+            COALESCE(ha.travel_time_minutes, ra.travel_time_minutes, 0) AS travel_time_minutes
+        FROM reservations r
+        CROSS JOIN max_travel mt
+        LEFT JOIN hotels h ON r.hotel_id = h.hotel_id
+        LEFT JOIN areas ha ON h.area_id = ha.area_id
+        LEFT JOIN areas ra ON r.area_id = ra.area_id
+        WHERE r.cast_id = %s
+          AND r.business_date BETWEEN %s::date - 1 AND %s::date + 1
+          AND r.end_datetime IS NOT NULL
+          AND tsrange(r.reservation_datetime, r.end_datetime, '[)')
+              && tsrange(%s::timestamp - mt.buffer, %s::timestamp + mt.buffer, '[)')
+          AND r.status <> ALL(%s)
+          AND r.reservation_id <> %s
+          AND r.reservation_datetime
+              - make_interval(mins => COALESCE(ha.travel_time_minutes, ra.travel_time_minutes, 0)) < %s
+          AND r.end_datetime
+              + make_interval(mins => COALESCE(ha.travel_time_minutes, ra.travel_time_minutes, 0)) > %s
+        ORDER BY r.reservation_datetime
+    """, (
+        cast_id,
+        occupied_start, occupied_end,
+        occupied_start, occupied_end,
+        list(EXCLUDED_RESERVATION_STATUSES),
+        exclude_reservation_id or 0,
+        occupied_end, occupied_start
+    ))
+
+    return [
+        {
+            'reservation_id': row[0],
+            'customer_name': row[1],
+            'reservation_datetime': row[2].strftime('%Y-%m-%d %H:%M') if row[2] else None,
+            'end_datetime': row[3].strftime('%Y-%m-%d %H:%M') if row[3] else None,
+            'travel_time_minutes': row[4]
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+def _check_reservation_conflicts(
+    cursor,
+    cast_id: Optional[int],
+    status: str,
+    reservation_datetime: str,
+    end_datetime: Optional[datetime],
+    travel_minutes: int,
+    exclude_reservation_id: Optional[int] = None
+) -> None:
+    """
+    予約書き込み前の重複チェック（同一トランザクション内で呼び出す）
+
+    キャスト単位のアドバイザリーロックを取ってから検索するため、
+    同じキャストへの同時登録でもどちらか一方が必ず重複を検出する。
+    """
+    if not cast_id or not end_datetime or status != '成約':
+        return
+
+    cursor.execute(
+        "SELECT pg_advisory_xact_lock(%s, %s)",
+        (RESERVATION_CAST_LOCK_NAMESPACE, cast_id)
+    )
+
+    start_datetime = datetime.strptime(reservation_datetime, '%Y-%m-%d %H:%M')
+    conflicts = find_conflicting_reservations(
+        cursor, cast_id, start_datetime, end_datetime,
+        travel_minutes=travel_minutes,
+        exclude_reservation_id=exclude_reservation_id
+    )
+    if conflicts:
+        raise ReservationConflictError(conflicts)
+
+
+def audit_reservation_overlaps(store_id: Optional[int], date_from: str, date_to: str) -> List[Dict]:
+    """
+    期間内の既存予約の重複を一括検出（1クエリ＋1パスのスイープ）
+
+    Args:
+        store_id: 店舗ID（Noneの場合は全店舗）
+        date_from: 開始営業日（YYYY-MM-DD）
+        date_to: 終了営業日（YYYY-MM-DD、この日を含む）
+
+    Returns:
+        list: [{'store_id', 'cast_id', 'cast_name', 'business_date',
+                'reservation_id', 'conflicting_reservation_id'}, ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT
+                r.store_id,
+                r.cast_id,
+                r.cast_name,
+                r.business_date,
+                r.reservation_id,
+                r.reservation_datetime,
+                r.end_datetime,
+                COALESCE(ha.travel_time_minutes, ra.travel_time_minutes, 0)
+            FROM reservations r
+            LEFT JOIN hotels h ON r.hotel_id = h.hotel_id
+            LEFT JOIN areas ha ON h.area_id = ha.area_id
+            LEFT JOIN areas ra ON r.area_id = ra.area_id
+            WHERE r.business_date BETWEEN %s AND %s
+              AND (%s::integer IS NULL OR r.store_id = %s)
+              AND r.cast_id IS NOT NULL
+              AND r.end_datetime IS NOT NULL
+              AND r.status <> ALL(%s)
+            ORDER BY
+                r.cast_id,
+                r.reservation_datetime
+                    - make_interval(mins => COALESCE(ha.travel_time_minutes, ra.travel_time_minutes, 0))
+        """, (date_from, date_to, store_id, store_id, list(EXCLUDED_RESERVATION_STATUSES)))
+
+        overlaps = []
+        current_cast_id = None
+        active = []  # 現在のキャストで、まだ終わっていない拘束区間
+
+        for row in cursor:
+            row_store_id, cast_id, cast_name, business_date, reservation_id, start, end, travel = row
+            occupied_start, occupied_end = occupied_interval(start, end, travel)
+
+            if cast_id != current_cast_id:
+                current_cast_id = cast_id
+                active = []
+
+            # 拘束区間の開始順に並んでいるので、終了済みの区間を捨てれば
+            # 残りはすべて現在の区間と重なっている
+            active = [item for item in active if item[1] > occupied_start]
+            for other_id, _other_end in active:
+                overlaps.append({
+                    'store_id': row_store_id,
+                    'cast_id': cast_id,
+                    'cast_name': cast_name,
+                    'business_date': business_date.strftime('%Y-%m-%d') if business_date else None,
+                    'reservation_id': other_id,
+                    'conflicting_reservation_id': reservation_id
+                })
+            active.append((reservation_id, occupied_end))
+
+        return overlaps
+
     finally:
+        cursor.close()
         conn.close()
 
+
 # =========================
 # 予約の管理
 # =========================
@@ -252,9 +427,15 @@ def create_reservation(
     staff_memo: Optional[str] = None,
     cancellation_reason_id: Optional[int] = None,
     reservation_method_id: Optional[int] = None,
-    adjustment_amount: int = 0
+    adjustment_amount: int = 0,
+    allow_overlap: bool = False
 ) -> Optional[int]:
-    """新規予約を作成（既存のreservationsテーブル構造に対応）"""
+    """
+    新規予約を作成（既存のreservationsテーブル構造に対応）
+
+    同じキャストの予約と重なる場合は ReservationConflictError を送出する
+    （allow_overlap=True の場合は重複を許可して登録）
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
@@ -448,6 +629,13 @@ def create_reservation(
         # ステータスを設定
         status = '成約' if contract_type == 'contract' else 'キャンセル'
 
+        # 重複チェック（移動時間込み）
+        travel_minutes, _ = get_travel_minutes(conn, hotel_id=hotel_id, area_id=area_id)
+        if not allow_overlap:
+            _check_reservation_conflicts(
+                cursor, cast_id, status, reservation_datetime, end_datetime, travel_minutes
+            )
+
         # 予約を挿入
         cursor.execute("""
             INSERT INTO reservations (
@@ -554,9 +742,19 @@ def create_reservation(
                 WHERE customer_id = %s
             """, (points_to_grant, customer_id))
 
+        # 締め済みの営業日なら daily_sales も集計し直す
+        reclose_if_closed(cursor, business_date)
+        version = bump_day_version(cursor, store_id, business_date)
         conn.commit()
+        put_reservation_in_day_index(
+            store_id, business_date, version, reservation_id, cast_id, status,
+            datetime.strptime(reservation_datetime, '%Y-%m-%d %H:%M'), end_datetime, travel_minutes
+        )
         return reservation_id
 
+    except ReservationConflictError:
+        conn.rollback()
+        raise
     except Exception as e:
         conn.rollback()
         print(f"Error creating reservation: {e}")
@@ -727,8 +925,13 @@ def get_reservations_by_date(store_id: int, target_date: str) -> List[Dict]:
         conn.close()
 
 
-def update_reservation(reservation_id: int, data: Dict) -> bool:
-    """予約を更新"""
+def update_reservation(reservation_id: int, data: Dict, allow_overlap: bool = False) -> bool:
+    """
+    予約を更新
+
+    同じキャストの他の予約と重なる場合は ReservationConflictError を送出する
+    （allow_overlap=True の場合は重複を許可して更新）
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
@@ -962,6 +1165,14 @@ def update_reservation(reservation_id: int, data: Dict) -> bool:
         # ステータスを設定
         status = '成約' if contract_type == 'contract' else 'キャンセル'
 
+        # 重複チェック（移動時間込み、自分自身は除外）
+        travel_minutes, _ = get_travel_minutes(conn, hotel_id=hotel_id, area_id=area_id)
+        if not allow_overlap:
+            _check_reservation_conflicts(
+                cursor, cast_id, status, reservation_datetime, end_datetime, travel_minutes,
+                exclude_reservation_id=reservation_id
+            )
+
         # 予約を更新
         cursor.execute("""
             UPDATE reservations SET
@@ -1066,9 +1277,26 @@ def update_reservation(reservation_id: int, data: Dict) -> bool:
                 WHERE customer_id = %s
             """, (points_diff, customer_id))
 
+        # 営業日が変わった場合は元の営業日からも取り除く
+        old_business_date = existing_reservation.get('business_date')
+        old_version = None
+        if old_business_date and str(old_business_date) != str(business_date):
+            reclose_if_closed(cursor, old_business_date)
+            old_version = bump_day_version(cursor, store_id, old_business_date)
+        reclose_if_closed(cursor, business_date)
+        version = bump_day_version(cursor, store_id, business_date)
         conn.commit()
+        if old_business_date and str(old_business_date) != str(business_date):
+            remove_reservation_from_day_index(store_id, old_business_date, old_version, reservation_id)
+        put_reservation_in_day_index(
+            store_id, business_date, version, reservation_id, cast_id, status,
+            datetime.strptime(reservation_datetime, '%Y-%m-%d %H:%M'), end_datetime, travel_minutes
+        )
         return True
 
+    except ReservationConflictError:
+        conn.rollback()
+        raise
     except Exception as e:
         conn.rollback()
         print(f"Error updating reservation: {e}")
@@ -1092,9 +1320,16 @@ def cancel_reservation(reservation_id: int, cancellation_reason_id: int = None)
                 cancellation_reason_id = %s,
                 updated_at = CURRENT_TIMESTAMP
             WHERE reservation_id = %s
+            RETURNING store_id, business_date
         """, (cancellation_reason_id, reservation_id))
+        cancelled = cursor.fetchone()
+        if cancelled:
+            reclose_if_closed(cursor, cancelled[1])
+        version = bump_day_version(cursor, cancelled[0], cancelled[1]) if cancelled else None
 
         conn.commit()
+        if cancelled:
+            remove_reservation_from_day_index(cancelled[0], cancelled[1], version, reservation_id)
         return True
 
     except Exception as e:
@@ -1128,6 +1363,12 @@ def delete_reservation_completely(reservation_id: int) -> bool:
             WHERE reservation_id = %s AND store_id = %s
         """, (reservation_id, existing_reservation['store_id']))
 
+        # 割引を削除（reservations のパーティション化で外部キーの ON DELETE CASCADE がなくなったため）
+        cursor.execute("""
+            DELETE FROM reservation_discounts
+            WHERE reservation_id = %s AND store_id = %s
+        """, (reservation_id, existing_reservation['store_id']))
+
         # 予約を削除
         cursor.execute("""
             DELETE FROM reservations
@@ -1142,7 +1383,12 @@ def delete_reservation_completely(reservation_id: int) -> bool:
                 WHERE customer_id = %s
             """, (points_to_grant, customer_id))
 
+        business_date = existing_reservation.get('business_date')
+        reclose_if_closed(cursor, business_date)
+        version = bump_day_version(cursor, existing_reservation['store_id'], business_date) if business_date else None
         conn.commit()
+        if business_date:
+            remove_reservation_from_day_index(existing_reservation['store_id'], business_date, version, reservation_id)
         return True
 
     except Exception as e:
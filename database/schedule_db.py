@@ -8,8 +8,10 @@ if sys.platform == 'win32':
 
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from database.availability_db import bump_day_version, set_shift_in_day_index, shift_interval
 
 # 環境変数を読み込む
 load_dotenv()
@@ -24,7 +26,7 @@ def get_db_connection():
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb'),
         row_factory=dict_row
     )
-    return conn
+    return instrument_connection(conn, 'schedule_db')
 
 def get_weekly_schedules(store_id, start_date):
     """
@@ -338,8 +340,19 @@ def upsert_schedule(store_id, cast_id, work_date, start_time, end_time, status='
                     note = EXCLUDED.note,
                     updated_at = CURRENT_TIMESTAMP
             """, (store_id, cast_id, work_date, start_time, end_time, status, note))
-        
+
+        # 空き枠インデックスに反映する出勤枠（build_day_index と同じく確定・有効なキャストのみ）
+        shift = None
+        if status == 'confirmed' and start_time and end_time:
+            cur.execute("SELECT name FROM casts WHERE cast_id = %s AND store_id = %s AND is_active = TRUE", (cast_id, store_id))
+            cast = cur.fetchone()
+            if cast:
+                shift_start, shift_end = shift_interval(work_date, start_time, end_time)
+                shift = {'cast_name': cast['name'], 'start': shift_start, 'end': shift_end}
+
+        version = bump_day_version(cur, store_id, work_date)
         conn.commit()
+        set_shift_in_day_index(store_id, work_date, version, cast_id, shift)
         return True
         
     except Exception as e:
@@ -370,9 +383,14 @@ def delete_schedule(cast_id, work_date):
             DELETE FROM cast_schedules
             WHERE cast_id = %s
             AND work_date = %s
+            RETURNING store_id
         """, (cast_id, work_date))
-        
+        deleted = cur.fetchone()
+        version = bump_day_version(cur, deleted['store_id'], work_date) if deleted else None
+
         conn.commit()
+        if deleted:
+            set_shift_in_day_index(deleted['store_id'], work_date, version, cast_id, None)
         return True
         
     except Exception as e:
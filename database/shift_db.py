@@ -4,6 +4,7 @@
 """
 
 from database.connection import get_db
+from database.ordering_db import move_item
 import psycopg
 from psycopg.rows import dict_row
 
@@ -148,62 +149,11 @@ def delete_shift_type(shift_type_id, store_id):
 
 
 def move_shift_type_order(shift_type_id, store_id, direction):
-    """シフト種別の並び順を変更"""
+    """シフト種別の並び順を変更（有効なシフト種別の中で入れ替え）"""
     try:
-        db = get_db()
-        if db is None:
-            return False
-
-        cursor = db.cursor()
-
-        # 現在の並び順を取得
-        cursor.execute("""
-            SELECT shift_type_id, sort_order
-            FROM shift_types
-            WHERE shift_type_id = %s AND is_active = TRUE AND store_id = %s
-        """, (shift_type_id, store_id))
-
-        current = cursor.fetchone()
-        if not current:
-            return False
-
-        current_order = current['sort_order']
-
-        # 入れ替え対象を検索
-        if direction == 'up':
-            cursor.execute("""
-                SELECT shift_type_id, sort_order
-                FROM shift_types
-                WHERE sort_order < %s AND is_active = TRUE AND store_id = %s
-                ORDER BY sort_order DESC
-                LIMIT 1
-            """, (current_order, store_id))
-        else:  # down
-            cursor.execute("""
-                SELECT shift_type_id, sort_order
-                FROM shift_types
-                WHERE sort_order > %s AND is_active = TRUE AND store_id = %s
-                ORDER BY sort_order ASC
-                LIMIT 1
-            """, (current_order, store_id))
-
-        target = cursor.fetchone()
-        if not target:
-            return False
-
-        # 入れ替え
-        target_id = target['shift_type_id']
-        target_order = target['sort_order']
-
-        cursor.execute("UPDATE shift_types SET sort_order = %s WHERE shift_type_id = %s AND store_id = %s", (target_order, shift_type_id, store_id))
-        cursor.execute("UPDATE shift_types SET sort_order = %s WHERE shift_type_id = %s AND store_id = %s", (current_order, target_id, store_id))
-        
-        db.commit()
-        return True
+        return move_item('shift_types', store_id, shift_type_id, direction)
     except Exception as e:
         print(f"Error in move_shift_type_order: {e}")
-        if db:
-            db.rollback()
         return False
 
 
@@ -9,6 +9,7 @@ if sys.platform == 'win32':
 from database.connection import get_db
 import psycopg
 from psycopg.rows import dict_row
+from utils.metrics import instrument_connection
 from dotenv import load_dotenv
 
 # 環境変数を読み込む
@@ -23,7 +24,7 @@ def get_db_connection(store_code):
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb')
     )
-    return conn
+    return instrument_connection(conn, 'user_db')
 
 # ==== ユーザー関連の関数 ====
 def find_user_by_login_id(db, login_id, store_id=None):
@@ -154,6 +155,17 @@ def get_active_users(db, store_id=None):
         """)
     return cursor.fetchall()
 
+def get_reservation_staff(db, store_id):
+    """予約登録画面の担当スタッフ一覧を取得（有効なユーザーを表示順で）"""
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT id, name
+        FROM users
+        WHERE is_active = true AND store_id = %s
+        ORDER BY COALESCE(sort_order, 0), name
+    """, (store_id,))
+    return cursor.fetchall()
+
 def get_users_by_role(db, role, store_id=None):
     """役割別ユーザー一覧を取得"""
     cursor = db.cursor()
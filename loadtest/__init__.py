@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+ローカル負荷試験（1晩分の営業を模擬）
+
+    datagen.py  : 規模を指定した合成データの生成（seed から再現可能・COPY で投入）
+    seed.py     : 店舗コードを指定して datagen のデータを投入（負荷試験の準備）
+    scenarios.py: 仮想ユーザー（電話受付の予約登録・ダッシュボードのポーリング・キャストのマイページ）
+    report.py   : ルートごとの p50/p95/p99・エラー率、/metrics の差分からSQL実行回数を集計
+    run.py      : 仮想ユーザーとスケジューラーの通知チェックを同時に動かして結果を出力
+
+使い方は loadtest/README.md を参照。
+"""
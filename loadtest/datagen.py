@@ -0,0 +1,657 @@
+# -*- coding: utf-8 -*-
+"""
+ベンチマーク用の合成データ生成（seed から再現可能・COPY で投入）
+
+1店舗・1か月から10店舗・5年分まで、スキーマ作成済みのDBに整合した合成データを投入する。
+同じ seed・規模なら同じデータになるため、コミット間でベンチマーク結果を比較できる。
+
+    マスタ  : スタッフ・コース・指名種別・予約方法・オプション・割引・延長・NGエリア/年齢パターン、
+              エリア・ホテル（店舗ごと）
+    共通    : ホテルカテゴリ（店舗をまたいで共有するテーブル）
+    キャスト: 出勤（cast_schedules）・NG設定（ホテル・コース・エリア・カスタムエリア・年齢）
+    顧客    : カナ氏名・電話番号（一部はハイフン付き）・生年月日
+    予約    : オプション・割引・延長付きの予約、成約分の送迎記録（入室・退室）・金銭記録・ポイント履歴
+
+IDは各テーブルの現在の最大値の次から明示的に振り、投入後にシーケンスを最大値+1に合わせる
+（空のDBなら毎回同じID）。店舗ごとに別の乱数列を使うため、店舗数を変えても既存店舗のデータは変わらない。
+
+ログインIDは lt{store_id}_staff{n} / lt{store_id}_cast{n}、パスワードは LOGIN_PASSWORD（loadtest/run.py が使用）。
+
+使い方: python -m loadtest.datagen --scale medium [--seed 1]
+        python -m loadtest.datagen --stores 2 --months 3
+"""
+import argparse
+import random
+import sys
+import time as time_module
+from datetime import date, datetime, time, timedelta
+
+from database.connection import get_connection
+
+LOGIN_PASSWORD = 'loadtest'
+
+# 規模のプリセット（店舗数, 月数）
+SCALES = {
+    'tiny': (1, 1),
+    'small': (1, 6),
+    'medium': (3, 12),
+    'large': (10, 60),
+}
+MAX_STORES = 10
+
+STAFF_PER_STORE = 8
+CASTS_PER_STORE = 40
+HOTELS_PER_STORE = 15
+# 顧客数は 月数 × CUSTOMERS_PER_MONTH（最低 MIN_CUSTOMERS）
+CUSTOMERS_PER_MONTH = 300
+MIN_CUSTOMERS = 500
+
+# 出勤率・1枠あたりの予約が入る確率
+SHIFT_RATE = 0.6
+BOOKING_RATE = 0.55
+CANCEL_RATE = 0.05
+# 予約と予約の間（移動時間を含む）の最小分数
+RESERVATION_GAP_MINUTES = 30
+CARD_FEE_RATE = 10
+
+FAMILY_NAMES = [
+    ('佐藤', 'サトウ'), ('鈴木', 'スズキ'), ('高橋', 'タカハシ'), ('田中', 'タナカ'),
+    ('伊藤', 'イトウ'), ('渡辺', 'ワタナベ'), ('山本', 'ヤマモト'), ('中村', 'ナカムラ'),
+    ('小林', 'コバヤシ'), ('加藤', 'カトウ'), ('吉田', 'ヨシダ'), ('山田', 'ヤマダ'),
+    ('佐々木', 'ササキ'), ('山口', 'ヤマグチ'), ('松本', 'マツモト'), ('井上', 'イノウエ'),
+    ('木村', 'キムラ'), ('林', 'ハヤシ'), ('清水', 'シミズ'), ('斎藤', 'サイトウ'),
+]
+GIVEN_NAMES = [
+    ('太郎', 'タロウ'), ('健', 'ケン'), ('大輔', 'ダイスケ'), ('翔太', 'ショウタ'),
+    ('拓也', 'タクヤ'), ('誠', 'マコト'), ('浩二', 'コウジ'), ('直樹', 'ナオキ'),
+    ('和也', 'カズヤ'), ('隆', 'タカシ'), ('亮', 'リョウ'), ('剛', 'ツヨシ'),
+    ('修', 'オサム'), ('学', 'マナブ'), ('陽介', 'ヨウスケ'), ('慎一', 'シンイチ'),
+]
+CAST_NAMES = ['あいり', 'みく', 'ゆい', 'さくら', 'なな', 'りこ', 'まい', 'えま', 'ひな', 'るな']
+
+# (コース名, 分, 料金, キャストバック)
+COURSES = [
+    ('60分', 60, 16000, 9000),
+    ('75分', 75, 19000, 11000),
+    ('90分', 90, 23000, 13000),
+    ('120分', 120, 30000, 17000),
+    ('150分', 150, 37000, 21000),
+    ('180分', 180, 44000, 25000),
+]
+# (指名種別, 料金, バック)
+NOMINATION_TYPES = [('フリー', 0, 0), ('本指名', 2000, 2000), ('写真指名', 1000, 1000)]
+RESERVATION_METHODS = ['電話', 'WEB', 'LINE']
+# (オプション名, 料金, バック)
+OPTIONS = [
+    ('コスプレ', 2000, 1000), ('写真', 3000, 1500), ('ローション', 1000, 500),
+    ('衣装', 2000, 1000), ('延長割', 1000, 500), ('指定下着', 1500, 1000),
+]
+# (割引名, 種類, 値)
+DISCOUNTS = [('新規割', 'fixed', 2000), ('リピート割', 'fixed', 1000), ('早割', 'percentage', 10), ('誕生日割', 'percentage', 20)]
+# (延長名, 分, 料金, バック)
+EXTENSIONS = [('延長30分', 30, 8000, 4500), ('延長60分', 60, 15000, 8500)]
+# (エリア名, 交通費, 移動時間)
+AREAS = [('市内', 0, 15), ('駅前', 0, 10), ('郊外', 2000, 30), ('郊外北', 2000, 35), ('遠方', 4000, 45), ('県外', 6000, 60)]
+NG_AREAS = ['駅東', '駅西', '工業団地', '温泉街']
+NG_AGE_PATTERNS = [('20代', '20〜29歳'), ('50代以上', '50歳以上'), ('60代以上', '60歳以上')]
+PREFECTURES = ['長野県', '群馬県', '埼玉県', '新潟県', '山梨県']
+
+# 出勤パターン（開始, 終了）。終了が開始より前なら翌日
+SHIFT_PATTERNS = [(time(18, 0), time(2, 0)), (time(19, 0), time(3, 0)), (time(20, 0), time(4, 0)), (time(12, 0), time(20, 0))]
+
+# テーブルごとの列（COPY の列順）。投入は外部キーの参照先から順に行うため、この順序を保つ
+TABLE_COLUMNS = {
+    'categories': ('category_id', 'name'),
+    'areas': ('area_id', 'name', 'transportation_fee', 'travel_time_minutes', 'sort_order', 'store_id'),
+    'hotels': ('hotel_id', 'name', 'category_id', 'area_id', 'base_price', 'additional_time', 'sort_order', 'is_active', 'store_id'),
+    'users': ('id', 'name', 'login_id', 'password', 'role', 'color', 'store_id',
+              'line_id', 'notification_minutes_before', 'line_notification_enabled'),
+    'course_categories': ('category_id', 'category_name', 'sort_order', 'is_active', 'store_id'),
+    'courses': ('course_id', 'name', 'category_id', 'time_minutes', 'price', 'cast_back_amount',
+                'sort_order', 'store_id', 'is_active'),
+    'nomination_types': ('nomination_type_id', 'type_name', 'additional_fee', 'back_amount',
+                         'display_order', 'store_id', 'is_active'),
+    'reservation_methods': ('method_id', 'store_id', 'method_name', 'is_active', 'display_order'),
+    'options': ('option_id', 'name', 'badge_name', 'price', 'cast_back_amount', 'sort_order', 'store_id', 'is_active'),
+    'discounts': ('discount_id', 'name', 'badge_name', 'discount_type', 'value', 'is_active', 'store_id', 'sort_order'),
+    'extensions': ('extension_id', 'extension_name', 'extension_minutes', 'extension_fee', 'back_amount',
+                   'is_active', 'store_id', 'sort_order'),
+    'ng_areas': ('ng_area_id', 'store_id', 'area_name', 'display_order', 'is_active'),
+    'ng_age_patterns': ('ng_age_id', 'store_id', 'pattern_name', 'description', 'display_order', 'is_active'),
+    'casts': ('cast_id', 'name', 'phone_number', 'login_id', 'password_plain', 'store_id', 'is_active',
+              'auto_call_enabled', 'notification_minutes_before', 'join_date'),
+    'cast_ng_hotels': ('cast_id', 'hotel_id', 'store_id'),
+    'cast_ng_courses': ('cast_id', 'course_id', 'store_id'),
+    'cast_ng_areas': ('cast_id', 'area_id', 'store_id'),
+    'cast_ng_custom_areas': ('cast_id', 'ng_area_id', 'store_id'),
+    'cast_ng_age_patterns': ('cast_id', 'ng_age_id', 'store_id'),
+    'customers': ('customer_id', 'store_id', 'name', 'furigana', 'phone', 'birthday', 'age', 'prefecture',
+                  'status', 'current_points', 'member_type'),
+    'cast_schedules': ('store_id', 'cast_id', 'work_date', 'start_time', 'end_time', 'status', 'source'),
+    'reservations': (
+        'reservation_id', 'store_id', 'customer_id', 'customer_name', 'customer_phone',
+        'cast_id', 'cast_name', 'business_date', 'reservation_datetime', 'end_datetime', 'status',
+        'course_id', 'course_name', 'course_time_minutes', 'course_price',
+        'nomination_type_id', 'nomination_type_name', 'nomination_fee',
+        'extension_id', 'extension_name', 'extension_minutes', 'extension_fee', 'extension_quantity',
+        'discount_id', 'discount_type', 'discount_name', 'discount_badge_name', 'discount_value', 'discount_amount',
+        'reservation_method_id', 'reservation_method_name',
+        'area_id', 'area_name', 'hotel_id', 'hotel_name', 'transportation_fee',
+        'payment_method', 'card_fee_rate', 'card_fee',
+        'options_total', 'subtotal', 'total_amount',
+        'staff_id', 'staff_name', 'points_to_grant', 'adjustment_amount'
+    ),
+    'reservation_options': ('reservation_id', 'option_id', 'quantity', 'calculated_price', 'cast_back_amount', 'store_id'),
+    'reservation_discounts': ('reservation_id', 'discount_id', 'applied_value', 'store_id'),
+    'pickup_records': ('record_id', 'type', 'cast_id', 'hotel_id', 'course_id', 'entry_time', 'exit_time', 'is_entry',
+                       'staff_id', 'created_date', 'nomination_type', 'cast_auto_call_sent', 'staff_line_sent'),
+    'money_records': ('id', 'record_id', 'cast_id', 'exit_time', 'received_amount', 'change_amount',
+                      'payment_method', 'staff_id', 'created_date', 'created_at'),
+    'point_history': ('store_id', 'customer_id', 'point_change', 'balance_after', 'transaction_type', 'reason', 'created_at'),
+}
+
+# (テーブル, ID列)。明示的にIDを振る列（投入後にシーケンスを合わせる）
+ID_COLUMNS = {
+    'categories': 'category_id',
+    'areas': 'area_id',
+    'hotels': 'hotel_id',
+    'users': 'id',
+    'course_categories': 'category_id',
+    'courses': 'course_id',
+    'nomination_types': 'nomination_type_id',
+    'reservation_methods': 'method_id',
+    'options': 'option_id',
+    'discounts': 'discount_id',
+    'extensions': 'extension_id',
+    'ng_areas': 'ng_area_id',
+    'ng_age_patterns': 'ng_age_id',
+    'casts': 'cast_id',
+    'customers': 'customer_id',
+    'reservations': 'reservation_id',
+    'pickup_records': 'record_id',
+    'money_records': 'id',
+}
+
+# 同じシーケンスで採番する列（reseed_id_sequences.py と同じ）
+SHARED_SEQUENCE_COLUMNS = {
+    ('pickup_records', 'record_id'): [('money_records', 'record_id')],
+}
+
+
+def store_prefix(store_id):
+    """負荷試験データのログインIDの接頭辞"""
+    return f'lt{store_id}_'
+
+
+def resolve_scale(scale=None, stores=None, months=None):
+    """プリセットと個別指定から (店舗数, 月数)"""
+    preset_stores, preset_months = SCALES[scale or 'tiny']
+    stores = stores or preset_stores
+    months = months or preset_months
+    if not 1 <= stores <= MAX_STORES:
+        raise ValueError(f'店舗数は1〜{MAX_STORES}で指定してください')
+    if months < 1:
+        raise ValueError('月数は1以上で指定してください')
+    return stores, months
+
+
+class IdAllocator:
+    """テーブルごとに現在の最大値の次からIDを振る"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.next_ids = {}
+
+    def take(self, table):
+        if table not in self.next_ids:
+            column = ID_COLUMNS[table]
+            max_values = [f"(SELECT MAX({column}) FROM {table})"]
+            for other_table, other_column in SHARED_SEQUENCE_COLUMNS.get((table, column), []):
+                max_values.append(f"(SELECT MAX({other_column}) FROM {other_table})")
+            self.cursor.execute(f"SELECT COALESCE(GREATEST({', '.join(max_values)}), 0) + 1")
+            self.next_ids[table] = self.cursor.fetchone()[0]
+        value = self.next_ids[table]
+        self.next_ids[table] += 1
+        return value
+
+    def reseed_sequences(self):
+        """使ったテーブルのシーケンスを最大値+1に合わせる（以降のアプリのINSERTと重ならないように）"""
+        for table in self.next_ids:
+            column = ID_COLUMNS[table]
+            self.cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, column))
+            sequence = self.cursor.fetchone()[0]
+            if sequence is None:
+                continue
+            self.cursor.execute("SELECT setval(%s, %s, false)", (sequence, self.next_ids[table]))
+
+
+def copy_rows(cursor, table, rows):
+    """rows を COPY で投入"""
+    if not rows:
+        return
+    columns = TABLE_COLUMNS[table]
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+class DataGenerator:
+    """
+    合成データの生成と投入
+
+    Args:
+        conn: get_connection() の接続（呼び出し側でコミット）
+        seed: 乱数の seed
+        store_ids: 投入する店舗ID
+        months: 予約を作る月数（end_date までの months × 30 日）
+        end_date: 最終営業日（省略時は今日。同じ日付を指定すると同じデータ）
+    """
+
+    def __init__(self, conn, seed=1, store_ids=(1,), months=1, end_date=None, casts_per_store=CASTS_PER_STORE,
+                 customers_per_store=None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.seed = seed
+        self.store_ids = list(store_ids)
+        self.months = months
+        self.end_date = end_date or date.today()
+        self.casts_per_store = casts_per_store
+        self.customers_per_store = customers_per_store or max(MIN_CUSTOMERS, months * CUSTOMERS_PER_MONTH)
+        self.ids = IdAllocator(self.cursor)
+        self.buffers = {table: [] for table in TABLE_COLUMNS}
+        self.counts = {table: 0 for table in TABLE_COLUMNS}
+
+    def add(self, table, row):
+        self.buffers[table].append(row)
+
+    def flush(self):
+        """ためた行を外部キーの参照先から順に COPY"""
+        for table, rows in self.buffers.items():
+            if rows:
+                copy_rows(self.cursor, table, rows)
+                self.counts[table] += len(rows)
+                self.buffers[table] = []
+
+    def is_seeded(self, store_id):
+        self.cursor.execute("SELECT 1 FROM users WHERE login_id LIKE %s LIMIT 1", (store_prefix(store_id) + '%',))
+        return self.cursor.fetchone() is not None
+
+    def run(self, progress=None):
+        """
+        すべての店舗のデータを投入（投入済みの店舗はスキップ）
+
+        Args:
+            progress: 進捗を受け取る関数（文字列1つ）
+
+        Returns:
+            dict: テーブル → 投入行数（'skipped_stores' にスキップした store_id）
+        """
+        category_id = self.generate_shared()
+        self.flush()
+
+        skipped = []
+        for store_id in self.store_ids:
+            if self.is_seeded(store_id):
+                skipped.append(store_id)
+                continue
+            started = time_module.perf_counter()
+            rng = random.Random(f'{self.seed}:{store_id}')
+            store = self.generate_store_masters(rng, store_id, category_id)
+            self.flush()
+            self.generate_store_history(rng, store)
+            if progress:
+                progress(f'store_id={store_id}: {time_module.perf_counter() - started:.1f}秒')
+
+        self.finish_points()
+        self.ids.reseed_sequences()
+        result = {table: count for table, count in self.counts.items() if count}
+        result['skipped_stores'] = skipped
+        return result
+
+    # ===== 共通マスタ =====
+
+    def generate_shared(self):
+        """ホテルカテゴリ（作成済みならそれを使う）"""
+        self.cursor.execute("SELECT category_id FROM categories WHERE name = 'LTビジネス' ORDER BY category_id LIMIT 1")
+        row = self.cursor.fetchone()
+        if row:
+            return row[0]
+
+        category_id = self.ids.take('categories')
+        self.add('categories', (category_id, 'LTビジネス'))
+        return category_id
+
+    def generate_store_hotels(self, rng, store_id, category_id):
+        """店舗のエリア・ホテル（作成済みならそれを使う）"""
+        self.cursor.execute("""
+            SELECT h.hotel_id, h.name, h.area_id, a.name
+            FROM hotels h LEFT JOIN areas a ON h.area_id = a.area_id
+            WHERE h.store_id = %s AND h.name LIKE 'LTホテル%%'
+            ORDER BY h.hotel_id
+        """, (store_id,))
+        hotels = [tuple(row) for row in self.cursor.fetchall()]
+        if hotels:
+            return hotels
+
+        areas = []
+        for sort_order, (name, fee, travel) in enumerate(AREAS, start=1):
+            area_id = self.ids.take('areas')
+            self.add('areas', (area_id, f'LT{name}', fee, travel, sort_order, store_id))
+            areas.append((area_id, f'LT{name}'))
+
+        for i in range(HOTELS_PER_STORE):
+            hotel_id = self.ids.take('hotels')
+            area_id, area_name = rng.choice(areas)
+            name = f'LTホテル{store_id}-{i + 1:02d}'
+            self.add('hotels', (hotel_id, name, category_id, area_id, 0, 0, i + 1, True, store_id))
+            hotels.append((hotel_id, name, area_id, area_name))
+        return hotels
+
+    # ===== 店舗のマスタ・キャスト・顧客 =====
+
+    def generate_store_masters(self, rng, store_id, category_id):
+        prefix = store_prefix(store_id)
+        store = {'store_id': store_id}
+
+        store['staff'] = []
+        for i in range(STAFF_PER_STORE):
+            user_id = self.ids.take('users')
+            name = f'LTスタッフ{store_id}-{i + 1}'
+            login_id = f'{prefix}staff{i + 1}'
+            self.add('users', (user_id, name, login_id, LOGIN_PASSWORD, '管理者' if i == 0 else 'スタッフ',
+                               '#4a90d9', store_id, f'U{store_id:04d}{i:028d}', 10, True))
+            store['staff'].append((user_id, login_id, name))
+
+        category_id = self.ids.take('course_categories')
+        self.add('course_categories', (category_id, 'LT通常', 1, True, store_id))
+        store['courses'] = []
+        for sort_order, (name, minutes, price, back) in enumerate(COURSES, start=1):
+            course_id = self.ids.take('courses')
+            self.add('courses', (course_id, name, category_id, minutes, price, back, sort_order, store_id, True))
+            store['courses'].append((course_id, name, minutes, price))
+
+        store['nomination_types'] = []
+        for display_order, (name, fee, back) in enumerate(NOMINATION_TYPES, start=1):
+            nomination_type_id = self.ids.take('nomination_types')
+            self.add('nomination_types', (nomination_type_id, name, fee, back, display_order, store_id, True))
+            store['nomination_types'].append((nomination_type_id, name, fee))
+
+        store['methods'] = []
+        for display_order, name in enumerate(RESERVATION_METHODS, start=1):
+            method_id = self.ids.take('reservation_methods')
+            self.add('reservation_methods', (method_id, store_id, name, True, display_order))
+            store['methods'].append((method_id, name))
+
+        store['options'] = []
+        for sort_order, (name, price, back) in enumerate(OPTIONS, start=1):
+            option_id = self.ids.take('options')
+            self.add('options', (option_id, name, name[:2], price, back, sort_order, store_id, True))
+            store['options'].append((option_id, price, back))
+
+        store['discounts'] = []
+        for sort_order, (name, discount_type, value) in enumerate(DISCOUNTS, start=1):
+            discount_id = self.ids.take('discounts')
+            self.add('discounts', (discount_id, name, name[:2], discount_type, value, True, store_id, sort_order))
+            store['discounts'].append((discount_id, discount_type, name, name[:2], value))
+
+        store['extensions'] = []
+        for sort_order, (name, minutes, fee, back) in enumerate(EXTENSIONS, start=1):
+            extension_id = self.ids.take('extensions')
+            self.add('extensions', (extension_id, name, minutes, fee, back, True, store_id, sort_order))
+            store['extensions'].append((extension_id, name, minutes, fee))
+
+        ng_area_ids = []
+        for display_order, name in enumerate(NG_AREAS, start=1):
+            ng_area_id = self.ids.take('ng_areas')
+            self.add('ng_areas', (ng_area_id, store_id, name, display_order, True))
+            ng_area_ids.append(ng_area_id)
+
+        ng_age_ids = []
+        for display_order, (name, description) in enumerate(NG_AGE_PATTERNS, start=1):
+            ng_age_id = self.ids.take('ng_age_patterns')
+            self.add('ng_age_patterns', (ng_age_id, store_id, name, description, display_order, True))
+            ng_age_ids.append(ng_age_id)
+
+        # エリア・ホテルは店舗ごと（アプリは store_id で絞り込む）
+        store['hotels'] = self.generate_store_hotels(rng, store_id, category_id)
+        area_ids = sorted({hotel[2] for hotel in store['hotels']})
+
+        first_date = self.end_date - timedelta(days=30 * self.months)
+        store['casts'] = []
+        for i in range(self.casts_per_store):
+            cast_id = self.ids.take('casts')
+            name = f'{CAST_NAMES[i % len(CAST_NAMES)]}{i // len(CAST_NAMES) + 1}'
+            # 入店日は期間内にばらけさせる（古参キャストは期間の最初から在籍）
+            join_date = first_date + timedelta(days=rng.randrange(0, 30 * self.months)) if rng.random() < 0.4 else first_date
+            self.add('casts', (cast_id, name, f'080{store_id:02d}{i:06d}', f'{prefix}cast{i + 1}',
+                               LOGIN_PASSWORD, store_id, True, True, 10, join_date))
+            store['casts'].append((cast_id, name, join_date))
+
+            # NG設定（2割のキャスト）
+            if rng.random() < 0.2:
+                for hotel in rng.sample(store['hotels'], 2):
+                    self.add('cast_ng_hotels', (cast_id, hotel[0], store_id))
+            if rng.random() < 0.1:
+                self.add('cast_ng_courses', (cast_id, rng.choice(store['courses'])[0], store_id))
+            if rng.random() < 0.1:
+                self.add('cast_ng_areas', (cast_id, rng.choice(area_ids), store_id))
+            if rng.random() < 0.15:
+                self.add('cast_ng_custom_areas', (cast_id, rng.choice(ng_area_ids), store_id))
+            if rng.random() < 0.15:
+                self.add('cast_ng_age_patterns', (cast_id, rng.choice(ng_age_ids), store_id))
+
+        store['customers'] = []
+        for i in range(self.customers_per_store):
+            customer_id = self.ids.take('customers')
+            family, family_kana = rng.choice(FAMILY_NAMES)
+            given, given_kana = rng.choice(GIVEN_NAMES)
+            digits = f'090{store_id:02d}{i:06d}'
+            # 3割はハイフン付きで登録されている（電話番号の正規化を通す）
+            phone = f'{digits[:3]}-{digits[3:7]}-{digits[7:]}' if rng.random() < 0.3 else digits
+            age = rng.randrange(20, 70)
+            birthday = date(self.end_date.year - age, rng.randrange(1, 13), rng.randrange(1, 29))
+            member_type = rng.choice(['一般', '一般', '会員'])
+            self.add('customers', (customer_id, store_id, f'{family} {given}', f'{family_kana} {given_kana}', phone,
+                                   birthday, age, rng.choice(PREFECTURES), '普通', 0, member_type))
+            store['customers'].append((customer_id, f'{family} {given}', phone, member_type))
+
+        return store
+
+    # ===== 出勤・予約・送迎・金銭・ポイント =====
+
+    def generate_store_history(self, rng, store):
+        """期間の出勤と予約を1日ずつ作り、1か月分ためるごとに COPY"""
+        store_id = store['store_id']
+        first_date = self.end_date - timedelta(days=30 * self.months)
+        points = {}
+        day = first_date
+        while day <= self.end_date + timedelta(days=7):
+            for cast_id, cast_name, join_date in store['casts']:
+                if day < join_date or rng.random() >= SHIFT_RATE:
+                    continue
+                shift_start_time, shift_end_time = rng.choice(SHIFT_PATTERNS)
+                self.add('cast_schedules', (store_id, cast_id, day, shift_start_time, shift_end_time, 'confirmed', 'manual'))
+
+                # 予約は最終営業日まで（それ以降は出勤のみ）
+                if day > self.end_date:
+                    continue
+                shift_start = datetime.combine(day, shift_start_time)
+                shift_end = datetime.combine(day, shift_end_time)
+                if shift_end <= shift_start:
+                    shift_end += timedelta(days=1)
+                slot = shift_start + timedelta(minutes=rng.randrange(0, 90, 10))
+                while True:
+                    course = rng.choice(store['courses'])
+                    extension = rng.choice(store['extensions']) if rng.random() < 0.1 else None
+                    end = slot + timedelta(minutes=course[2] + (extension[2] if extension else 0))
+                    if end > shift_end:
+                        break
+                    if rng.random() < BOOKING_RATE:
+                        self._add_reservation(rng, store, day, slot, end, (cast_id, cast_name), course, extension, points)
+                        slot = end + timedelta(minutes=RESERVATION_GAP_MINUTES)
+                    else:
+                        slot += timedelta(minutes=RESERVATION_GAP_MINUTES)
+
+            if day.day == 1 or day == self.end_date:
+                self.flush()
+            day += timedelta(days=1)
+        self.flush()
+
+    def _add_reservation(self, rng, store, business_date, start, end, cast, course, extension, points):
+        store_id = store['store_id']
+        cast_id, cast_name = cast
+        course_id, course_name, course_minutes, course_price = course
+        customer_id, customer_name, customer_phone, member_type = rng.choice(store['customers'])
+        nomination_type_id, nomination_type_name, nomination_fee = rng.choice(store['nomination_types'])
+        method_id, method_name = rng.choice(store['methods'])
+        hotel_id, hotel_name, area_id, area_name = rng.choice(store['hotels'])
+        staff_user_id, staff_login_id, staff_name = rng.choice(store['staff'])
+        reservation_id = self.ids.take('reservations')
+
+        chosen_options = [option for option in store['options'] if rng.random() < 0.08]
+        options_total = sum(price for _, price, _ in chosen_options)
+        extension_fee = extension[3] if extension else 0
+        subtotal = course_price + nomination_fee + options_total + extension_fee
+
+        chosen_discounts = []
+        if rng.random() < 0.15:
+            chosen_discounts = [rng.choice(store['discounts'])]
+        discount_amounts = [
+            int(subtotal * value / 100) if discount_type == 'percentage' else int(value)
+            for _, discount_type, _, _, value in chosen_discounts
+        ]
+        total_amount = subtotal - sum(discount_amounts)
+
+        payment_method = 'カード' if rng.random() < 0.3 else '現金'
+        card_fee_rate = CARD_FEE_RATE if payment_method == 'カード' else 0
+        card_fee = int(total_amount * card_fee_rate / 100)
+        total_amount += card_fee
+
+        status = 'キャンセル' if rng.random() < CANCEL_RATE else '成約'
+        points_to_grant = total_amount // 1000 if member_type == '会員' and status == '成約' else 0
+        first_discount = chosen_discounts[0] if chosen_discounts else (None, None, None, None, None)
+
+        self.add('reservations', (
+            reservation_id, store_id, customer_id, customer_name, customer_phone,
+            cast_id, cast_name, business_date, start, end, status,
+            course_id, course_name, course_minutes, course_price,
+            nomination_type_id, nomination_type_name, nomination_fee,
+            extension[0] if extension else None, extension[1] if extension else None,
+            extension[2] if extension else 0, extension_fee, 1 if extension else 0,
+            first_discount[0], first_discount[1], first_discount[2], first_discount[3], first_discount[4],
+            sum(discount_amounts),
+            method_id, method_name,
+            area_id, area_name, hotel_id, hotel_name, 0,
+            payment_method, card_fee_rate, card_fee,
+            options_total, subtotal, total_amount,
+            staff_user_id, staff_name, points_to_grant, 0
+        ))
+        for option_id, price, back in chosen_options:
+            self.add('reservation_options', (reservation_id, option_id, 1, price, back, store_id))
+        for (discount_id, _, _, _, _), amount in zip(chosen_discounts, discount_amounts):
+            self.add('reservation_discounts', (reservation_id, discount_id, amount, store_id))
+
+        if status != '成約':
+            return
+
+        # 送迎記録（入室・退室の2行）と退室時の金銭記録。最終営業日より前の通知は送信済み
+        notified = business_date < self.end_date
+        entry_record_id = self.ids.take('pickup_records')
+        exit_record_id = self.ids.take('pickup_records')
+        self.add('pickup_records', (entry_record_id, 'pickup', cast_id, hotel_id, course_id, start, None, True,
+                                    staff_login_id, business_date, nomination_type_name, notified, notified))
+        self.add('pickup_records', (exit_record_id, 'pickup', cast_id, hotel_id, course_id, start, end, False,
+                                    staff_login_id, business_date, nomination_type_name, notified, notified))
+        received_amount = -(-total_amount // 10000) * 10000
+        self.add('money_records', (self.ids.take('money_records'), exit_record_id, cast_id, end.strftime('%H:%M'),
+                                   received_amount, received_amount - total_amount, payment_method,
+                                   staff_login_id, end.date(), end))
+
+        # ポイント（付与と、ときどき利用）
+        if points_to_grant:
+            balance = points.get(customer_id, 0) + points_to_grant
+            self.add('point_history', (store_id, customer_id, points_to_grant, balance, 'add', '予約ポイント付与', end))
+            if balance >= 100 and rng.random() < 0.2:
+                used = balance // 100 * 100
+                balance -= used
+                self.add('point_history', (store_id, customer_id, -used, balance, 'consume', 'ポイント利用',
+                                           end + timedelta(minutes=1)))
+            points[customer_id] = balance
+
+    def finish_points(self):
+        """顧客の現在ポイントをポイント履歴の最新残高に合わせる"""
+        self.cursor.execute("""
+            UPDATE customers c
+            SET current_points = latest.balance_after
+            FROM (
+                SELECT DISTINCT ON (customer_id) customer_id, balance_after
+                FROM point_history
+                ORDER BY customer_id, created_at DESC, id DESC
+            ) latest
+            WHERE c.customer_id = latest.customer_id
+                AND c.current_points IS DISTINCT FROM latest.balance_after
+        """)
+
+
+def generate(seed=1, store_ids=(1,), months=1, end_date=None, progress=None, **options):
+    """
+    合成データを投入してコミット（投入済みの店舗はスキップ）
+
+    Returns:
+        dict: テーブル → 投入行数
+    """
+    conn = get_connection()
+    try:
+        generator = DataGenerator(conn, seed, store_ids, months, end_date, **options)
+        result = generator.run(progress)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    from loadtest.seed import check_target_database
+
+    parser = argparse.ArgumentParser(description='ベンチマーク用の合成データを投入')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='tiny',
+                        help='規模のプリセット（' + ', '.join(f'{k}={v[0]}店舗/{v[1]}か月' for k, v in SCALES.items()) + '）')
+    parser.add_argument('--stores', type=int, help=f'店舗数（1〜{MAX_STORES}、プリセットより優先）')
+    parser.add_argument('--months', type=int, help='月数（プリセットより優先）')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--end-date', help='最終営業日 YYYY-MM-DD（省略時は今日。固定すると日をまたいでも同じデータ）')
+    parser.add_argument('--allow-remote', action='store_true', help='ローカル以外のDBへの投入を許可')
+    args = parser.parse_args(argv)
+
+    check_target_database(args.allow_remote)
+
+    try:
+        stores, months = resolve_scale(args.scale, args.stores, args.months)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    end_date = datetime.strptime(args.end_date, '%Y-%m-%d').date() if args.end_date else None
+
+    print(f"投入: {stores}店舗 × {months}か月（seed={args.seed}）")
+    started = time_module.perf_counter()
+    try:
+        result = generate(args.seed, range(1, stores + 1), months, end_date,
+                          progress=lambda message: print(f"  {message}"))
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        return 1
+
+    skipped = result.pop('skipped_stores')
+    if skipped:
+        print(f"⏭️  投入済みのためスキップした店舗: {skipped}")
+    for table, count in result.items():
+        print(f"  {table:24s} {count:10d}行")
+    print(f"✅ 完了（{time_module.perf_counter() - started:.1f}秒）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
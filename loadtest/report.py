@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+負荷試験結果の集計
+
+    summarize_samples : 仮想ユーザーの記録からルートごとの件数・エラー率・p50/p95/p99
+    parse_metrics     : /metrics（Prometheus テキスト形式）を {(名前, ラベル): 値} に変換
+    summarize_db      : 試験前後の /metrics の差分から、エンドポイントごとの1リクエストあたりSQL回数・時間
+"""
+import json
+import math
+import re
+
+_SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def percentile(sorted_values, ratio):
+    """ソート済みの値の percentile（最近傍法）"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(ratio * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize_samples(samples, duration_seconds):
+    """
+    Args:
+        samples: [(ルート名, ステータス, 所要秒, エラー), ...]
+        duration_seconds: 試験時間
+
+    Returns:
+        dict: ルート名 → {'count', 'errors', 'error_rate', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'statuses', 'error_examples'}
+    """
+    by_route = {}
+    for route, status, seconds, error in samples:
+        entry = by_route.setdefault(route, {'latencies': [], 'errors': 0, 'statuses': {}, 'error_examples': {}})
+        entry['latencies'].append(seconds)
+        key = str(status) if status is not None else 'connection_error'
+        entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+        if error:
+            entry['errors'] += 1
+            entry['error_examples'][error] = entry['error_examples'].get(error, 0) + 1
+
+    summary = {}
+    for route in sorted(by_route):
+        entry = by_route[route]
+        latencies = sorted(entry['latencies'])
+        count = len(latencies)
+        summary[route] = {
+            'count': count,
+            'errors': entry['errors'],
+            'error_rate': entry['errors'] / count,
+            'rps': count / duration_seconds if duration_seconds else None,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000,
+            'statuses': entry['statuses'],
+            # 多い順に5種類まで
+            'error_examples': dict(sorted(entry['error_examples'].items(), key=lambda item: -item[1])[:5])
+        }
+    return summary
+
+
+def parse_metrics(text):
+    """
+    Prometheus テキスト形式を解析
+
+    Returns:
+        dict: (メトリクス名, ((ラベル名, 値), ...)) → 値
+    """
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = _SAMPLE_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        label_pairs = tuple(sorted(_LABEL.findall(labels or '')))
+        try:
+            values[(name, label_pairs)] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+def _diff(before, after, name):
+    """after - before（ラベルごと）"""
+    result = {}
+    for (metric, labels), value in after.items():
+        if metric == name:
+            result[labels] = value - before.get((metric, labels), 0.0)
+    return result
+
+
+def summarize_db(before, after):
+    """
+    エンドポイントごとの1リクエストあたりSQL実行回数・SQL時間（/metrics の試験前後の差分）
+
+    Args:
+        before, after: parse_metrics の結果
+
+    Returns:
+        dict: 'blueprint.endpoint' → {'requests', 'queries_per_request', 'db_ms_per_request'}
+    """
+    counts = _diff(before, after, 'db_queries_per_request_count')
+    query_sums = _diff(before, after, 'db_queries_per_request_sum')
+    time_sums = _diff(before, after, 'db_time_per_request_seconds_sum')
+
+    summary = {}
+    for labels, count in counts.items():
+        if count <= 0:
+            continue
+        label_map = dict(labels)
+        endpoint = label_map.get('endpoint') or ''
+        summary[endpoint] = {
+            'requests': int(count),
+            'queries_per_request': query_sums.get(labels, 0.0) / count,
+            'db_ms_per_request': time_sums.get(labels, 0.0) / count * 1000
+        }
+    return dict(sorted(summary.items()))
+
+
+def summarize_connections(before, after):
+    """試験中に開いたDB接続数（接続の種類ごと）"""
+    opened = _diff(before, after, 'db_connections_opened_total')
+    return {dict(labels).get('kind', ''): int(value) for labels, value in sorted(opened.items()) if value > 0}
+
+
+def format_report(result):
+    """run.run_loadtest の結果を表形式の文字列に"""
+    lines = [
+        f"試験時間: {result['duration_seconds']:.0f}秒 / 仮想ユーザー: "
+        + ', '.join(f'{name}={count}' for name, count in result['users'].items()),
+        '',
+        f"{'ルート':48s} {'件数':>7s} {'req/s':>7s} {'エラー率':>8s} {'p50ms':>8s} {'p95ms':>8s} {'p99ms':>8s}",
+    ]
+    for route, stats in result['routes'].items():
+        lines.append(
+            f"{route:48s} {stats['count']:7d} {stats['rps']:7.2f} {stats['error_rate'] * 100:7.2f}% "
+            f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f}"
+        )
+        for error, count in stats['error_examples'].items():
+            lines.append(f"    {count:5d} × {error[:100]}")
+
+    if result.get('db'):
+        lines += ['', f"{'エンドポイント':48s} {'件数':>7s} {'SQL/件':>8s} {'DBms/件':>8s}"]
+        for endpoint, stats in result['db'].items():
+            lines.append(
+                f"{endpoint:48s} {stats['requests']:7d} {stats['queries_per_request']:8.1f} {stats['db_ms_per_request']:8.1f}"
+            )
+    if result.get('db_connections'):
+        lines += ['', 'DB接続数: ' + ', '.join(f'{kind}={count}' for kind, count in result['db_connections'].items())]
+
+    scheduler = result.get('scheduler')
+    if scheduler:
+        lines += [
+            '',
+            f"スケジューラー通知チェック: {scheduler['ticks']}回 / p50 {scheduler['p50_ms']:.1f}ms / "
+            f"p95 {scheduler['p95_ms']:.1f}ms / 最大 {scheduler['max_ms']:.1f}ms / "
+            f"SQL {scheduler['queries_per_tick']:.1f}回/回 / エラーログ {scheduler['errors']}件"
+        ]
+    return '\n'.join(lines)
+
+
+def write_json(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
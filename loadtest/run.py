@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+1晩分の営業を模擬する負荷試験
+
+起動済みの Flask アプリ（--base-url）に仮想ユーザーでリクエストを送り、同じプロセスで
+スケジューラーの通知チェック・再発信チェックを --scheduler-interval 秒ごとに実行する。
+LINE / Twilio はローカルの模擬サーバー（bench_outbound_http.FakeApiHandler）に向けるため外部には送信しない。
+
+仮想ユーザー数は店舗ごと、--scale 倍（例: --scale 3 で現在の3倍のトラフィック）。
+アプリの /metrics を試験前後に取得し、エンドポイントごとの1リクエストあたりSQL回数を出す。
+
+使い方: python -m loadtest.run --base-url http://127.0.0.1:5000 --stores nagano --duration 600 --scale 3
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import requests
+
+from loadtest.report import (
+    format_report, parse_metrics, percentile, summarize_connections, summarize_db, summarize_samples, write_json
+)
+from loadtest.scenarios import SCENARIOS, Recorder
+from loadtest.seed import check_target_database, seed_pickup_window
+
+# --scale 1 のときの店舗あたりの仮想ユーザー数（現在の営業のおおよその規模）
+DEFAULT_USERS = {'desk': 2, 'dashboard': 3, 'cast': 15}
+
+
+class ErrorLogCounter(logging.Handler):
+    """スケジューラーのエラーログ件数（通知チェックは例外をログに出して握りつぶすため）"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def start_fake_apis():
+    """
+    模擬 LINE / Twilio サーバーを起動し、utils.http_clients の送信先をそこに向ける
+
+    utils.http_clients は読み込み時に環境変数を読むため、scheduler を import する前に呼ぶ。
+    """
+    from bench_outbound_http import FakeApiHandler
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    os.environ['LINE_API_BASE_URL'] = base_url
+    os.environ['TWILIO_API_BASE_URL'] = base_url
+    # 模擬サーバーはステータスコールバックを送らない
+    os.environ.pop('TWILIO_STATUS_CALLBACK_URL', None)
+    return server
+
+
+def load_fixtures(store_code):
+    """仮想ユーザーが使う店舗のデータ（seed.py で投入したもの）"""
+    from database.connection import get_connection, get_store_id
+
+    store_id = get_store_id(store_code)
+    prefix = f'lt{store_id}_'
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id, login_id FROM users WHERE login_id LIKE %s ORDER BY id", (prefix + '%',))
+        staff = cursor.fetchall()
+        cursor.execute("SELECT login_id FROM casts WHERE login_id LIKE %s ORDER BY cast_id", (prefix + '%',))
+        cast_login_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT customer_id, phone FROM customers
+            WHERE store_id = %s AND phone IS NOT NULL
+            ORDER BY customer_id LIMIT 5000
+        """, (store_id,))
+        customers = cursor.fetchall()
+        cursor.execute("SELECT course_id FROM courses WHERE store_id = %s AND is_active = TRUE ORDER BY course_id", (store_id,))
+        course_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT nomination_type_id FROM nomination_types WHERE store_id = %s ORDER BY nomination_type_id", (store_id,))
+        nomination_type_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT option_id FROM options WHERE store_id = %s AND is_active = TRUE ORDER BY option_id", (store_id,))
+        option_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT hotel_id FROM hotels WHERE store_id = %s AND is_active = TRUE ORDER BY hotel_id", (store_id,))
+        hotel_ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+    if not staff or not cast_login_ids or not customers or not course_ids:
+        raise SystemExit(f"❌ {store_code} の負荷試験データがありません。先に python -m loadtest.seed を実行してください")
+
+    return {
+        'store_id': store_id,
+        'staff_ids': [row[0] for row in staff],
+        'staff_login_ids': [row[1] for row in staff],
+        'cast_login_ids': cast_login_ids,
+        'customers': customers,
+        'course_ids': course_ids,
+        'nomination_type_ids': nomination_type_ids,
+        'option_ids': option_ids,
+        'hotel_ids': hotel_ids,
+    }
+
+
+def fetch_metrics(base_url):
+    """アプリの /metrics（取得できなければ None）"""
+    try:
+        response = requests.get(base_url.rstrip('/') + '/metrics', timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"⚠️  /metrics を取得できません（SQL回数は集計しません）: {e}")
+        return None
+    return parse_metrics(response.text)
+
+
+def _in_process_query_count():
+    """このプロセス（スケジューラー）で実行したSQLの回数"""
+    from utils.metrics import render_metrics
+
+    return parse_metrics(render_metrics()).get(('db_query_duration_seconds_count', ()), 0.0)
+
+
+def run_scheduler_ticks(stop_event, interval, ticks):
+    """
+    通知チェックと再発信チェックを interval 秒ごとに実行（ticks に所要秒とSQL回数を追加）
+    """
+    from scheduler import check_and_send_notifications, redial_unanswered_calls
+
+    while not stop_event.is_set():
+        queries_before = _in_process_query_count()
+        started = time.perf_counter()
+        check_and_send_notifications()
+        redial_unanswered_calls()
+        ticks.append((time.perf_counter() - started, _in_process_query_count() - queries_before))
+        stop_event.wait(interval)
+
+
+def run_loadtest(base_url, store_codes, duration, scale=1.0, users=None, scheduler_interval=30,
+                 pickups_per_store=50, seed=1):
+    """
+    負荷試験を実行して結果を返す
+
+    Returns:
+        dict: report.format_report / write_json に渡す結果
+    """
+    fake_server = start_fake_apis()
+    error_counter = ErrorLogCounter()
+    for name in ('scheduler', 'utils'):
+        logging.getLogger(name).addHandler(error_counter)
+
+    try:
+        fixtures = {code: load_fixtures(code) for code in store_codes}
+
+        if scheduler_interval and pickups_per_store:
+            from database.connection import get_connection
+
+            conn = get_connection()
+            try:
+                seed_pickup_window(
+                    conn, [fixtures[code]['store_id'] for code in store_codes],
+                    datetime.now(), duration / 60, pickups_per_store, seed
+                )
+            finally:
+                conn.close()
+
+        metrics_before = fetch_metrics(base_url)
+
+        recorder = Recorder()
+        stop_event = threading.Event()
+        user_counts = {name: max(1, round(count * scale)) for name, count in (users or DEFAULT_USERS).items() if count}
+        threads = []
+        user_number = 0
+        for code in store_codes:
+            for name, count in user_counts.items():
+                for _ in range(count):
+                    user_number += 1
+                    rng = random.Random(seed * 100003 + user_number)
+                    threads.append(SCENARIOS[name](base_url, code, fixtures[code], recorder, rng, stop_event))
+
+        ticks = []
+        if scheduler_interval:
+            threads.append(threading.Thread(
+                target=run_scheduler_ticks, args=(stop_event, scheduler_interval, ticks), daemon=True
+            ))
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        stop_event.wait(duration)
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=60)
+        elapsed = time.perf_counter() - started
+
+        metrics_after = fetch_metrics(base_url)
+    finally:
+        for name in ('scheduler', 'utils'):
+            logging.getLogger(name).removeHandler(error_counter)
+        fake_server.shutdown()
+
+    result = {
+        'base_url': base_url,
+        'stores': store_codes,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'duration_seconds': elapsed,
+        'users': {name: count * len(store_codes) for name, count in user_counts.items()},
+        'routes': summarize_samples(recorder.samples, elapsed),
+    }
+    if metrics_before is not None and metrics_after is not None:
+        result['db'] = summarize_db(metrics_before, metrics_after)
+        result['db_connections'] = summarize_connections(metrics_before, metrics_after)
+    if ticks:
+        durations = sorted(seconds for seconds, _ in ticks)
+        result['scheduler'] = {
+            'ticks': len(ticks),
+            'p50_ms': percentile(durations, 0.50) * 1000,
+            'p95_ms': percentile(durations, 0.95) * 1000,
+            'max_ms': durations[-1] * 1000,
+            'queries_per_tick': sum(queries for _, queries in ticks) / len(ticks),
+            'errors': error_counter.count
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='1晩分の営業を模擬する負荷試験')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--stores', default='nagano', help='店舗コード（カンマ区切り）')
+    parser.add_argument('--duration', type=float, default=300, help='試験時間（秒）')
+    parser.add_argument('--scale', type=float, default=1.0, help='仮想ユーザー数の倍率')
+    parser.add_argument('--desk', type=int, default=DEFAULT_USERS['desk'], help='店舗あたりの電話受付数（scale 1）')
+    parser.add_argument('--dashboard', type=int, default=DEFAULT_USERS['dashboard'], help='店舗あたりのダッシュボード数（scale 1）')
+    parser.add_argument('--cast', type=int, default=DEFAULT_USERS['cast'], help='店舗あたりのキャスト数（scale 1）')
+    parser.add_argument('--scheduler-interval', type=float, default=30, help='通知チェックの間隔秒（0で実行しない）')
+    parser.add_argument('--pickups', type=int, default=50, help='試験中に通知が来る送迎記録の店舗あたりの件数')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='結果をJSONで保存するパス')
+    parser.add_argument('--allow-remote', action='store_true', help='ローカル以外のDBを許可')
+    args = parser.parse_args(argv)
+
+    check_target_database(args.allow_remote)
+
+    store_codes = [code.strip() for code in args.stores.split(',') if code.strip()]
+    result = run_loadtest(
+        args.base_url, store_codes, args.duration, args.scale,
+        users={'desk': args.desk, 'dashboard': args.dashboard, 'cast': args.cast},
+        scheduler_interval=args.scheduler_interval,
+        pickups_per_store=args.pickups,
+        seed=args.seed
+    )
+
+    print(format_report(result))
+    if args.json:
+        write_json(result, args.json)
+        print(f"\n✅ 結果を保存しました: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+負荷試験の仮想ユーザー
+
+1ユーザー = 1スレッド + 1つの requests.Session（ログインのCookieを保持）。
+リクエストごとの結果は Recorder に (ルート名, ステータス, 所要秒, エラー) で記録する。
+ルート名は '/<store>/dashboard_data' のように店舗・IDを伏せた形にして店舗をまたいで集計する。
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from loadtest.seed import LOGIN_PASSWORD
+
+REQUEST_TIMEOUT = 30
+
+
+class Recorder:
+    """リクエスト結果をスレッド間で集める"""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, route, status, seconds, error=None):
+        with self._lock:
+            self.samples.append((route, status, seconds, error))
+
+
+def _json_failure(response):
+    """success: false を返すJSON（ステータス200のエラー）ならそのメッセージ"""
+    if 'application/json' not in response.headers.get('Content-Type', ''):
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return 'JSONの解析に失敗'
+    if isinstance(body, dict) and body.get('success') is False:
+        return body.get('error') or body.get('message') or 'success: false'
+    return None
+
+
+class VirtualUser(threading.Thread):
+    """
+    仮想ユーザーの共通処理（ログイン後、stop_event までstep()を繰り返す）
+
+    Args:
+        base_url: アプリのURL（例: http://127.0.0.1:5000）
+        store: 店舗コード
+        fixtures: run.load_fixtures の店舗ごとのデータ
+        recorder: Recorder
+        rng: random.Random（ユーザーごとに別の seed）
+        stop_event: threading.Event
+        think_seconds: step() と step() の間の待ち秒数
+    """
+
+    think_seconds = 5.0
+
+    def __init__(self, base_url, store, fixtures, recorder, rng, stop_event, think_seconds=None):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.store = store
+        self.fixtures = fixtures
+        self.recorder = recorder
+        self.rng = rng
+        self.stop_event = stop_event
+        if think_seconds is not None:
+            self.think_seconds = think_seconds
+        self.session = requests.Session()
+
+    def request(self, route, method, path, expected=(200,), **kwargs):
+        """
+        リクエストを送って結果を記録
+
+        Args:
+            route: 集計用のルート名
+            expected: エラーとして数えないステータス（JSONの success: false はエラー）
+
+        Returns:
+            requests.Response or None（接続エラー時）
+        """
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, timeout=REQUEST_TIMEOUT, allow_redirects=False, **kwargs
+            )
+        except requests.RequestException as e:
+            self.recorder.record(route, None, time.perf_counter() - started, type(e).__name__)
+            return None
+        elapsed = time.perf_counter() - started
+
+        error = None
+        if response.status_code not in expected:
+            error = f'HTTP {response.status_code}'
+        elif response.status_code == 200:
+            error = _json_failure(response)
+        self.recorder.record(route, response.status_code, elapsed, error)
+        return response
+
+    def login(self):
+        raise NotImplementedError
+
+    def step(self):
+        raise NotImplementedError
+
+    def run(self):
+        # 全員が同時にログインしないよう開始をずらす
+        if self.stop_event.wait(self.rng.uniform(0, self.think_seconds)):
+            return
+        self.login()
+        while not self.stop_event.is_set():
+            self.step()
+            # 待ち時間は ±50% ばらつかせる
+            self.stop_event.wait(self.think_seconds * self.rng.uniform(0.5, 1.5))
+
+    @staticmethod
+    def business_date():
+        """営業日（6時までは前日扱い）"""
+        now = datetime.now()
+        if now.hour < 6:
+            now -= timedelta(days=1)
+        return now.strftime('%Y-%m-%d')
+
+
+class StaffUser(VirtualUser):
+    """スタッフとしてログインする仮想ユーザー"""
+
+    def login(self):
+        login_id = self.rng.choice(self.fixtures['staff_login_ids'])
+        self.request('POST /<store>/login', 'POST', f'/{self.store}/login', expected=(302,),
+                     data={'login_id': login_id, 'password': LOGIN_PASSWORD})
+        # customers/search はセッションの店舗を使う
+        self.staff_id = self.fixtures['staff_ids'][self.fixtures['staff_login_ids'].index(login_id)]
+
+
+class PhoneDeskUser(StaffUser):
+    """
+    電話受付: 予約画面のマスタ取得 → 顧客検索 → 空きキャスト検索 → 予約登録
+
+    空きキャストがいない場合は登録しない（電話で断った扱い）。
+    """
+
+    think_seconds = 20.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bootstrap_etag = None
+
+    def step(self):
+        store = self.store
+        headers = {'If-None-Match': self.bootstrap_etag} if self.bootstrap_etag else {}
+        response = self.request('GET /<store>/reservation/bootstrap', 'GET', f'/{store}/reservation/bootstrap',
+                                expected=(200, 304), headers=headers)
+        if response is not None and response.headers.get('ETag'):
+            self.bootstrap_etag = response.headers['ETag']
+
+        customer_id, phone = self.rng.choice(self.fixtures['customers'])
+        self.request('GET /<store>/api/customers/search', 'GET', f'/{store}/api/customers/search',
+                     params={'keyword': phone[-4:]})
+
+        business_date = self.business_date()
+        desired = datetime.now() + timedelta(minutes=self.rng.randrange(20, 120, 10))
+        hour = desired.hour + (24 if desired.strftime('%Y-%m-%d') != business_date else 0)
+        course_id = self.rng.choice(self.fixtures['course_ids'])
+        hotel_id = self.rng.choice(self.fixtures['hotel_ids'])
+        response = self.request('GET /<store>/gantt/api/availability', 'GET', f'/{store}/gantt/api/availability',
+                                params={'date': business_date, 'start': f'{hour:02d}:{desired.minute // 10 * 10:02d}',
+                                        'course_id': course_id, 'hotel_id': hotel_id, 'max_delay': 60})
+        if response is None or response.status_code != 200:
+            return
+        try:
+            casts = response.json()['data']['casts']
+        except (ValueError, KeyError, TypeError):
+            return
+        if not casts:
+            return
+
+        cast = casts[0]
+        start_date, start_time = cast['start_datetime'].split(' ')
+        form = {
+            'customer_id': customer_id,
+            'contract_type': 'contract',
+            'reservation_date': start_date,
+            'reservation_time': start_time,
+            'cast_id': cast['cast_id'],
+            'staff_id': self.staff_id,
+            'course_id': course_id,
+            'nomination_type': self.rng.choice(self.fixtures['nomination_type_ids']),
+            'hotel_id': hotel_id,
+            'payment_method': self.rng.choice(['現金', 'カード']),
+        }
+        if self.fixtures['option_ids'] and self.rng.random() < 0.2:
+            form['options[]'] = [self.rng.choice(self.fixtures['option_ids'])]
+        # 別の受付が先に同じ枠を取った場合は 409（重複）になる。業務上の結果なのでエラーにしない
+        self.request('POST /<store>/reservations/register', 'POST', f'/{store}/reservations/register',
+                     expected=(200, 409), data=form)
+
+        self.request('GET /<store>/reservations/api', 'GET', f'/{store}/reservations/api',
+                     params={'date': business_date})
+
+
+class DashboardUser(StaffUser):
+    """事務所のダッシュボード: dashboard_data のポーリング（ときどきタイムスケジュールも更新）"""
+
+    think_seconds = 5.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.polls = 0
+
+    def login(self):
+        super().login()
+        self.request('GET /<store>/dashboard', 'GET', f'/{self.store}/dashboard')
+
+    def step(self):
+        self.polls += 1
+        today = datetime.now().strftime('%Y-%m-%d')
+        self.request('GET /<store>/dashboard_data', 'GET', f'/{self.store}/dashboard_data', params={'date': today})
+        if self.polls % 6 == 0:
+            self.request('GET /<store>/gantt/api/data', 'GET', f'/{self.store}/gantt/api/data',
+                         params={'date': self.business_date()})
+
+
+class CastPhoneUser(VirtualUser):
+    """キャストのスマホ: マイページの予約カレンダー・予約一覧・報酬"""
+
+    think_seconds = 30.0
+
+    def login(self):
+        login_id = self.rng.choice(self.fixtures['cast_login_ids'])
+        self.request('POST /<store>/cast/login', 'POST', f'/{self.store}/cast/login', expected=(302,),
+                     data={'login_id': login_id, 'password': LOGIN_PASSWORD})
+        self.request('GET /<store>/cast/dashboard', 'GET', f'/{self.store}/cast/dashboard')
+
+    def step(self):
+        now = datetime.now()
+        choice = self.rng.random()
+        if choice < 0.4:
+            self.request('GET /<store>/cast/api/reservation_counts', 'GET',
+                         f'/{self.store}/cast/api/reservation_counts', params={'year': now.year, 'month': now.month})
+        elif choice < 0.8:
+            self.request('GET /<store>/cast/reservation_list', 'GET', f'/{self.store}/cast/reservation_list',
+                         params={'date': self.business_date()})
+        else:
+            self.request('GET /<store>/cast/api/monthly_rewards', 'GET', f'/{self.store}/cast/api/monthly_rewards',
+                         params={'year': now.year, 'month': now.month})
+
+
+SCENARIOS = {
+    'desk': PhoneDeskUser,
+    'dashboard': DashboardUser,
+    'cast': CastPhoneUser,
+}
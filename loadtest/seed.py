@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+負荷試験用の合成データをローカルの PostgreSQL に投入する
+
+データの生成は loadtest/datagen.py（seed から再現可能・COPY で投入）で行い、ここでは
+店舗コードで投入先を指定する。テーブル定義は本番のスキーマのみのダンプなどで作成済みであることが前提。
+
+ログインIDは lt{store_id}_staff{n} / lt{store_id}_cast{n}、パスワードはすべて LOGIN_PASSWORD。
+
+使い方: python -m loadtest.seed --stores nagano --months 3 [--seed 1]
+"""
+import argparse
+import random
+import sys
+from datetime import timedelta
+
+from config import DATABASE_CONFIG
+from database.connection import DB_PATHS, get_store_id
+from loadtest.datagen import CASTS_PER_STORE, LOGIN_PASSWORD, generate, store_prefix
+
+# ローカル以外のDBには投入しない（--allow-remote で解除）
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+def check_target_database(allow_remote=False):
+    """投入先がローカルのDBか確認（本番DBへの誤投入防止）"""
+    if DATABASE_CONFIG['host'] not in LOCAL_HOSTS and not allow_remote:
+        raise SystemExit(
+            f"❌ 投入先がローカルではありません（host={DATABASE_CONFIG['host']}）。"
+            "ローカルの負荷試験用DBを指定するか --allow-remote を付けてください"
+        )
+
+
+def seed_pickup_window(conn, store_ids, start, minutes, per_store, seed=1):
+    """
+    負荷試験中にスケジューラーの通知チェックが処理する送迎記録を作る
+
+    start から minutes 分の間に退室時刻が来る送迎記録（入室・退室の2行）を店舗ごとに per_store 件。
+    負荷試験の開始時に実行し、1晩分の通知を試験時間に詰めて再現する。
+
+    Returns:
+        int: 作成した送迎（入室・退室の組）の数
+    """
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    try:
+        rows = []
+        for store_id in store_ids:
+            cursor.execute("""
+                SELECT c.cast_id FROM casts c
+                WHERE c.store_id = %s AND c.login_id LIKE %s
+                ORDER BY c.cast_id
+            """, (store_id, store_prefix(store_id) + '%'))
+            cast_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT login_id FROM users WHERE login_id LIKE %s ORDER BY id", (store_prefix(store_id) + '%',))
+            staff_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT course_id, time_minutes FROM courses WHERE store_id = %s ORDER BY course_id", (store_id,))
+            courses = cursor.fetchall()
+            cursor.execute("SELECT hotel_id FROM hotels WHERE store_id = %s AND name LIKE 'LTホテル%%' ORDER BY hotel_id", (store_id,))
+            hotel_ids = [row[0] for row in cursor.fetchall()]
+            if not cast_ids or not courses:
+                continue
+
+            for _ in range(per_store):
+                course_id, course_minutes = rng.choice(courses)
+                # 通知（退室の notification_minutes_before 分前）が試験時間内に来るようにする
+                exit_time = start + timedelta(minutes=10 + rng.uniform(0, minutes))
+                entry_time = exit_time - timedelta(minutes=course_minutes)
+                cast_id = rng.choice(cast_ids)
+                hotel_id = rng.choice(hotel_ids) if hotel_ids else None
+                staff_id = rng.choice(staff_ids) if staff_ids else None
+                rows.append(('pickup', cast_id, hotel_id, course_id, entry_time, None, True, staff_id))
+                rows.append(('pickup', cast_id, hotel_id, course_id, entry_time, exit_time, False, staff_id))
+
+        cursor.executemany("""
+            INSERT INTO pickup_records
+                (type, cast_id, hotel_id, course_id, entry_time, exit_time, is_entry, staff_id, created_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_DATE)
+        """, rows)
+        conn.commit()
+        return len(rows) // 2
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def seed_database(store_codes, months=3, seed=1, casts_per_store=CASTS_PER_STORE, customers_per_store=None):
+    """
+    合成データを投入（投入済みの店舗はスキップ）
+
+    Returns:
+        dict: テーブル → 投入行数（'skipped_stores' にスキップした store_id）
+    """
+    return generate(
+        seed, [get_store_id(code) for code in store_codes], months,
+        casts_per_store=casts_per_store, customers_per_store=customers_per_store
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='負荷試験用の合成データを投入')
+    parser.add_argument('--stores', default='nagano', help='店舗コード（カンマ区切り）')
+    parser.add_argument('--months', type=int, default=3, help='予約を作る月数')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--casts', type=int, default=CASTS_PER_STORE, help='店舗あたりのキャスト数')
+    parser.add_argument('--customers', type=int, help='店舗あたりの顧客数（省略時は月数に応じて決める）')
+    parser.add_argument('--allow-remote', action='store_true', help='ローカル以外のDBへの投入を許可')
+    args = parser.parse_args(argv)
+
+    check_target_database(args.allow_remote)
+
+    store_codes = [code.strip() for code in args.stores.split(',') if code.strip()]
+    unknown = [code for code in store_codes if code not in DB_PATHS]
+    if unknown:
+        print(f"❌ 不明な店舗コード: {', '.join(unknown)}")
+        return 1
+
+    try:
+        result = seed_database(store_codes, args.months, args.seed, args.casts, args.customers)
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        return 1
+
+    skipped = result.pop('skipped_stores')
+    if skipped:
+        print(f"⏭️  投入済みのためスキップした店舗ID: {skipped}")
+    for table, count in result.items():
+        print(f"  {table:24s} {count:10d}行")
+    print("✅ 完了")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
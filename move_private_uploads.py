@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+static/uploads/cast 以下の身分証・契約書を非公開ディレクトリ（private_uploads/）へ移すスクリプト
+
+移動する画像はEXIF（位置情報など）を除去してから保存する。
+static 下に生成済みの variant は公開されていたため削除する（非公開側で必要時に再生成される）。
+DBに保存されているパス（uploads/cast/...）は変わらないため、DBの更新は不要。
+"""
+
+import os
+import shutil
+
+from utils.image_pipeline import (
+    PRIVATE_ROOT, PRIVATE_UPLOAD_DIRS, STATIC_ROOT, is_image_path, strip_metadata
+)
+
+
+def move_private_uploads():
+    """static 下の非公開ファイルを private_uploads/ へ移動"""
+    moved = 0
+
+    try:
+        for upload_dir in PRIVATE_UPLOAD_DIRS:
+            legacy_root = os.path.join(STATIC_ROOT, upload_dir)
+            if not os.path.isdir(legacy_root):
+                continue
+
+            for directory, dirnames, filenames in os.walk(legacy_root):
+                if os.path.basename(directory) == 'variants':
+                    continue
+                for filename in filenames:
+                    legacy_path = os.path.join(directory, filename)
+                    relative_path = os.path.relpath(legacy_path, STATIC_ROOT).replace(os.sep, '/')
+                    private_path = os.path.join(PRIVATE_ROOT, relative_path)
+
+                    os.makedirs(os.path.dirname(private_path), exist_ok=True)
+                    if not os.path.exists(private_path):
+                        with open(legacy_path, 'rb') as f:
+                            data = f.read()
+                        if is_image_path(relative_path):
+                            data = strip_metadata(data)
+                        with open(private_path, 'wb') as f:
+                            f.write(data)
+                    os.remove(legacy_path)
+                    moved += 1
+                    print(f"  {relative_path}: 移動")
+
+            # 公開されていた variant を削除
+            for directory, dirnames, filenames in os.walk(legacy_root, topdown=False):
+                if os.path.basename(directory) == 'variants':
+                    shutil.rmtree(directory)
+
+        print(f"✅ 非公開ファイルの移動が完了しました（{moved}件）")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+
+
+if __name__ == '__main__':
+    move_private_uploads()
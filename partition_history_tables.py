@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+履歴テーブルを月単位の範囲パーティションに移行するスクリプト
+
+対象は database/partition_db.py の PARTITIONED_TABLES
+（reservations / pickup_records / money_records / point_history）。テーブルごとに1トランザクションで
+    1. 既存テーブルを {テーブル}_unpartitioned に改名（インデックスも改名）
+    2. 同じ列・デフォルト・CHECK制約で PARTITION BY RANGE (パーティションキー) のテーブルを作成
+       （主キーは (ID列, パーティションキー)。IDのシーケンスはそのまま引き継ぐ）
+    3. デフォルトパーティションと、最古の月から PARTITION_MONTHS_AHEAD か月先までの月パーティションを作成
+    4. 既存の行をコピーし、インデックス・外部キー（他テーブルへの参照）を作り直す
+を行う。
+
+- パーティションテーブルは主キーにパーティションキーを含める必要があるため、
+  他のテーブルからこれらのテーブルへの外部キー（reservation_options など）は削除する（削除した定義を表示する）。
+  予約削除時の子テーブルの削除は delete_reservation で行う
+- {テーブル}_unpartitioned は確認用に残す。件数を確認したら手動で DROP する
+- 移行中は対象テーブルをロックするため、営業時間外に実行すること
+"""
+import sys
+from datetime import date
+
+from database.connection import get_connection
+from database.partition_db import (
+    PARTITION_MONTHS_AHEAD, PARTITIONED_TABLES, add_months, create_month_partition,
+    get_partitioned_tables, month_start, partition_name
+)
+
+OLD_SUFFIX = '_unpartitioned'
+
+
+def check_table(cursor, table, key):
+    """移行できないテーブルなら理由を返す"""
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE {key} IS NULL)")
+    if cursor.fetchone()[0]:
+        return f"{key} が NULL の行があります"
+
+    # 一意インデックスはパーティションキーを含まないと作れない
+    cursor.execute("""
+        SELECT i.relname
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass AND x.indisunique AND NOT x.indisprimary
+    """, (table,))
+    unique_indexes = [row[0] for row in cursor.fetchall()]
+    if unique_indexes:
+        return f"主キー以外の一意インデックスがあります: {', '.join(unique_indexes)}"
+
+    cursor.execute("""
+        SELECT DISTINCT v.relname
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = %s::regclass AND v.oid <> d.refobjid
+    """, (table,))
+    views = [row[0] for row in cursor.fetchall()]
+    if views:
+        return f"参照しているビューがあります: {', '.join(views)}"
+    return None
+
+
+def partition_table(cursor, table, config, today):
+    """1テーブルをパーティションテーブルに移行"""
+    key = config['key']
+    id_column = config['id']
+    old_table = f"{table}{OLD_SUFFIX}"
+
+    cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    reason = check_table(cursor, table, key)
+    if reason:
+        raise RuntimeError(f"{table}: {reason}")
+
+    # 作り直すインデックス（主キー以外）と外部キー
+    cursor.execute("""
+        SELECT i.relname, pg_get_indexdef(x.indexrelid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass AND NOT x.indisprimary
+    """, (table,))
+    indexes = cursor.fetchall()
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+    """, (table,))
+    foreign_keys = cursor.fetchall()
+    cursor.execute("""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE confrelid = %s::regclass AND contype = 'f'
+    """, (table,))
+    referencing_keys = cursor.fetchall()
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, id_column))
+    sequence = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+    """, (table,))
+    columns = ', '.join(row[0] for row in cursor.fetchall())
+
+    # 既存テーブルを退避（インデックス名は新しいテーブルで使うため改名する）
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {old_table}")
+    for index_name, _ in indexes:
+        cursor.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}{OLD_SUFFIX}")
+    cursor.execute("""
+        SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'
+    """, (old_table,))
+    row = cursor.fetchone()
+    if row:
+        cursor.execute(f"ALTER TABLE {old_table} RENAME CONSTRAINT {row[0]} TO {row[0]}{OLD_SUFFIX}")
+    for referencing_table, constraint, definition in referencing_keys:
+        cursor.execute(f"ALTER TABLE {referencing_table} DROP CONSTRAINT {constraint}")
+        print(f"  ⚠️ 外部キーを削除: {referencing_table}.{constraint} {definition}")
+
+    cursor.execute(f"""
+        CREATE TABLE {table} (
+            LIKE {old_table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS
+        ) PARTITION BY RANGE ({key})
+    """)
+    cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({id_column}, {key})")
+    if sequence:
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{id_column}")
+
+    cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    cursor.execute(f"SELECT MIN({key}) FROM {old_table}")
+    oldest = cursor.fetchone()[0]
+    month = month_start(oldest) if oldest else month_start(today)
+    last_month = add_months(month_start(today), PARTITION_MONTHS_AHEAD)
+    partitions = 0
+    while month <= last_month:
+        create_month_partition(cursor, table, month)
+        partitions += 1
+        month = add_months(month, 1)
+
+    cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old_table}")
+    rows = cursor.rowcount
+
+    for _, definition in indexes:
+        # 改名前に取得した定義（ON public.テーブル）は新しいパーティションテーブルを指す（各パーティションにも作られる）
+        cursor.execute(definition)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{key} ON {table} ({key})")
+    for constraint, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} {definition}")
+    cursor.execute(f"ANALYZE {table}")
+
+    print(f"  {table}: {rows}行を移行（パーティション {partitions}個、最新 {partition_name(table, last_month)}）")
+
+
+def partition_history_tables(tables=None):
+    """PARTITIONED_TABLES を順に移行（移行済みのテーブルはスキップ）"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    today = date.today()
+
+    try:
+        partitioned = get_partitioned_tables(cursor)
+        for table in tables or PARTITIONED_TABLES:
+            cursor.execute("SELECT to_regclass(%s)", (table,))
+            if cursor.fetchone()[0] is None:
+                print(f"⚠️ テーブル {table} が存在しないためスキップします")
+                continue
+            if table in partitioned:
+                print(f"⏭️  {table} は移行済みです")
+                continue
+            try:
+                partition_table(cursor, table, PARTITIONED_TABLES[table], today)
+                conn.commit()
+            except Exception as e:
+                print(f"❌ エラー: {e}")
+                conn.rollback()
+                continue
+
+        print(f"✅ 完了（確認後に *{OLD_SUFFIX} テーブルを DROP してください）")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    partition_history_tables(sys.argv[1:] or None)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+ID採番をシーケンスに切り替えるためのスクリプト
+
+以前は各 *_db.py で MAX(id)+1 を計算して明示的にIDを指定していたため、
+SERIAL列でもシーケンスが進んでいない。INSERT ... RETURNING に切り替える前に
+シーケンスを作成（未作成の場合）し、現在の最大値の次から採番されるようにする。
+"""
+
+from database.connection import get_connection
+
+# (テーブル, ID列)
+ID_COLUMNS = [
+    ('pickup_records', 'record_id'),
+    ('money_records', 'id'),
+    ('casts', 'cast_id'),
+    ('categories', 'category_id'),
+    ('areas', 'area_id'),
+    ('hotels', 'hotel_id'),
+]
+
+# シーケンスの開始値を決める際に追加で考慮する列
+# money_records.record_id は pickup_records.record_id のシーケンスで採番する（register_money_record）
+SHARED_SEQUENCE_COLUMNS = {
+    ('pickup_records', 'record_id'): [('money_records', 'record_id')],
+}
+
+def ensure_id_sequence(cursor, table, column):
+    """ID列にシーケンス（DEFAULT nextval）を設定し、最大値+1から採番するよう再設定"""
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, column))
+    sequence = cursor.fetchone()[0]
+
+    if sequence is None:
+        sequence = f"{table}_{column}_seq"
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence} OWNED BY {table}.{column}")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT nextval('{sequence}')")
+        print(f"  {table}.{column}: シーケンス {sequence} を作成")
+
+    max_values = [f"(SELECT MAX({column}) FROM {table})"]
+    for other_table, other_column in SHARED_SEQUENCE_COLUMNS.get((table, column), []):
+        max_values.append(f"(SELECT MAX({other_column}) FROM {other_table})")
+
+    cursor.execute(f"SELECT COALESCE(GREATEST({', '.join(max_values)}), 0) + 1")
+    next_value = cursor.fetchone()[0]
+
+    cursor.execute("SELECT setval(%s, %s, false)", (sequence, next_value))
+    print(f"  {table}.{column}: 次のIDを {next_value} に設定")
+
+def reseed_id_sequences():
+    """ID_COLUMNS のすべてのシーケンスを再設定"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        for table, column in ID_COLUMNS:
+            cursor.execute("SELECT to_regclass(%s)", (table,))
+            if cursor.fetchone()[0] is None:
+                print(f"⚠️ テーブル {table} が存在しないためスキップします")
+                continue
+            ensure_id_sequence(cursor, table, column)
+
+        conn.commit()
+        print("✅ IDシーケンスの再設定が完了しました")
+
+    except Exception as e:
+        print(f"❌ エラー: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    reseed_id_sequences()
@@ -3,7 +3,6 @@ import os
 import json
 from datetime import datetime
 from flask import Blueprint, jsonify
-from werkzeug.utils import secure_filename
 from flask import render_template, request, redirect, url_for
 from database.connection import get_db, get_display_name, get_store_id
 from datetime import datetime, date
@@ -20,6 +19,7 @@ from database.cast_db import (
     update_cast_ng_custom_areas, update_cast_ng_age_patterns
 )
 from database.extension_db import get_all_extensions
+from utils.image_pipeline import save_upload, delete_upload
 
 
 # ファイルアップロード設定
@@ -46,25 +46,8 @@ def save_cast_file(file, cast_id, file_type):
         str: 保存されたファイルの相対パス（static/からの相対パス）
     """
     if file and allowed_file(file.filename):
-        # ファイル名を安全にする
-        filename = secure_filename(file.filename)
-        
-        # タイムスタンプを追加してファイル名の重複を防ぐ
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        name, ext = os.path.splitext(filename)
-        filename = f"{file_type}_{timestamp}{ext}"
-        
-        # 保存先ディレクトリを作成
-        upload_dir = os.path.join('static', 'uploads', 'cast', str(cast_id))
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # ファイルを保存
-        file_path = os.path.join(upload_dir, filename)
-        file.save(file_path)
-        
-        # データベース保存用の相対パス（static/からの相対パス）
-        relative_path = os.path.join('uploads', 'cast', str(cast_id), filename)
-        return relative_path
+        # 内容のハッシュをファイル名にして保存（表示用の縮小画像はバックグラウンドで生成）
+        return save_upload(file, f'uploads/cast/{cast_id}', prefix=f'{file_type}_')
     
     return None
 
@@ -76,10 +59,8 @@ def delete_cast_file(file_path):
         file_path: ファイルの相対パス（uploads/cast/{cast_id}/...）
     """
     try:
-        full_path = os.path.join('static', file_path)
-        if os.path.exists(full_path):
-            os.remove(full_path)
-            print(f"ファイル削除成功: {full_path}")
+        if delete_upload(file_path):
+            print(f"ファイル削除成功: {file_path}")
             return True
     except Exception as e:
         print(f"ファイル削除エラー: {e}")
@@ -269,7 +250,7 @@ def register_cast(store):
         for file in id_document_files:
             if file and file.filename:
                 saved_path = save_cast_file(file, cast_id, 'id_document')
-                if saved_path:
+                if saved_path and saved_path not in id_docs:
                     id_docs.append(saved_path)
         
         # 契約書等画像
@@ -277,7 +258,7 @@ def register_cast(store):
         for file in contract_document_files:
             if file and file.filename:
                 saved_path = save_cast_file(file, cast_id, 'contract_document')
-                if saved_path:
+                if saved_path and saved_path not in contract_docs:
                     contract_docs.append(saved_path)
         
         cast_data['id_document_paths'] = id_docs
@@ -475,16 +456,22 @@ def edit_cast(store, cast_id):
         deleted_id_docs = request.form.getlist('deleted_id_documents')
         deleted_contract_docs = request.form.getlist('deleted_contract_documents')
         
-        # 削除対象ファイルを実際に削除
+        # 削除対象ファイルを一覧から外す（このキャストに登録済みのファイルのみ）
+        removed_paths = set()
         for file_path in deleted_id_docs:
-            delete_cast_file(file_path)
             if file_path in existing_id_docs:
                 existing_id_docs.remove(file_path)
+                removed_paths.add(file_path)
         
         for file_path in deleted_contract_docs:
-            delete_cast_file(file_path)
             if file_path in existing_contract_docs:
                 existing_contract_docs.remove(file_path)
+                removed_paths.add(file_path)
+
+        # 同じ内容のファイルは同じパスになるため、まだ参照が残っているファイルは消さない
+        for file_path in removed_paths:
+            if file_path not in existing_id_docs and file_path not in existing_contract_docs:
+                delete_cast_file(file_path)
         
         # 新規アップロードファイルの処理（身分証）
         id_document_files = request.files.getlist('id_documents')
@@ -517,7 +504,8 @@ def edit_cast(store, cast_id):
                     )
                 
                 saved_path = save_cast_file(file, cast_id, 'id_document')
-                if saved_path:
+                # 同じ内容のファイルを重ねて登録しない
+                if saved_path and saved_path not in existing_id_docs:
                     existing_id_docs.append(saved_path)
         
         # 新規アップロードファイルの処理（契約書等）
@@ -551,7 +539,7 @@ def edit_cast(store, cast_id):
                     )
                 
                 saved_path = save_cast_file(file, cast_id, 'contract_document')
-                if saved_path:
+                if saved_path and saved_path not in existing_contract_docs:
                     existing_contract_docs.append(saved_path)
         
         # ファイルパスをcast_dataに追加
@@ -10,8 +10,6 @@ from database.cast_db import (
 )
 from database.cast_mypage_db import (
     create_cast_session,
-    get_cast_session,
-    update_cast_session_activity,
     delete_cast_session,
     get_cast_notices,
     get_cast_notice_by_id,
@@ -22,6 +20,16 @@ from database.cast_mypage_db import (
     update_cast_blog_draft,
     delete_cast_blog_draft
 )
+from database.cast_session_cache import (
+    get_cached_cast_session,
+    touch_cast_session,
+    invalidate_cast_session
+)
+from database.cast_session_token import (
+    issue_cast_session_token,
+    verify_cast_session_token
+)
+from config import CAST_SESSION_MODE
 from database.cast_reservation_db import (
     get_cast_reservations_by_date,
     get_cast_monthly_reservation_counts,
@@ -44,9 +52,8 @@ from database.customer_db import (
 from database.rating_db import (
     get_all_rating_items
 )
-from werkzeug.utils import secure_filename
+from utils.image_pipeline import save_upload, image_variant_url
 from datetime import datetime, timedelta
-import os
 
 cast_mypage_bp = Blueprint('cast_mypage', __name__, url_prefix='/<store>/cast')
 
@@ -57,14 +64,6 @@ def allowed_file(filename):
     """許可されたファイル形式かチェック"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def ensure_upload_folder():
-    """アップロードフォルダの確認・作成"""
-    upload_folder = os.path.join('static', 'uploads', 'blog')
-    if not os.path.exists(upload_folder):
-        os.makedirs(upload_folder)
-    return upload_folder
-
-
 # ==== ログイン認証デコレータ ====
 
 def login_required(f):
@@ -78,9 +77,14 @@ def login_required(f):
             return redirect(url_for('cast_mypage.login', store=store))
 
         # セッション検証
-        db = get_db(store)
+        # token: 署名付きトークンで検証（DB参照なし）
+        # db: プロセス内キャッシュ、TTL切れの場合のみDB参照
         store_id = get_store_id(store)
-        cast_session = get_cast_session(db, cast_session_id, store_id)
+        cast_session_token = session.get('cast_session_token')
+        if CAST_SESSION_MODE == 'token' and cast_session_token:
+            cast_session = verify_cast_session_token(cast_session_token, store_id)
+        else:
+            cast_session = get_cached_cast_session(cast_session_id, store_id)
 
         # 辞書形式でアクセス
         if not cast_session or not cast_session['is_active']:
@@ -96,8 +100,8 @@ def login_required(f):
         # セッションにcast_idを保存（念のため）
         session['cast_id'] = cast_id
 
-        # 最終アクティビティ更新
-        update_cast_session_activity(db, cast_session_id, store_id)
+        # 最終アクティビティ更新（バックグラウンドでまとめて書き込む）
+        touch_cast_session(cast_session_id, store_id)
 
         return f(store, *args, **kwargs)
     
@@ -139,6 +143,8 @@ def login(store):
         
         # セッションに保存
         session['cast_session_id'] = cast_session_id
+        if CAST_SESSION_MODE == 'token':
+            session['cast_session_token'] = issue_cast_session_token(cast_session_id, cast_id, store_id)
         
         # キャスト情報を取得して名前をセッションに保存
         cast = find_cast_by_login_id(db, login_id)
@@ -164,6 +170,8 @@ def logout(store):
         db = get_db(store)
         store_id = get_store_id(store)
         delete_cast_session(db, cast_session_id, store_id)
+        db.close()
+        invalidate_cast_session(cast_session_id, store_id)
 
     session.clear()
     flash('ログアウトしました。', 'success')
@@ -510,22 +518,11 @@ def upload_blog_image(store):
             return {'error': 'ファイル名が空です'}, 400
         
         if file and allowed_file(file.filename):
-            # ファイル名を安全にする
-            filename = secure_filename(file.filename)
-            # タイムスタンプを追加してユニークにする
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            name, ext = os.path.splitext(filename)
-            filename = f"{name}_{timestamp}{ext}"
-            
-            # アップロードフォルダを確認・作成
-            upload_path = ensure_upload_folder()
+            # 内容のハッシュをファイル名にして保存（縮小・WebP変換はバックグラウンドで実行）
+            relative_path = save_upload(file, 'uploads/blog')
             
-            # ファイルを保存
-            filepath = os.path.join(upload_path, filename)
-            file.save(filepath)
-            
-            # URLを返す（TinyMCE用）
-            file_url = url_for('static', filename=f'uploads/blog/{filename}')
+            # URLを返す（TinyMCE用）。表示用に縮小したvariantを配信する
+            file_url = image_variant_url(relative_path, 'medium')
             
             print(f"[SUCCESS] ブログ画像アップロード成功: {file_url}")
             return {'location': file_url}, 200
@@ -670,11 +667,6 @@ def reservation_detail_api(store):
         if not detail:
             return jsonify({'success': False, 'error': '予約が見つかりません'}), 404
 
-        # datetime型をISO形式文字列に変換
-        for key, value in detail.items():
-            if isinstance(value, datetime):
-                detail[key] = value.isoformat()
-
         # 接客回数を取得
         visit_count = get_customer_visit_count(db, detail['customer_id'], cast_id, store_id)
 
@@ -1028,7 +1020,7 @@ def api_customer_list(store):
                 'customer_name': customer['customer_name'],
                 'furigana': customer['furigana'],
                 'visit_count': customer['visit_count'],
-                'last_visit_datetime': customer['last_visit_datetime'].isoformat() if customer['last_visit_datetime'] else None,
+                'last_visit_datetime': customer['last_visit_datetime'],
                 'last_reservation_id': customer['last_reservation_id'],
                 'last_hotel_name': customer['last_hotel_name'],
                 'last_nomination_type': customer['last_nomination_type'],
@@ -1159,7 +1151,7 @@ def api_customer_search(store):
                 'customer_name': customer['customer_name'],
                 'furigana': customer['furigana'],
                 'visit_count': customer['visit_count'],
-                'last_visit_datetime': customer['last_visit_datetime'].isoformat() if customer['last_visit_datetime'] else None,
+                'last_visit_datetime': customer['last_visit_datetime'],
                 'last_reservation_id': customer['last_reservation_id'],
                 'last_hotel_name': customer['last_hotel_name'],
                 'last_nomination_type': customer['last_nomination_type'],
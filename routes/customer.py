@@ -2,8 +2,10 @@
 from flask import render_template, request, jsonify, session, redirect, url_for
 from database.customer_db import (
     add_customer, get_all_customers, get_customer_by_id,
-    update_customer, delete_customer, search_customers
+    update_customer, delete_customer, search_customers,
+    DuplicatePhoneError
 )
+from database.customer_import_db import import_customers_csv
 from database.point_db import add_point_transaction
 from datetime import datetime
 
@@ -106,7 +108,7 @@ def api_get_customers_endpoint(store):
                 'name': customer['name'],
                 'furigana': customer.get('furigana'),
                 'phone': customer.get('phone'),
-                'birthday': customer['birthday'].isoformat() if customer.get('birthday') else None,
+                'birthday': customer.get('birthday'),
                 'age': customer.get('age'),
                 'prefecture': customer.get('prefecture'),
                 'city': customer.get('city'),
@@ -121,8 +123,8 @@ def api_get_customers_endpoint(store):
                 'nickname': customer.get('nickname'),
                 'last_visit_date': last_visit_date,
                 'visit_count': visit_count,
-                'created_at': customer['created_at'].isoformat() if customer.get('created_at') else None,
-                'updated_at': customer['updated_at'].isoformat() if customer.get('updated_at') else None
+                'created_at': customer.get('created_at'),
+                'updated_at': customer.get('updated_at')
             }
             customers_list.append(customer_dict)
 
@@ -156,14 +158,6 @@ def api_get_customer_endpoint(store, customer_id):
         # 顧客番号 = 顧客ID（数字そのまま）
         customer_dict['customer_number'] = customer_id
         
-        # date型をJSON対応形式に変換
-        if customer_dict.get('birthday'):
-            customer_dict['birthday'] = customer_dict['birthday'].isoformat()
-        if customer_dict.get('created_at'):
-            customer_dict['created_at'] = customer_dict['created_at'].isoformat()
-        if customer_dict.get('updated_at'):
-            customer_dict['updated_at'] = customer_dict['updated_at'].isoformat()
-        
         # 🔧 修正: 'customer' → 'data' に変更
         return jsonify({'success': True, 'data': customer_dict})
     except Exception as e:
@@ -199,6 +193,8 @@ def api_add_customer_endpoint(store):
         point_reason = data.get('point_reason')
 
         customer_id = add_customer(store_code, data)
+        if not customer_id:
+            return jsonify({'success': False, 'message': '顧客の登録に失敗しました'}), 500
 
         # ポイント操作がある場合、ポイントを追加/消費
         if point_operation and point_amount:
@@ -225,6 +221,8 @@ def api_add_customer_endpoint(store):
             'message': '顧客を登録しました',
             'customer_id': customer_id
         })
+    except DuplicatePhoneError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -284,6 +282,8 @@ def api_update_customer_endpoint(store, customer_id):
             'success': True,
             'message': '顧客情報を更新しました'
         })
+    except DuplicatePhoneError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
     except Exception as e:
         error_message = str(e)
         
@@ -314,6 +314,35 @@ def api_delete_customer_endpoint(store, customer_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def api_import_customers_endpoint(store):
+    """顧客CSV一括取り込みAPI（multipart: file, update_existing=1 で既存顧客を更新）"""
+    if 'store' not in session:
+        return jsonify({'success': False, 'message': '未ログイン'}), 401
+
+    try:
+        store_code = session['store']
+        upload = request.files.get('file')
+
+        if not upload or not upload.filename:
+            return jsonify({'success': False, 'message': 'CSVファイルを選択してください'}), 400
+
+        update_existing = request.form.get('update_existing') == '1'
+
+        try:
+            summary = import_customers_csv(store_code, upload.read(), update_existing)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'message': f"{summary['inserted']}件登録、{summary['updated']}件更新、"
+                       f"{summary['skipped']}件スキップ、{summary['errors']}件エラー",
+            **summary
+        })
+    except Exception as e:
+        print(f"Error in api_import_customers_endpoint: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 def api_search_customers_endpoint(store):
     """顧客検索API（統合検索対応）"""
     if 'store' not in session:
@@ -375,14 +404,6 @@ def api_search_customers_endpoint(store):
             customer_dict['last_visit_date'] = last_visit_date
             customer_dict['visit_count'] = visit_count
 
-            # date型をJSON対応形式に変換
-            if customer_dict.get('birthday'):
-                customer_dict['birthday'] = customer_dict['birthday'].isoformat()
-            if customer_dict.get('created_at'):
-                customer_dict['created_at'] = customer_dict['created_at'].isoformat()
-            if customer_dict.get('updated_at'):
-                customer_dict['updated_at'] = customer_dict['updated_at'].isoformat()
-
             customers_list.append(customer_dict)
 
         return jsonify({
@@ -404,11 +425,6 @@ def get_usage_history_api(store, customer_id):
 
         history = get_customer_usage_history(store, customer_id, limit=10)
 
-        # datetime型を文字列に変換
-        for item in history:
-            if item.get('reservation_datetime'):
-                item['reservation_datetime'] = item['reservation_datetime'].isoformat()
-
         return jsonify({
             'success': True,
             'data': history
@@ -427,11 +443,6 @@ def get_cast_usage_api(store, customer_id):
 
         cast_usage = get_customer_cast_usage(store, customer_id)
 
-        # datetime型を文字列に変換
-        for item in cast_usage:
-            if item.get('latest_datetime'):
-                item['latest_datetime'] = item['latest_datetime'].isoformat()
-
         return jsonify({
             'success': True,
             'data': cast_usage
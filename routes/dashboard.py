@@ -2,10 +2,11 @@ from flask import render_template, request, session, jsonify
 from datetime import datetime, timedelta
 from database.db_connection import get_db_connection
 from database.connection import get_store_id
+from database.call_attempts_db import CALL_STATUS_DISPLAY, get_latest_call_outcomes
 from database.db_access import (
     get_display_name, get_db, get_pickup_records_by_date, get_staff_list,
     get_all_casts, get_all_hotels_with_details, update_pickup_record,
-    delete_pickup_record, auto_cleanup_if_needed, get_all_courses
+    delete_pickup_record, get_all_courses
 )
 
 def store_home(store):
@@ -37,6 +38,11 @@ def store_home(store):
         
         # 各レコードに通知情報を追加
         cursor = db.cursor()
+        
+        # Twilio のステータスコールバックで記録された最新の通話結果
+        call_outcomes = get_latest_call_outcomes(
+            db, [record['record_id'] for record in pickup_records if record.get('record_id')]
+        )
         for record in pickup_records:
             if record['type'] == 'pickup' and not record['is_entry'] and record.get('exit_time'):
                 # キャストの通知設定とオートコール状態を取得
@@ -82,9 +88,13 @@ def store_home(store):
                     record['cast_auto_call_sent'] = False
                     record['cast_auto_call_disabled'] = False
                 
-                # 通知状態を設定
+                # 通知状態を設定（通話結果が届いていれば結果を優先）
+                call_outcome = call_outcomes.get(record_id)
+                record['call_attempts'] = call_outcome['attempt_no'] if call_outcome else 0
                 if record['cast_auto_call_disabled']:
                     record['call_status'] = 'disabled'
+                elif call_outcome:
+                    record['call_status'] = CALL_STATUS_DISPLAY.get(call_outcome['status'], 'success')
                 elif record['cast_auto_call_sent']:
                     record['call_status'] = 'success'
                 else:
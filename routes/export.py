@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+月末締め用エクスポート（CSV / Excel）ルート
+"""
+import tempfile
+from datetime import date, datetime
+
+from flask import Response, request, session, redirect, url_for, stream_with_context
+from database.connection import get_store_id
+from database.export_db import iter_export_csv, write_export_xlsx
+
+# Excelファイルをレスポンスへ流すときのチャンクサイズ
+XLSX_CHUNK_SIZE = 64 * 1024
+
+
+def _export_filters(store):
+    """
+    クエリパラメータからエクスポート条件を取得
+
+    CSVはレスポンスを返し始めてからSQLを実行するため、日付はここで検証する。
+
+    Raises:
+        ValueError: 日付の形式・範囲が不正な場合
+    """
+    today = date.today()
+    date_from = request.args.get('date_from') or today.replace(day=1).strftime('%Y-%m-%d')
+    date_to = request.args.get('date_to') or today.strftime('%Y-%m-%d')
+    if datetime.strptime(date_from, '%Y-%m-%d') > datetime.strptime(date_to, '%Y-%m-%d'):
+        raise ValueError('date_from は date_to 以前の日付を指定してください')
+
+    # all_stores=1 の場合は全店舗分を出力
+    store_id = None if request.args.get('all_stores') == '1' else get_store_id(store)
+
+    filters = {
+        'store_id': store_id,
+        'cast_id': request.args.get('cast_id', type=int),
+        'status': request.args.get('status') or None
+    }
+    return date_from, date_to, filters
+
+
+def _iter_file(fileobj):
+    """一時ファイルをチャンク単位で読み出し、読み終えたら閉じる"""
+    try:
+        while True:
+            chunk = fileobj.read(XLSX_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def _export_response(store, kind):
+    """指定種別のエクスポートをCSVまたはExcelで返す"""
+    if 'store' not in session:
+        return redirect(url_for('main_routes.index', store=store))
+    # 売上・報酬・顧客名を含むため、ドライバーには出力しない
+    if session.get('user_role') == 'ドライバー':
+        return "権限がありません。", 403
+
+    try:
+        date_from, date_to, filters = _export_filters(store)
+    except ValueError as e:
+        return f"日付の指定が不正です（YYYY-MM-DD）: {e}", 400
+    export_format = request.args.get('format', 'csv')
+    scope = 'all' if filters['store_id'] is None else store
+    filename = f"{kind}_{scope}_{date_from}_{date_to}"
+
+    if export_format == 'xlsx':
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            return "Excel出力にはopenpyxlのインストールが必要です。", 500
+
+        # write_onlyモードで一時ファイルに書き出してから流す（全行をメモリに持たない）
+        tmp = tempfile.TemporaryFile()
+        try:
+            write_export_xlsx(tmp, kind, date_from, date_to, **filters)
+        except Exception:
+            tmp.close()
+            raise
+        tmp.seek(0)
+
+        return Response(
+            _iter_file(tmp),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={'Content-Disposition': f'attachment; filename="{filename}.xlsx"'}
+        )
+
+    return Response(
+        stream_with_context(iter_export_csv(kind, date_from, date_to, **filters)),
+        mimetype='text/csv; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'}
+    )
+
+
+def export_reservations(store):
+    """予約データのエクスポート"""
+    return _export_response(store, 'reservations')
+
+
+def export_money_records(store):
+    """金銭記録のエクスポート"""
+    return _export_response(store, 'money_records')
+
+
+def export_rewards(store):
+    """キャスト報酬のエクスポート"""
+    return _export_response(store, 'rewards')
@@ -206,7 +206,7 @@ def move_extension_up_route(store, extension_id):
 
     try:
         db = get_db()
-        if move_extension_order(db, extension_id, 'up'):
+        if move_extension_order(db, extension_id, 'up', get_store_id(store)):
             return redirect(url_for('main_routes.extension_management', store=store, success="並び順を変更しました"))
         else:
             # 既に最上位の場合はエラーを表示せずにリダイレクト
@@ -225,7 +225,7 @@ def move_extension_down_route(store, extension_id):
 
     try:
         db = get_db()
-        if move_extension_order(db, extension_id, 'down'):
+        if move_extension_order(db, extension_id, 'down', get_store_id(store)):
             return redirect(url_for('main_routes.extension_management', store=store, success="並び順を変更しました"))
         else:
             # 既に最下位の場合はエラーを表示せずにリダイレクト
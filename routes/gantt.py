@@ -5,6 +5,7 @@
 from flask import Blueprint, render_template, request, jsonify
 from database.connection import get_connection, get_store_id
 from database.gantt_db import get_gantt_data, get_time_slots, get_store_schedule_settings, update_reservation_room_number
+from database.availability_db import find_available_casts, get_travel_minutes, parse_desired_start
 from datetime import datetime, timedelta
 
 gantt_bp = Blueprint('gantt', __name__)
@@ -101,6 +102,99 @@ def gantt_api_data(store):
         }), 500
 
 
+@gantt_bp.route('/<store>/gantt/api/availability')
+def gantt_api_availability(store):
+    """
+    空きキャスト検索API
+
+    クエリパラメータ:
+        date: 営業日（YYYY-MM-DD）
+        start: 希望開始時刻（HH:MM、24時以降は25:00形式）
+        minutes: コース時間（分）※course_id指定時は省略可
+        course_id / hotel_id / area_id: 任意（移動時間・NG判定に使用）
+        max_delay: 希望時刻から何分後までの開始を許容するか（省略時は出勤終了まで）
+    """
+    try:
+        target_date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        start_value = request.args.get('start')
+        minutes = request.args.get('minutes', type=int)
+        course_id = request.args.get('course_id', type=int)
+        hotel_id = request.args.get('hotel_id', type=int)
+        area_id = request.args.get('area_id', type=int)
+        max_delay = request.args.get('max_delay', type=int)
+
+        if not start_value:
+            return jsonify({
+                'success': False,
+                'error': '希望開始時刻が指定されていません'
+            }), 400
+
+        try:
+            desired_start = parse_desired_start(target_date, start_value)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': '希望開始時刻の形式が正しくありません'
+            }), 400
+
+        store_id = get_store_id(store)
+        db = get_connection()
+
+        try:
+            if not minutes and course_id:
+                cursor = db.cursor()
+                cursor.execute(
+                    "SELECT time_minutes FROM courses WHERE course_id = %s AND store_id = %s",
+                    (course_id, store_id)
+                )
+                row = cursor.fetchone()
+                cursor.close()
+                minutes = row[0] if row and row[0] else None
+
+            if not minutes:
+                return jsonify({
+                    'success': False,
+                    'error': 'コース時間が指定されていません'
+                }), 400
+
+            travel_minutes, area_id = get_travel_minutes(db, hotel_id=hotel_id, area_id=area_id)
+
+            casts = find_available_casts(
+                store_id=store_id,
+                business_date=target_date,
+                desired_start=desired_start,
+                duration_minutes=minutes,
+                travel_minutes=travel_minutes,
+                hotel_id=hotel_id,
+                course_id=course_id,
+                area_id=area_id,
+                max_delay_minutes=max_delay,
+                db=db
+            )
+
+        finally:
+            db.close()
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'date': target_date,
+                'requested_start': desired_start.strftime('%Y-%m-%d %H:%M'),
+                'minutes': minutes,
+                'travel_time_minutes': travel_minutes,
+                'casts': casts
+            }
+        })
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @gantt_bp.route('/<store>/gantt/api/update_room_number', methods=['POST'])
 def update_room_number(store):
     """
@@ -1,5 +1,5 @@
 from flask import render_template, request, redirect, url_for, jsonify
-from database.connection import get_display_name, get_db
+from database.connection import get_display_name, get_db, get_store_id
 from database.hotel_db import (
     get_all_categories,
     get_all_areas,
@@ -36,9 +36,9 @@ def register_hotel(store):
 
     # 共通で使用するデータを取得（並び順指定修正）
     categories = get_all_categories(db)
-    areas = get_all_areas(db)
+    areas = get_all_areas(db, get_store_id(store))
     # 重要：sort_order順で取得するよう変更
-    hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+    hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
 
     if request.method == "POST":
         action = request.form.get("action")
@@ -115,7 +115,7 @@ def register_hotel(store):
             
             try:
                 # db_access.pyのregister_area関数を直接使用（travel_time_minutes対応版）
-                if db_register_area(db, name, transportation_fee, travel_time):
+                if db_register_area(db, name, transportation_fee, travel_time, store_id=get_store_id(store)):
                     return redirect(url_for('main_routes.register_hotel', store=store, success="エリアを追加しました。"))
                 else:
                     return redirect(url_for('main_routes.register_hotel', store=store, error="追加中にエラーが発生しました。"))
@@ -179,7 +179,7 @@ def register_hotel(store):
             
             if error_msg:
                 # エラー時も最新のホテル一覧を取得
-                hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+                hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
                 return render_template(
                     "hotel_management.html",
                     store=store, display_name=display_name,
@@ -194,7 +194,7 @@ def register_hotel(store):
                     
             except ValueError as e:
                 # エラー時も最新のホテル一覧を取得
-                hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+                hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
                 return render_template(
                     "hotel_management.html",
                     store=store, display_name=display_name,
@@ -206,7 +206,7 @@ def register_hotel(store):
             existing_hotel = find_hotel_by_name_category_area(db, name, category_id, area_id)
             if existing_hotel:
                 # エラー時も最新のホテル一覧を取得
-                hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+                hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
                 return render_template(
                     "hotel_management.html",
                     store=store, display_name=display_name,
@@ -216,11 +216,11 @@ def register_hotel(store):
 
             # ホテル登録（additional_timeを0で固定）
             try:
-                if db_register_hotel(db, name, category_id, area_id, 0, 0):
+                if db_register_hotel(db, name, category_id, area_id, 0, 0, store_id=get_store_id(store)):
                     return redirect(url_for('main_routes.register_hotel', store=store, success="ホテルを登録しました。"))
                 else:
                     # エラー時も最新のホテル一覧を取得
-                    hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+                    hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
                     return render_template(
                         "hotel_management.html",
                         store=store, display_name=display_name,
@@ -229,7 +229,7 @@ def register_hotel(store):
                     )
             except Exception as e:
                 # エラー時も最新のホテル一覧を取得
-                hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+                hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
                 return render_template(
                     "hotel_management.html",
                     store=store, display_name=display_name,
@@ -265,7 +265,7 @@ def edit_hotel(store, hotel_id):
     
     # カテゴリとエリア一覧を取得
     categories = get_all_categories(db)
-    areas = get_all_areas(db)
+    areas = get_all_areas(db, get_store_id(store))
 
     if request.method == "POST":
         name = request.form.get("name", "").strip()
@@ -356,14 +356,14 @@ def delete_hotel(store, hotel_id):
 
 def move_hotel_up_route(store, hotel_id):
     """ホテル並び順上移動"""
-    if move_hotel_up(hotel_id):
+    if move_hotel_up(hotel_id, get_store_id(store)):
         return redirect(url_for('main_routes.register_hotel', store=store, success="並び順を変更しました。"))
     else:
         return redirect(url_for('main_routes.register_hotel', store=store, error="並び順変更に失敗しました。"))
 
 def move_hotel_down_route(store, hotel_id):
     """ホテル並び順下移動"""
-    if move_hotel_down(hotel_id):
+    if move_hotel_down(hotel_id, get_store_id(store)):
         return redirect(url_for('main_routes.register_hotel', store=store, success="並び順を変更しました。"))
     else:
         return redirect(url_for('main_routes.register_hotel', store=store, error="並び順変更に失敗しました。"))
@@ -481,7 +481,7 @@ def get_areas_api(store):
         if db is None:
             return jsonify({"success": False, "message": "データベース接続エラー"}), 500
         
-        areas = get_all_areas(db)
+        areas = get_all_areas(db, get_store_id(store))
         
         # 辞書形式に変換
         data = []
@@ -528,7 +528,7 @@ def add_area_api(store):
             return jsonify({"success": False, "message": "既に登録されているエリア名です"}), 400
         
         # 登録
-        if db_register_area(db, area_name, transportation_fee, travel_time):
+        if db_register_area(db, area_name, transportation_fee, travel_time, store_id=get_store_id(store)):
             return jsonify({"success": True, "message": "エリアを追加しました"})
         else:
             return jsonify({"success": False, "message": "追加に失敗しました"}), 500
@@ -597,7 +597,7 @@ def get_hotels_api(store):
         if db is None:
             return jsonify({"success": False, "message": "データベース接続エラー"}), 500
         
-        hotels = get_all_hotels_with_details(db, sort_by='sort_order')
+        hotels = get_all_hotels_with_details(db, sort_by='sort_order', store_id=get_store_id(store))
         
         # 辞書形式に変換
         data = []
@@ -668,7 +668,7 @@ def add_hotel_api(store):
             return jsonify({"success": False, "message": "同じ名前・種別・エリアのホテルは既に登録されています"}), 400
         
         # 登録（additional_timeを0で固定）
-        if db_register_hotel(db, hotel_name, hotel_type_id, area_id, 0, 0):
+        if db_register_hotel(db, hotel_name, hotel_type_id, area_id, 0, 0, store_id=get_store_id(store)):
             return jsonify({"success": True, "message": "ホテルを登録しました"})
         else:
             return jsonify({"success": False, "message": "登録に失敗しました"}), 500
@@ -736,7 +736,7 @@ def move_area_up_api(store, id):
         if db is None:
             return jsonify({"success": False, "message": "データベース接続エラー"}), 500
         
-        if move_area_up(db, id):
+        if move_area_up(db, id, get_store_id(store)):
             return jsonify({"success": True, "message": "並び順を変更しました"})
         else:
             return jsonify({"success": False, "message": "並び替えに失敗しました"}), 400
@@ -750,7 +750,7 @@ def move_area_down_api(store, id):
         if db is None:
             return jsonify({"success": False, "message": "データベース接続エラー"}), 500
         
-        if move_area_down(db, id):
+        if move_area_down(db, id, get_store_id(store)):
             return jsonify({"success": True, "message": "並び順を変更しました"})
         else:
             return jsonify({"success": False, "message": "並び替えに失敗しました"}), 400
@@ -765,7 +765,7 @@ def move_hotel_up_api(store, id):
             return jsonify({"success": False, "message": "データベース接続エラー"}), 500
         
         # move_hotel_upは既にget_db()を内部で呼んでいるので、idのみ渡す
-        if move_hotel_up(id):
+        if move_hotel_up(id, get_store_id(store)):
             return jsonify({"success": True, "message": "並び順を変更しました"})
         else:
             return jsonify({"success": False, "message": "並び替えに失敗しました"}), 400
@@ -780,7 +780,7 @@ def move_hotel_down_api(store, id):
             return jsonify({"success": False, "message": "データベース接続エラー"}), 500
         
         # move_hotel_downは既にget_db()を内部で呼んでいるので、idのみ渡す
-        if move_hotel_down(id):
+        if move_hotel_down(id, get_store_id(store)):
             return jsonify({"success": True, "message": "並び順を変更しました"})
         else:
             return jsonify({"success": False, "message": "並び替えに失敗しました"}), 400
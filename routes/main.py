@@ -122,6 +122,7 @@ from .customer import (
     api_update_customer_endpoint,
     api_delete_customer_endpoint,
     api_search_customers_endpoint,
+    api_import_customers_endpoint,
     get_usage_history_api,
     get_cast_usage_api
 )
@@ -152,6 +153,14 @@ from .settings_customer_api import (
     api_move_field_option
 )
 
+# 月末締めエクスポートを追加
+from .export import export_reservations, export_money_records, export_rewards
+# 並び順一括更新
+from .ordering import api_reorder
+# 全店舗横断レポート
+from .report import api_owner_report
+from utils.image_pipeline import serve_variant, serve_private_variant
+
 
 # メインのBlueprint作成
 main_routes = Blueprint('main_routes', __name__)
@@ -367,6 +376,7 @@ main_routes.add_url_rule('/<store>/api/customers/add', 'api_add_customer', api_a
 main_routes.add_url_rule('/<store>/api/customers/<int:customer_id>/update', 'api_update_customer', api_update_customer_endpoint, methods=['POST'])
 main_routes.add_url_rule('/<store>/api/customers/<int:customer_id>/delete', 'api_delete_customer', api_delete_customer_endpoint, methods=['POST'])
 main_routes.add_url_rule('/<store>/api/customers/search', 'api_search_customers', api_search_customers_endpoint, methods=['GET'])
+main_routes.add_url_rule('/<store>/api/customers/import', 'api_import_customers', api_import_customers_endpoint, methods=['POST'])
 main_routes.add_url_rule('/<store>/api/customer/<int:customer_id>/usage_history', 'get_usage_history', get_usage_history_api, methods=['GET'])
 main_routes.add_url_rule('/<store>/api/customer/<int:customer_id>/cast_usage', 'get_cast_usage', get_cast_usage_api, methods=['GET'])
 
@@ -380,4 +390,28 @@ main_routes.add_url_rule('/<store>/api/customer_fields/option', 'api_add_field_o
 main_routes.add_url_rule('/<store>/api/customer_fields/option/<int:option_id>', 'api_update_field_option', api_update_field_option, methods=['PUT'])
 main_routes.add_url_rule('/<store>/api/customer_fields/option/<int:option_id>/visibility', 'api_toggle_field_option_visibility', api_toggle_field_option_visibility, methods=['PUT'])
 main_routes.add_url_rule('/<store>/api/customer_fields/option/<int:option_id>', 'api_delete_field_option', api_delete_field_option, methods=['DELETE'])
-main_routes.add_url_rule('/<store>/api/customer_fields/option/<int:option_id>/move', 'api_move_field_option', api_move_field_option, methods=['PUT'])
\ No newline at end of file
+main_routes.add_url_rule('/<store>/api/customer_fields/option/<int:option_id>/move', 'api_move_field_option', api_move_field_option, methods=['PUT'])
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 月末締めエクスポート（CSV / Excel）
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+main_routes.add_url_rule('/<store>/export/reservations', 'export_reservations', export_reservations, methods=['GET'])
+main_routes.add_url_rule('/<store>/export/money_records', 'export_money_records', export_money_records, methods=['GET'])
+main_routes.add_url_rule('/<store>/export/rewards', 'export_rewards', export_rewards, methods=['GET'])
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 並び順一括更新（ドラッグ&ドロップ）
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+main_routes.add_url_rule('/<store>/api/reorder/<table>', 'api_reorder', api_reorder, methods=['POST'])
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 全店舗横断レポート（オーナー用）
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+main_routes.add_url_rule('/<store>/api/reports/owner', 'api_owner_report', api_owner_report, methods=['GET'])
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# アップロード画像の縮小版（variant）配信
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+main_routes.add_url_rule('/media/<size>/<fmt>/<path:relative_path>', 'media_variant', serve_variant, methods=['GET'])
+# 身分証・契約書（ログイン中のスタッフのみ、キャッシュさせない）
+main_routes.add_url_rule('/media/private/<size>/<fmt>/<path:relative_path>', 'private_media_variant', serve_private_variant, methods=['GET'])
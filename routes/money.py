@@ -3,9 +3,9 @@ from flask import render_template, request, redirect, url_for, session, jsonify
 from database.connection import get_store_id
 from database.db_access import (
     get_display_name, get_db, get_all_casts, get_all_users,
-    register_money_record, get_money_records_by_date, delete_money_record_by_id,
-    cleanup_old_money_records
+    register_money_record, get_money_records_by_date, delete_money_record_by_id
 )
+from database.daily_sales_db import get_money_cast_totals
 
 def money_management(store):
     display_name = get_display_name(store)
@@ -18,9 +18,6 @@ def money_management(store):
         return "店舗が見つかりません。", 404
 
     try:
-        # 古いデータを自動削除
-        cleanup_old_money_records(db)
-
         # 日付の処理
         selected_date = request.args.get('date')
         if not selected_date:
@@ -79,7 +76,7 @@ def money_management(store):
                 casts = get_all_casts(db, store_id)
                 staff = get_all_users(db, store_id)
                 records = get_money_records_by_date(db, selected_date)
-                cast_totals = create_cast_totals(records)
+                cast_totals = get_money_cast_totals(db, store_id, selected_date)
                 current_staff_id = session.get('login_id', '')
                 return render_template(
                     "money_management.html",
@@ -95,8 +92,8 @@ def money_management(store):
         staff = get_all_users(db, store_id)
         records = get_money_records_by_date(db, selected_date)
         
-        # キャスト別集計を作成
-        cast_totals = create_cast_totals(records)
+        # キャスト別集計（締め済みの営業日は日次集計から）
+        cast_totals = get_money_cast_totals(db, store_id, selected_date)
 
         current_staff_id = session.get('login_id', '')
         success_msg = request.args.get('success')
@@ -116,38 +113,6 @@ def money_management(store):
         if db:
             db.close()
 
-def create_cast_totals(records):
-    """キャスト別集計を作成する関数"""
-    cast_totals = {}
-    for record in records:
-        try:
-            # recordがsqlite3.Rowかdictかを判定してアクセス
-            if hasattr(record, 'cast_name'):
-                cast_name = record.cast_name
-                received_amount = record.received_amount
-                change_amount = record.change_amount
-            else:
-                cast_name = record['cast_name']
-                received_amount = record['received_amount']
-                change_amount = record['change_amount']
-            
-            if cast_name not in cast_totals:
-                cast_totals[cast_name] = {
-                    'received_total': 0,
-                    'change_total': 0,
-                    'sales_total': 0
-                }
-            cast_totals[cast_name]['received_total'] += received_amount
-            cast_totals[cast_name]['change_total'] += change_amount
-            cast_totals[cast_name]['sales_total'] += (received_amount - change_amount)
-        except Exception as e:
-            print(f"Error processing record: {e}")
-            print(f"Record type: {type(record)}")
-            print(f"Record content: {record}")
-            continue
-    
-    return cast_totals
-
 def delete_money_record(store, record_id):
     db = get_db(store)
     if db is None:
@@ -224,18 +189,14 @@ def register_change(store):
         # PostgreSQL形式で直接INSERT
         cursor = db.cursor()
         
-        print(f"DEBUG: Getting next money_record ID...")
-        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 as next_id FROM money_records")
-        result = cursor.fetchone()
-        new_id = result['next_id']
-        print(f"DEBUG: New money_record ID = {new_id}")
-        
         print(f"DEBUG: Inserting money record...")
         cursor.execute("""
             INSERT INTO money_records 
-            (id, record_id, cast_id, exit_time, received_amount, change_amount, payment_method, staff_id, created_date, created_at) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-        """, (new_id, record_id, cast_id, exit_time, received_amount, change_amount, payment_method, staff_id, today))
+            (record_id, cast_id, exit_time, received_amount, change_amount, payment_method, staff_id, created_date, created_at) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            RETURNING id
+        """, (record_id, cast_id, exit_time, received_amount, change_amount, payment_method, staff_id, today))
+        new_id = cursor.fetchone()['id']
         
         db.commit()
         print(f"DEBUG: Money record inserted successfully with ID {new_id}")
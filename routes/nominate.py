@@ -165,7 +165,7 @@ def move_nomination_type_up_route(store, nomination_type_id):
         return "店舗が見つかりません。", 404
 
     try:
-        if move_nomination_type_up(nomination_type_id):
+        if move_nomination_type_up(nomination_type_id, get_store_id(store)):
             return redirect(url_for('main_routes.nominate_management', store=store, success="並び順を変更しました"))
         else:
             # 既に最上位の場合はエラーを表示せずにリダイレクト
@@ -183,7 +183,7 @@ def move_nomination_type_down_route(store, nomination_type_id):
         return "店舗が見つかりません。", 404
 
     try:
-        if move_nomination_type_down(nomination_type_id):
+        if move_nomination_type_down(nomination_type_id, get_store_id(store)):
             return redirect(url_for('main_routes.nominate_management', store=store, success="並び順を変更しました"))
         else:
             # 既に最下位の場合はエラーを表示せずにリダイレクト
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from flask import request, jsonify, session
+from database.connection import get_store_id
+from database.ordering_db import reorder
+
+def api_reorder(store, table):
+    """並び順一括更新API（JSON: {"ids": [表示順のID...]}）"""
+    if 'store' not in session:
+        return jsonify({'success': False, 'message': '未ログイン'}), 401
+
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'success': False, 'message': '並び順が指定されていません'}), 400
+
+        try:
+            updated = reorder(table, get_store_id(store), [int(item_id) for item_id in ids])
+        except (ValueError, TypeError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({'success': True, 'updated': updated})
+    except Exception as e:
+        print(f"Error in api_reorder: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
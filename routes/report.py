@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from flask import request, jsonify, session
+from database.report_db import get_owner_report, get_default_report_range, REPORT_PERIODS
+
+def api_owner_report(store):
+    """
+    全店舗横断レポートAPI（オーナー用）
+
+    クエリパラメータ:
+        period: day / week / month（デフォルト: day）
+        date_from, date_to: YYYY-MM-DD（省略時は直近の期間）
+    """
+    if 'store' not in session:
+        return jsonify({'success': False, 'message': '未ログイン'}), 401
+    if session.get('user_role') == 'ドライバー':
+        return jsonify({'success': False, 'message': '権限がありません'}), 403
+
+    period = request.args.get('period', 'day')
+    if period not in REPORT_PERIODS:
+        return jsonify({'success': False, 'message': f'period は {", ".join(REPORT_PERIODS)} のいずれかです'}), 400
+
+    try:
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        if date_from and date_to:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
+        else:
+            date_from, date_to = get_default_report_range(period)
+
+        report = get_owner_report(period, date_from, date_to)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error in api_owner_report: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+    return jsonify({'success': True, **report})
@@ -2,7 +2,7 @@
 """
 予約管理用Blueprint
 """
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, make_response
 from datetime import datetime, timedelta
 import sys
 import os
@@ -28,8 +28,10 @@ from database.reservation_db import (
     get_reservations_by_date,
     get_reservation_by_id,
     update_reservation,
-    cancel_reservation
+    cancel_reservation,
+    ReservationConflictError
 )
+from database.reservation_bootstrap_db import get_reservation_bootstrap
 
 reservation_bp = Blueprint('reservation', __name__)
 
@@ -71,12 +73,6 @@ def get_reservations_api(store):
 
         reservations = get_reservations_by_date(store_id, target_date)
 
-        # datetime型をISO形式文字列に変換
-        for reservation in reservations:
-            for key, value in reservation.items():
-                if isinstance(value, datetime):
-                    reservation[key] = value.isoformat()
-
         # お釣り機能の設定を取得
         from database.settings_db import get_change_feature_setting
         use_change_feature = get_change_feature_setting(store_id)
@@ -98,6 +94,17 @@ def get_reservations_api(store):
         }), 500
 
 
+def _conflict_response(error):
+    """予約重複時のレスポンス（409）"""
+    return jsonify({
+        'success': False,
+        'conflict': True,
+        'message': '同じキャストの予約と時間が重なっています',
+        'conflicting_reservation_ids': [c['reservation_id'] for c in error.conflicts],
+        'conflicts': error.conflicts
+    }), 409
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 顧客予約登録ページ（既存機能）
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -187,6 +194,48 @@ def new_reservation(store):
         customer=customer_data
     )
 
+@reservation_bp.route('/<store>/reservation/bootstrap', methods=['GET'])
+def reservation_bootstrap(store):
+    """
+    予約登録画面のマスタデータ一括取得API
+
+    ETag はマスタデータのバージョン番号。If-None-Match が一致すれば 304 を返す。
+    """
+    store_id = get_store_id(store)
+    if store_id is None:
+        return jsonify({'success': False, 'message': '店舗が見つかりません'}), 404
+
+    try:
+        # ETag 形式: "<店舗ID>-<バージョン>"
+        known_version = None
+        for etag in request.if_none_match.as_set():
+            prefix, _, version = etag.partition('-')
+            if prefix == str(store_id) and version.isdigit():
+                known_version = int(version)
+
+        version, payload = get_reservation_bootstrap(store_id, known_version)
+
+        if payload is None:
+            response = make_response('', 304)
+        else:
+            response = jsonify(payload)
+
+        if version is not None:
+            response.set_etag(f'{store_id}-{version}')
+        # 毎回ETagで再検証させる（変更がなければ304で本文なし）
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception as e:
+        print(f"Error in reservation_bootstrap: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': f'マスタデータの取得に失敗しました: {str(e)}'
+        }), 500
+
+
 @reservation_bp.route('/<store>/reservation/save', methods=['POST'])
 def save_reservation(store):
     """予約保存（Ajax用）"""
@@ -252,6 +301,9 @@ def register_reservation(store):
         # discount_idsの取得（チェックボックスから複数選択対応）
         discount_ids = request.form.getlist('discounts[]', type=int)
 
+        # 重複を承知で登録する場合（確認ダイアログでOK済み）
+        allow_overlap = request.form.get('allow_overlap') == '1'
+
         # 予約を作成
         reservation_id = create_reservation(
             store_id=store_id,
@@ -278,7 +330,8 @@ def register_reservation(store):
             staff_memo=None,
             cancellation_reason_id=cancellation_reason_id,
             reservation_method_id=reservation_method_id,
-            adjustment_amount=adjustment_amount
+            adjustment_amount=adjustment_amount,
+            allow_overlap=allow_overlap
         )
 
         if reservation_id:
@@ -293,6 +346,8 @@ def register_reservation(store):
                 'message': '予約登録に失敗しました'
             }), 500
 
+    except ReservationConflictError as e:
+        return _conflict_response(e)
     except Exception as e:
         print(f"Error in register_reservation: {e}")
         import traceback
@@ -610,7 +665,8 @@ def update_reservation_route(store):
             return jsonify({'success': False, 'message': '予約IDが指定されていません'}), 400
 
         # 予約を更新
-        success = update_reservation(reservation_id, request.form)
+        allow_overlap = request.form.get('allow_overlap') == '1'
+        success = update_reservation(reservation_id, request.form, allow_overlap=allow_overlap)
 
         if success:
             return jsonify({
@@ -624,6 +680,8 @@ def update_reservation_route(store):
                 'message': '予約更新に失敗しました'
             }), 500
 
+    except ReservationConflictError as e:
+        return _conflict_response(e)
     except Exception as e:
         print(f"Error in update_reservation_route: {e}")
         import traceback
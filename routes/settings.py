@@ -16,7 +16,7 @@ from database.parking_db import (
     get_parking_enabled
 )
 from database.connection import get_store_id
-from twilio.rest import Client
+from utils.http_clients import call_twilio, clear_credentials_cache, get_twilio_client
 import os
 from dotenv import load_dotenv
 
@@ -90,6 +90,7 @@ def register_settings_routes(app):
 
             # 一括更新
             success_count, error_count = bulk_update_settings(settings_dict, store_id, updated_by)
+            clear_credentials_cache(store_id)
             
             if error_count > 0:
                 return jsonify({
@@ -149,8 +150,9 @@ def register_settings_routes(app):
                     'message': 'Twilio設定が完了していません'
                 }), 400
 
-            # Twilioクライアント作成
-            client = Client(
+            # Twilioクライアント（店舗ごとに使い回す）
+            client = get_twilio_client(
+                store_id,
                 twilio_config['account_sid'],
                 twilio_config['auth_token']
             )
@@ -163,12 +165,12 @@ def register_settings_routes(app):
             timeout_seconds = int(get_setting('call_timeout_seconds', store_id) or '15')
             
             # テスト発信
-            call = client.calls.create(
+            call = call_twilio(lambda: client.calls.create(
                 to=test_phone,
                 from_=twilio_config['phone_number'],
                 twiml=f'<Response><Say language="ja-JP">{message}</Say></Response>',
                 timeout=timeout_seconds
-            )
+            ))
             
             return jsonify({
                 'success': True,
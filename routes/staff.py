@@ -4,7 +4,7 @@ import psycopg
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from database.db_access import (
     get_display_name, get_db, register_user, get_all_users,
-    find_user_by_name, find_user_by_login_id
+    find_user_by_name, find_user_by_login_id, get_reservation_staff
 )
 from database.db_connection import get_db_connection
 from database.connection import get_store_id
@@ -425,14 +425,7 @@ def get_staff_api(store):
         if db is None:
             return jsonify({'error': 'データベース接続エラー'}), 500
 
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT id, name
-            FROM users
-            WHERE is_active = true AND store_id = %s
-            ORDER BY COALESCE(sort_order, 0), name
-        """, (store_id,))
-        users = cursor.fetchall()
+        users = get_reservation_staff(db, store_id)
 
         # id, name を含むデータを返す
         return jsonify([{
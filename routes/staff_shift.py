@@ -59,24 +59,12 @@ def get_staff_shift_data(store):
             WHERE role IN ('スタッフ', 'ドライバー') AND store_id = %s
             ORDER BY COALESCE(sort_order, 0), name
         """, (store_id,))
-        staff_list_raw = cursor.fetchall()
-        
-        # スタッフリストをJSON serializable形式に変換
-        staff_list = []
-        for staff in staff_list_raw:
-            staff_dict = dict(staff)
-            staff_list.append(staff_dict)
+        staff_list = cursor.fetchall()
 
         # シフト種別を取得
-        shift_types_raw = get_all_shift_types(store_id)
-
-        # シフト種別をJSON serializable形式に変換
-        shift_types = []
-        for shift_type in shift_types_raw:
-            shift_type_dict = dict(shift_type)
-            shift_types.append(shift_type_dict)
+        shift_types = get_all_shift_types(store_id)
 
-        # 指定月のシフトを取得
+        # 指定月のシフトを取得（date / time 型はそのまま jsonify できる）
         shifts = get_shifts_by_month(year, month, store_id)
 
         # 日付別備考を取得
@@ -85,29 +73,6 @@ def get_staff_shift_data(store):
         # その月の日数を取得
         _, days_in_month = calendar.monthrange(year, month)
         
-        # シフトデータをJSON serializable形式に変換
-        shifts_serializable = []
-        for shift in shifts:
-            shift_dict = dict(shift)
-            # time型を文字列に変換
-            if shift_dict.get('start_time'):
-                shift_dict['start_time'] = str(shift_dict['start_time'])
-            if shift_dict.get('end_time'):
-                shift_dict['end_time'] = str(shift_dict['end_time'])
-            # date型を文字列に変換
-            if shift_dict.get('shift_date'):
-                shift_dict['shift_date'] = str(shift_dict['shift_date'])
-            shifts_serializable.append(shift_dict)
-        
-        # 備考データをJSON serializable形式に変換
-        memos_serializable = []
-        for memo in memos:
-            memo_dict = dict(memo)
-            # date型を文字列に変換
-            if memo_dict.get('memo_date'):
-                memo_dict['memo_date'] = str(memo_dict['memo_date'])
-            memos_serializable.append(memo_dict)
-        
         return jsonify({
             'success': True,
             'year': year,
@@ -115,8 +80,8 @@ def get_staff_shift_data(store):
             'days_in_month': days_in_month,
             'staff_list': staff_list,
             'shift_types': shift_types,
-            'shifts': shifts_serializable,
-            'memos': memos_serializable
+            'shifts': shifts,
+            'memos': memos
         })
         
     except Exception as e:
@@ -2,9 +2,12 @@
 """
 オートコール・LINE通知スケジューラー
 5分ごとにpickup_recordsをチェックし、通知タイミングが来たら自動実行
+古いデータの削除・営業日締めなどのメンテナンスジョブもここで登録・実行する（utils/maintenance.py）
 """
+import logging
 import os
 import sys
+import time
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -16,10 +19,24 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.twilio_call import make_auto_call
-from utils.line_messaging import send_pickup_reminder_to_staff
+from utils.line_messaging import LineNotificationBatch
+from utils.call_outcomes import MAX_CALL_ATTEMPTS, REDIAL_DELAY_MINUTES
+from utils.http_clients import get_circuit_states
+from utils.maintenance import register_maintenance_job, schedule_maintenance_jobs
+from utils.metrics import NOTIFICATION_LAG, SCHEDULER_TICK_DURATION, instrument_connection
+from database.connection import DB_PATHS, get_connection, get_db, get_store_id
+from database.daily_sales_db import close_pending_business_days, BUSINESS_DAY_CUTOFF_HOUR
+from database.pickup_db import cleanup_old_money_records, cleanup_old_pickup_records
+from database.partition_db import detach_expired_partitions, ensure_partitions, get_partitioned_tables
+from database.cast_mypage_db import cleanup_expired_sessions
+from database.line_webhook_db import cleanup_old_webhook_events
+from database.call_attempts_db import claim_due_redials, cleanup_old_call_attempts
+from database.db_access import cleanup_old_announcement_records
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # グローバルスケジューラー
 scheduler = None
 
@@ -33,53 +50,126 @@ def get_db_connection():
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb'),
         row_factory=dict_row
     )
-    return conn
+    return instrument_connection(conn, 'scheduler')
+
+
+def claim_due_cast_calls(conn, now):
+    """
+    オートコール対象を確保（送信済みフラグを先に立ててコミット）
+
+    FOR UPDATE SKIP LOCKED で行を確保するため、複数のワーカーが同時に実行しても
+    1件のレコードを確保できるのは1ワーカーだけになる（同じキャストへの二重発信を防ぐ）。
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE pickup_records pr
+        SET cast_auto_call_sent = TRUE,
+            cast_auto_call_sent_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT 
+                pr2.record_id,
+                c.store_id,
+                c.name AS cast_name,
+                c.phone_number AS cast_phone,
+                h.name AS hotel_name,
+                h.address AS hotel_address,
+                pr2.exit_time - INTERVAL '1 minute' * c.notification_minutes_before AS notify_at
+            FROM pickup_records pr2
+            JOIN casts c ON pr2.cast_id = c.cast_id
+            LEFT JOIN hotels h ON pr2.hotel_id = h.hotel_id
+            WHERE 
+                pr2.cast_auto_call_sent = FALSE
+                AND c.auto_call_enabled = TRUE
+                AND c.phone_number IS NOT NULL
+                AND pr2.exit_time IS NOT NULL
+                AND (pr2.exit_time - INTERVAL '1 minute' * c.notification_minutes_before) <= %s
+                AND (pr2.exit_time - INTERVAL '1 minute' * c.notification_minutes_before) > %s
+            FOR UPDATE OF pr2 SKIP LOCKED
+        ) due
+        WHERE pr.record_id = due.record_id
+        RETURNING pr.record_id, pr.cast_id, pr.staff_id, pr.exit_time,
+                  due.store_id, due.cast_name, due.cast_phone, due.hotel_name, due.hotel_address,
+                  due.notify_at
+    """, (now, now - timedelta(minutes=5)))
+    records = cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    return records
+
+
+def claim_due_staff_notifications(conn, now):
+    """スタッフへのLINE通知対象を確保（claim_due_cast_calls と同じ方式）"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE pickup_records pr
+        SET staff_line_sent = TRUE,
+            staff_line_sent_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT 
+                pr2.record_id,
+                c.store_id,
+                c.name AS cast_name,
+                u.name AS staff_name,
+                u.line_id AS staff_line_id,
+                h.name AS hotel_name,
+                h.address AS hotel_address,
+                pr2.exit_time - INTERVAL '1 minute' * u.notification_minutes_before AS notify_at
+            FROM pickup_records pr2
+            JOIN casts c ON pr2.cast_id = c.cast_id
+            JOIN users u ON pr2.staff_id = u.login_id
+            LEFT JOIN hotels h ON pr2.hotel_id = h.hotel_id
+            WHERE 
+                pr2.staff_line_sent = FALSE
+                AND u.line_id IS NOT NULL
+                AND u.line_id != ''
+                AND pr2.exit_time IS NOT NULL
+                AND (pr2.exit_time - INTERVAL '1 minute' * u.notification_minutes_before) <= %s
+                AND (pr2.exit_time - INTERVAL '1 minute' * u.notification_minutes_before) > %s
+            FOR UPDATE OF pr2 SKIP LOCKED
+        ) due
+        WHERE pr.record_id = due.record_id
+        RETURNING pr.record_id, pr.cast_id, pr.staff_id, pr.exit_time,
+                  due.store_id, due.cast_name, due.staff_name, due.staff_line_id, due.hotel_name,
+                  due.hotel_address, due.notify_at
+    """, (now, now - timedelta(minutes=5)))
+    records = cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    return records
+
+
+def _record_notification_lag(channel, notify_at):
+    """通知の遅れ（送信時刻 - 予定時刻 exit_time - notification_minutes_before）を記録"""
+    if notify_at is not None:
+        NOTIFICATION_LAG.observe(max((datetime.now() - notify_at).total_seconds(), 0), channel)
 
 
 def check_and_send_notifications():
     """
     ピックアップレコードをチェックして通知を送信
     5分ごとに実行される
+
+    複数ワーカーで同時に実行しても、各レコードの通知は確保できた1ワーカーだけが送る。
+    送信済みフラグは送信前に立てるため、通知は最大1回（送信に失敗した場合は再送しない）。
+
+    LINE通知（スタッフへのリマインダー・店舗へのオートコール結果）は LineNotificationBatch に
+    ためて最後にまとめて送る（同じ宛先は1回の push、同じメッセージの複数宛先は multicast）。
     """
     try:
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 通知チェック開始...")
+        started = time.perf_counter()
         
         conn = get_db_connection()
-        cursor = conn.cursor()
         
         # 現在時刻
         now = datetime.now()
         
-        # ===== キャストへのオートコール =====
-        cursor.execute("""
-            SELECT 
-                pr.record_id,
-                pr.cast_id,
-                pr.staff_id,
-                pr.exit_time,
-                pr.cast_auto_call_sent,
-                c.name AS cast_name,
-                c.phone_number AS cast_phone,
-                c.notification_minutes_before AS cast_notification_minutes,
-                c.auto_call_enabled,
-                h.name AS hotel_name,
-                h.address AS hotel_address
-            FROM pickup_records pr
-            JOIN casts c ON pr.cast_id = c.cast_id
-            LEFT JOIN hotels h ON pr.hotel_id = h.hotel_id
-            WHERE 
-                pr.cast_auto_call_sent = FALSE
-                AND c.auto_call_enabled = TRUE
-                AND c.phone_number IS NOT NULL
-                AND pr.exit_time IS NOT NULL
-                AND (pr.exit_time - INTERVAL '1 minute' * c.notification_minutes_before) <= %s
-                AND (pr.exit_time - INTERVAL '1 minute' * c.notification_minutes_before) > %s
-        """, (now, now - timedelta(minutes=5)))
+        line_batch = LineNotificationBatch()
         
-        cast_records = cursor.fetchall()
+        # ===== キャストへのオートコール =====
+        cast_records = claim_due_cast_calls(conn, now)
         
         for record in cast_records:
-            print(f"  → キャストへのオートコール: {record['cast_name']}さん")
+            logger.info("キャストへのオートコール: %sさん", record['cast_name'], extra={'record_id': record['record_id']})
             
             # 退室時刻をフォーマット
             exit_time_str = record['exit_time'].strftime('%H:%M')
@@ -88,91 +178,221 @@ def check_and_send_notifications():
             result = make_auto_call(
                 to_phone_number=record['cast_phone'],
                 cast_name=record['cast_name'],
-                exit_time_str=exit_time_str
+                exit_time_str=exit_time_str,
+                store_id=record['store_id'],
+                record_id=record['record_id']
             )
             
-            # 送信フラグを更新
             if result['success']:
-                cursor.execute("""
-                    UPDATE pickup_records 
-                    SET cast_auto_call_sent = TRUE,
-                        cast_auto_call_sent_at = CURRENT_TIMESTAMP
-                    WHERE record_id = %s
-                """, (record['record_id'],))
-                conn.commit()
-                print(f"    ✅ オートコール送信成功（Record ID: {record['record_id']}）")
+                _record_notification_lag('auto_call', record['notify_at'])
+                logger.info("オートコール送信成功", extra={'record_id': record['record_id']})
             else:
-                print(f"    ❌ オートコール送信失敗: {result['error']}")
+                logger.error("オートコール送信失敗: %s", result['error'], extra={'record_id': record['record_id']})
+            
+            # 店舗へのオートコール結果通知（店舗用LINE IDが未設定なら送らない）
+            line_batch.add_autocall_result(
+                cast_name=record['cast_name'],
+                exit_time_str=exit_time_str,
+                call_success=result['success'],
+                error_message=result['error'],
+                store_id=record['store_id']
+            )
         
         # ===== スタッフへのLINE通知 =====
-        cursor.execute("""
-            SELECT 
-                pr.record_id,
-                pr.cast_id,
-                pr.staff_id,
-                pr.exit_time,
-                pr.staff_line_sent,
-                c.name AS cast_name,
-                u.name AS staff_name,
-                u.line_id AS staff_line_id,
-                u.notification_minutes_before AS staff_notification_minutes,
-                h.name AS hotel_name,
-                h.address AS hotel_address
-            FROM pickup_records pr
-            JOIN casts c ON pr.cast_id = c.cast_id
-            JOIN users u ON pr.staff_id = u.login_id
-            LEFT JOIN hotels h ON pr.hotel_id = h.hotel_id
-            WHERE 
-                pr.staff_line_sent = FALSE
-                AND u.line_id IS NOT NULL
-                AND u.line_id != ''
-                AND pr.exit_time IS NOT NULL
-                AND (pr.exit_time - INTERVAL '1 minute' * u.notification_minutes_before) <= %s
-                AND (pr.exit_time - INTERVAL '1 minute' * u.notification_minutes_before) > %s
-        """, (now, now - timedelta(minutes=5)))
-        
-        staff_records = cursor.fetchall()
+        staff_records = claim_due_staff_notifications(conn, now)
         
+        staff_entries = []
         for record in staff_records:
-            print(f"  → スタッフへのLINE通知: {record['staff_name']}さん (LINE ID: {record['staff_line_id']})")
+            logger.info("スタッフへのLINE通知: %sさん", record['staff_name'], extra={'record_id': record['record_id']})
 
             # 退室時刻をフォーマット
             exit_time_str = record['exit_time'].strftime('%H:%M')
 
-            # LINE通知
-            result = send_pickup_reminder_to_staff(
-                staff_name=record['staff_name'],
+            entry_id = line_batch.add_pickup_reminder(
+                line_user_id=record['staff_line_id'],
                 cast_name=record['cast_name'],
                 exit_time_str=exit_time_str,
                 hotel_name=record['hotel_name'] or '未設定',
-                line_user_id=record['staff_line_id']
+                store_id=record['store_id']
             )
-            
-            # 送信フラグを更新
+            staff_entries.append((record, entry_id))
+        
+        # ===== LINE通知をまとめて送信 =====
+        line_messages = len(line_batch)
+        line_results = line_batch.flush()
+        
+        for record, entry_id in staff_entries:
+            result = line_results[entry_id]
             if result['success']:
-                cursor.execute("""
-                    UPDATE pickup_records 
-                    SET staff_line_sent = TRUE,
-                        staff_line_sent_at = CURRENT_TIMESTAMP
-                    WHERE record_id = %s
-                """, (record['record_id'],))
-                conn.commit()
-                print(f"    ✅ LINE通知送信成功（Record ID: {record['record_id']}）")
+                _record_notification_lag('line', record['notify_at'])
+                logger.info("LINE通知送信成功", extra={'record_id': record['record_id']})
             else:
-                print(f"    ❌ LINE通知送信失敗: {result['error']}")
+                logger.error("LINE通知送信失敗: %s", result['error'], extra={'record_id': record['record_id']})
         
-        cursor.close()
         conn.close()
         
-        if not cast_records and not staff_records:
-            print("  通知対象なし")
-        
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 通知チェック完了\n")
+        duration = time.perf_counter() - started
+        SCHEDULER_TICK_DURATION.observe(duration, 'notifications')
+        logger.info(
+            "通知チェック完了",
+            extra={
+                'cast_calls': len(cast_records),
+                'staff_notifications': len(staff_records),
+                'line_messages': line_messages,
+                'duration_ms': round(duration * 1000, 2)
+            }
+        )
         
-    except Exception as e:
-        print(f"❌ スケジューラーエラー: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("スケジューラーエラー")
+
+
+def redial_unanswered_calls():
+    """
+    応答がなかったオートコールを再発信（1分ごとに実行）
+
+    通話結果は Twilio のステータスコールバックで call_attempts に記録される（utils/call_outcomes.py）。
+    no-answer / busy / failed の発信を REDIAL_DELAY_MINUTES 分後に MAX_CALL_ATTEMPTS 回目まで再発信する。
+    """
+    try:
+        conn = get_db_connection()
+        try:
+            attempts = claim_due_redials(conn, datetime.now(), MAX_CALL_ATTEMPTS, REDIAL_DELAY_MINUTES)
+        finally:
+            conn.close()
+
+        for attempt in attempts:
+            logger.info(
+                "オートコール再発信: %sさん", attempt['cast_name'],
+                extra={'record_id': attempt['record_id'], 'attempt_no': attempt['attempt_no']}
+            )
+            result = make_auto_call(
+                to_phone_number=attempt['cast_phone'],
+                cast_name=attempt['cast_name'],
+                exit_time_str=attempt['exit_time'].strftime('%H:%M'),
+                store_id=attempt['store_id'],
+                record_id=attempt['record_id'],
+                attempt_no=attempt['attempt_no']
+            )
+            if not result['success']:
+                logger.error("オートコール再発信失敗: %s", result['error'], extra={'record_id': attempt['record_id']})
+
+    except Exception:
+        logger.exception("再発信チェックエラー")
+
+
+# ===== メンテナンスジョブ =====
+
+def run_business_day_close():
+    """
+    営業日締め（毎日 BUSINESS_DAY_CUTOFF_HOUR 時過ぎに実行）
+    未締めの営業日を daily_sales に集計する（古い金銭記録の整理は partition_maintenance で行う）
+    """
+    results = close_pending_business_days()
+    for result in results:
+        logger.info("営業日を締めました: %s", result['business_date'], extra=result)
+
+    return {'closed_days': [result['business_date'] for result in results]}
+
+
+def run_partition_maintenance():
+    """
+    履歴テーブルのパーティション管理（営業日締めの後に実行）
+    先の月のパーティションを作成し、保持期間を過ぎた送迎記録・金銭記録の月のパーティションを切り離す。
+    パーティションに移行していないテーブルは従来どおり古い行を DELETE する
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        try:
+            partitioned = get_partitioned_tables(cursor)
+        finally:
+            cursor.close()
+        result = {
+            'partitions_created': ensure_partitions(conn, partitioned),
+            'partitions_archived': detach_expired_partitions(conn, partitioned)
+        }
+    finally:
+        conn.close()
+
+    db = get_db()
+    try:
+        if 'pickup_records' not in partitioned:
+            result['pickup_records_cleaned'] = cleanup_old_pickup_records(db)
+        # 締め済みの営業日の行だけ削除するため、営業日締めの後に実行する
+        if 'money_records' not in partitioned:
+            result['money_records_cleaned'] = cleanup_old_money_records(db)
+    finally:
+        db.close()
+    return result
+
+
+def run_cast_sessions_cleanup():
+    """最終アクティビティから24時間以上経過したキャストマイページのセッションを無効化"""
+    db = get_db()
+    try:
+        return {
+            store_code: cleanup_expired_sessions(db, get_store_id(store_code))
+            for store_code in DB_PATHS
+        }
+    finally:
+        db.close()
+
+
+def run_call_attempts_cleanup():
+    """30日以上前のオートコール発信結果を削除"""
+    db = get_db()
+    try:
+        return {'call_attempts_cleaned': cleanup_old_call_attempts(db)}
+    finally:
+        db.close()
+
+
+def run_line_webhook_events_cleanup():
+    """7日以上前の LINE Webhook イベント記録を削除"""
+    db = get_db()
+    try:
+        return {'line_webhook_events_cleaned': cleanup_old_webhook_events(db)}
+    finally:
+        db.close()
+
+
+def run_announcement_records_cleanup():
+    """30日以上前のお知らせ記録を削除（店舗ごと）"""
+    db = get_db()
+    try:
+        return {
+            store_code: cleanup_old_announcement_records(db, get_store_id(store_code))
+            for store_code in DB_PATHS
+        }
+    finally:
+        db.close()
+
+
+register_maintenance_job(
+    'business_day_close', '営業日締め（毎日）', run_business_day_close,
+    'cron', hour=BUSINESS_DAY_CUTOFF_HOUR, minute=10
+)
+register_maintenance_job(
+    'partition_maintenance', '履歴テーブルのパーティション管理（毎日）', run_partition_maintenance,
+    'cron', hour=BUSINESS_DAY_CUTOFF_HOUR, minute=20
+)
+register_maintenance_job(
+    'cast_sessions_cleanup', 'キャストセッションの期限切れ処理（1時間ごと）', run_cast_sessions_cleanup,
+    'interval', hours=1
+)
+register_maintenance_job(
+    'line_webhook_events_cleanup', 'LINE Webhook イベント記録の削除（毎日）', run_line_webhook_events_cleanup,
+    'cron', hour=BUSINESS_DAY_CUTOFF_HOUR, minute=30
+)
+register_maintenance_job(
+    'call_attempts_cleanup', 'オートコール発信結果の削除（毎日）', run_call_attempts_cleanup,
+    'cron', hour=BUSINESS_DAY_CUTOFF_HOUR, minute=40
+)
+register_maintenance_job(
+    'announcement_records_cleanup', 'お知らせ記録の削除（毎日）', run_announcement_records_cleanup,
+    'cron', hour=BUSINESS_DAY_CUTOFF_HOUR, minute=50
+)
 
 
 def start_scheduler():
@@ -183,24 +403,42 @@ def start_scheduler():
     global scheduler
     
     if scheduler is not None and scheduler.running:
-        print("⚠️ スケジューラーは既に起動しています")
+        logger.warning("スケジューラーは既に起動しています")
         return
     
     scheduler = BackgroundScheduler(timezone='Asia/Tokyo')
     
-    # 5分ごとに実行
+    # 5分ごとに実行（前回の実行が終わっていなければ重ねて実行しない）
     scheduler.add_job(
         func=check_and_send_notifications,
         trigger=IntervalTrigger(minutes=5),
         id='notification_check',
         name='通知チェック（5分ごと）',
-        replace_existing=True
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1
+    )
+
+    # 応答がなかったオートコールの再発信（1分ごと）
+    scheduler.add_job(
+        func=redial_unanswered_calls,
+        trigger=IntervalTrigger(minutes=1),
+        id='auto_call_redial',
+        name='オートコール再発信（1分ごと）',
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1
     )
+
+    # メンテナンスジョブ（古いデータの削除・営業日締め）
+    schedule_maintenance_jobs(scheduler)
     
     scheduler.start()
-    print("✅ オートコール・LINE通知スケジューラー起動")
-    print("   実行間隔: 5分ごと")
-    print("   次回実行: " + scheduler.get_jobs()[0].next_run_time.strftime('%Y-%m-%d %H:%M:%S'))
+    logger.info(
+        "オートコール・LINE通知スケジューラー起動（5分ごと、メンテナンスジョブ %d件）",
+        len(scheduler.get_jobs()) - 2,
+        extra={'next_run': scheduler.get_jobs()[0].next_run_time.strftime('%Y-%m-%d %H:%M:%S')}
+    )
 
 
 def stop_scheduler():
@@ -209,9 +447,9 @@ def stop_scheduler():
     
     if scheduler is not None and scheduler.running:
         scheduler.shutdown()
-        print("⏸️ スケジューラーを停止しました")
+        logger.info("スケジューラーを停止しました")
     else:
-        print("⚠️ スケジューラーは起動していません")
+        logger.warning("スケジューラーは起動していません")
 
 
 def get_scheduler_status():
@@ -234,7 +472,8 @@ def get_scheduler_status():
     
     return {
         'running': scheduler.running,
-        'jobs': jobs
+        'jobs': jobs,
+        'circuits': get_circuit_states()
     }
 
 
@@ -243,11 +482,12 @@ if __name__ == '__main__':
     print("=== スケジューラーテスト起動 ===")
     print("Ctrl+C で停止できます\n")
     
+    from utils.app_logging import setup_logging
+    setup_logging()
     start_scheduler()
     
     try:
         # スケジューラーを実行し続ける
-        import time
         while True:
             time.sleep(1)
     except (KeyboardInterrupt, SystemExit):
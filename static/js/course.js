@@ -219,4 +219,26 @@ function initCourseManagement(successMessage, errorMessage) {
     } else if (errorMessage) {
         showMessage(errorMessage, false);
     }
-}
\ No newline at end of file
+}
+
+// コース一覧のドラッグ&ドロップ並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+document.addEventListener('DOMContentLoaded', function() {
+    const tbody = document.getElementById('courseTableBody');
+    if (tbody) {
+        window.enableDragReorder(tbody, 'courses', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
+});
+
+// カテゴリ一覧のドラッグ&ドロップ並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+document.addEventListener('DOMContentLoaded', function() {
+    const tbody = document.getElementById('categoryTableBody');
+    if (tbody) {
+        window.enableDragReorder(tbody, 'course_categories', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
+});
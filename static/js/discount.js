@@ -7,6 +7,7 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log('割引マスタ管理ページ初期化');
     updateRegisterValueLabel();
     initTypeButtons();
+    initDragReorder();
 });
 
 // ========== 種類ボタンの初期化 ==========
@@ -360,6 +361,19 @@ async function moveDiscount(discountId, direction) {
     }
 }
 
+/**
+ * ドラッグ&ドロップで並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+ */
+function initDragReorder() {
+    const tbody = document.querySelector('.discount-table tbody');
+    if (tbody) {
+        window.enableDragReorder(tbody, 'discounts', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
+}
+
 // ========== メッセージ表示 ==========
 
 /**
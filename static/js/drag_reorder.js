@@ -0,0 +1,78 @@
+// ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+// ドラッグ&ドロップ並び替え（共通）
+// 直下の要素（tr など）に data-id を付けたコンテナ（tbody など）を渡すと、
+// ドロップ後の並び全体を /<store>/api/reorder/<table> に1回だけ送信する
+// ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+(function() {
+    'use strict';
+
+    window.enableDragReorder = function(tbody, table, options) {
+        options = options || {};
+        const store = window.location.pathname.split('/')[1];
+        let draggingRow = null;
+
+        // コンテナ直下の data-id 付き要素（並び替えの対象）
+        const rowOf = function(element) {
+            const row = element.closest('[data-id]');
+            return row && row.parentNode === tbody ? row : null;
+        };
+
+        tbody.querySelectorAll(':scope > [data-id]').forEach(row => {
+            row.setAttribute('draggable', 'true');
+            row.style.cursor = 'move';
+        });
+
+        // 描画し直すたびに呼ばれるため、リスナーは tbody に1回だけ登録する
+        if (tbody.dataset.dragReorder) {
+            return;
+        }
+        tbody.dataset.dragReorder = table;
+
+        tbody.addEventListener('dragstart', function(e) {
+            draggingRow = rowOf(e.target);
+            if (!draggingRow) return;
+            e.dataTransfer.effectAllowed = 'move';
+            draggingRow.style.opacity = '0.5';
+        });
+
+        tbody.addEventListener('dragover', function(e) {
+            if (!draggingRow) return;
+            e.preventDefault();
+            const target = rowOf(e.target);
+            if (!target || target === draggingRow) return;
+
+            const rect = target.getBoundingClientRect();
+            const after = e.clientY > rect.top + rect.height / 2;
+            tbody.insertBefore(draggingRow, after ? target.nextSibling : target);
+        });
+
+        tbody.addEventListener('dragend', function() {
+            if (!draggingRow) return;
+            draggingRow.style.opacity = '';
+            draggingRow = null;
+
+            const ids = Array.from(tbody.querySelectorAll(':scope > [data-id]')).map(row => parseInt(row.dataset.id, 10));
+
+            fetch(`/${store}/api/reorder/${tbody.dataset.dragReorder}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ ids: ids })
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    if (options.onSaved) options.onSaved();
+                } else {
+                    alert(data.message || '並び替えに失敗しました');
+                    if (options.onError) options.onError();
+                }
+            })
+            .catch(error => {
+                console.error('Error saving order:', error);
+                alert('並び替え中にエラーが発生しました');
+                if (options.onError) options.onError();
+            });
+        });
+    };
+})();
@@ -151,3 +151,14 @@ function getStoreFromPath() {
     const pathSegments = window.location.pathname.split('/');
     return pathSegments[1] || 'nagano';
 }
+
+// 延長一覧のドラッグ&ドロップ並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+document.addEventListener('DOMContentLoaded', function() {
+    const tbody = document.getElementById('extensionTableBody');
+    if (tbody) {
+        window.enableDragReorder(tbody, 'extensions', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
+});
@@ -242,7 +242,7 @@
         }
         
         tbody.innerHTML = areas.map((area, index) => `
-            <tr>
+            <tr data-id="${area.area_id}">
                 <td>
                     <button type="button" 
                             class="hotel-sort-btn ${index === 0 ? 'hotel-sort-btn-disabled' : ''}" 
@@ -276,6 +276,9 @@
                 </td>
             </tr>
         `).join('');
+
+        // ドラッグ&ドロップで並び替え（並び全体を1回で保存）
+        window.enableDragReorder(tbody, 'areas', { onSaved: loadAreas, onError: loadAreas });
     }
     
     function updateAreaSelects(areas) {
@@ -454,7 +457,7 @@
         }
         
         tbody.innerHTML = hotels.map((hotel, index) => `
-            <tr>
+            <tr data-id="${hotel.hotel_id}">
                 <td>
                     <button type="button" 
                             class="hotel-sort-btn ${index === 0 ? 'hotel-sort-btn-disabled' : ''}" 
@@ -488,6 +491,9 @@
                 </td>
             </tr>
         `).join('');
+
+        // ドラッグ&ドロップで並び替え（並び全体を1回で保存）
+        window.enableDragReorder(tbody, 'hotels', { onSaved: loadHotels, onError: loadHotels });
     }
     
     function saveHotel(event) {
@@ -150,3 +150,14 @@ function getStoreFromPath() {
     const pathSegments = window.location.pathname.split('/');
     return pathSegments[1] || 'nagano';
 }
+
+// 指名種類一覧のドラッグ&ドロップ並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+document.addEventListener('DOMContentLoaded', function() {
+    const tbody = document.getElementById('nominateTableBody');
+    if (tbody) {
+        window.enableDragReorder(tbody, 'nomination_types', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
+});
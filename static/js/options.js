@@ -171,4 +171,15 @@ document.addEventListener('keydown', function(event) {
 function getStoreFromPath() {
     const pathSegments = window.location.pathname.split('/');
     return pathSegments[1] || 'nagano';
-}
\ No newline at end of file
+}
+
+// オプション一覧のドラッグ&ドロップ並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+document.addEventListener('DOMContentLoaded', function() {
+    const tbody = document.getElementById('optionTableBody');
+    if (tbody) {
+        window.enableDragReorder(tbody, 'options', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
+});
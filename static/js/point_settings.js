@@ -420,4 +420,13 @@ function resetReasonForm() {
 document.addEventListener('DOMContentLoaded', function() {
     // 初期表示の切り替え
     togglePointMethod();
+
+    // 理由一覧のドラッグ&ドロップ並び替え（並び全体を1回で保存し、ページをリロードして最新の順序を表示）
+    const reasonBody = document.querySelector('.point-settings-table tbody');
+    if (reasonBody) {
+        window.enableDragReorder(reasonBody, 'point_reasons', {
+            onSaved: () => location.reload(),
+            onError: () => location.reload()
+        });
+    }
 });
@@ -113,43 +113,31 @@ function updateSelectDisplay() {
 }
 
 /**
- * すべてのマスタデータを並列で取得
+ * すべてのマスタデータを一括で取得
  */
 async function loadAllDataParallel() {
     const store = getStoreFromUrl();
 
     try {
-        // すべてのfetchを並列実行
-        const results = await Promise.allSettled([
-            fetch(`/${store}/casts/api`).then(r => r.json()),
-            fetch(`/${store}/courses/api`).then(r => r.json()),
-            fetch(`/${store}/nomination-types/api`).then(r => r.json()),
-            fetch(`/${store}/extensions/api`).then(r => r.json()),
-            fetch(`/${store}/options/api`).then(r => r.json()),
-            fetch(`/${store}/discount_management/api/list`).then(r => r.json()),
-            fetch(`/${store}/reservation-settings/cancellation_reasons`).then(r => r.json()),
-            fetch(`/${store}/settings/reservation_methods`).then(r => r.json()),
-            fetch(`/${store}/reservation-settings/meeting_places`).then(r => r.json()),
-            fetch(`/${store}/hotel-management/hotels`).then(r => r.json()),
-            fetch(`/${store}/hotel-management/areas`).then(r => r.json()),
-            fetch(`/${store}/staff/api`).then(r => r.json()),
-            fetch(`/${store}/reservation-settings/card_fee_rate`).then(r => r.json()).catch(() => ({ success: true, rate: 5 }))
-        ]);
+        // マスタデータを1リクエストで取得（変更がなければETagで304になりブラウザキャッシュを使う）
+        const bootstrap = await fetch(`/${store}/reservation/bootstrap`, { cache: 'no-cache' })
+            .then(r => r.ok ? r.json() : {})
+            .catch(() => ({}));
 
         // 結果を展開
-        const castsResponse = results[0].status === 'fulfilled' ? results[0].value : [];
-        const coursesResponse = results[1].status === 'fulfilled' ? results[1].value : [];
-        const nominationsResponse = results[2].status === 'fulfilled' ? results[2].value : [];
-        const extensionsResponse = results[3].status === 'fulfilled' ? results[3].value : [];
-        const optionsResponse = results[4].status === 'fulfilled' ? results[4].value : [];
-        const discountsResponse = results[5].status === 'fulfilled' ? results[5].value : { success: false };
-        const cancellationResponse = results[6].status === 'fulfilled' ? results[6].value : { success: false };
-        const methodsResponse = results[7].status === 'fulfilled' ? results[7].value : [];
-        const meetingPlacesResponse = results[8].status === 'fulfilled' ? results[8].value : { success: false };
-        const hotelsResponse = results[9].status === 'fulfilled' ? results[9].value : { success: false };
-        const areasResponse = results[10].status === 'fulfilled' ? results[10].value : { success: false };
-        const staffResponse = results[11].status === 'fulfilled' ? results[11].value : [];
-        const cardFeeResponse = results[12].status === 'fulfilled' ? results[12].value : { success: true, rate: 5 };
+        const castsResponse = bootstrap.casts || [];
+        const coursesResponse = bootstrap.courses || [];
+        const nominationsResponse = bootstrap.nomination_types || [];
+        const extensionsResponse = bootstrap.extensions || [];
+        const optionsResponse = bootstrap.options || [];
+        const discountsResponse = bootstrap.discounts || { success: false };
+        const cancellationResponse = bootstrap.cancellation_reasons || { success: false };
+        const methodsResponse = bootstrap.reservation_methods || [];
+        const meetingPlacesResponse = bootstrap.meeting_places || { success: false };
+        const hotelsResponse = bootstrap.hotels || { success: false };
+        const areasResponse = bootstrap.areas || { success: false };
+        const staffResponse = bootstrap.staff || [];
+        const cardFeeResponse = bootstrap.card_fee_rate || { success: true, rate: 5 };
 
         // データを保存
         castsData = castsResponse;
@@ -933,6 +921,11 @@ document.getElementById('reservation_form').addEventListener('submit', function(
     console.log('hotel_id element:', document.getElementById('hotel_id'));
     console.log('===========================');
 
+    submitReservationForm(store, formData);
+});
+
+// 予約を送信（キャストの予約重複時は確認のうえ再送信）
+function submitReservationForm(store, formData) {
     fetch(`/${store}/reservations/register`, {
         method: 'POST',
         body: formData
@@ -942,6 +935,14 @@ document.getElementById('reservation_form').addEventListener('submit', function(
         if (data.success) {
             alert('予約を登録しました');
             window.location.href = `/${store}/reservations`;
+        } else if (data.conflict) {
+            const lines = data.conflicts.map(c =>
+                `・予約ID ${c.reservation_id}（${c.customer_name || ''}様 ${c.reservation_datetime}〜${c.end_datetime}）`
+            );
+            if (confirm(data.message + '\n' + lines.join('\n') + '\n\nこのまま登録しますか？')) {
+                formData.set('allow_overlap', '1');
+                submitReservationForm(store, formData);
+            }
         } else {
             alert('予約登録に失敗しました: ' + data.message);
         }
@@ -950,7 +951,7 @@ document.getElementById('reservation_form').addEventListener('submit', function(
         console.error('Error:', error);
         alert('エラーが発生しました');
     });
-});
+}
 
 // URLから店舗名を取得
 function getStoreFromUrl() {
@@ -516,7 +516,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         listDiv.innerHTML = shiftTypesData.map(type => `
-            <div class="shift-type-item">
+            <div class="shift-type-item" data-id="${type.shift_type_id}">
                 <div class="shift-type-color" style="background-color: ${type.color}"></div>
                 <span class="shift-type-name">${escapeHtml(type.shift_name)}</span>
                 <span class="shift-type-badge ${type.is_work_day ? 'badge-work' : 'badge-off'}">
@@ -536,6 +536,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 </div>
             </div>
         `).join('');
+
+        // ドラッグ&ドロップで並び替え（並び全体を1回で保存）
+        window.enableDragReorder(listDiv, 'shift_types', { onSaved: loadShiftTypes, onError: loadShiftTypes });
     }
     
     window.showAddShiftTypeModal = function() {
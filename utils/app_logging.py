@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+アプリケーションのログ出力（非同期・JSON形式）
+
+各モジュールは logging.getLogger(__name__) でロガーを取得して出力する。
+ログは QueueHandler でキューに入れるだけにして、標準出力への書き込みは
+QueueListener のスレッドで行う（リクエスト処理中のスレッドでI/Oを待たない）。
+
+1件のログは1行のJSONで、リクエスト中であればリクエストID・店舗コードを付ける。
+リクエストごとに処理時間（duration_ms）付きのアクセスログを1件出力する。
+
+環境変数:
+    LOG_LEVEL: 出力レベル（デフォルト INFO）
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+from datetime import datetime
+
+# リクエスト中のリクエストID・店舗コード（ログに付ける）
+request_id_var = contextvars.ContextVar('request_id', default=None)
+store_var = contextvars.ContextVar('store', default=None)
+
+# LogRecord の標準属性（これ以外の属性は extra として JSON に含める）
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class RequestContextFilter(logging.Filter):
+    """ログにリクエストID・店舗コードを付ける（キューに入れる前に実行）"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        if not hasattr(record, 'store'):
+            record.store = store_var.get()
+        return True
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler（整形はリスナー側で行う）
+
+    標準の QueueHandler はキューに入れる前に呼び出し元スレッドで整形するため、
+    メッセージの展開と例外のトレースバックだけ行い、JSON化はリスナーのスレッドに任せる。
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """1件のログを1行のJSONにする"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=None, stream=None):
+    """
+    ルートロガーに非同期のJSON出力を設定（プロセスごとに1回、2回目以降は何もしない）
+
+    Args:
+        level: 出力レベル（省略時は環境変数 LOG_LEVEL、未設定なら INFO）
+        stream: 出力先（省略時は標準出力）
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output_handler = logging.StreamHandler(stream or sys.stdout)
+    output_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredFormatQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level or os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """キューに残っているログを書き出してリスナーを停止"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_request_logging(app):
+    """リクエストIDの採番とアクセスログ（処理時間付き）を設定"""
+    from flask import g, request
+
+    access_logger = logging.getLogger('access')
+
+    @app.before_request
+    def _start_request_logging():
+        g.request_started = time.perf_counter()
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+        request_id_var.set(g.request_id)
+        store_var.set((request.view_args or {}).get('store'))
+
+    @app.after_request
+    def _log_request(response):
+        started = g.get('request_started')
+        duration_ms = round((time.perf_counter() - started) * 1000, 2) if started else None
+        access_logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': duration_ms
+            }
+        )
+        if g.get('request_id'):
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    @app.teardown_request
+    def _clear_request_logging(exception=None):
+        request_id_var.set(None)
+        store_var.set(None)
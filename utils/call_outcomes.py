@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Twilio ステータスコールバックの受け付けとオートコールの再発信ポリシー
+
+/twilio/status（app.py）は署名を検証した通話結果を enqueue_call_status でキューに入れて
+すぐに応答し、DBへの書き込みは書き込み用スレッドが FLUSH_BATCH_SIZE 件ずつまとめて行う
+（コールバックが集中してもリクエスト処理スレッドを DB 待ちで止めない）。
+書き込みに失敗したまとまりは破棄せず、FLUSH_RETRY_MAX_SECONDS まで間隔を伸ばしながら書き込み直す。
+キューが満杯の場合は /twilio/status が 503 を返す。
+
+応答がなかった発信（no-answer / busy / failed）は、スケジューラーの再発信チェックで
+REDIAL_DELAY_MINUTES 分後に MAX_CALL_ATTEMPTS 回目まで再発信する（退室時刻を過ぎたら再発信しない）。
+
+環境変数:
+    TWILIO_STATUS_CALLBACK_URL: /twilio/status の公開URL（未設定ならコールバックを受け取らない）
+    AUTO_CALL_MAX_ATTEMPTS: 1件の送迎記録への最大発信回数（デフォルト 3）
+    AUTO_CALL_REDIAL_DELAY_MINUTES: 再発信までの分数（デフォルト 2）
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlencode
+
+from database.call_attempts_db import insert_call_attempts
+from database.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+STATUS_CALLBACK_URL = os.getenv('TWILIO_STATUS_CALLBACK_URL')
+
+MAX_CALL_ATTEMPTS = int(os.getenv('AUTO_CALL_MAX_ATTEMPTS', '3'))
+REDIAL_DELAY_MINUTES = int(os.getenv('AUTO_CALL_REDIAL_DELAY_MINUTES', '2'))
+
+# 書き込み用スレッドが1回に書き込む件数と、件数が揃わないときに待つ秒数
+FLUSH_BATCH_SIZE = 200
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# 書き込みに失敗したときに書き込み直すまでの秒数（失敗が続くたびに倍にし、上限まで伸ばす）
+FLUSH_RETRY_INITIAL_SECONDS = 1
+FLUSH_RETRY_MAX_SECONDS = 60
+
+# 通話の最終状態（これ以外のコールバックは記録しない）
+FINAL_CALL_STATUSES = ('completed', 'no-answer', 'busy', 'failed', 'canceled')
+
+_status_queue = queue.Queue(maxsize=10000)
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def build_status_callback_url(store_id, record_id, attempt_no):
+    """
+    発信ごとのステータスコールバックURL（送迎記録・発信回数をクエリに付ける）
+
+    Returns:
+        str or None: TWILIO_STATUS_CALLBACK_URL が未設定なら None
+    """
+    if not STATUS_CALLBACK_URL or record_id is None:
+        return None
+    params = {'record_id': record_id, 'attempt_no': attempt_no}
+    if store_id is not None:
+        params['store_id'] = store_id
+    return f"{STATUS_CALLBACK_URL}?{urlencode(params)}"
+
+
+def is_valid_twilio_request(query_string, params, signature, auth_token):
+    """
+    X-Twilio-Signature を検証
+
+    プロキシ経由でも同じURLで検証できるよう、request.url ではなく
+    TWILIO_STATUS_CALLBACK_URL にクエリ文字列を付けたURLで検証する。
+    """
+    from twilio.request_validator import RequestValidator
+
+    if not STATUS_CALLBACK_URL or not signature or not auth_token:
+        return False
+    url = STATUS_CALLBACK_URL + (f"?{query_string}" if query_string else '')
+    return RequestValidator(auth_token).validate(url, params, signature)
+
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_writer_loop, name='call-status-writer', daemon=True)
+            _writer.start()
+
+
+def enqueue_call_status(call_sid, call_status, duration_seconds, record_id, store_id, attempt_no):
+    """
+    通話結果を書き込みキューに入れる（最終状態以外は記録しない）
+
+    Returns:
+        bool: 受け付けた場合 True（最終状態以外で記録不要の場合も True）。
+              キューが満杯で破棄した場合だけ False
+    """
+    if call_status not in FINAL_CALL_STATUSES:
+        return True
+
+    _start_writer()
+    try:
+        _status_queue.put_nowait({
+            'call_sid': call_sid,
+            'record_id': record_id,
+            'store_id': store_id,
+            'attempt_no': attempt_no or 1,
+            'status': call_status,
+            'duration_seconds': duration_seconds
+        })
+        return True
+    except queue.Full:
+        logger.error("通話結果の書き込みキューが満杯のため破棄しました", extra={'call_sid': call_sid})
+        return False
+
+
+def _writer_loop():
+    while True:
+        batch = [_status_queue.get()]
+        while len(batch) < FLUSH_BATCH_SIZE:
+            try:
+                batch.append(_status_queue.get(timeout=FLUSH_INTERVAL_SECONDS))
+            except queue.Empty:
+                break
+        _flush_with_retry(batch)
+
+
+def _flush_with_retry(batch):
+    """書き込めるまで間隔を伸ばしながら書き込み直す（失敗した通話結果を破棄しない）"""
+    delay = FLUSH_RETRY_INITIAL_SECONDS
+    while True:
+        try:
+            flush_call_statuses(batch)
+            return
+        except Exception:
+            logger.exception("通話結果の書き込みエラー（再試行します）",
+                             extra={'attempts': len(batch), 'retry_in_seconds': delay})
+        time.sleep(delay)
+        delay = min(delay * 2, FLUSH_RETRY_MAX_SECONDS)
+
+
+def flush_call_statuses(attempts):
+    """通話結果をまとめて call_attempts に書き込む（1トランザクション）"""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            insert_call_attempts(cursor, attempts)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    logger.info("通話結果を記録しました", extra={'attempts': len(attempts)})
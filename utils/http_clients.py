@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+外部API（LINE Messaging API・Twilio）への共通HTTPクライアント
+
+店舗ごとにクライアントを1つ作って使い回し、接続を keep-alive で再利用する
+（送信のたびにTLS接続を張り直さない）。すべてのリクエストに接続・読み取りの
+タイムアウトを付け、スケジューラーの処理が外部APIの応答待ちで止まらないようにする。
+
+外部APIごとにサーキットブレーカーを持ち、接続エラー・タイムアウト・5xx が
+CIRCUIT_FAILURE_THRESHOLD 回続いたら CIRCUIT_RESET_SECONDS 秒間は送信せずに
+CircuitOpenError にする（障害中の外部APIをタイムアウトまで待ち続けない）。
+
+環境変数:
+    OUTBOUND_CONNECT_TIMEOUT: 接続タイムアウト秒（デフォルト 3）
+    OUTBOUND_READ_TIMEOUT: 読み取りタイムアウト秒（デフォルト 10）
+    LINE_API_BASE_URL: LINE Messaging API のURL（ローカルの模擬サーバーで計測する場合に変更）
+    TWILIO_API_BASE_URL: Twilio API のURL（同上、未設定なら Twilio の標準）
+"""
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv('OUTBOUND_CONNECT_TIMEOUT', '3'))
+READ_TIMEOUT = float(os.getenv('OUTBOUND_READ_TIMEOUT', '10'))
+
+LINE_API_BASE_URL = os.getenv('LINE_API_BASE_URL', 'https://api.line.me').rstrip('/')
+TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL')
+
+# 1クライアントあたりの keep-alive 接続数
+POOL_MAXSIZE = 10
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+# 店舗設定（アクセストークン・認証情報）を読み直すまでの秒数
+CREDENTIALS_CACHE_SECONDS = 60
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いている（外部APIへの送信を止めている）"""
+
+
+class CircuitBreaker:
+    """
+    外部API1つ分のサーキットブレーカー
+
+    closed   : 通常どおり送信
+    open     : 失敗が続いたため送信しない（reset_seconds 経過まで）
+    half_open: reset_seconds 経過後、1件だけ試しに送信して成功したら closed に戻す
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        """送信前に呼ぶ（送信できない場合は CircuitOpenError）"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return
+        raise CircuitOpenError(f'{self.name} への送信を停止中です（連続{self.failures}回失敗）')
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("%s のサーキットブレーカーを開きました", self.name, extra={'failures': self.failures})
+                self.opened_at = time.monotonic()
+
+
+_breakers = {
+    'line': CircuitBreaker('line'),
+    'twilio': CircuitBreaker('twilio')
+}
+
+# (外部API, store_id) → クライアント
+_clients = {}
+_clients_lock = threading.Lock()
+
+# (外部API, store_id) → (読み込んだ時刻, 設定)
+_credentials_cache = {}
+
+
+def get_circuit_breaker(provider):
+    """外部API（'line' / 'twilio'）のサーキットブレーカー"""
+    return _breakers[provider]
+
+
+def get_circuit_states():
+    """外部APIごとのサーキットブレーカーの状態"""
+    return {
+        name: {'state': breaker.state, 'failures': breaker.failures}
+        for name, breaker in _breakers.items()
+    }
+
+
+def get_cached_credentials(provider, store_id, loader):
+    """
+    店舗設定を CREDENTIALS_CACHE_SECONDS 秒キャッシュして返す
+
+    Args:
+        provider: 'line' / 'twilio'
+        store_id: 店舗ID（None は店舗を限定しない）
+        loader: キャッシュがない場合に設定を読み込む関数（引数なし）
+    """
+    key = (provider, store_id)
+    cached = _credentials_cache.get(key)
+    now = time.monotonic()
+    if cached and now - cached[0] < CREDENTIALS_CACHE_SECONDS:
+        return cached[1]
+    credentials = loader()
+    _credentials_cache[key] = (now, credentials)
+    return credentials
+
+
+def clear_credentials_cache(store_id=None):
+    """設定変更時にキャッシュを破棄（店舗を限定しない設定も破棄、store_id 省略時はすべて）"""
+    for key in list(_credentials_cache):
+        if store_id is None or key[1] in (store_id, None):
+            _credentials_cache.pop(key, None)
+
+
+def get_line_session(store_id):
+    """店舗ごとの LINE Messaging API 用セッション（keep-alive で接続を再利用）"""
+    key = ('line', store_id)
+    with _clients_lock:
+        session = _clients.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _clients[key] = session
+        return session
+
+
+def line_post(store_id, access_token, path, payload):
+    """
+    LINE Messaging API に POST（タイムアウト・サーキットブレーカー付き）
+
+    Args:
+        store_id: 店舗ID
+        access_token: チャネルアクセストークン
+        path: APIのパス（例: '/v2/bot/message/push'）
+        payload: リクエストボディ（JSON）
+
+    Returns:
+        requests.Response
+
+    Raises:
+        CircuitOpenError: サーキットブレーカーが開いている
+        requests.RequestException: 接続エラー・タイムアウト
+    """
+    breaker = _breakers['line']
+    breaker.before_call()
+    try:
+        response = get_line_session(store_id).post(
+            LINE_API_BASE_URL + path,
+            headers={'Authorization': f'Bearer {access_token}'},
+            json=payload,
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def get_twilio_client(store_id, account_sid, auth_token):
+    """
+    店舗ごとの Twilio クライアント（認証情報が変わった場合は作り直す）
+
+    TwilioHttpClient の pool_connections で接続を再利用し、timeout を付ける。
+    """
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+
+    key = ('twilio', store_id)
+    with _clients_lock:
+        cached = _clients.get(key)
+        if cached and cached[0] == (account_sid, auth_token):
+            return cached[1]
+
+        http_client = TwilioHttpClient(pool_connections=True, timeout=READ_TIMEOUT)
+        client = Client(account_sid, auth_token, http_client=http_client)
+        if TWILIO_API_BASE_URL:
+            client.api.base_url = TWILIO_API_BASE_URL.rstrip('/')
+        _clients[key] = ((account_sid, auth_token), client)
+        return client
+
+
+def call_twilio(func):
+    """
+    Twilio API の呼び出しをサーキットブレーカー付きで実行
+
+    4xx（番号誤りなど）は Twilio 側の障害ではないため失敗として数えない。
+
+    Args:
+        func: Twilio クライアントを使う関数（引数なし）
+
+    Raises:
+        CircuitOpenError: サーキットブレーカーが開いている
+    """
+    from twilio.base.exceptions import TwilioRestException
+
+    breaker = _breakers['twilio']
+    breaker.before_call()
+    try:
+        result = func()
+    except TwilioRestException as e:
+        if e.status is not None and e.status < 500:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
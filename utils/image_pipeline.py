@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+アップロード画像の最適化（縮小・WebP/JPEG変換・EXIF除去）
+
+アップロード時は元画像をコンテンツハッシュ名で保存してすぐに返し、
+表示用のサイズ違い（variant）はバックグラウンドのワーカーで生成する。
+元画像も保存時にEXIF（位置情報など）を除去する（向きは反映してから保存）。
+
+variant は /media/<size>/<fmt>/<元画像のstatic相対パス> で配信し、
+ファイル名がハッシュのため長期キャッシュ（immutable）を付ける。
+
+身分証・契約書（PRIVATE_UPLOAD_DIRS）は static の外（PRIVATE_ROOT）に保存し、
+ログイン中のスタッフだけが /media/private/... から取得できる（キャッシュさせない）。
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import abort, request, send_file, session, url_for
+from PIL import Image, ImageOps
+
+STATIC_ROOT = 'static'
+
+# 非公開ファイルの保存先（static の外）と、非公開として扱うディレクトリ（static/ からの相対パスと同じ形式）
+PRIVATE_ROOT = 'private_uploads'
+PRIVATE_UPLOAD_DIRS = ('uploads/cast/',)
+
+# 表示用サイズ（長辺の最大ピクセル数）
+IMAGE_VARIANTS = {
+    'thumb': 320,
+    'medium': 1280,
+    'large': 2048
+}
+
+IMAGE_FORMATS = ('webp', 'jpg')
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# variant のキャッシュ期間（1年）
+VARIANT_MAX_AGE = 365 * 24 * 60 * 60
+
+# 元画像の保存形式ごとのオプション（EXIF除去のための再保存。GIFはアニメーションを保つため再保存しない）
+ORIGINAL_SAVE_OPTIONS = {
+    'JPEG': {'quality': 95},
+    'WEBP': {'quality': 95},
+    'PNG': {'optimize': True}
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-variants')
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def is_image_path(relative_path):
+    """画像ファイルかどうか（拡張子で判定）"""
+    return '.' in relative_path and relative_path.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_private_path(relative_path):
+    """身分証・契約書など、ログインしたスタッフだけに見せるファイルか"""
+    return relative_path.replace('\\', '/').startswith(PRIVATE_UPLOAD_DIRS)
+
+
+def _root(relative_path):
+    return PRIVATE_ROOT if is_private_path(relative_path) else STATIC_ROOT
+
+
+def source_path(relative_path):
+    """
+    元ファイルの保存先（ファイルシステム上のパス）
+
+    非公開ファイルで PRIVATE_ROOT に無いものは、移行前の static 下のファイルを返す
+    （move_private_uploads.py で移行する）
+    """
+    path = os.path.join(_root(relative_path), relative_path)
+    if is_private_path(relative_path) and not os.path.exists(path):
+        legacy_path = os.path.join(STATIC_ROOT, relative_path)
+        if os.path.exists(legacy_path):
+            return legacy_path
+    return path
+
+
+def variant_path(relative_path, size, fmt):
+    """
+    variant の保存先（ファイルシステム上のパス）
+
+    uploads/blog/abc.jpg → static/uploads/blog/variants/abc_medium.webp
+    uploads/cast/1/abc.jpg → private_uploads/uploads/cast/1/variants/abc_medium.webp
+    """
+    directory, filename = os.path.split(relative_path)
+    name = os.path.splitext(filename)[0]
+    return os.path.join(_root(relative_path), directory, 'variants', f'{name}_{size}.{fmt}')
+
+
+def strip_metadata(data):
+    """
+    画像のEXIF（位置情報・撮影機器など）を除去したバイト列を返す
+
+    EXIFの向き（Orientation）は画素に反映してから除去する。
+    画像として読めないもの・GIF は元のまま返す。
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            image_format = original.format
+            if image_format not in ORIGINAL_SAVE_OPTIONS:
+                return data
+            icc_profile = original.info.get('icc_profile')
+            image = ImageOps.exif_transpose(original)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L', 'CMYK'):
+                image = image.convert('RGB')
+
+            output = io.BytesIO()
+            options = dict(ORIGINAL_SAVE_OPTIONS[image_format])
+            if icc_profile:
+                options['icc_profile'] = icc_profile
+            image.save(output, image_format, **options)
+            return output.getvalue()
+    except Exception as e:
+        print(f"[ERROR] 画像のEXIF除去エラー: {e}")
+        return data
+
+
+def save_upload(file, upload_dir, prefix=''):
+    """
+    アップロードファイルをコンテンツハッシュ名で保存し、variant 生成をキューに入れる
+
+    同じ内容のファイルは同じ名前になるため、再アップロードしても重複保存されない
+    （同じファイルを複数の記録から参照しうるため、削除時は呼び出し側で他の参照を確認する）。
+    画像はEXIFを除去してから保存する（ハッシュはアップロードされた内容で計算する）。
+
+    Args:
+        file: アップロードファイルオブジェクト
+        upload_dir: 保存先ディレクトリ（static/ からの相対パス）
+        prefix: ファイル名の接頭辞（例: 'id_document_'）
+
+    Returns:
+        str: 保存したファイルの static/ からの相対パス
+    """
+    data = file.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    ext = os.path.splitext(file.filename)[1].lower()
+    filename = f'{prefix}{digest}{ext}'
+
+    relative_path = os.path.join(upload_dir, filename).replace(os.sep, '/')
+    file_path = os.path.join(_root(relative_path), relative_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    if not os.path.exists(file_path):
+        if is_image_path(relative_path):
+            data = strip_metadata(data)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+    if is_image_path(relative_path):
+        enqueue_variants(relative_path)
+    return relative_path
+
+
+def enqueue_variants(relative_path):
+    """variant 生成をバックグラウンドワーカーに投入（投入済みなら既存のFutureを返す）"""
+    with _pending_lock:
+        future = _pending.get(relative_path)
+        if future is None:
+            future = _executor.submit(_generate_variants_task, relative_path)
+            _pending[relative_path] = future
+        return future
+
+
+def _generate_variants_task(relative_path):
+    try:
+        generate_variants(relative_path)
+    except Exception as e:
+        print(f"[ERROR] 画像variant生成エラー ({relative_path}): {e}")
+    finally:
+        with _pending_lock:
+            _pending.pop(relative_path, None)
+
+
+def generate_variants(relative_path):
+    """
+    元画像から全サイズ・全形式の variant を生成する
+
+    向きはEXIFのOrientationを反映してから保存し、EXIF（位置情報など）は書き出さない。
+    元画像より大きいサイズには拡大しない。
+    """
+    with Image.open(source_path(relative_path)) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        for size, max_pixels in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((max_pixels, max_pixels), Image.LANCZOS)
+
+            for fmt in IMAGE_FORMATS:
+                output_path = variant_path(relative_path, size, fmt)
+                if os.path.exists(output_path):
+                    continue
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+                # 書き込み途中のファイルを配信しないよう一時ファイル経由で置き換える
+                tmp_path = f'{output_path}.tmp'
+                if fmt == 'webp':
+                    resized.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+                else:
+                    flattened = resized
+                    if resized.mode == 'RGBA':
+                        flattened = Image.new('RGB', resized.size, (255, 255, 255))
+                        flattened.paste(resized, mask=resized.split()[3])
+                    flattened.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                os.replace(tmp_path, output_path)
+
+
+def delete_upload(relative_path):
+    """
+    元画像と生成済みの variant をすべて削除する
+
+    同じ内容のアップロードは同じファイルになるため、他の記録から参照されていないことを
+    呼び出し側で確認してから呼び出す。
+    """
+    path = source_path(relative_path)
+    if not os.path.exists(path):
+        return False
+
+    os.remove(path)
+    for size in IMAGE_VARIANTS:
+        for fmt in IMAGE_FORMATS:
+            output_path = variant_path(relative_path, size, fmt)
+            if os.path.exists(output_path):
+                os.remove(output_path)
+    return True
+
+
+def image_variant_url(relative_path, size='medium', fmt='auto'):
+    """
+    テンプレート用: variant のURLを返す（画像以外は元ファイルのURL）
+
+    fmt='auto' はブラウザのAcceptヘッダーでWebP/JPEGを切り替える。
+    身分証・契約書は非公開の配信URLを返す。
+    """
+    if not relative_path:
+        return ''
+    if is_private_path(relative_path):
+        return url_for('main_routes.private_media_variant', size=size, fmt=fmt, relative_path=relative_path)
+    if not is_image_path(relative_path):
+        return url_for('static', filename=relative_path)
+    return url_for('main_routes.media_variant', size=size, fmt=fmt, relative_path=relative_path)
+
+
+def _send_variant(size, fmt, relative_path, private):
+    """
+    variant を返す（未生成の場合は生成をキューに入れ、元ファイルをキャッシュさせずに返す）
+
+    生成完了をリクエストの中で待たない（ワーカーを塞がない）。
+    """
+    if size not in IMAGE_VARIANTS or (fmt != 'auto' and fmt not in IMAGE_FORMATS):
+        abort(404)
+
+    relative_path = relative_path.replace('\\', '/')
+    if not relative_path.startswith('uploads/') or '..' in relative_path.split('/'):
+        abort(404)
+    if is_private_path(relative_path) != private:
+        abort(404)
+    original_path = source_path(relative_path)
+    if not os.path.exists(original_path):
+        abort(404)
+
+    if not is_image_path(relative_path):
+        # PDFなど（非公開ファイルのみ。公開ファイルは static から配信される）
+        response = send_file(os.path.abspath(original_path), max_age=0)
+    else:
+        resolved_fmt = fmt
+        if fmt == 'auto':
+            resolved_fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg'
+
+        output_path = variant_path(relative_path, size, resolved_fmt)
+        if os.path.exists(output_path):
+            response = send_file(
+                os.path.abspath(output_path),
+                mimetype='image/webp' if resolved_fmt == 'webp' else 'image/jpeg',
+                max_age=0 if private else VARIANT_MAX_AGE
+            )
+            if not private:
+                response.cache_control.public = True
+                response.cache_control.immutable = True
+            if fmt == 'auto':
+                response.vary.add('Accept')
+        else:
+            enqueue_variants(relative_path)
+            response = send_file(os.path.abspath(original_path), max_age=0)
+            response.cache_control.no_cache = True
+
+    if private:
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.no_store = True
+        response.cache_control.max_age = None
+    return response
+
+
+def serve_variant(size, fmt, relative_path):
+    """variant 配信ビュー（ブログ画像などの公開ファイル）"""
+    return _send_variant(size, fmt, relative_path, private=False)
+
+
+def serve_private_variant(size, fmt, relative_path):
+    """
+    非公開ファイル（身分証・契約書）の配信ビュー
+
+    ログイン中のスタッフ（ドライバーを除く）が、自店舗のキャストのファイルだけを取得できる。
+    """
+    if 'store' not in session:
+        abort(401)
+    if session.get('user_role') == 'ドライバー':
+        abort(403)
+
+    # uploads/cast/<cast_id>/... のキャストが自店舗に所属しているか
+    parts = relative_path.replace('\\', '/').split('/')
+    if len(parts) < 4 or not parts[2].isdigit():
+        abort(404)
+
+    from database.connection import get_db, get_store_id
+    db = get_db()
+    try:
+        cursor = db.execute("SELECT store_id FROM casts WHERE cast_id = %s", (int(parts[2]),))
+        cast = cursor.fetchone()
+    finally:
+        db.close()
+    if not cast or cast['store_id'] != get_store_id(session['store']):
+        abort(404)
+
+    return _send_variant(size, fmt, relative_path, private=True)
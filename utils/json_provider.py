@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Flask の JSON 出力（jsonify・request.get_json・テンプレートの tojson）
+
+orjson がインストールされていれば orjson でシリアライズする（無ければ標準の json）。
+DBから取得した行をそのまま jsonify できるよう、PostgreSQL の型を次の形式で出力する。
+
+    datetime / date / time : ISO 8601 文字列（'2025-01-31T21:30:00' / '2025-01-31' / '21:30:00'）
+    Decimal                : 数値（float）
+    timedelta              : 秒数（float）
+
+Flask 標準の出力（datetime / date は 'Fri, 31 Jan 2025 21:30:00 GMT'、Decimal は文字列）とは
+形式が異なるため、各ルートでの isoformat() などの変換は不要。
+"""
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(o):
+    """標準で扱えない型の変換（orjson / json 共通）"""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, timedelta):
+        return o.total_seconds()
+    # UUID・dataclass・Markup などは Flask 標準の変換
+    return DefaultJSONProvider.default(o)
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """orjson（無ければ標準の json）で DB の型をそのまま出力する JSON プロバイダ"""
+
+    default = staticmethod(default)
+    ensure_ascii = False
+
+    def _orjson_option(self, indent=None):
+        # int のキー（{cast_id: 件数} など）は標準の json と同じく文字列にする
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    # 引数（セッションの object_hook・separators など）が渡された場合は orjson では
+    # 再現できないため標準の json を使う
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=default, option=self._orjson_option()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # デバッグ時は標準と同じく整形して出力
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=default, option=self._orjson_option(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """アプリの JSON 出力を AppJSONProvider に切り替え"""
+    app.json = AppJSONProvider(app)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+LINE Webhook イベントのバックグラウンド処理
+
+Webhook（routes/line_webhook.py）は署名を検証したイベントを enqueue_events でキューに入れて
+すぐに 200 を返し、イベントの処理（返信など）はワーカースレッドで行う。
+一度に大量のイベントが届いても、LINE の配信タイムアウト内に応答できる。
+
+同じイベントが再送された場合は line_webhook_events（webhookEventId）で判定し、1回だけ処理する。
+
+環境変数:
+    LINE_WEBHOOK_WORKERS: ワーカースレッド数（デフォルト 2）
+    LINE_WEBHOOK_QUEUE_SIZE: キューに入れられるイベント数（デフォルト 1000）
+"""
+import logging
+import os
+import queue
+import threading
+
+from database.connection import get_db
+from database.line_webhook_db import claim_webhook_event, finish_webhook_event
+from utils.http_clients import get_cached_credentials, line_post
+
+logger = logging.getLogger(__name__)
+
+WORKER_COUNT = int(os.getenv('LINE_WEBHOOK_WORKERS', '2'))
+QUEUE_SIZE = int(os.getenv('LINE_WEBHOOK_QUEUE_SIZE', '1000'))
+
+# 「ID確認」コマンド
+ID_COMMANDS = ('ID確認', 'id確認', 'ID', 'id', 'ユーザーID', 'ユーザーid')
+
+_event_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def get_line_webhook_credentials():
+    """
+    LINE のアクセストークンとチャネルシークレット（CREDENTIALS_CACHE_SECONDS 秒キャッシュ）
+
+    Returns:
+        tuple: (access_token, channel_secret)
+    """
+    def load():
+        db = get_db()
+        try:
+            cursor = db.cursor()
+            cursor.execute("""
+                SELECT setting_key, setting_value
+                FROM store_settings
+                WHERE setting_key IN ('line_channel_access_token', 'line_channel_secret')
+            """)
+            settings = {row['setting_key']: row['setting_value'] for row in cursor.fetchall()}
+            cursor.close()
+        finally:
+            db.close()
+        return (
+            settings.get('line_channel_access_token', ''),
+            settings.get('line_channel_secret', '')
+        )
+
+    return get_cached_credentials('line_webhook', None, load)
+
+
+def _start_workers():
+    with _workers_lock:
+        if _workers:
+            return
+        for index in range(WORKER_COUNT):
+            worker = threading.Thread(target=_worker_loop, name=f'line-webhook-worker-{index}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def enqueue_events(events):
+    """
+    Webhook のイベントをキューに入れる（ワーカーは最初の呼び出しで起動）
+
+    Returns:
+        int: キューが満杯で入れられなかったイベント数
+    """
+    _start_workers()
+    dropped = 0
+    for event in events:
+        try:
+            _event_queue.put_nowait(event)
+        except queue.Full:
+            dropped += 1
+    if dropped:
+        logger.error("LINE Webhook キューが満杯のためイベントを破棄しました", extra={'dropped': dropped})
+    return dropped
+
+
+def get_queue_size():
+    """処理待ちのイベント数"""
+    return _event_queue.qsize()
+
+
+def _worker_loop():
+    while True:
+        event = _event_queue.get()
+        try:
+            process_event(event)
+        except Exception:
+            logger.exception("LINE Webhook イベント処理エラー")
+        finally:
+            _event_queue.task_done()
+
+
+def process_event(event):
+    """
+    イベントを1件処理（同じ webhookEventId のイベントは1回だけ）
+
+    Returns:
+        bool: 処理した場合 True（処理済みのイベントなら False）
+    """
+    webhook_event_id = event.get('webhookEventId')
+    event_type = event.get('type')
+
+    db = get_db()
+    try:
+        if webhook_event_id and not claim_webhook_event(db, webhook_event_id, event_type):
+            logger.info("処理済みのLINE Webhook イベントをスキップ", extra={'webhook_event_id': webhook_event_id})
+            return False
+
+        try:
+            handle_event(event)
+        except Exception as e:
+            if webhook_event_id:
+                finish_webhook_event(db, webhook_event_id, 'failed', str(e))
+            raise
+
+        if webhook_event_id:
+            finish_webhook_event(db, webhook_event_id, 'processed')
+        return True
+    finally:
+        db.close()
+
+
+def handle_event(event):
+    """イベント種別ごとの処理（現在はテキストメッセージへの返信のみ）"""
+    message = event.get('message') or {}
+    if event.get('type') != 'message' or message.get('type') != 'text':
+        return
+
+    user_id = (event.get('source') or {}).get('userId')
+    text = message.get('text', '').strip()
+
+    logger.info("LINEメッセージ受信: '%s'", text, extra={'line_user_id': user_id})
+
+    if text in ID_COMMANDS:
+        reply_message = f"あなたのLINE User IDは:\n\n{user_id}\n\nこのIDをコピーして、スタッフ編集画面の「LINE User ID」欄に貼り付けてください。"
+    else:
+        # その他のメッセージには簡単な返信
+        reply_message = "「ID確認」と送信すると、あなたのLINE User IDを確認できます。"
+
+    reply_text(event.get('replyToken'), reply_message)
+
+
+def reply_text(reply_token, text):
+    """reply API でテキストを返信"""
+    access_token, _ = get_line_webhook_credentials()
+    if not access_token or not reply_token:
+        logger.error("LINE返信に必要なアクセストークンまたは replyToken がありません")
+        return
+
+    response = line_post(None, access_token, '/v2/bot/message/reply', {
+        'replyToken': reply_token,
+        'messages': [{'type': 'text', 'text': text}]
+    })
+    if response.status_code != 200:
+        raise RuntimeError(f"LINE API エラー: {response.status_code} - {response.text}")
@@ -3,104 +3,257 @@
 LINE Messaging API通知処理
 スタッフへの退室時刻リマインダー通知
 店舗へのオートコール結果通知
+
+スケジューラーからの通知は LineNotificationBatch でまとめて送る
+（同じ宛先へのメッセージは1回の push、同じメッセージの複数宛先は multicast）。
 """
+import logging
 import os
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 from database.connection import get_db
+from utils.http_clients import get_cached_credentials, line_post
 
 load_dotenv()
 
-def send_line_message(line_user_id, message_text):
+logger = logging.getLogger(__name__)
+
+# push / multicast 1回で送れるメッセージ数
+LINE_MAX_MESSAGES_PER_PUSH = 5
+
+# multicast 1回で送れる宛先数
+LINE_MAX_MULTICAST_RECIPIENTS = 500
+
+
+def get_line_access_token(store_id=None):
+    """
+    Channel Access Token を取得（CREDENTIALS_CACHE_SECONDS 秒キャッシュ）
+
+    Args:
+        store_id (int, optional): 店舗ID（省略時は店舗を限定しない）
+
+    Returns:
+        str or None: アクセストークン
+    """
+    def load():
+        db = get_db()
+        try:
+            cursor = db.cursor()
+            cursor.execute("""
+                SELECT setting_value 
+                FROM store_settings 
+                WHERE setting_key = 'line_channel_access_token'
+                  AND (%(store_id)s::int IS NULL OR store_id = %(store_id)s)
+                LIMIT 1
+            """, {'store_id': store_id})
+            result = cursor.fetchone()
+            cursor.close()
+            return result['setting_value'] if result and result['setting_value'] else None
+        finally:
+            db.close()
+
+    return get_cached_credentials('line', store_id, load)
+
+
+def push_line_messages(line_user_id, messages, store_id=None):
+    """
+    LINE Messaging API の push でメッセージを送信（共通HTTPクライアントを使用）
+
+    Args:
+        line_user_id (str): LINE User ID
+        messages (list): メッセージオブジェクトのリスト
+        store_id (int, optional): 店舗ID
+
+    Returns:
+        dict: 送信結果 {'success': bool, 'error': str}
+    """
+    access_token = get_line_access_token(store_id)
+    if not access_token:
+        return {
+            'success': False,
+            'error': 'LINE Channel Access Tokenが設定されていません'
+        }
+
+    response = line_post(store_id, access_token, '/v2/bot/message/push', {
+        'to': line_user_id,
+        'messages': messages
+    })
+
+    if response.status_code == 200:
+        return {
+            'success': True,
+            'error': None
+        }
+
+    error_msg = f"LINE API エラー: {response.status_code} - {response.text}"
+    logger.error(error_msg)
+    return {
+        'success': False,
+        'error': error_msg
+    }
+
+
+def multicast_line_messages(line_user_ids, messages, store_id=None):
+    """
+    LINE Messaging API の multicast で同じメッセージを複数の宛先に送信
+
+    Args:
+        line_user_ids (list): LINE User ID（LINE_MAX_MULTICAST_RECIPIENTS 件まで）
+        messages (list): メッセージオブジェクトのリスト（LINE_MAX_MESSAGES_PER_PUSH 件まで）
+        store_id (int, optional): 店舗ID
+
+    Returns:
+        dict: 送信結果 {'success': bool, 'error': str}
+    """
+    access_token = get_line_access_token(store_id)
+    if not access_token:
+        return {
+            'success': False,
+            'error': 'LINE Channel Access Tokenが設定されていません'
+        }
+
+    response = line_post(store_id, access_token, '/v2/bot/message/multicast', {
+        'to': list(line_user_ids),
+        'messages': messages
+    })
+
+    if response.status_code == 200:
+        return {
+            'success': True,
+            'error': None
+        }
+
+    error_msg = f"LINE API エラー: {response.status_code} - {response.text}"
+    logger.error(error_msg)
+    return {
+        'success': False,
+        'error': error_msg
+    }
+
+
+def send_line_message(line_user_id, message_text, store_id=None):
     """
     LINE Messaging APIでメッセージを送信
     
     Args:
         line_user_id (str): LINE User ID
         message_text (str): 送信メッセージ
+        store_id (int, optional): 店舗ID
     
     Returns:
         dict: 送信結果 {'success': bool, 'error': str}
     """
     try:
-        # Channel Access Tokenをデータベースから取得
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT setting_value 
-            FROM store_settings 
-            WHERE setting_key = 'line_channel_access_token'
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
-        cursor.close()
-        
-        if not result or not result['setting_value']:
-            return {
-                'success': False,
-                'error': 'LINE Channel Access Tokenが設定されていません'
-            }
-        
-        access_token = result['setting_value']
-        
-        # LINE Messaging API エンドポイント
-        url = 'https://api.line.me/v2/bot/message/push'
-        
-        # リクエストヘッダー
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {access_token}'
-        }
-        
-        # リクエストボディ
-        payload = {
-            'to': line_user_id,
-            'messages': [
-                {
-                    'type': 'text',
-                    'text': message_text
-                }
-            ]
-        }
-        
-        # API呼び出し
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            print(f"✅ LINE通知送信成功: {line_user_id}")
-            return {
-                'success': True,
-                'error': None
-            }
-        else:
-            error_msg = f"LINE API エラー: {response.status_code} - {response.text}"
-            print(f"❌ {error_msg}")
-            return {
-                'success': False,
-                'error': error_msg
+        result = push_line_messages(line_user_id, [
+            {
+                'type': 'text',
+                'text': message_text
             }
+        ], store_id)
+        if result['success']:
+            logger.info("LINE通知送信成功: %s", line_user_id)
+        return result
         
     except Exception as e:
         error_msg = f"LINE通知エラー: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error(error_msg)
         return {
             'success': False,
             'error': error_msg
         }
 
 
-def send_pickup_reminder_to_staff(staff_name, cast_name, exit_time_str, hotel_name, line_user_id=None):
+DEFAULT_PICKUP_REMINDER_TEMPLATE = """【ピックアップリマインダー】
+
+キャスト: {name}さん
+退室時刻: {time}
+ホテル: {hotel}
+
+まもなく退室時刻です。
+ピックアップの準備をお願いします。"""
+
+DEFAULT_AUTOCALL_RESULT_TEMPLATE = """【オートコール{result}】
+{name}さんへの発信{result_text}
+退室予定: {time}
+発信時刻: {call_time}"""
+
+
+def get_line_notification_settings(store_id=None):
+    """
+    通知用の店舗設定（テンプレート・店舗用LINE ID）を取得
+
+    Returns:
+        dict: setting_key → setting_value
+    """
+    db = get_db()
+    try:
+        cursor = db.cursor()
+        cursor.execute("""
+            SELECT setting_key, setting_value 
+            FROM store_settings 
+            WHERE setting_key IN ('line_message_template', 'store_line_id', 'store_line_message_template')
+              AND (%(store_id)s::int IS NULL OR store_id = %(store_id)s)
+        """, {'store_id': store_id})
+        settings = {row['setting_key']: row['setting_value'] for row in cursor.fetchall()}
+        cursor.close()
+        return settings
+    finally:
+        db.close()
+
+
+def build_pickup_reminder_message(cast_name, exit_time_str, hotel_name, template=None):
+    """スタッフ向けピックアップリマインダーの本文（テンプレートがなければデフォルト）"""
+    message = (template or DEFAULT_PICKUP_REMINDER_TEMPLATE).replace('{name}', cast_name)
+    message = message.replace('{time}', exit_time_str)
+    return message.replace('{hotel}', hotel_name or '未設定')
+
+
+def build_autocall_result_message(cast_name, exit_time_str, call_success, error_message=None, template=None):
+    """店舗向けオートコール結果通知の本文（テンプレートがなければデフォルト）"""
+    current_time = datetime.now().strftime('%H:%M')
+
+    if call_success:
+        result = "完了"
+        result_text = "完了"
+        result_emoji = "✅"
+    else:
+        result = "失敗"
+        result_text = "失敗"
+        result_emoji = "❌"
+
+    # 変数を置き換え
+    message = (template or DEFAULT_AUTOCALL_RESULT_TEMPLATE).replace('{result}', result)
+    message = message.replace('{result_text}', result_text)
+    message = message.replace('{name}', cast_name)
+    message = message.replace('{time}', exit_time_str)
+    message = message.replace('{call_time}', current_time)
+
+    # エラーメッセージがあれば追加
+    if error_message:
+        message += f"\n\nエラー詳細: {error_message}"
+
+    # 結果の絵文字を先頭に追加
+    return f"{result_emoji} {message}"
+
+
+def split_line_ids(value):
+    """店舗用LINE ID（カンマ区切りで複数指定可）をリストにする"""
+    return [line_id.strip() for line_id in (value or '').split(',') if line_id.strip()]
+
+
+def send_pickup_reminder_to_staff(staff_name, cast_name, exit_time_str, hotel_name, line_user_id=None, store_id=None):
     """
     スタッフにピックアップリマインダーを送信（テンプレート使用）
 
+    スケジューラーからまとめて送る場合は LineNotificationBatch.add_pickup_reminder を使う。
+
     Args:
         staff_name (str): スタッフ名
         cast_name (str): キャスト名
         exit_time_str (str): 退室時刻
         hotel_name (str): ホテル名
         line_user_id (str, optional): LINE User ID (指定されない場合はDBから取得)
+        store_id (int, optional): 店舗ID（テンプレート・アクセストークンの取得に使用）
 
     Returns:
         dict: 送信結果
@@ -118,59 +271,36 @@ def send_pickup_reminder_to_staff(staff_name, cast_name, exit_time_str, hotel_na
             """, (staff_name,))
 
             result = cursor.fetchone()
+            cursor.close()
+            db.close()
 
             if not result or not result['line_id']:
-                cursor.close()
                 return {
                     'success': False,
                     'error': f'スタッフ {staff_name} のLINE IDが登録されていません'
                 }
 
             line_user_id = result['line_id']
-            cursor.close()
         
         # 🔧 メッセージテンプレートを取得
-        cursor.execute("""
-            SELECT setting_value 
-            FROM store_settings 
-            WHERE setting_key = 'line_message_template'
-            LIMIT 1
-        """)
-        
-        template_result = cursor.fetchone()
-        cursor.close()
-        
-        # テンプレートがあれば使用、なければデフォルト
-        if template_result and template_result['setting_value']:
-            message_template = template_result['setting_value']
-        else:
-            message_template = """【ピックアップリマインダー】
-
-キャスト: {name}さん
-退室時刻: {time}
-ホテル: {hotel}
-
-まもなく退室時刻です。
-ピックアップの準備をお願いします。"""
-        
-        # 🔧 変数を置き換え
-        message = message_template.replace('{name}', cast_name)
-        message = message.replace('{time}', exit_time_str)
-        message = message.replace('{hotel}', hotel_name or '未設定')
+        settings = get_line_notification_settings(store_id)
+        message = build_pickup_reminder_message(
+            cast_name, exit_time_str, hotel_name, settings.get('line_message_template')
+        )
         
         # LINE送信
-        return send_line_message(line_user_id, message)
+        return send_line_message(line_user_id, message, store_id)
         
     except Exception as e:
         error_msg = f"スタッフ通知エラー: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error(error_msg)
         return {
             'success': False,
             'error': error_msg
         }
 
 
-def send_autocall_result_to_store(cast_name, exit_time_str, call_success, error_message=None):
+def send_autocall_result_to_store(cast_name, exit_time_str, call_success, error_message=None, store_id=None):
     """
     店舗にオートコール実行結果を通知
     
@@ -179,148 +309,209 @@ def send_autocall_result_to_store(cast_name, exit_time_str, call_success, error_
         exit_time_str (str): 退室時刻
         call_success (bool): オートコール成功/失敗
         error_message (str, optional): エラーメッセージ
+        store_id (int, optional): 店舗ID
     
     Returns:
         dict: 送信結果
     """
     try:
         # 店舗用LINE IDとテンプレートを取得
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT setting_key, setting_value 
-            FROM store_settings 
-            WHERE setting_key IN ('store_line_id', 'store_line_message_template')
-        """)
-        
-        settings = {row['setting_key']: row['setting_value'] for row in cursor.fetchall()}
-        cursor.close()
+        settings = get_line_notification_settings(store_id)
         
         # 店舗LINE IDが設定されていない場合はスキップ
-        store_line_id = settings.get('store_line_id')
-        if not store_line_id:
-            print("📝 店舗用LINE IDが未設定のため、通知をスキップしました")
+        store_line_ids = split_line_ids(settings.get('store_line_id'))
+        if not store_line_ids:
+            logger.info("店舗用LINE IDが未設定のため、通知をスキップしました")
             return {
                 'success': True,  # エラーではないのでTrue
                 'error': None,
                 'skipped': True
             }
         
-        # テンプレート取得
-        message_template = settings.get('store_line_message_template')
-        if not message_template:
-            # デフォルトテンプレート
-            message_template = """【オートコール{result}】
-{name}さんへの発信{result_text}
-退室予定: {time}
-発信時刻: {call_time}"""
-        
-        # 変数を準備
-        current_time = datetime.now().strftime('%H:%M')
-        
-        if call_success:
-            result = "完了"
-            result_text = "完了"
-            result_emoji = "✅"
-        else:
-            result = "失敗"
-            result_text = "失敗"
-            result_emoji = "❌"
-        
-        # 変数を置き換え
-        message = message_template.replace('{result}', result)
-        message = message.replace('{result_text}', result_text)
-        message = message.replace('{name}', cast_name)
-        message = message.replace('{time}', exit_time_str)
-        message = message.replace('{call_time}', current_time)
+        message = build_autocall_result_message(
+            cast_name, exit_time_str, call_success, error_message,
+            settings.get('store_line_message_template')
+        )
         
-        # エラーメッセージがあれば追加
-        if error_message:
-            message += f"\n\nエラー詳細: {error_message}"
-        
-        # 結果の絵文字を先頭に追加
-        message = f"{result_emoji} {message}"
-        
-        # LINE送信
-        return send_line_message(store_line_id, message)
+        # LINE送信（店舗用LINE IDが複数なら multicast）
+        batch = LineNotificationBatch()
+        entry_ids = [batch.add(line_id, message, store_id) for line_id in store_line_ids]
+        results = batch.flush()
+        errors = [results[entry_id]['error'] for entry_id in entry_ids if not results[entry_id]['success']]
+        return {
+            'success': not errors,
+            'error': errors[0] if errors else None
+        }
         
     except Exception as e:
         error_msg = f"店舗通知エラー: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+
+class LineNotificationBatch:
+    """
+    スケジューラーの1回の実行分のLINE通知をまとめて送る
+
+    add したメッセージは flush で次のようにまとめて送信する。
+        - 同じ宛先へのメッセージは1回の push にまとめる（1回 LINE_MAX_MESSAGES_PER_PUSH 件まで）
+        - 同じメッセージを受け取る宛先が複数ある場合は multicast で送る
+          （1回 LINE_MAX_MULTICAST_RECIPIENTS 人まで）
+        - multicast が失敗した場合は宛先ごとの push で送り直し、宛先ごとに成功/失敗を返す
+    """
+
+    def __init__(self):
+        # (store_id, line_user_id, text)
+        self._entries = []
+        # store_id → 通知用の店舗設定（1回の実行で1回だけ読む）
+        self._settings = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def settings(self, store_id):
+        if store_id not in self._settings:
+            try:
+                self._settings[store_id] = get_line_notification_settings(store_id)
+            except Exception as e:
+                # 設定が読めない場合はデフォルトのテンプレートで送る（店舗への通知は送らない）
+                logger.error("LINE通知設定の取得エラー: %s", e)
+                self._settings[store_id] = {}
+        return self._settings[store_id]
+
+    def add(self, line_user_id, text, store_id=None):
+        """
+        送信するメッセージを追加
+
+        Returns:
+            int: flush の結果を参照するためのID
+        """
+        self._entries.append((store_id, line_user_id, text))
+        return len(self._entries) - 1
+
+    def add_pickup_reminder(self, line_user_id, cast_name, exit_time_str, hotel_name, store_id=None):
+        """スタッフ向けピックアップリマインダーを追加"""
+        message = build_pickup_reminder_message(
+            cast_name, exit_time_str, hotel_name, self.settings(store_id).get('line_message_template')
+        )
+        return self.add(line_user_id, message, store_id)
+
+    def add_autocall_result(self, cast_name, exit_time_str, call_success, error_message=None, store_id=None):
+        """
+        店舗向けオートコール結果通知を追加（店舗用LINE IDが未設定なら追加しない）
+
+        Returns:
+            list: 追加したメッセージのID
+        """
+        settings = self.settings(store_id)
+        message = build_autocall_result_message(
+            cast_name, exit_time_str, call_success, error_message,
+            settings.get('store_line_message_template')
+        )
+        return [self.add(line_id, message, store_id) for line_id in split_line_ids(settings.get('store_line_id'))]
+
+    def flush(self):
+        """
+        追加したメッセージをまとめて送信
+
+        Returns:
+            dict: add の戻り値 → 送信結果 {'success': bool, 'error': str}
+        """
+        results = {}
+
+        # store_id → 宛先 → [(メッセージID, 本文)]
+        by_store = {}
+        for entry_id, (store_id, line_user_id, text) in enumerate(self._entries):
+            by_store.setdefault(store_id, {}).setdefault(line_user_id, []).append((entry_id, text))
+        self._entries = []
+
+        for store_id, recipients in by_store.items():
+            # 同じメッセージ（同じ順序）を受け取る宛先ごとにまとめる
+            groups = {}
+            for line_user_id, items in recipients.items():
+                texts = tuple(text for _, text in items)
+                groups.setdefault(texts, []).append(line_user_id)
+
+            for texts, line_user_ids in groups.items():
+                if len(line_user_ids) > 1:
+                    self._send_multicast(store_id, line_user_ids, texts, recipients, results)
+                else:
+                    self._send_push(store_id, line_user_ids[0], recipients[line_user_ids[0]], results)
+
+        return results
+
+    def _send_push(self, store_id, line_user_id, items, results):
+        for start in range(0, len(items), LINE_MAX_MESSAGES_PER_PUSH):
+            chunk = items[start:start + LINE_MAX_MESSAGES_PER_PUSH]
+            result = _safe_send(lambda: push_line_messages(
+                line_user_id, [{'type': 'text', 'text': text} for _, text in chunk], store_id
+            ))
+            for entry_id, _ in chunk:
+                results[entry_id] = result
+
+    def _send_multicast(self, store_id, line_user_ids, texts, recipients, results):
+        for start in range(0, len(line_user_ids), LINE_MAX_MULTICAST_RECIPIENTS):
+            chunk_ids = line_user_ids[start:start + LINE_MAX_MULTICAST_RECIPIENTS]
+            failed = False
+            for message_start in range(0, len(texts), LINE_MAX_MESSAGES_PER_PUSH):
+                chunk_texts = texts[message_start:message_start + LINE_MAX_MESSAGES_PER_PUSH]
+                result = _safe_send(lambda: multicast_line_messages(
+                    chunk_ids, [{'type': 'text', 'text': text} for text in chunk_texts], store_id
+                ))
+                if not result['success']:
+                    failed = True
+                    break
+                for line_user_id in chunk_ids:
+                    for entry_id, _ in recipients[line_user_id][message_start:message_start + LINE_MAX_MESSAGES_PER_PUSH]:
+                        results[entry_id] = result
+
+            if failed:
+                # 宛先ごとの push で送り直す（無効な宛先があっても他の宛先には届ける）
+                logger.warning(
+                    "LINE multicast 失敗のため宛先ごとに送信します: %s", result['error'],
+                    extra={'recipients': len(chunk_ids)}
+                )
+                for line_user_id in chunk_ids:
+                    pending = [item for item in recipients[line_user_id] if item[0] not in results]
+                    self._send_push(store_id, line_user_id, pending, results)
+
+
+def _safe_send(send):
+    try:
+        return send()
+    except Exception as e:
+        error_msg = f"LINE通知エラー: {str(e)}"
+        logger.error(error_msg)
         return {
             'success': False,
             'error': error_msg
         }
 
 
-def send_line_flex_message(line_user_id, flex_message):
+def send_line_flex_message(line_user_id, flex_message, store_id=None):
     """
     LINE Flex Messageを送信（リッチなメッセージ）
     
     Args:
         line_user_id (str): LINE User ID
         flex_message (dict): Flex MessageのJSON
+        store_id (int, optional): 店舗ID
     
     Returns:
         dict: 送信結果
     """
     try:
-        # Channel Access Tokenをデータベースから取得
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT setting_value 
-            FROM store_settings 
-            WHERE setting_key = 'line_channel_access_token'
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
-        cursor.close()
-        
-        if not result or not result['setting_value']:
-            return {
-                'success': False,
-                'error': 'LINE Channel Access Tokenが設定されていません'
-            }
-        
-        access_token = result['setting_value']
-        
-        # LINE Messaging API エンドポイント
-        url = 'https://api.line.me/v2/bot/message/push'
-        
-        # リクエストヘッダー
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {access_token}'
-        }
-        
-        # リクエストボディ
-        payload = {
-            'to': line_user_id,
-            'messages': [flex_message]
-        }
-        
-        # API呼び出し
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            print(f"✅ LINE Flex Message送信成功: {line_user_id}")
-            return {
-                'success': True,
-                'error': None
-            }
-        else:
-            error_msg = f"LINE API エラー: {response.status_code} - {response.text}"
-            print(f"❌ {error_msg}")
-            return {
-                'success': False,
-                'error': error_msg
-            }
+        result = push_line_messages(line_user_id, [flex_message], store_id)
+        if result['success']:
+            logger.info("LINE Flex Message送信成功: %s", line_user_id)
+        return result
         
     except Exception as e:
         error_msg = f"LINE Flex Message送信エラー: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error(error_msg)
         return {
             'success': False,
             'error': error_msg
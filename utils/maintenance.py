@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+メンテナンスジョブ（古いデータの削除・集計など）の実行基盤
+
+ジョブは register_maintenance_job で登録し、scheduler.py の BackgroundScheduler に
+schedule_maintenance_jobs で追加する。ユーザーのリクエスト中にはメンテナンス処理を行わない。
+
+複数のワーカープロセスが同じスケジュールで起動しても、ジョブごとの
+PostgreSQL アドバイザリロック（pg_try_advisory_lock）を取れた1プロセスだけが実行する。
+ロックを取った時点で同じ回（スケジュール間隔の半分以内）に成功した実行があれば、
+他プロセスが実行し終えた後とみなしてスキップする。
+実行結果は maintenance_runs テーブルに記録し（create_maintenance_tables.py で作成）、
+プロセス内の実行回数・所要時間は get_maintenance_metrics で参照できる。
+"""
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from database.connection import get_connection
+
+# pg_try_advisory_lock の名前空間（ジョブIDのハッシュと組み合わせる）
+MAINTENANCE_LOCK_NAMESPACE = 27002
+
+# ジョブID → {'name', 'func', 'trigger', 'trigger_args'}
+MAINTENANCE_JOBS = {}
+
+# interval トリガーで間隔として扱う引数
+INTERVAL_TRIGGER_ARGS = ('weeks', 'days', 'hours', 'minutes', 'seconds')
+
+# ジョブID → プロセス内の実行統計
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def register_maintenance_job(job_id, name, func, trigger='cron', **trigger_args):
+    """
+    メンテナンスジョブを登録
+
+    Args:
+        job_id: ジョブID（ロックと実行履歴のキー）
+        name: 表示名
+        func: 実行する関数（戻り値は実行履歴に JSON で記録する）
+        trigger: APScheduler のトリガー種別（'cron' / 'interval'）
+        **trigger_args: トリガーの引数（hour=6, minute=10 など）
+    """
+    MAINTENANCE_JOBS[job_id] = {
+        'name': name,
+        'func': func,
+        'trigger': trigger,
+        'trigger_args': trigger_args
+    }
+
+
+def schedule_maintenance_jobs(scheduler):
+    """登録済みのメンテナンスジョブをスケジューラーに追加"""
+    for job_id, job in MAINTENANCE_JOBS.items():
+        scheduler.add_job(
+            func=run_maintenance_job,
+            args=(job_id,),
+            trigger=job['trigger'],
+            id=f'maintenance_{job_id}',
+            name=job['name'],
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            **job['trigger_args']
+        )
+
+
+def schedule_period(job):
+    """
+    ジョブの実行間隔（同じ回の実行かどうかの判定用）
+
+    interval トリガーは指定した間隔、毎日の cron（hour・minute 指定）は1日、
+    毎時の cron（minute のみ指定）は1時間。それ以外は None（判定しない）。
+    """
+    trigger_args = job['trigger_args']
+    if job['trigger'] == 'interval':
+        period = timedelta(**{key: value for key, value in trigger_args.items() if key in INTERVAL_TRIGGER_ARGS})
+        return period or None
+    if job['trigger'] == 'cron':
+        if set(trigger_args) == {'hour', 'minute'}:
+            return timedelta(days=1)
+        if set(trigger_args) == {'minute'}:
+            return timedelta(hours=1)
+    return None
+
+
+def _has_succeeded_in_current_slot(cursor, job_id, job):
+    """同じ回（スケジュール間隔の半分以内）に成功した実行があるか"""
+    period = schedule_period(job)
+    if period is None:
+        return False
+    cursor.execute("""
+        SELECT 1
+        FROM maintenance_runs
+        WHERE job_id = %s
+        AND status = 'succeeded'
+        AND started_at >= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+        LIMIT 1
+    """, (job_id, period.total_seconds() / 2))
+    return cursor.fetchone() is not None
+
+
+def _record_metrics(job_id, status, duration_ms=None):
+    with _metrics_lock:
+        metrics = _metrics.setdefault(job_id, {
+            'runs': 0,
+            'failures': 0,
+            'skipped': 0,
+            'total_duration_ms': 0,
+            'max_duration_ms': 0,
+            'last_duration_ms': None,
+            'last_status': None,
+            'last_run_at': None
+        })
+        if status == 'skipped':
+            metrics['skipped'] += 1
+        else:
+            metrics['runs'] += 1
+            if status == 'failed':
+                metrics['failures'] += 1
+            metrics['total_duration_ms'] += duration_ms
+            metrics['max_duration_ms'] = max(metrics['max_duration_ms'], duration_ms)
+            metrics['last_duration_ms'] = duration_ms
+        metrics['last_status'] = status
+        metrics['last_run_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def run_maintenance_job(job_id):
+    """
+    メンテナンスジョブを実行（他プロセスで実行中・同じ回を実行済みの場合はスキップ）
+
+    Returns:
+        str: 'succeeded' / 'failed' / 'skipped'
+    """
+    job = MAINTENANCE_JOBS[job_id]
+
+    # ロックはジョブの実行中保持するため、専用の接続で取る
+    lock_conn = get_connection()
+    lock_conn.autocommit = True
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_try_advisory_lock(%s, hashtext(%s))",
+                (MAINTENANCE_LOCK_NAMESPACE, job_id)
+            )
+            if not cursor.fetchone()[0]:
+                print(f"メンテナンスジョブ {job_id}: 他のプロセスで実行中のためスキップ")
+                _record_metrics(job_id, 'skipped')
+                return 'skipped'
+
+            if _has_succeeded_in_current_slot(cursor, job_id, job):
+                cursor.execute(
+                    "SELECT pg_advisory_unlock(%s, hashtext(%s))",
+                    (MAINTENANCE_LOCK_NAMESPACE, job_id)
+                )
+                print(f"メンテナンスジョブ {job_id}: 他のプロセスで実行済みのためスキップ")
+                _record_metrics(job_id, 'skipped')
+                return 'skipped'
+
+            cursor.execute("""
+                INSERT INTO maintenance_runs (job_id, started_at, status, host, pid)
+                VALUES (%s, CURRENT_TIMESTAMP, 'running', %s, %s)
+                RETURNING run_id
+            """, (job_id, socket.gethostname(), os.getpid()))
+            run_id = cursor.fetchone()[0]
+
+            started = time.perf_counter()
+            status = 'succeeded'
+            result = None
+            error = None
+            try:
+                result = job['func']()
+            except Exception as e:
+                status = 'failed'
+                error = str(e)
+                print(f"❌ メンテナンスジョブ {job_id} エラー: {e}")
+            duration_ms = int((time.perf_counter() - started) * 1000)
+
+            cursor.execute("""
+                UPDATE maintenance_runs
+                SET finished_at = CURRENT_TIMESTAMP,
+                    duration_ms = %s,
+                    status = %s,
+                    result = %s,
+                    error = %s
+                WHERE run_id = %s
+            """, (duration_ms, status, json.dumps(result, ensure_ascii=False, default=str), error, run_id))
+
+            cursor.execute(
+                "SELECT pg_advisory_unlock(%s, hashtext(%s))",
+                (MAINTENANCE_LOCK_NAMESPACE, job_id)
+            )
+
+        _record_metrics(job_id, status, duration_ms)
+        return status
+    finally:
+        lock_conn.close()
+
+
+def get_maintenance_metrics():
+    """プロセス内のジョブ実行統計"""
+    with _metrics_lock:
+        metrics = {job_id: dict(values) for job_id, values in _metrics.items()}
+
+    for job_id, job in MAINTENANCE_JOBS.items():
+        values = metrics.setdefault(job_id, {'runs': 0, 'failures': 0, 'skipped': 0})
+        values['name'] = job['name']
+        runs = values.get('runs', 0)
+        values['avg_duration_ms'] = int(values['total_duration_ms'] / runs) if runs else None
+    return metrics
+
+
+def get_maintenance_history(limit=50, job_id=None):
+    """maintenance_runs の実行履歴（新しい順）"""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT run_id, job_id, started_at, finished_at, duration_ms, status, result, error, host, pid
+                FROM maintenance_runs
+                WHERE %(job_id)s::text IS NULL OR job_id = %(job_id)s
+                ORDER BY run_id DESC
+                LIMIT %(limit)s
+            """, {'job_id': job_id, 'limit': limit})
+            columns = [desc[0] for desc in cursor.description]
+            history = []
+            for row in cursor.fetchall():
+                run = dict(zip(columns, row))
+                for key in ('started_at', 'finished_at'):
+                    if run[key]:
+                        run[key] = run[key].strftime('%Y-%m-%d %H:%M:%S')
+                history.append(run)
+            return history
+    finally:
+        conn.close()
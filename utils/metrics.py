@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+プロセス内のメトリクス（Prometheus テキスト形式で /metrics に出力）
+
+記録する項目:
+    http_request_duration_seconds    : ルート（Blueprint・エンドポイント）ごとのレスポンス時間
+    db_queries_per_request           : 1リクエストあたりのSQL実行回数
+    db_time_per_request_seconds      : 1リクエストあたりのSQL実行時間
+    db_query_duration_seconds        : SQL 1回ごとの実行時間
+    db_connections_opened_total      : DB接続を開いた回数
+    scheduler_tick_duration_seconds  : 通知チェック1回の所要時間
+    notification_lag_seconds         : 通知の遅れ（実際の送信時刻 - 予定時刻）
+
+値はロックで保護した辞書に加算するだけなので、本番で常時有効にしても負荷は小さい。
+"""
+import contextvars
+import threading
+import time
+
+import psycopg
+
+# 1リクエスト中のSQL実行回数・時間（[回数, 秒]）。リクエスト外では None
+_request_db_stats = contextvars.ContextVar('request_db_stats', default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+NOTIFICATION_LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+
+def _format_labels(label_names, label_values):
+    if not label_names:
+        return ''
+    pairs = []
+    for name, value in zip(label_names, label_values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    """単調増加するカウンター"""
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    """バケットごとの件数・合計・件数を持つヒストグラム"""
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for index, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        for label_values, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names + ('le',), label_values + (repr(float(upper)),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names + ('le',), label_values + ('+Inf',))
+            lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTPリクエストの処理時間',
+    ('blueprint', 'endpoint', 'method', 'status')
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request', '1リクエストあたりのSQL実行回数',
+    ('blueprint', 'endpoint'), QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    'db_time_per_request_seconds', '1リクエストあたりのSQL実行時間',
+    ('blueprint', 'endpoint')
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'SQL 1回ごとの実行時間', (), DB_QUERY_BUCKETS
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'db_connections_opened_total', 'DB接続を開いた回数', ('kind',)
+)
+SCHEDULER_TICK_DURATION = Histogram(
+    'scheduler_tick_duration_seconds', '通知チェック1回の所要時間', ('job',)
+)
+NOTIFICATION_LAG = Histogram(
+    'notification_lag_seconds', '通知の遅れ（実際の送信時刻 - 予定時刻）',
+    ('channel',), NOTIFICATION_LAG_BUCKETS
+)
+
+REGISTRY = (
+    HTTP_REQUEST_DURATION,
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    DB_QUERY_DURATION,
+    DB_CONNECTIONS_OPENED,
+    SCHEDULER_TICK_DURATION,
+    NOTIFICATION_LAG,
+)
+
+
+class MetricsCursor(psycopg.Cursor):
+    """execute の回数・時間を記録するカーソル（connection.cursor_factory に設定）"""
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            record_db_query(time.perf_counter() - started)
+
+
+def record_db_query(seconds):
+    """SQL 1回分の実行時間を記録"""
+    DB_QUERY_DURATION.observe(seconds)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += seconds
+
+
+def instrument_connection(conn, kind):
+    """DB接続を開いた回数を記録し、SQL実行を計測するカーソルを使うようにする"""
+    DB_CONNECTIONS_OPENED.inc(1, kind)
+    conn.cursor_factory = MetricsCursor
+    return conn
+
+
+def render_metrics():
+    """Prometheus テキスト形式"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_request_metrics(app):
+    """リクエストごとの処理時間・SQL実行回数/時間の記録と /metrics エンドポイントを設定"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_db_stats = [0, 0.0]
+        _request_db_stats.set(g.metrics_db_stats)
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.get('metrics_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+        blueprint = request.blueprint or ''
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            blueprint, endpoint, request.method, f'{response.status_code // 100}xx'
+        )
+        queries, seconds = g.metrics_db_stats
+        DB_QUERIES_PER_REQUEST.observe(queries, blueprint, endpoint)
+        DB_TIME_PER_REQUEST.observe(seconds, blueprint, endpoint)
+        return response
+
+    @app.teardown_request
+    def _clear_request_metrics(exception=None):
+        _request_db_stats.set(None)
+
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
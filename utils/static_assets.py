@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+静的ファイル（JS / CSS）の配信最適化と API レスポンスの圧縮
+
+build_static_assets.py で static/ 以下の JS / CSS を縮小し、内容のハッシュを付けた名前で
+static/dist/ に出力する（同時に .gz / .br も作成）。出力時の対応表 manifest.json を
+起動時に読み込み、テンプレートの url_for('static', filename='js/reservation.js') が
+ハッシュ付きの名前（dist/js/reservation.1a2b3c4d5e.js）を返すようにする。
+ハッシュ付きのファイルは内容が変われば名前も変わるため、1年の immutable キャッシュを付ける。
+
+manifest.json が無い場合（ビルド前・開発環境）は従来どおり元のファイルを配信する。
+
+/api を含むパスの JSON レスポンスは、一定サイズ以上であれば gzip で圧縮して返す。
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+from utils.image_pipeline import PRIVATE_UPLOAD_DIRS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+# ビルド済みファイルの出力先（static フォルダからの相対パス）
+DIST_DIR = 'dist'
+MANIFEST_FILENAME = 'manifest.json'
+
+# ビルド対象の拡張子
+ASSET_EXTENSIONS = ('.js', '.css')
+
+# ビルド対象外のディレクトリ（static フォルダからの相対パス）
+EXCLUDED_DIRS = {DIST_DIR, 'uploads', 'images'}
+
+# ハッシュ付きファイルのキャッシュ期間（1年）
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+# ハッシュの桁数
+HASH_LENGTH = 10
+
+# API の JSON レスポンスを圧縮する最小サイズ（バイト）
+JSON_COMPRESS_MIN_SIZE = 1024
+JSON_COMPRESS_LEVEL = 6
+
+# 元のパス → ハッシュ付きのパス
+_manifest = {}
+
+
+# ========================================
+# ビルド
+# ========================================
+
+def minify_css(source):
+    """CSS を縮小（rcssmin が無い場合はコメントと余分な空白だけ取り除く）"""
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    return source.strip()
+
+
+def minify_js(source):
+    """JS を縮小（rjsmin が無い場合は文字列やテンプレートリテラルを壊さないよう縮小しない）"""
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    return source
+
+
+def _iter_asset_files(static_folder):
+    """ビルド対象のファイル（static フォルダからの相対パス）を列挙"""
+    for root, dirs, files in os.walk(static_folder):
+        relative_root = os.path.relpath(root, static_folder)
+        if relative_root == '.':
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+            relative_root = ''
+        for filename in sorted(files):
+            if filename.endswith(ASSET_EXTENSIONS):
+                yield os.path.join(relative_root, filename).replace(os.sep, '/')
+
+
+def _write_file(path, data):
+    """一時ファイルに書いてから置き換える（配信中のファイルを中途半端な状態にしない）"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def build_static_assets(static_folder='static'):
+    """
+    JS / CSS を縮小・ハッシュ付きの名前で出力し、manifest.json を書き出す
+
+    Returns:
+        dict: 元のパス → ハッシュ付きのパス
+    """
+    manifest = {}
+    dist_root = os.path.join(static_folder, DIST_DIR)
+
+    for relative_path in _iter_asset_files(static_folder):
+        with open(os.path.join(static_folder, relative_path), encoding='utf-8') as f:
+            source = f.read()
+
+        if relative_path.endswith('.css'):
+            minified = minify_css(source)
+        else:
+            minified = minify_js(source)
+        data = minified.encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        name, ext = os.path.splitext(relative_path)
+        hashed_path = f'{DIST_DIR}/{name}.{digest}{ext}'
+        output_path = os.path.join(static_folder, hashed_path)
+
+        if not os.path.exists(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            _write_file(output_path, data)
+            _write_file(f'{output_path}.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_file(f'{output_path}.br', brotli.compress(data, quality=11))
+
+        manifest[relative_path] = hashed_path
+
+    os.makedirs(dist_root, exist_ok=True)
+    _write_file(
+        os.path.join(dist_root, MANIFEST_FILENAME),
+        json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    )
+    return manifest
+
+
+# ========================================
+# 配信
+# ========================================
+
+def load_manifest(static_folder):
+    """manifest.json を読み込む（無ければ空）"""
+    global _manifest
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_FILENAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            _manifest = json.load(f)
+    except FileNotFoundError:
+        _manifest = {}
+    except Exception as e:
+        print(f"静的ファイル manifest 読み込みエラー: {e}")
+        _manifest = {}
+    return _manifest
+
+
+def hashed_static_filename(endpoint, values):
+    """url_for('static', filename=...) をハッシュ付きの名前に置き換える（url_defaults）"""
+    if endpoint != 'static' or not _manifest:
+        return
+    filename = values.get('filename')
+    if filename and filename in _manifest:
+        values['filename'] = _manifest[filename]
+
+
+def _accepted_encodings():
+    accept = request.accept_encodings
+    encodings = []
+    if brotli is not None and accept['br']:
+        encodings.append(('br', '.br'))
+    if accept['gzip']:
+        encodings.append(('gzip', '.gz'))
+    return encodings
+
+
+def serve_static(filename):
+    """
+    static エンドポイント
+
+    ハッシュ付きのファイルは圧縮済みファイル（.br / .gz）があればそれを返し、
+    immutable キャッシュを付ける。それ以外は Flask 標準の配信。
+    """
+    # 身分証・契約書は移行前の static 下のファイルも公開しない（/media/private から配信）
+    if filename.replace('\\', '/').startswith(PRIVATE_UPLOAD_DIRS):
+        abort(404)
+    if not filename.startswith(f'{DIST_DIR}/'):
+        return current_app.send_static_file(filename)
+
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if mimetype.startswith('text/') or mimetype == 'application/javascript':
+        mimetype = f'{mimetype}; charset=utf-8'
+
+    content_encoding = None
+    for encoding, suffix in _accepted_encodings():
+        if os.path.isfile(path + suffix):
+            path = path + suffix
+            content_encoding = encoding
+            break
+
+    response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE, conditional=True)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def compress_json_response(response):
+    """/api の JSON レスポンスを gzip 圧縮（after_request）"""
+    if (
+        '/api' not in request.path
+        or response.status_code != 200
+        or response.mimetype != 'application/json'
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or not request.accept_encodings['gzip']
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < JSON_COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=JSON_COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_static_assets(app):
+    """静的ファイル配信とレスポンス圧縮をアプリに設定"""
+    load_manifest(app.static_folder)
+    app.url_defaults(hashed_static_filename)
+    app.view_functions['static'] = serve_static
+    app.after_request(compress_json_response)
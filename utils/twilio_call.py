@@ -3,14 +3,19 @@
 Twilioオートコール機能
 キャストに自動電話をかける
 """
+import logging
 import os
 import psycopg
 from psycopg.rows import dict_row
-from twilio.rest import Client
+from utils.metrics import instrument_connection
+from utils.http_clients import call_twilio, get_cached_credentials, get_twilio_client
+from utils.call_outcomes import build_status_callback_url
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def get_db_connection():
     """データベース接続を取得"""
     conn = psycopg.connect(
@@ -21,18 +26,29 @@ def get_db_connection():
         password=os.getenv('DB_PASSWORD', 'diary8475ftkb'),
         row_factory=dict_row
     )
-    return conn
+    return instrument_connection(conn, 'twilio_call')
 
 
-def get_twilio_settings():
+def get_twilio_settings(store_id=None):
     """
-    データベースからTwilio設定を取得
+    データベースからTwilio設定を取得（CREDENTIALS_CACHE_SECONDS 秒キャッシュ）
+    
+    Args:
+        store_id (int, optional): 店舗ID（省略時は店舗を限定しない）
     
     Returns:
         dict: Twilio設定
     """
     try:
-        conn = get_db_connection()
+        return get_cached_credentials('twilio', store_id, lambda: _load_twilio_settings(store_id))
+    except Exception as e:
+        logger.error("設定取得エラー: %s", e)
+        return {}
+
+
+def _load_twilio_settings(store_id):
+    conn = get_db_connection()
+    try:
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -45,26 +61,22 @@ def get_twilio_settings():
                 'call_timeout_seconds',
                 'auto_call_enabled'
             )
-        """)
+              AND (%(store_id)s::int IS NULL OR store_id = %(store_id)s)
+        """, {'store_id': store_id})
         
         rows = cursor.fetchall()
         cursor.close()
-        conn.close()
         
         settings = {}
         for row in rows:
             settings[row['setting_key']] = row['setting_value']
-        
-        # 🔍 デバッグ出力
-        print(f"🔍 DEBUG: Retrieved settings = {settings}")
-        print(f"🔍 DEBUG: auto_call_enabled = '{settings.get('auto_call_enabled')}'")
-        print(f"🔍 DEBUG: Comparison result = {settings.get('auto_call_enabled') == 'true'}")
+
+        # 認証情報は出力しない
+        logger.debug("Twilio設定取得: auto_call_enabled=%s", settings.get('auto_call_enabled'))
         
         return settings
-        
-    except Exception as e:
-        print(f"❌ 設定取得エラー: {e}")
-        return {}
+    finally:
+        conn.close()
 
 
 def format_phone_number(phone):
@@ -95,7 +107,7 @@ def format_phone_number(phone):
     return clean
 
 
-def make_auto_call(to_phone_number, cast_name, exit_time_str):
+def make_auto_call(to_phone_number, cast_name, exit_time_str, store_id=None, record_id=None, attempt_no=1):
     """
     キャストに自動電話をかける
     
@@ -103,6 +115,9 @@ def make_auto_call(to_phone_number, cast_name, exit_time_str):
         to_phone_number (str): 発信先電話番号（例: '08091729180' or '+819091729180'）
         cast_name (str): キャスト名
         exit_time_str (str): 退室時刻（例: '18:30'）
+        store_id (int, optional): 店舗ID（Twilio設定・クライアントの選択に使用）
+        record_id (int, optional): 送迎記録ID（通話結果のステータスコールバックに付ける）
+        attempt_no (int): 何回目の発信か（再発信は2以上）
     
     Returns:
         dict: {
@@ -113,7 +128,7 @@ def make_auto_call(to_phone_number, cast_name, exit_time_str):
     """
     try:
         # データベースから設定を取得
-        settings = get_twilio_settings()
+        settings = get_twilio_settings(store_id)
         
         # オートコールが無効なら終了
         if settings.get('auto_call_enabled') != 'true':
@@ -139,26 +154,37 @@ def make_auto_call(to_phone_number, cast_name, exit_time_str):
         # 🔧 電話番号を国際形式に変換
         formatted_phone = format_phone_number(to_phone_number)
         
-        # Twilioクライアント
-        client = Client(account_sid, auth_token)
+        # Twilioクライアント（店舗ごとに使い回す）
+        client = get_twilio_client(store_id, account_sid, auth_token)
         
         # TwiML URL（音声メッセージ）
         twiml_url = os.getenv('TWIML_URL', 'http://twimlets.com/holdmusic?Bucket=com.twilio.music.classical')
         
-        print(f"Making auto call to {cast_name} ({formatted_phone})...")
-        print(f"Exit time: {exit_time_str}, Timeout: {timeout_seconds}秒")
+        logger.info(
+            "オートコール発信: %s", cast_name,
+            extra={'exit_time': exit_time_str, 'timeout_seconds': timeout_seconds, 'attempt_no': attempt_no}
+        )
+        
+        # 通話終了時のステータスコールバック（/twilio/status で call_attempts に記録）
+        callback_args = {}
+        status_callback_url = build_status_callback_url(store_id, record_id, attempt_no)
+        if status_callback_url:
+            callback_args = {
+                'status_callback': status_callback_url,
+                'status_callback_event': ['completed'],
+                'status_callback_method': 'POST'
+            }
         
         # 電話をかける
-        call = client.calls.create(
+        call = call_twilio(lambda: client.calls.create(
             to=formatted_phone,  # 🔧 変換後の番号を使用
             from_=phone_number,
             url=twiml_url,
             timeout=timeout_seconds,
-            status_callback_event=['completed'],
-            status_callback_method='POST'
-        )
+            **callback_args
+        ))
         
-        print(f"Call SID: {call.sid}")
+        logger.info("オートコール発信完了", extra={'call_sid': call.sid})
         
         return {
             'success': True,
@@ -167,7 +193,7 @@ def make_auto_call(to_phone_number, cast_name, exit_time_str):
         }
         
     except Exception as e:
-        print(f"Error making call: {e}")
+        logger.error("オートコール発信エラー: %s", e)
         return {
             'success': False,
             'call_sid': None,
@@ -175,12 +201,13 @@ def make_auto_call(to_phone_number, cast_name, exit_time_str):
         }
 
 
-def get_call_status(call_sid):
+def get_call_status(call_sid, store_id=None):
     """
     通話ステータスを取得
     
     Args:
         call_sid (str): Twilio Call SID
+        store_id (int, optional): 店舗ID
     
     Returns:
         dict: {
@@ -190,7 +217,7 @@ def get_call_status(call_sid):
         }
     """
     try:
-        settings = get_twilio_settings()
+        settings = get_twilio_settings(store_id)
         account_sid = settings.get('twilio_account_sid')
         auth_token = settings.get('twilio_auth_token')
         
@@ -201,8 +228,8 @@ def get_call_status(call_sid):
                 'error': 'Twilio認証情報が設定されていません'
             }
         
-        client = Client(account_sid, auth_token)
-        call = client.calls(call_sid).fetch()
+        client = get_twilio_client(store_id, account_sid, auth_token)
+        call = call_twilio(lambda: client.calls(call_sid).fetch())
         
         return {
             'status': call.status,